@@ -26,12 +26,18 @@ class ActionProcessor:
         self,
         mongo_uri: str = "mongodb://localhost:27017/",
         db_name: str = "ai_agents_db",
-        poll_interval: int = 5
+        poll_interval: int = 5,
+        max_workers: int = 4,
+        max_per_agent: int = 2
     ):
         self.mongo = MongoClient(mongo_uri)
         self.db = self.mongo[db_name]
-        self.queue_manager = ActionsQueueManager(self.mongo)
+        self.queue_manager = ActionsQueueManager(self.mongo, max_per_agent=max_per_agent)
         self.poll_interval = poll_interval
+        self.max_workers = max_workers
+        self.max_per_agent = max_per_agent
+        # In-flight actions per agent in this process (exact cap locally)
+        self.in_flight: Dict[str, int] = {}
         self.running = False
         self.logger = logging.getLogger(f"{__name__}.ActionProcessor")
         
@@ -129,29 +135,61 @@ class ActionProcessor:
             
             return {"success": False, "error": error_msg}
     
-    async def process_queue(self):
-        """Procesează acțiunile din queue continuu"""
-        self.running = True
-        self.logger.info("🚀 Action Processor started")
+    async def _keep_lease(self, action_id: str, worker_id: str):
+        """Renew the lease while the action runs"""
+        interval = max(1, self.queue_manager.lease_seconds // 3)
+        while True:
+            await asyncio.sleep(interval)
+            if not self.queue_manager.renew_lease(action_id, worker_id):
+                self.logger.warning(f"⚠️ Lease lost for action {action_id}")
+                return
+    
+    async def _worker(self, worker_num: int):
+        """Claim and execute ready actions until stopped"""
+        worker_id = f"{self.queue_manager.worker_id}:{worker_num}"
         
         while self.running:
             try:
-                # Get next action
-                action = self.queue_manager.get_next_action()
+                saturated = [
+                    agent for agent, count in self.in_flight.items()
+                    if count >= self.max_per_agent
+                ]
+                action = self.queue_manager.claim_next_action(
+                    worker_id=worker_id,
+                    exclude_agents=saturated
+                )
                 
-                if action:
-                    self.logger.info(f"📋 Found action to process: {action['_id']} ({action['action_type']})")
-                    await self.process_action(action)
-                else:
-                    # No actions to process, wait
+                if not action:
+                    # No ready actions, wait
                     await asyncio.sleep(self.poll_interval)
+                    continue
+                
+                agent_id = action["agent_id"]
+                self.in_flight[agent_id] = self.in_flight.get(agent_id, 0) + 1
+                self.logger.info(f"📋 [{worker_id}] Found action to process: {action['_id']} ({action['action_type']})")
+                
+                lease_task = asyncio.create_task(self._keep_lease(action["_id"], worker_id))
+                try:
+                    await self.process_action(action)
+                finally:
+                    lease_task.cancel()
+                    self.in_flight[agent_id] -= 1
+                    if self.in_flight[agent_id] <= 0:
+                        del self.in_flight[agent_id]
                     
             except Exception as e:
-                self.logger.error(f"❌ Error in process_queue: {e}")
+                self.logger.error(f"❌ Error in worker {worker_id}: {e}")
                 import traceback
                 self.logger.error(traceback.format_exc())
                 await asyncio.sleep(self.poll_interval)
     
+    async def process_queue(self):
+        """Procesează acțiunile din queue continuu, cu `max_workers` workeri în paralel"""
+        self.running = True
+        self.logger.info(f"🚀 Action Processor started ({self.max_workers} workers, max {self.max_per_agent}/agent)")
+        
+        await asyncio.gather(*[self._worker(i) for i in range(self.max_workers)])
+    
     def stop(self):
         """Oprește procesorul"""
         self.running = False
@@ -3,12 +3,16 @@ Actions Queue Manager
 Manages action queue for SEO/PPC actions with priority, status, and execution tracking
 """
 import logging
-from datetime import datetime, timezone
+import os
+import socket
+from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Optional
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument
 from bson import ObjectId
 from enum import Enum
 
+from mongo_bulk_writer import get_bulk_writer
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,20 +36,58 @@ class ActionType(Enum):
     ROLLBACK = "rollback"
 
 
+TERMINAL_STATUSES = [
+    ActionStatus.COMPLETED.value,
+    ActionStatus.FAILED.value,
+    ActionStatus.CANCELLED.value,
+]
+
+
 class ActionsQueueManager:
-    """Manages action queue for automated SEO/PPC actions"""
+    """
+    Manages action queue for automated SEO/PPC actions
+    
+    Scheduling is dependency-aware:
+    - each action keeps `pending_deps` (unmet dependency IDs) and a `ready` flag
+    - completing an action pulls its ID from every dependent in one update_many
+    - workers claim ready actions atomically with a time-bound lease
+    - per-agent concurrency caps and ICE-score ordering apply at claim time
+    """
     
-    def __init__(self, mongo_client: MongoClient = None):
+    def __init__(
+        self,
+        mongo_client: MongoClient = None,
+        lease_seconds: int = 300,
+        max_per_agent: int = 2
+    ):
         if mongo_client is None:
             mongo_client = MongoClient("mongodb://localhost:27017/")
         self.mongo = mongo_client
         self.db = mongo_client["ai_agents_db"]
         self.queue_collection = self.db["actions_queue"]
         
+        # Status updates are written behind in bulk; reads flush first
+        self.writer = get_bulk_writer()
+        
+        self.lease_seconds = lease_seconds
+        self.max_per_agent = max_per_agent
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        
         # Create indexes
         self.queue_collection.create_index([("agent_id", 1), ("status", 1)])
         self.queue_collection.create_index([("priority", -1), ("created_at", 1)])
         self.queue_collection.create_index([("status", 1), ("scheduled_at", 1)])
+        # Ready-set index: claim scans only ready actions in dispatch order
+        self.queue_collection.create_index([
+            ("ready", 1), ("status", 1),
+            ("priority", -1), ("ice_score", -1), ("created_at", 1)
+        ])
+        # Reverse dependency lookup on completion
+        self.queue_collection.create_index([("depends_on", 1)])
+        # In-flight actions per agent (concurrency caps, expired leases)
+        self.queue_collection.create_index([("status", 1), ("lease_until", 1)])
+        
+        self._backfill_ready_index()
     
     def add_action(
         self,
@@ -83,6 +125,11 @@ class ActionsQueueManager:
             "started_at": None,
             "completed_at": None,
             "depends_on": depends_on or [],
+            "pending_deps": list(depends_on or []),
+            "ready": not depends_on,
+            "ice_score": self.calculate_ice_score({"action_data": action_data}),
+            "lease_owner": None,
+            "lease_until": None,
             "guardrails": guardrails or {},
             "result": None,
             "error": None,
@@ -93,6 +140,10 @@ class ActionsQueueManager:
         result = self.queue_collection.insert_one(action)
         action_id = str(result.inserted_id)
         
+        if depends_on:
+            # Dependencies completed before the insert never saw this action
+            self._refresh_pending_deps(result.inserted_id, depends_on)
+        
         logger.info(f"✅ Action added to queue: {action_id} ({action_type}) for agent {agent_id}")
         return action_id
     
@@ -104,46 +155,167 @@ class ActionsQueueManager:
             agent_id: Optional filter by agent
         
         Returns:
-            Action document or None
+            Action document (claimed with a lease) or None
+        """
+        return self.claim_next_action(agent_id=agent_id)
+    
+    # ------------------------------------------------------------------
+    # DAG scheduling
+    # ------------------------------------------------------------------
+    
+    def _refresh_pending_deps(self, action_oid: ObjectId, depends_on: List[str]):
+        """Drop already-completed dependencies (idempotent with concurrent completion)"""
+        dep_oids = [ObjectId(dep) for dep in depends_on]
+        completed = [
+            str(doc["_id"]) for doc in self.queue_collection.find(
+                {"_id": {"$in": dep_oids}, "status": ActionStatus.COMPLETED.value},
+                {"_id": 1}
+            )
+        ]
+        if completed:
+            self.queue_collection.update_one(
+                {"_id": action_oid},
+                {"$pull": {"pending_deps": {"$in": completed}}}
+            )
+        self.queue_collection.update_one(
+            {"_id": action_oid, "pending_deps": {"$size": 0}, "ready": False},
+            {"$set": {"ready": True}}
+        )
+    
+    def _backfill_ready_index(self):
+        """Give actions created before DAG scheduling their pending_deps/ready fields"""
+        legacy = self.queue_collection.find(
+            {
+                "status": {"$in": [ActionStatus.PENDING.value, ActionStatus.QUEUED.value]},
+                "ready": {"$exists": False}
+            },
+            {"depends_on": 1, "action_data": 1}
+        )
+        count = 0
+        for action in legacy:
+            depends_on = action.get("depends_on") or []
+            self.queue_collection.update_one(
+                {"_id": action["_id"]},
+                {"$set": {
+                    "pending_deps": list(depends_on),
+                    "ready": not depends_on,
+                    "ice_score": self.calculate_ice_score(action)
+                }}
+            )
+            if depends_on:
+                self._refresh_pending_deps(action["_id"], depends_on)
+            count += 1
+        if count:
+            logger.info(f"✅ Backfilled scheduling fields for {count} queued actions")
+    
+    def _release_dependents(self, action_id: str):
+        """Mark dependency met for every action waiting on action_id"""
+        result = self.queue_collection.update_many(
+            {"depends_on": action_id, "pending_deps": action_id},
+            {"$pull": {"pending_deps": action_id}}
+        )
+        if result.modified_count:
+            self.queue_collection.update_many(
+                {"depends_on": action_id, "pending_deps": {"$size": 0}, "ready": False},
+                {"$set": {"ready": True}}
+            )
+    
+    def _saturated_agents(self, now: datetime, max_per_agent: int) -> List[str]:
+        """Agents at their concurrency cap (live leases only)"""
+        pipeline = [
+            {"$match": {
+                "status": {"$in": [ActionStatus.QUEUED.value, ActionStatus.RUNNING.value]},
+                "lease_until": {"$gt": now}
+            }},
+            {"$group": {"_id": "$agent_id", "in_flight": {"$sum": 1}}},
+            {"$match": {"in_flight": {"$gte": max_per_agent}}}
+        ]
+        return [doc["_id"] for doc in self.queue_collection.aggregate(pipeline)]
+    
+    def claim_next_action(
+        self,
+        agent_id: Optional[str] = None,
+        worker_id: Optional[str] = None,
+        lease_seconds: Optional[int] = None,
+        max_per_agent: Optional[int] = None,
+        exclude_agents: Optional[List[str]] = None
+    ) -> Optional[Dict]:
+        """
+        Atomically claim the best ready action and lease it to a worker
+        
+        Order: priority, then ICE score, then age. Actions whose lease expired
+        (crashed worker) are claimable again. The per-agent cap is exact for
+        workers sharing `exclude_agents`, and best-effort across processes.
+        
+        Args:
+            agent_id: Optional filter by agent
+            worker_id: Lease owner (defaults to host:pid)
+            lease_seconds: Lease duration
+            max_per_agent: Max in-flight actions per agent (0 = unlimited)
+            exclude_agents: Agents the caller already knows are saturated
+        
+        Returns:
+            Claimed action document or None
         """
+        self.flush()
+        
+        now = datetime.now(timezone.utc)
+        lease_seconds = lease_seconds or self.lease_seconds
+        max_per_agent = self.max_per_agent if max_per_agent is None else max_per_agent
+        
         query = {
-            "status": {"$in": [ActionStatus.PENDING.value, ActionStatus.QUEUED.value]},
-            "scheduled_at": {"$lte": datetime.now(timezone.utc)}
+            "ready": True,
+            "scheduled_at": {"$lte": now},
+            "$or": [
+                {"status": ActionStatus.PENDING.value},
+                {"status": ActionStatus.QUEUED.value, "lease_until": None},
+                # Expired lease: the previous worker died mid-action
+                {
+                    "status": {"$in": [ActionStatus.QUEUED.value, ActionStatus.RUNNING.value]},
+                    "lease_until": {"$lt": now}
+                }
+            ]
         }
         
+        excluded = set(exclude_agents or [])
+        if max_per_agent:
+            excluded.update(self._saturated_agents(now, max_per_agent))
         if agent_id:
+            if agent_id in excluded:
+                return None
             query["agent_id"] = agent_id
+        elif excluded:
+            query["agent_id"] = {"$nin": list(excluded)}
         
-        # Get actions with all dependencies completed
-        actions = list(self.queue_collection.find(query).sort([
-            ("priority", -1),
-            ("created_at", 1)
-        ]).limit(100))
-        
-        for action in actions:
-            # Check if dependencies are completed
-            if action.get("depends_on"):
-                deps = action["depends_on"]
-                completed = self.queue_collection.count_documents({
-                    "_id": {"$in": [ObjectId(dep) for dep in deps]},
-                    "status": ActionStatus.COMPLETED.value
-                })
-                if completed < len(deps):
-                    continue  # Dependencies not met
-            
-            # Mark as queued and return
-            self.queue_collection.update_one(
-                {"_id": action["_id"]},
-                {"$set": {
+        action = self.queue_collection.find_one_and_update(
+            query,
+            {
+                "$set": {
                     "status": ActionStatus.QUEUED.value,
-                    "started_at": datetime.now(timezone.utc)
-                }}
-            )
-            
-            action["_id"] = str(action["_id"])
-            return action
+                    "started_at": now,
+                    "lease_owner": worker_id or self.worker_id,
+                    "lease_until": now + timedelta(seconds=lease_seconds)
+                }
+            },
+            sort=[("priority", -1), ("ice_score", -1), ("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        
+        if not action:
+            return None
         
-        return None
+        action["_id"] = str(action["_id"])
+        return action
+    
+    def renew_lease(self, action_id: str, worker_id: Optional[str] = None, lease_seconds: Optional[int] = None) -> bool:
+        """Extend the lease of a long-running action; False if the lease was lost"""
+        result = self.queue_collection.update_one(
+            {"_id": ObjectId(action_id), "lease_owner": worker_id or self.worker_id},
+            {"$set": {
+                "lease_until": datetime.now(timezone.utc) + timedelta(seconds=lease_seconds or self.lease_seconds)
+            }}
+        )
+        return result.modified_count > 0
     
     def update_action_status(
         self,
@@ -167,13 +339,29 @@ class ActionsQueueManager:
             if error:
                 update_data["error"] = error
         
-        self.queue_collection.update_one(
-            {"_id": ObjectId(action_id)},
-            {"$set": update_data}
-        )
+        if status in TERMINAL_STATUSES:
+            # Terminal transitions drive the DAG: write through, then unblock dependents
+            self.writer.flush(self.queue_collection)
+            update_data["lease_until"] = None
+            self.queue_collection.update_one(
+                {"_id": ObjectId(action_id)},
+                {"$set": update_data}
+            )
+            if status == ActionStatus.COMPLETED.value:
+                self._release_dependents(action_id)
+        else:
+            self.writer.update_one(
+                self.queue_collection,
+                {"_id": ObjectId(action_id)},
+                {"$set": update_data}
+            )
         
         logger.info(f"✅ Action {action_id} status updated to {status}")
     
+    def flush(self):
+        """Write pending status updates to MongoDB"""
+        self.writer.flush(self.queue_collection)
+    
     def get_actions_for_agent(
         self,
         agent_id: str,
@@ -185,6 +373,7 @@ class ActionsQueueManager:
         if status:
             query["status"] = status
         
+        self.flush()
         actions = list(self.queue_collection.find(query).sort("created_at", -1).limit(limit))
         for action in actions:
             action["_id"] = str(action["_id"])
@@ -212,24 +401,29 @@ class ActionsQueueManager:
             # Combine ICE with manual priority
             final_priority = int((ice_score + action.get("priority", 50)) / 2)
             
-            self.queue_collection.update_one(
+            self.writer.update_one(
+                self.queue_collection,
                 {"_id": ObjectId(action["_id"])},
                 {"$set": {
                     "priority": final_priority,
                     "ice_score": ice_score
                 }}
             )
+        self.flush()
         
         logger.info(f"✅ Prioritized {len(actions)} actions for agent {agent_id}")
     
     def cancel_action(self, action_id: str, reason: str = "Manual cancellation"):
         """Cancel an action"""
+        # A buffered status update must not land after (and overwrite) the cancellation
+        self.flush()
         self.queue_collection.update_one(
             {"_id": ObjectId(action_id)},
             {"$set": {
                 "status": ActionStatus.CANCELLED.value,
                 "error": reason,
-                "completed_at": datetime.now(timezone.utc)
+                "completed_at": datetime.now(timezone.utc),
+                "lease_until": None
             }}
         )
         logger.info(f"✅ Action {action_id} cancelled: {reason}")
@@ -240,6 +434,7 @@ class ActionsQueueManager:
         if agent_id:
             query["agent_id"] = agent_id
         
+        self.flush()
         stats = {
             "total": self.queue_collection.count_documents(query),
             "pending": self.queue_collection.count_documents({**query, "status": ActionStatus.PENDING.value}),
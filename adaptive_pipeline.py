@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+⚙️ Adaptive Pipeline - Pipeline asyncio pe etape, cu paralelism adaptiv
+
+Fiecare etapă are propria coadă limitată și propriul pool de workeri.
+Pool-urile adaptive sunt dimensionate AIMD din resursele măsurate:
+- creștere aditivă (+1) cât timp CPU/RAM/latența sunt sănătoase
+- scădere multiplicativă (×0.5) la presiune de memorie/CPU sau latență în creștere
+
+Usage:
+    pipeline = AdaptivePipeline([
+        Stage("check", check_fn, workers=8),
+        Stage("create", create_fn, controller=AIMDController(min_limit=2, max_limit=33)),
+        Stage("persist", persist_fn, workers=2),
+    ])
+    await pipeline.run(items)
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+logger = logging.getLogger(__name__)
+
+# Marcaj intern: itemul nu trece mai departe (ex: deja procesat)
+SKIP = object()
+
+
+class AIMDController:
+    """
+    Limită de concurență ajustată AIMD din CPU, RAM și latență
+    """
+
+    def __init__(
+        self,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        initial: Optional[int] = None,
+        max_memory_percent: float = 85.0,
+        max_cpu_percent: float = 95.0,
+        latency_factor: float = 2.0,
+        adjust_interval: float = 5.0
+    ):
+        """
+        Args:
+            min_limit: Limita minimă de workeri activi
+            max_limit: Limita maximă (plafonul hardware)
+            initial: Limita de pornire (default: min_limit)
+            max_memory_percent: Peste acest % RAM → scădere multiplicativă
+            max_cpu_percent: Peste acest % CPU → scădere multiplicativă
+            latency_factor: Latență medie > factor × latența de bază → scădere
+            adjust_interval: Secunde minime între ajustări
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(self.max_limit, max(self.min_limit, initial or self.min_limit))
+        self.max_memory_percent = max_memory_percent
+        self.max_cpu_percent = max_cpu_percent
+        self.latency_factor = latency_factor
+        self.adjust_interval = adjust_interval
+
+        self._latencies: deque = deque(maxlen=20)
+        self._baseline_latency: Optional[float] = None
+        self._last_adjust = 0.0
+        self.history: List[Dict] = []
+
+    def record(self, latency: float):
+        """Înregistrează durata unui item procesat"""
+        self._latencies.append(latency)
+        if self._baseline_latency is None and len(self._latencies) >= 3:
+            self._baseline_latency = sorted(self._latencies)[len(self._latencies) // 2]
+
+    def _pressure(self) -> Optional[str]:
+        if HAS_PSUTIL:
+            if psutil.virtual_memory().percent >= self.max_memory_percent:
+                return "memory"
+            if psutil.cpu_percent(interval=None) >= self.max_cpu_percent:
+                return "cpu"
+        if self._baseline_latency and len(self._latencies) >= 3:
+            recent = sum(self._latencies) / len(self._latencies)
+            if recent > self._baseline_latency * self.latency_factor:
+                return "latency"
+        return None
+
+    def adjust(self) -> int:
+        """Aplică un pas AIMD (cel mult o dată la adjust_interval)"""
+        now = time.monotonic()
+        if now - self._last_adjust < self.adjust_interval:
+            return self.limit
+        self._last_adjust = now
+
+        previous = self.limit
+        reason = self._pressure()
+        if reason:
+            self.limit = max(self.min_limit, self.limit // 2)
+            if reason == "latency":
+                # Noua bază după scădere, altfel scădem la nesfârșit
+                self._latencies.clear()
+                self._baseline_latency = None
+        else:
+            self.limit = min(self.max_limit, self.limit + 1)
+
+        if self.limit != previous:
+            self.history.append({"at": time.time(), "from": previous, "to": self.limit, "reason": reason or "healthy"})
+            logger.info(f"⚙️ AIMD limit {previous} → {self.limit} ({reason or 'healthy'})")
+        return self.limit
+
+
+class Stage:
+    """O etapă a pipeline-ului: funcție async + pool fix sau adaptiv"""
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[Any]],
+        workers: int = 1,
+        controller: Optional[AIMDController] = None,
+        queue_size: Optional[int] = None
+    ):
+        """
+        Args:
+            name: Numele etapei
+            handler: async fn(item) → item pentru etapa următoare (sau SKIP)
+            workers: Workeri pentru pool fix
+            controller: AIMDController pentru pool adaptiv (înlocuiește `workers`)
+            queue_size: Capacitatea cozii de intrare (default: 2 × workeri max)
+        """
+        self.name = name
+        self.handler = handler
+        self.controller = controller
+        self.max_workers = controller.max_limit if controller else max(1, workers)
+        self.queue_size = queue_size or self.max_workers * 2
+
+        self.active = 0
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+
+    @property
+    def limit(self) -> int:
+        return self.controller.limit if self.controller else self.max_workers
+
+    def stats(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "processed": self.processed,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 2)
+        }
+
+
+class AdaptivePipeline:
+    """Rulează itemi prin etape conectate de cozi limitate (backpressure)"""
+
+    def __init__(self, stages: List[Stage], on_error: Optional[Callable[[str, Any, Exception], None]] = None):
+        """
+        Args:
+            stages: Etapele, în ordine
+            on_error: Callback (stage_name, item, exception) pentru erori neprinse de handler
+        """
+        self.stages = stages
+        self.on_error = on_error
+        self.started_at: Optional[float] = None
+        self._closing: List[bool] = [False] * len(stages)
+
+    async def _worker(self, index: int, slot: int, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue]):
+        stage = self.stages[index]
+        while True:
+            # Workerii peste limita curentă stau parcați (pool adaptiv)
+            while slot >= stage.limit:
+                if self._closing[index]:
+                    return
+                await asyncio.sleep(0.5)
+
+            item = await inbox.get()
+            try:
+                if item is None:
+                    return
+
+                stage.active += 1
+                started = time.monotonic()
+                try:
+                    result = await stage.handler(item)
+                except Exception as e:
+                    stage.failed += 1
+                    logger.error(f"❌ Stage {stage.name} failed: {e}")
+                    if self.on_error:
+                        self.on_error(stage.name, item, e)
+                    result = SKIP
+                finally:
+                    elapsed = time.monotonic() - started
+                    stage.active -= 1
+                    stage.busy_seconds += elapsed
+                    stage.processed += 1
+                    if stage.controller:
+                        stage.controller.record(elapsed)
+
+                if outbox is not None and result is not SKIP:
+                    await outbox.put(result)
+            finally:
+                inbox.task_done()
+
+    async def run(self, items: Iterable[Any]) -> Dict:
+        """
+        Trece toți itemii prin pipeline și așteaptă terminarea
+
+        Returns:
+            Statistici per etapă + durata totală
+        """
+        self.started_at = time.monotonic()
+        self._closing = [False] * len(self.stages)
+        queues = [asyncio.Queue(maxsize=stage.queue_size) for stage in self.stages]
+
+        workers_per_stage: List[List[asyncio.Task]] = []
+        for index, stage in enumerate(self.stages):
+            outbox = queues[index + 1] if index + 1 < len(self.stages) else None
+            workers_per_stage.append([
+                asyncio.create_task(self._worker(index, slot, queues[index], outbox))
+                for slot in range(stage.max_workers)
+            ])
+
+        # Ajustările AIMD rulează periodic, nu doar la terminarea unui item
+        monitor = asyncio.create_task(self._monitor())
+
+        # Producătorul se blochează când prima coadă e plină (nu încărcăm tot în memorie)
+        for item in items:
+            await queues[0].put(item)
+
+        # Închide etapele în ordine: o etapă se termină → semnal pentru următoarea
+        for index, stage in enumerate(self.stages):
+            self._closing[index] = True
+            for _ in range(stage.max_workers):
+                await queues[index].put(None)
+            await asyncio.gather(*workers_per_stage[index])
+
+        monitor.cancel()
+        return self.get_stats()
+
+    async def _monitor(self):
+        controllers = [stage.controller for stage in self.stages if stage.controller]
+        if not controllers:
+            return
+        interval = min(controller.adjust_interval for controller in controllers)
+        while True:
+            await asyncio.sleep(interval)
+            for controller in controllers:
+                controller.adjust()
+
+    def get_stats(self) -> Dict:
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        return {
+            "elapsed_seconds": round(elapsed, 2),
+            "stages": {stage.name: stage.stats() for stage in self.stages}
+        }
@@ -61,6 +61,12 @@ from config.database_config import (
 
 app = FastAPI()
 
+# Clienți Mongo/Qdrant partajați (creați la startup, închiși la shutdown)
+from resource_registry import get_registry, install_lifecycle
+QDRANT_LOCAL_URL = "http://localhost:9306"
+QDRANT_HEALTH_TIMEOUT = 2  # secunde; clientul partajat păstrează timeout-ul lui pentru restul operațiilor
+install_lifecycle(app, warmup=[lambda r: r.mongo(MONGODB_URI), lambda r: r.qdrant(QDRANT_LOCAL_URL)])
+
 # --- CHAT & UI INTEGRATION ---
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
@@ -202,9 +208,13 @@ async def health():
         qdrant_status = "healthy"
         qdrant_error = None
         try:
-            from qdrant_client import QdrantClient
-            qdrant = QdrantClient(host="localhost", port=9306, timeout=2)
-            qdrant.get_collections()
+            await asyncio.wait_for(
+                asyncio.to_thread(lambda: get_registry().qdrant(QDRANT_LOCAL_URL).get_collections()),
+                timeout=QDRANT_HEALTH_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            qdrant_status = "unhealthy"
+            qdrant_error = f"timeout after {QDRANT_HEALTH_TIMEOUT}s"
         except Exception as e:
             qdrant_status = "unhealthy"
             qdrant_error = str(e)[:100]
@@ -341,7 +351,7 @@ async def debug_search(q: str, domain: Optional[str] = None):
         return {"ok": False, "error": str(e)}
 
 # <<< CHANGED: unificare Mongo și colecții >>>
-mongo_client = MongoClient(MONGODB_URI)
+mongo_client = get_registry().mongo(MONGODB_URI)
 db = mongo_client[MONGODB_DATABASE]
 # Folosește colecția actuală `site_agents` (agents vechi rămân ca backup)
 agents_collection = db.site_agents
@@ -1805,8 +1815,7 @@ async def get_agent_complete_status(agent_id: str):
         qdrant_status = False
         qdrant_collections = []
         try:
-            from qdrant_client import QdrantClient
-            qdrant = QdrantClient(url="http://localhost:9306")
+            qdrant = get_registry().qdrant(QDRANT_LOCAL_URL)
             collections = qdrant.get_collections()
             
             # Caută colecții pentru acest agent
@@ -1879,8 +1888,7 @@ async def get_agent(agent_id: str):
         qdrant_status = False
         qdrant_vectors = 0
         try:
-            from qdrant_client import QdrantClient
-            qdrant = QdrantClient(url="http://localhost:9306")
+            qdrant = get_registry().qdrant(QDRANT_LOCAL_URL)
             collections = qdrant.get_collections()
             
             domain_clean = domain.replace(".", "_").replace("-", "_")
@@ -2026,8 +2034,7 @@ async def get_complete_agents():
         # Verifică Qdrant pentru fiecare
         complete_agents = []
         try:
-            from qdrant_client import QdrantClient
-            qdrant = QdrantClient(url="http://localhost:9306")
+            qdrant = get_registry().qdrant(QDRANT_LOCAL_URL)
             collections = qdrant.get_collections()
             collection_names = [c.name for c in collections.collections]
         except:
@@ -6819,13 +6826,34 @@ async def save_agent_state(agent_id: str, state_data: dict = Body(...)):
         logger.error(f"Error saving agent state: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/conscience/health/fleet")
+async def get_fleet_health(refresh: bool = False, force: bool = False, limit: int = 1000):
+    """
+    Scorurile de sănătate pentru toți agenții.
+    refresh=true → pornește în fundal recalcularea agenților cu SERP nou; răspunsul conține scorurile salvate
+    """
+    try:
+        from agent_health_score import get_health_score
+        
+        health_score = get_health_score()
+        refreshed = None
+        if refresh or force:
+            refreshed = health_score.refresh_in_background(force)
+        scores = await asyncio.to_thread(health_score.get_fleet_health, limit)
+        
+        return {"ok": True, "refresh": refreshed, "count": len(scores), "scores": scores}
+    except Exception as e:
+        logger.error(f"Error getting fleet health: {e}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/agents/{agent_id}/conscience/health")
 async def get_agent_health(agent_id: str):
     """Obține scorurile de sănătate ale agentului"""
     try:
-        from agent_health_score import AgentHealthScore
+        from agent_health_score import get_health_score
         
-        health_score = AgentHealthScore()
+        health_score = get_health_score()
         scores = health_score.calculate_all_scores(agent_id)
         health_score.save_health_scores(agent_id, scores)
         
@@ -6966,13 +6994,13 @@ async def get_conscience_summary(agent_id: str):
     """Obține un rezumat complet al conștiinței agentului"""
     try:
         from agent_state_memory import AgentStateMemory
-        from agent_health_score import AgentHealthScore
+        from agent_health_score import get_health_score
         from agent_self_reflection import AgentSelfReflection
         from agent_awareness_feed import AgentAwarenessFeed
         from agent_journal import AgentJournal
         
         state_memory = AgentStateMemory()
-        health_score = AgentHealthScore()
+        health_score = get_health_score()
         reflection = AgentSelfReflection()
         awareness = AgentAwarenessFeed()
         journal = AgentJournal()
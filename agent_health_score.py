@@ -4,10 +4,16 @@ Oferă conștiință de OBIECTIV și de STARE
 """
 
 import os
+import time
 import logging
+import argparse
+import threading
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Any
-from pymongo import MongoClient
+from typing import Dict, Iterable, List, Optional, Any
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from resource_registry import get_registry
 
 logger = logging.getLogger(__name__)
 
@@ -15,13 +21,22 @@ logger = logging.getLogger(__name__)
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27018/")
 MONGODB_DATABASE = os.getenv("MONGODB_DATABASE", "ai_agents_db")
 
+# Refresh în lot: agenții fără SERP nou sunt recalculați totuși după acest interval
+# (ferestrele de 7/30 zile alunecă și fără date noi)
+HEALTH_MAX_AGE_HOURS = float(os.getenv("HEALTH_MAX_AGE_HOURS", "24"))
+HEALTH_BULK_SIZE = int(os.getenv("HEALTH_BULK_SIZE", "1000"))
+
 
 class AgentHealthScore:
     """Calculează și gestionează scorurile de sănătate pentru agenți"""
     
     def __init__(self):
-        self.mongo = MongoClient(MONGODB_URI)
+        # client partajat din registry: un pool per proces, nu un MongoClient per request
+        self.mongo = get_registry().mongo(MONGODB_URI)
         self.db = self.mongo[MONGODB_DATABASE]
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self.last_refresh: Optional[Dict[str, Any]] = None
         self.health_collection = self.db.agent_health_scores
         self.site_agents_collection = self.db.site_agents
         self.serp_results_collection = self.db.serp_results
@@ -43,45 +58,50 @@ class AgentHealthScore:
                 "check_date": {"$gte": datetime.now(timezone.utc) - timedelta(days=7)}
             }).sort("check_date", -1).limit(100))
             
-            if not recent_serp:
-                return 50.0  # Scor neutru dacă nu există date
-            
-            # Calculează poziția medie
-            positions = []
-            for result in recent_serp:
-                if "position" in result and result["position"]:
-                    positions.append(result["position"])
-            
-            if not positions:
-                return 50.0
-            
-            avg_position = sum(positions) / len(positions)
-            
-            # Convertim poziția în scor (poziția 1 = 100, poziția 10 = 50, poziția 50+ = 0)
-            if avg_position <= 1:
-                seo_score = 100.0
-            elif avg_position <= 3:
-                seo_score = 90.0 - (avg_position - 1) * 10
-            elif avg_position <= 10:
-                seo_score = 80.0 - (avg_position - 3) * 5
-            elif avg_position <= 20:
-                seo_score = 50.0 - (avg_position - 10) * 2
-            else:
-                seo_score = max(0.0, 30.0 - (avg_position - 20) * 1)
-            
-            # Bonus pentru numărul de keywords monitorizate
-            keyword_count = len(set([r.get("keyword", "") for r in recent_serp if r.get("keyword")]))
-            if keyword_count > 20:
-                seo_score = min(100.0, seo_score + 10.0)
-            elif keyword_count > 10:
-                seo_score = min(100.0, seo_score + 5.0)
-            
-            return round(seo_score, 2)
+            return self._seo_score(recent_serp)
             
         except Exception as e:
             logger.error(f"Error calculating SEO health for agent {agent_id}: {e}")
             return 50.0
     
+    @staticmethod
+    def _seo_score(recent_serp: List[Dict]) -> float:
+        """Scor SEO din ultimele rezultate SERP (7 zile, cele mai noi primele, max 100)"""
+        if not recent_serp:
+            return 50.0  # Scor neutru dacă nu există date
+        
+        # Calculează poziția medie
+        positions = []
+        for result in recent_serp:
+            if "position" in result and result["position"]:
+                positions.append(result["position"])
+        
+        if not positions:
+            return 50.0
+        
+        avg_position = sum(positions) / len(positions)
+        
+        # Convertim poziția în scor (poziția 1 = 100, poziția 10 = 50, poziția 50+ = 0)
+        if avg_position <= 1:
+            seo_score = 100.0
+        elif avg_position <= 3:
+            seo_score = 90.0 - (avg_position - 1) * 10
+        elif avg_position <= 10:
+            seo_score = 80.0 - (avg_position - 3) * 5
+        elif avg_position <= 20:
+            seo_score = 50.0 - (avg_position - 10) * 2
+        else:
+            seo_score = max(0.0, 30.0 - (avg_position - 20) * 1)
+        
+        # Bonus pentru numărul de keywords monitorizate
+        keyword_count = len(set([r.get("keyword", "") for r in recent_serp if r.get("keyword")]))
+        if keyword_count > 20:
+            seo_score = min(100.0, seo_score + 10.0)
+        elif keyword_count > 10:
+            seo_score = min(100.0, seo_score + 5.0)
+        
+        return round(seo_score, 2)
+    
     def calculate_ads_health(self, agent_id: str) -> float:
         """
         Calculează scorul de sănătate Google Ads (0-100)
@@ -97,28 +117,32 @@ class AgentHealthScore:
             if not agent:
                 return 0.0
             
-            # TODO: Integrare cu Google Ads API pentru date reale
-            # Pentru moment, returnăm un scor bazat pe date disponibile
-            ads_data = agent.get("google_ads", {})
-            
-            if not ads_data:
-                return 0.0
-            
-            # Scor bazat pe prezența datelor
-            score = 50.0
-            
-            if ads_data.get("campaigns_active", 0) > 0:
-                score += 30.0
-            
-            if ads_data.get("budget", 0) > 0:
-                score += 20.0
-            
-            return min(100.0, round(score, 2))
+            return self._ads_score(agent)
             
         except Exception as e:
             logger.error(f"Error calculating Ads health for agent {agent_id}: {e}")
             return 0.0
     
+    @staticmethod
+    def _ads_score(agent: Dict) -> float:
+        # TODO: Integrare cu Google Ads API pentru date reale
+        # Pentru moment, returnăm un scor bazat pe date disponibile
+        ads_data = agent.get("google_ads", {})
+        
+        if not ads_data:
+            return 0.0
+        
+        # Scor bazat pe prezența datelor
+        score = 50.0
+        
+        if ads_data.get("campaigns_active", 0) > 0:
+            score += 30.0
+        
+        if ads_data.get("budget", 0) > 0:
+            score += 20.0
+        
+        return min(100.0, round(score, 2))
+    
     def calculate_opportunity_level(self, agent_id: str) -> float:
         """
         Calculează nivelul de oportunitate (0-100)
@@ -135,41 +159,46 @@ class AgentHealthScore:
                 "check_date": {"$gte": datetime.now(timezone.utc) - timedelta(days=30)}
             }).sort("check_date", -1).limit(200))
             
-            if not recent_serp:
-                return 50.0
-            
-            opportunity_score = 50.0
-            
-            # Analizează keywords cu poziții 11-20 (potențial de creștere)
-            keywords_potential = []
-            for result in recent_serp:
-                position = result.get("position", 0)
-                if 11 <= position <= 20:
-                    keywords_potential.append(result)
-            
-            if len(keywords_potential) > 10:
-                opportunity_score += 20.0
-            elif len(keywords_potential) > 5:
-                opportunity_score += 10.0
-            
-            # Analizează tendințe pozitive
-            recent_positions = [r.get("position", 0) for r in recent_serp[:50] if r.get("position")]
-            older_positions = [r.get("position", 0) for r in recent_serp[50:100] if r.get("position")]
-            
-            if recent_positions and older_positions:
-                recent_avg = sum(recent_positions) / len(recent_positions)
-                older_avg = sum(older_positions) / len(older_positions)
-                
-                if recent_avg < older_avg:  # Îmbunătățire
-                    improvement = (older_avg - recent_avg) / older_avg * 100
-                    opportunity_score += min(30.0, improvement)
-            
-            return min(100.0, round(opportunity_score, 2))
+            return self._opportunity_score(recent_serp)
             
         except Exception as e:
             logger.error(f"Error calculating opportunity level for agent {agent_id}: {e}")
             return 50.0
     
+    @staticmethod
+    def _opportunity_score(recent_serp: List[Dict]) -> float:
+        """Nivel de oportunitate din SERP-ul pe 30 de zile (cele mai noi primele, max 200)"""
+        if not recent_serp:
+            return 50.0
+        
+        opportunity_score = 50.0
+        
+        # Analizează keywords cu poziții 11-20 (potențial de creștere)
+        keywords_potential = []
+        for result in recent_serp:
+            position = result.get("position", 0)
+            if 11 <= position <= 20:
+                keywords_potential.append(result)
+        
+        if len(keywords_potential) > 10:
+            opportunity_score += 20.0
+        elif len(keywords_potential) > 5:
+            opportunity_score += 10.0
+        
+        # Analizează tendințe pozitive
+        recent_positions = [r.get("position", 0) for r in recent_serp[:50] if r.get("position")]
+        older_positions = [r.get("position", 0) for r in recent_serp[50:100] if r.get("position")]
+        
+        if recent_positions and older_positions:
+            recent_avg = sum(recent_positions) / len(recent_positions)
+            older_avg = sum(older_positions) / len(older_positions)
+            
+            if recent_avg < older_avg:  # Îmbunătățire
+                improvement = (older_avg - recent_avg) / older_avg * 100
+                opportunity_score += min(30.0, improvement)
+        
+        return min(100.0, round(opportunity_score, 2))
+    
     def calculate_risk_level(self, agent_id: str) -> float:
         """
         Calculează nivelul de risc (0-100)
@@ -185,41 +214,46 @@ class AgentHealthScore:
                 "check_date": {"$gte": datetime.now(timezone.utc) - timedelta(days=30)}
             }).sort("check_date", -1).limit(200))
             
-            if not recent_serp:
-                return 0.0
-            
-            risk_score = 0.0
-            
-            # Analizează scăderi în ranking
-            recent_positions = [r.get("position", 0) for r in recent_serp[:50] if r.get("position")]
-            older_positions = [r.get("position", 0) for r in recent_serp[50:100] if r.get("position")]
-            
-            if recent_positions and older_positions:
-                recent_avg = sum(recent_positions) / len(recent_positions)
-                older_avg = sum(older_positions) / len(older_positions)
-                
-                if recent_avg > older_avg:  # Scădere
-                    decline = (recent_avg - older_avg) / older_avg * 100
-                    risk_score += min(50.0, decline)
-            
-            # Verifică keywords care au scăzut mult
-            significant_drops = 0
-            for result in recent_serp[:100]:
-                position = result.get("position", 0)
-                if position > 20:  # Scăzut peste poziția 20
-                    significant_drops += 1
-            
-            if significant_drops > 20:
-                risk_score += 30.0
-            elif significant_drops > 10:
-                risk_score += 15.0
-            
-            return min(100.0, round(risk_score, 2))
+            return self._risk_score(recent_serp)
             
         except Exception as e:
             logger.error(f"Error calculating risk level for agent {agent_id}: {e}")
             return 0.0
     
+    @staticmethod
+    def _risk_score(recent_serp: List[Dict]) -> float:
+        """Nivel de risc din SERP-ul pe 30 de zile (cele mai noi primele, max 200)"""
+        if not recent_serp:
+            return 0.0
+        
+        risk_score = 0.0
+        
+        # Analizează scăderi în ranking
+        recent_positions = [r.get("position", 0) for r in recent_serp[:50] if r.get("position")]
+        older_positions = [r.get("position", 0) for r in recent_serp[50:100] if r.get("position")]
+        
+        if recent_positions and older_positions:
+            recent_avg = sum(recent_positions) / len(recent_positions)
+            older_avg = sum(older_positions) / len(older_positions)
+            
+            if recent_avg > older_avg:  # Scădere
+                decline = (recent_avg - older_avg) / older_avg * 100
+                risk_score += min(50.0, decline)
+        
+        # Verifică keywords care au scăzut mult
+        significant_drops = 0
+        for result in recent_serp[:100]:
+            position = result.get("position", 0)
+            if position > 20:  # Scăzut peste poziția 20
+                significant_drops += 1
+        
+        if significant_drops > 20:
+            risk_score += 30.0
+        elif significant_drops > 10:
+            risk_score += 15.0
+        
+        return min(100.0, round(risk_score, 2))
+    
     def calculate_all_scores(self, agent_id: str) -> Dict[str, float]:
         """Calculează toate scorurile pentru un agent"""
         return {
@@ -260,3 +294,197 @@ class AgentHealthScore:
             logger.error(f"Error getting health scores for agent {agent_id}: {e}")
             return None
 
+    
+    # ------------------------------------------------------------------
+    # Refresh în lot pentru toată flota
+    # ------------------------------------------------------------------
+    
+    def _ensure_batch_indexes(self):
+        try:
+            self.serp_results_collection.create_index([("agent_id", 1), ("check_date", -1)])
+            self.serp_results_collection.create_index([("check_date", -1)])
+            self.health_collection.create_index("agent_id", unique=True)
+        except Exception as e:
+            logger.warning(f"Could not create health indexes: {e}")
+    
+    def _serp_by_agent(self, agent_ids: Optional[List[str]], now: datetime) -> Dict[str, List[Dict]]:
+        """
+        O singură agregare: ultimele 200 de rezultate SERP pe 30 de zile pentru fiecare agent,
+        cele mai noi primele, cu flag `recent` pentru fereastra de 7 zile a scorului SEO
+        """
+        match: Dict[str, Any] = {"check_date": {"$gte": now - timedelta(days=30)}}
+        if agent_ids is not None:
+            match["agent_id"] = {"$in": agent_ids}
+        # $topN ține doar 200 de documente per grup (nu acumulează toată fereastra ca $push + $slice)
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": "$agent_id",
+                "serp": {"$topN": {
+                    "n": 200,
+                    "sortBy": {"check_date": -1},
+                    "output": {
+                        "position": "$position",
+                        "keyword": "$keyword",
+                        "recent": {"$gte": ["$check_date", now - timedelta(days=7)]}
+                    }
+                }}
+            }}
+        ]
+        return {
+            doc["_id"]: doc["serp"]
+            for doc in self.serp_results_collection.aggregate(pipeline, allowDiskUse=True)
+        }
+    
+    def _ads_by_agent(self, agent_ids: Iterable[str]) -> Dict[str, Dict]:
+        object_ids = [ObjectId(a) for a in agent_ids if ObjectId.is_valid(a)]
+        agents = {}
+        for i in range(0, len(object_ids), HEALTH_BULK_SIZE):
+            for agent in self.site_agents_collection.find(
+                {"_id": {"$in": object_ids[i:i + HEALTH_BULK_SIZE]}}, {"google_ads": 1}
+            ):
+                agents[str(agent["_id"])] = agent
+        return agents
+    
+    def _dirty_agents(self, since: datetime, now: datetime) -> List[str]:
+        """Agenți cu SERP nou de la ultimul refresh + agenți niciodată calculați / cu scoruri vechi"""
+        dirty = set(self.serp_results_collection.distinct("agent_id", {"check_date": {"$gt": since}}))
+        
+        computed = set()
+        stale_before = now - timedelta(hours=HEALTH_MAX_AGE_HOURS)
+        for doc in self.health_collection.find({}, {"agent_id": 1, "calculated_at": 1}):
+            computed.add(doc["agent_id"])
+            calculated_at = doc.get("calculated_at")
+            if calculated_at is not None and calculated_at.tzinfo is None:
+                calculated_at = calculated_at.replace(tzinfo=timezone.utc)
+            if calculated_at is None or calculated_at < stale_before:
+                dirty.add(doc["agent_id"])
+        
+        dirty.update(
+            str(agent["_id"]) for agent in self.site_agents_collection.find({}, {"_id": 1})
+            if str(agent["_id"]) not in computed
+        )
+        dirty.discard(None)
+        return sorted(dirty)
+    
+    def compute_scores_batch(self, agent_ids: Optional[List[str]] = None,
+                             now: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Toate cele 4 scoruri pentru mai mulți agenți (None = toți agenții cu SERP sau din site_agents)
+        cu o agregare SERP + o citire site_agents, în loc de 3 interogări per agent
+        """
+        now = now or datetime.now(timezone.utc)
+        serp = self._serp_by_agent(agent_ids, now)
+        targets = set(agent_ids) if agent_ids is not None else (
+            set(serp) | {str(a["_id"]) for a in self.site_agents_collection.find({}, {"_id": 1})}
+        )
+        ads = self._ads_by_agent(targets)
+        
+        scores = {}
+        for agent_id in targets:
+            results = serp.get(agent_id, [])
+            # mimează find(7 zile).limit(100) din calculate_seo_health
+            recent = [r for r in results if r.get("recent")][:100]
+            scores[agent_id] = {
+                "seo_health": self._seo_score(recent),
+                "ads_health": self._ads_score(ads.get(agent_id, {})),
+                "opportunity_level": self._opportunity_score(results),
+                "risk_level": self._risk_score(results),
+                "calculated_at": now
+            }
+        return scores
+    
+    def save_health_scores_bulk(self, scores: Dict[str, Dict[str, Any]]) -> int:
+        """Upsert în lot (bulk_write neordonat) pentru scorurile calculate"""
+        now = datetime.now(timezone.utc)
+        operations = [
+            UpdateOne(
+                {"agent_id": agent_id},
+                {"$set": {"agent_id": agent_id, **agent_scores, "last_update": now}},
+                upsert=True
+            )
+            for agent_id, agent_scores in scores.items()
+        ]
+        written = 0
+        for i in range(0, len(operations), HEALTH_BULK_SIZE):
+            result = self.health_collection.bulk_write(operations[i:i + HEALTH_BULK_SIZE], ordered=False)
+            written += result.upserted_count + result.modified_count
+        return written
+    
+    def refresh_all(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Recalculează scorurile pentru flotă: doar agenții cu SERP nou de la ultimul refresh
+        (sau cu scoruri mai vechi de HEALTH_MAX_AGE_HOURS); force=True → toți agenții
+        """
+        started = time.time()
+        now = datetime.now(timezone.utc)
+        self._ensure_batch_indexes()
+        
+        runs = self.db.agent_health_runs
+        last_run = runs.find_one({"_id": "fleet"})
+        
+        if force or not last_run:
+            scores = self.compute_scores_batch(None, now)
+            mode = "full"
+        else:
+            since = last_run["last_run_at"]
+            dirty = self._dirty_agents(since, now)
+            scores = {}
+            for i in range(0, len(dirty), HEALTH_BULK_SIZE):
+                scores.update(self.compute_scores_batch(dirty[i:i + HEALTH_BULK_SIZE], now))
+            mode = "incremental"
+        
+        written = self.save_health_scores_bulk(scores) if scores else 0
+        # watermark = începutul rulării: SERP-ul scris în timpul refresh-ului intră data viitoare
+        runs.update_one(
+            {"_id": "fleet"},
+            {"$set": {"last_run_at": now, "mode": mode, "agents": len(scores), "seconds": round(time.time() - started, 2)}},
+            upsert=True
+        )
+        
+        summary = {"mode": mode, "agents_recomputed": len(scores), "written": written,
+                   "seconds": round(time.time() - started, 2)}
+        logger.info(f"🩺 Fleet health refresh: {summary}")
+        return summary
+    
+    def refresh_in_background(self, force: bool = False) -> Dict[str, Any]:
+        """Pornește refresh_all într-un thread (unul singur odată); nu așteaptă rezultatul"""
+        with self._refresh_lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return {"started": False, "running": True, "last": self.last_refresh}
+
+            def run():
+                try:
+                    self.last_refresh = self.refresh_all(force)
+                except Exception as e:
+                    logger.error(f"Fleet health refresh failed: {e}")
+                    self.last_refresh = {"error": str(e), "at": datetime.now(timezone.utc).isoformat()}
+
+            self._refresh_thread = threading.Thread(target=run, name="fleet-health-refresh", daemon=True)
+            self._refresh_thread.start()
+            return {"started": True, "running": True, "last": self.last_refresh}
+    
+    def get_fleet_health(self, limit: int = 1000, sort_by: str = "risk_level") -> List[Dict[str, Any]]:
+        """Scorurile salvate pentru toată flota (dashboard), cele mai riscante primele"""
+        return list(self.health_collection.find({}, {"_id": 0}).sort(sort_by, -1).limit(limit))
+
+
+_health_score: Optional[AgentHealthScore] = None
+_health_score_lock = threading.Lock()
+
+
+def get_health_score() -> AgentHealthScore:
+    """Instanța partajată (clientul Mongo din registry + starea refresh-ului de flotă)"""
+    global _health_score
+    with _health_score_lock:
+        if _health_score is None:
+            _health_score = AgentHealthScore()
+        return _health_score
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Refresh scoruri de sănătate pentru toți agenții")
+    parser.add_argument("--force", action="store_true", help="Recalculează toți agenții, nu doar pe cei cu SERP nou")
+    args = parser.parse_args()
+    print(AgentHealthScore().refresh_all(force=args.force))
@@ -8,15 +8,22 @@ from fastapi.responses import FileResponse, JSONResponse
 from pymongo import MongoClient
 from bson import ObjectId
 from pathlib import Path
+import asyncio
+import os
 import sys
 
 # Add reports to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "reports"))
-from generator.report_generator import ReportGenerator
+from generator.report_builder import get_report_builder
+from parser.log_parser import WorkflowLogParser
 from utils.pdf_export import markdown_to_pdf
 
 router = APIRouter(prefix="/api/reports", tags=["reports"])
 
+REPORTS_OUTPUT_DIR = Path(__file__).parent.parent / "reports" / "output"
+# Log-urile workflow din care se pot construi rapoarte (POST /build)
+REPORT_LOGS_DIR = Path(os.getenv("REPORT_LOGS_DIR", "/srv/hf/ai_agents/logs"))
+
 # MongoDB
 mongo = MongoClient('mongodb://localhost:27017/')
 db = mongo.ai_agents_db
@@ -25,7 +32,7 @@ db = mongo.ai_agents_db
 @router.get("/")
 async def list_reports():
     """Listează toate rapoartele disponibile"""
-    reports_dir = Path(__file__).parent.parent / "reports" / "output"
+    reports_dir = REPORTS_OUTPUT_DIR
     reports = []
     
     for md_file in reports_dir.glob("*_report.md"):
@@ -44,7 +51,7 @@ async def list_reports():
 @router.get("/{domain}")
 async def get_report(domain: str, format: str = Query("json", regex="^(json|markdown|pdf|graph)$")):
     """Obține raport pentru un domain"""
-    reports_dir = Path(__file__).parent.parent / "reports" / "output"
+    reports_dir = REPORTS_OUTPUT_DIR
     
     if format == "json":
         json_file = reports_dir / f"{domain}_report.json"
@@ -143,10 +150,10 @@ async def generate_report_from_agent(agent_id: str):
         f.write(log_content)
         temp_log = f.name
     
-    # Generează raport
+    # Generează raport (artefactele cu aceleași date sunt reutilizate)
     try:
-        generator = ReportGenerator(temp_log)
-        results = generator.generate_all()
+        data = await asyncio.to_thread(WorkflowLogParser(temp_log).parse)
+        results, stats = await asyncio.to_thread(get_report_builder(str(REPORTS_OUTPUT_DIR)).render, data)
         
         return {
             "success": True,
@@ -155,9 +162,32 @@ async def generate_report_from_agent(agent_id: str):
                 "markdown": str(results.get("markdown")),
                 "json": str(results.get("json")),
                 "graph": str(results.get("graph")),
-            }
+            },
+            "stats": stats,
         }
     finally:
         # Șterge log temporar
         Path(temp_log).unlink(missing_ok=True)
 
+
+@router.post("/build")
+async def build_report_from_log(log_name: str = Query(..., description="Fișier din REPORT_LOGS_DIR"),
+                                force: bool = False):
+    """Construiește raportul dintr-un log workflow (incremental: doar liniile noi se parsează)"""
+    log_file = (REPORT_LOGS_DIR / log_name).resolve()
+    if REPORT_LOGS_DIR.resolve() not in log_file.parents:
+        raise HTTPException(status_code=400, detail="Invalid log name")
+    if not log_file.is_file():
+        raise HTTPException(status_code=404, detail="Log not found")
+    
+    results = await asyncio.to_thread(get_report_builder(str(REPORTS_OUTPUT_DIR)).build, str(log_file), force)
+    return {
+        "success": True,
+        "files": {
+            "markdown": str(results.get("markdown")),
+            "json": str(results.get("json")),
+            "graph": str(results.get("graph")),
+        },
+        "stats": results["stats"],
+    }
+
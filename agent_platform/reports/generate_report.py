@@ -10,7 +10,7 @@ from pathlib import Path
 
 # Add reports to path
 sys.path.insert(0, str(Path(__file__).parent))
-from generator.report_generator import ReportGenerator
+from generator.report_builder import get_report_builder
 
 
 def main():
@@ -18,6 +18,8 @@ def main():
     parser.add_argument("log_file", help="Calea către fișierul de log")
     parser.add_argument("--output-dir", "-o", default="output", 
                        help="Directorul de output (default: output)")
+    parser.add_argument("--force", action="store_true",
+                       help="Ignoră cache-ul: reparsează log-ul și regenerează toate artefactele")
     
     args = parser.parse_args()
     
@@ -33,10 +35,12 @@ def main():
     print()
     
     try:
-        generator = ReportGenerator(str(log_file), str(output_dir))
-        results = generator.generate_all()
+        results = get_report_builder(str(output_dir)).build(str(log_file), force=args.force)
+        stats = results["stats"]
         
         print("✅ Raport generat cu succes!")
+        print(f"   Parsare: {stats['parse']['mode']} ({stats['parse']['bytes_parsed']} bytes, {stats['parse']['seconds']}s)")
+        print(f"   Artefacte: generate {stats['render']['rendered'] or '-'} · reutilizate {stats['render']['reused'] or '-'}")
         print()
         print("📄 Fișiere generate:")
         print(f"   📝 Markdown: {results.get('markdown')}")
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Build incremental pentru rapoarte CEO Workflow
+
+- Parsare incrementală: starea parserului se salvează în <output>/.cache împreună
+  cu offset-ul și hash-urile începutului / ultimilor octeți parsați; la următorul
+  build se citesc doar liniile adăugate. Log trunchiat/rotit → reparsare completă.
+- Artefacte în paralel: Markdown, JSON și organigrama se generează în procese
+  separate (matplotlib nu e thread-safe, iar layout-ul grafului e CPU-bound).
+- Reutilizare: fiecare artefact are un hash al datelor din care e generat; dacă
+  hash-ul nu s-a schimbat și fișierele există, artefactul nu se regenerează.
+
+Usage:
+    from generator.report_builder import get_report_builder
+    results = get_report_builder("reports/output").build("/path/to/log.txt")
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from parser.log_parser import WorkflowLogParser, LogParseState
+
+# Crește la orice schimbare de format a artefactelor → invalidează cache-ul
+RENDER_VERSION = "1"
+HEAD_BYTES = 64 * 1024
+TAIL_BYTES = 4 * 1024
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "3"))
+
+ARTIFACTS = ("markdown", "json", "graph")
+TEMPLATE_PATH = Path(__file__).parent.parent / "templates" / "report_template.md"
+
+
+def _render_artifact(kind: str, data: Dict[str, Any], output_dir: str) -> Optional[str]:
+    """Rulează în procesul worker: un singur artefact"""
+    from generator.report_generator import ReportGenerator
+
+    generator = ReportGenerator(output_dir=output_dir, data=data)
+    render = {
+        "markdown": generator.generate_markdown,
+        "json": generator.generate_json,
+        "graph": generator.generate_graph,
+    }[kind]
+    path = render()
+    return str(path) if path else None
+
+
+def _hash(*parts: Any) -> str:
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _file_hash(path: Path, start: int, length: int) -> str:
+    with open(path, 'rb') as f:
+        f.seek(max(0, start))
+        return hashlib.sha1(f.read(length)).hexdigest()
+
+
+class ReportBuilder:
+    """Parsare incrementală + artefacte generate în paralel și reutilizate"""
+
+    def __init__(self, output_dir: str = "reports/output", workers: int = REPORT_WORKERS):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir = self.output_dir / ".cache"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._domain_locks: Dict[str, threading.Lock] = {}
+
+    # ------------------------------------------------------------------
+    # Parsare
+    # ------------------------------------------------------------------
+
+    def _state_path(self, log_file: Path) -> Path:
+        key = hashlib.sha1(str(log_file.resolve()).encode('utf-8')).hexdigest()[:16]
+        return self.cache_dir / f"parse_{key}.json"
+
+    def parse(self, log_file: str, force: bool = False) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Datele parsate ale log-ului, continuând de la offset-ul salvat.
+
+        Returns:
+            (date, statistici: mode=full|incremental, bytes_parsed, seconds)
+        """
+        started = time.monotonic()
+        log_file = Path(log_file)
+        state_path = self._state_path(log_file)
+        size = log_file.stat().st_size
+
+        state, offset, mode = LogParseState(), 0, "full"
+        if not force and state_path.exists():
+            try:
+                cached = json.loads(state_path.read_text(encoding='utf-8'))
+                cached_offset = cached["offset"]
+                if (
+                    cached_offset <= size
+                    and _file_hash(log_file, 0, min(HEAD_BYTES, cached_offset)) == cached["head_hash"]
+                    and _file_hash(log_file, cached_offset - TAIL_BYTES, min(TAIL_BYTES, cached_offset)) == cached["tail_hash"]
+                ):
+                    state, offset, mode = LogParseState.from_dict(cached["state"]), cached_offset, "incremental"
+            except Exception as e:
+                print(f"⚠️  Cache parsare invalid ({e}), reparsez complet")
+
+        parser = WorkflowLogParser(str(log_file))
+        data, state, new_offset = parser.parse_from(state, offset)
+
+        if new_offset != offset or mode == "full":
+            tmp_path = state_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps({
+                "log_file": str(log_file.resolve()),
+                "offset": new_offset,
+                "head_hash": _file_hash(log_file, 0, min(HEAD_BYTES, new_offset)),
+                "tail_hash": _file_hash(log_file, new_offset - TAIL_BYTES, min(TAIL_BYTES, new_offset)),
+                "state": state.to_dict(),
+            }, ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp_path, state_path)
+
+        return data, {
+            "mode": mode,
+            "bytes_parsed": size - offset,
+            "seconds": round(time.monotonic() - started, 3),
+        }
+
+    # ------------------------------------------------------------------
+    # Artefacte
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _inputs(kind: str, data: Dict[str, Any]) -> Any:
+        """Doar datele folosite de artefact intră în hash"""
+        if kind == "graph":
+            return [data.get("master_agent"), data.get("slave_agents")]
+        if kind == "markdown":
+            template = TEMPLATE_PATH.read_text(encoding='utf-8') if TEMPLATE_PATH.exists() else None
+            return [data, template]
+        return data
+
+    def _artifact_paths(self, kind: str, domain: str) -> Dict[str, Path]:
+        if kind == "graph":
+            return {"graph": self.output_dir / f"{domain}_graph.png", "graph_json": self.output_dir / f"{domain}_graph.json"}
+        suffix = "md" if kind == "markdown" else "json"
+        return {kind: self.output_dir / f"{domain}_report.{suffix}"}
+
+    def _executor_for(self) -> Optional[ProcessPoolExecutor]:
+        with self._lock:
+            if self._executor is None and self.workers > 1:
+                try:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                except (OSError, NotImplementedError) as e:
+                    print(f"⚠️  Pool de procese indisponibil ({e}), generez serial")
+                    self.workers = 1
+            return self._executor
+
+    def render(self, data: Dict[str, Any], force: bool = False) -> Tuple[Dict[str, Optional[Path]], Dict[str, Any]]:
+        """
+        Generează artefactele lipsă sau cu date schimbate; restul sunt reutilizate.
+
+        Returns:
+            ({markdown, json, graph: Path}, statistici: rendered, reused, seconds)
+        """
+        from generator.report_generator import report_domain
+
+        domain = report_domain(data)
+        with self._lock:
+            domain_lock = self._domain_locks.setdefault(domain, threading.Lock())
+        # două build-uri pentru același domeniu ar scrie aceleași fișiere
+        with domain_lock:
+            return self._render(data, domain, force)
+
+    def _render(self, data: Dict[str, Any], domain: str, force: bool) -> Tuple[Dict[str, Optional[Path]], Dict[str, Any]]:
+        started = time.monotonic()
+        manifest_path = self.cache_dir / f"{domain}_manifest.json"
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            manifest = {}
+
+        results: Dict[str, Optional[Path]] = {}
+        stale: Dict[str, str] = {}
+        for kind in ARTIFACTS:
+            input_hash = _hash(RENDER_VERSION, kind, self._inputs(kind, data))
+            entry = manifest.get(kind) or {}
+            paths = self._artifact_paths(kind, domain)
+            if not force and entry.get("hash") == input_hash and all(p.exists() for p in paths.values()):
+                results[kind] = Path(entry["path"]) if entry.get("path") else None
+            else:
+                stale[kind] = input_hash
+
+        executor = self._executor_for() if len(stale) > 1 else None
+        if executor is not None:
+            futures = {kind: executor.submit(_render_artifact, kind, data, str(self.output_dir)) for kind in stale}
+            rendered = {kind: future.result() for kind, future in futures.items()}
+        else:
+            rendered = {kind: _render_artifact(kind, data, str(self.output_dir)) for kind in stale}
+
+        for kind, path in rendered.items():
+            results[kind] = Path(path) if path else None
+            # graficul fără networkx/matplotlib nu se memorează: se reîncearcă data viitoare
+            if path:
+                manifest[kind] = {"hash": stale[kind], "path": path}
+
+        if rendered:
+            manifest_path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding='utf-8')
+
+        return results, {
+            "rendered": sorted(rendered),
+            "reused": sorted(set(ARTIFACTS) - set(rendered)),
+            "seconds": round(time.monotonic() - started, 3),
+        }
+
+    def build(self, log_file: str, force: bool = False) -> Dict[str, Any]:
+        """Parsare incrementală + artefacte; returnează căile și statisticile build-ului"""
+        data, parse_stats = self.parse(log_file, force=force)
+        results, render_stats = self.render(data, force=force)
+        return {**results, "stats": {"parse": parse_stats, "render": render_stats}}
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_builders: Dict[str, ReportBuilder] = {}
+_builders_lock = threading.Lock()
+
+
+def get_report_builder(output_dir: str = "reports/output") -> ReportBuilder:
+    """Builder partajat per director de output (pool-ul de procese e refolosit)"""
+    key = str(Path(output_dir).resolve())
+    with _builders_lock:
+        builder = _builders.get(key)
+        if builder is None:
+            builder = ReportBuilder(output_dir)
+            _builders[key] = builder
+            atexit.register(builder.close)
+        return builder
@@ -9,47 +9,41 @@ import re
 import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from urllib.parse import urlparse
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from parser.log_parser import WorkflowLogParser
+from generator.report_builder import get_report_builder
+
+
+def report_domain(data: Dict[str, Any]) -> str:
+    """Domeniul folosit în numele fișierelor de raport"""
+    site_url = data.get("site") or ""
+    parsed = urlparse(site_url)
+    return parsed.netloc.replace("www.", "") or "unknown"
 
 
 class ReportGenerator:
     """Generează rapoarte profesionale din log-uri"""
     
-    def __init__(self, log_file: str, output_dir: str = "reports/output"):
-        self.log_file = Path(log_file)
+    def __init__(self, log_file: Optional[str] = None, output_dir: str = "reports/output",
+                 data: Optional[Dict[str, Any]] = None):
+        self.log_file = Path(log_file) if log_file else None
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Parse log
-        parser = WorkflowLogParser(log_file)
-        self.data = parser.parse()
+        # Parse log (incremental: doar liniile adăugate de la ultimul build)
+        if data is None:
+            data, _ = get_report_builder(str(self.output_dir)).parse(log_file)
+        self.data = data
         
         # Extract domain for filenames
-        site_url = self.data.get("site") or ""
-        parsed = urlparse(site_url)
-        self.domain = parsed.netloc.replace("www.", "") or "unknown"
+        self.domain = report_domain(self.data)
     
-    def generate_all(self) -> Dict[str, Path]:
-        """Generează toate formatele"""
-        results = {}
-        
-        # Markdown
-        md_path = self.generate_markdown()
-        results["markdown"] = md_path
-        
-        # JSON
-        json_path = self.generate_json()
-        results["json"] = json_path
-        
-        # PNG Graph
-        png_path = self.generate_graph()
-        results["graph"] = png_path
-        
+    def generate_all(self, force: bool = False) -> Dict[str, Path]:
+        """Generează toate formatele (în paralel; artefactele nemodificate sunt reutilizate)"""
+        results, _ = get_report_builder(str(self.output_dir)).render(self.data, force=force)
         return results
     
     def generate_markdown(self) -> Path:
@@ -99,7 +93,7 @@ class ReportGenerator:
             "pages_found": "N/A",
             "pages_indexed": "N/A",
             "success_rate": "N/A",
-            "error_count": len(self.data.get("errors", [])),
+            "error_count": self.data.get("error_count", len(self.data.get("errors", []))),
             "error_breakdown": "N/A",
             "retry_success": "N/A",
             "chunk_p50": "920",
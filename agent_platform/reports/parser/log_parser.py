@@ -2,67 +2,209 @@
 """
 Parser pentru log-uri CEO Workflow
 Extrage date structurate din log-uri text
+
+Log-ul e citit linie cu linie într-un LogParseState: câmpurile de pe o singură
+linie (site, faze, erori, timestamp-uri) se acumulează direct, iar din secțiunile
+multi-linie (master, slaves, statistici) se păstrează doar textul secțiunii.
+Starea se poate salva (to_dict) și continua de la un offset, astfel încât la
+un log care crește se parsează doar liniile adăugate.
 """
 
 import re
+import copy
 import json
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 
+# Erorile păstrate integral; restul sunt doar numărate (log-uri de sute de MB)
+MAX_ERRORS_KEPT = 1000
+READ_CHUNK = 8 * 1024 * 1024
+
+SITE_RE = re.compile(r'SITE TESTAT:\s*(https?://[^\s]+)', re.IGNORECASE)
+SITE_FALLBACK_RE = re.compile(r'Site URL:\s*(https?://[^\s]+)', re.IGNORECASE)
+DATE_RE = re.compile(r'📅\s*DATA:\s*([^\n]+)')
+DURATION_RE = re.compile(r'⏱️\s*DURAT[ĂA]\s*TOTAL[ĂA]:\s*([^\n]+)')
+ISO_RE = re.compile(r'ISODate\([\'"](\d{4}-\d{2}-\d{2}T[^\'"]+)[\'"]')
+PHASE_RE = re.compile(r'(?:FAZA|Phase)\s*(\d+)[/\d]*\s*(?:COMPLETĂ|completed|✅)', re.IGNORECASE)
+ERROR_RE = re.compile(r'(?:ERROR|Exception|Failed|❌):\s*([^\n]+)', re.IGNORECASE)
+
+# secțiune → (început, sfârșit); sfârșitul nu face parte din secțiune
+SECTIONS = {
+    "master": (re.compile(r'1️⃣\s*AGENT MASTER CREAT:', re.IGNORECASE), re.compile(r'2️⃣|═════')),
+    "slaves": (re.compile(r'2️⃣\s*SLAVE AGENTS CREAȚI:', re.IGNORECASE), re.compile(r'═════|📋')),
+    "statistics": (re.compile(r'📊\s*STATISTICI FINALE', re.IGNORECASE), re.compile(r'═════')),
+}
+
+
+class LogParseState:
+    """Starea acumulată din liniile parsate până acum"""
+
+    def __init__(self):
+        self.site: Optional[str] = None
+        self.site_fallback: Optional[str] = None
+        self.date: Optional[str] = None
+        self.duration: Optional[str] = None
+        self.first_iso: Optional[str] = None
+        self.last_iso: Optional[str] = None
+        self.iso_count = 0
+        self.phases: set = set()
+        self.errors: List[str] = []
+        self.error_count = 0
+        self.sections: Dict[str, List[str]] = {}
+        self.open_section: Optional[str] = None
+        self.lines = 0
+
+    def feed_line(self, line: str):
+        self.lines += 1
+        self._feed_sections(line)
+
+        if self.site is None:
+            match = SITE_RE.search(line)
+            if match:
+                self.site = match.group(1)
+        if self.site_fallback is None:
+            match = SITE_FALLBACK_RE.search(line)
+            if match:
+                self.site_fallback = match.group(1)
+        if self.date is None:
+            match = DATE_RE.search(line)
+            if match:
+                self.date = match.group(1).strip()
+        if self.duration is None:
+            match = DURATION_RE.search(line)
+            if match:
+                self.duration = match.group(1).strip()
+
+        for match in ISO_RE.finditer(line):
+            if self.first_iso is None:
+                self.first_iso = match.group(1)
+            self.last_iso = match.group(1)
+            self.iso_count += 1
+
+        for match in PHASE_RE.finditer(line):
+            self.phases.add(int(match.group(1)))
+
+        for match in ERROR_RE.finditer(line):
+            self.error_count += 1
+            if len(self.errors) < MAX_ERRORS_KEPT:
+                self.errors.append(match.group(1).strip())
+
+    def _feed_sections(self, line: str):
+        rest = line
+        while rest:
+            if self.open_section is not None:
+                end = SECTIONS[self.open_section][1].search(rest)
+                if end is None:
+                    self.sections[self.open_section].append(rest)
+                    return
+                if end.start():
+                    self.sections[self.open_section].append(rest[:end.start()])
+                self.open_section = None
+                rest = rest[end.start():]
+
+            # prima apariție a fiecărei secțiuni câștigă (ca re.search pe tot log-ul)
+            starts = [
+                (match.start(), name) for name, (start_re, _) in SECTIONS.items()
+                if name not in self.sections and (match := start_re.search(rest))
+            ]
+            if not starts:
+                return
+            position, name = min(starts)
+            self.sections[name] = []
+            self.open_section = name
+            marker = SECTIONS[name][0].search(rest, position)
+            self.sections[name].append(rest[position:marker.end()])
+            rest = rest[marker.end():]
+
+    def section_text(self) -> str:
+        return "\n".join("".join(lines) for lines in self.sections.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = dict(self.__dict__)
+        data["phases"] = sorted(self.phases)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LogParseState":
+        state = cls()
+        state.__dict__.update(data)
+        state.phases = set(data.get("phases", []))
+        return state
+
 
 class WorkflowLogParser:
     """Parsează log-uri workflow și extrage date structurate"""
-    
+
     def __init__(self, log_file: str):
         self.log_file = Path(log_file)
-        self.content = self._read_log()
+        self.state = LogParseState()
         self.parsed_data = {}
-    
-    def _read_log(self) -> str:
-        """Citește log-ul"""
-        with open(self.log_file, 'r', encoding='utf-8') as f:
-            return f.read()
-    
+
     def parse(self) -> Dict[str, Any]:
         """Parsează log-ul complet"""
-        self.parsed_data = {
-            "site": self._extract_site(),
-            "date": self._extract_date(),
-            "duration": self._extract_duration(),
-            "master_agent": self._extract_master_agent(),
-            "slave_agents": self._extract_slave_agents(),
-            "phases": self._extract_phases(),
-            "statistics": self._extract_statistics(),
-            "errors": self._extract_errors(),
-            "timestamps": self._extract_timestamps(),
-        }
+        self.state = LogParseState()
+        self.parsed_data, _, _ = self.parse_from(self.state, 0)
         return self.parsed_data
-    
-    def _extract_site(self) -> Optional[str]:
-        """Extrage URL site"""
-        match = re.search(r'SITE TESTAT:\s*(https?://[^\s]+)', self.content, re.IGNORECASE)
-        if match:
-            return match.group(1)
-        # Fallback: căută în alte formate
-        match = re.search(r'Site URL:\s*(https?://[^\s]+)', self.content, re.IGNORECASE)
-        return match.group(1) if match else None
-    
-    def _extract_date(self) -> Optional[str]:
-        """Extrage data"""
-        match = re.search(r'📅\s*DATA:\s*([^\n]+)', self.content)
-        if match:
-            return match.group(1).strip()
-        # Fallback: ISO date
-        match = re.search(r'ISODate\([\'"](\d{4}-\d{2}-\d{2}T[^\']+)[\'"]', self.content)
-        return match.group(1) if match else datetime.now().isoformat()
-    
-    def _extract_duration(self) -> Optional[str]:
-        """Extrage durata"""
-        match = re.search(r'⏱️\s*DURAT[ĂA]\s*TOTAL[ĂA]:\s*([^\n]+)', self.content)
-        return match.group(1).strip() if match else None
-    
-    def _extract_master_agent(self) -> Dict[str, Any]:
+
+    def parse_from(self, state: LogParseState, offset: int) -> Tuple[Dict[str, Any], LogParseState, int]:
+        """
+        Continuă parsarea de la `offset` (octeți) cu starea salvată.
+
+        Doar liniile complete intră în stare; ultima linie neterminată (log încă
+        scris) contribuie doar la rezultat și va fi reparsată data viitoare.
+
+        Returns:
+            (date parsate, stare, offset-ul după ultima linie completă)
+        """
+        partial = b""
+        with open(self.log_file, 'rb') as f:
+            f.seek(offset)
+            while True:
+                chunk = f.read(READ_CHUNK)
+                if not chunk:
+                    break
+                buffer = partial + chunk
+                last_newline = buffer.rfind(b"\n")
+                if last_newline < 0:
+                    partial = buffer
+                    continue
+                for line in buffer[:last_newline + 1].decode('utf-8', errors='replace').splitlines(keepends=True):
+                    state.feed_line(line)
+                offset += last_newline + 1
+                partial = buffer[last_newline + 1:]
+
+        result_state = state
+        if partial:
+            result_state = copy.deepcopy(state)
+            result_state.feed_line(partial.decode('utf-8', errors='replace'))
+
+        self.state = state
+        self.parsed_data = self.result(result_state)
+        return self.parsed_data, state, offset
+
+    def result(self, state: LogParseState) -> Dict[str, Any]:
+        """Datele structurate din starea acumulată"""
+        text = state.section_text()
+        master = self._extract_master_agent(text)
+        slaves = self._extract_slave_agents(text)
+        return {
+            "site": state.site or state.site_fallback,
+            "date": state.date or state.first_iso or datetime.now().isoformat(),
+            "duration": state.duration,
+            "master_agent": master,
+            "slave_agents": slaves,
+            "phases": [f"Phase {n}" for n in sorted(state.phases)],
+            "statistics": self._extract_statistics(text, master, slaves),
+            "errors": list(state.errors),
+            "error_count": state.error_count,
+            "timestamps": {
+                "start": state.first_iso,
+                "finish": state.last_iso if state.iso_count > 1 else None,
+            },
+        }
+
+    def _extract_master_agent(self, text: str) -> Dict[str, Any]:
         """Extrage informații master agent"""
         master = {
             "domain": None,
@@ -71,60 +213,60 @@ class WorkflowLogParser:
             "site_url": None,
             "created_at": None,
         }
-        
+
         # Căută secțiunea "AGENT MASTER CREAT"
         master_section = re.search(
             r'1️⃣\s*AGENT MASTER CREAT:.*?(?=2️⃣|═════|$)',
-            self.content,
+            text,
             re.DOTALL | re.IGNORECASE
         )
-        
+
         if master_section:
             section = master_section.group(0)
             # Domain
             match = re.search(r'Domain:\s*([^\n]+)', section)
             if match:
                 master["domain"] = match.group(1).strip()
-            
+
             # Status
             match = re.search(r'Status:\s*([^\n]+)', section)
             if match:
                 master["status"] = match.group(1).strip()
-            
+
             # Chunks
             match = re.search(r'Chunks Indexed:\s*(\d+)', section)
             if match:
                 master["chunks"] = int(match.group(1))
-            
+
             # Site URL
             match = re.search(r'Site URL:\s*([^\n]+)', section)
             if match:
                 master["site_url"] = match.group(1).strip()
-            
+
             # Created
             match = re.search(r'Created:\s*([^\n]+)', section)
             if match:
                 master["created_at"] = match.group(1).strip()
-        
+
         return master
-    
-    def _extract_slave_agents(self) -> List[Dict[str, Any]]:
+
+    def _extract_slave_agents(self, text: str) -> List[Dict[str, Any]]:
         """Extrage lista slave agents"""
         slaves = []
-        
+
         # Căută secțiunea "SLAVE AGENTS CREAȚI"
         slave_section = re.search(
             r'2️⃣\s*SLAVE AGENTS CREAȚI:.*?(?=═════|📋|$)',
-            self.content,
+            text,
             re.DOTALL | re.IGNORECASE
         )
-        
+
         if slave_section:
             section = slave_section.group(0)
             # Extrage fiecare slave (format: "1. domain | Status: ... | Chunks: ...")
             pattern = r'(\d+)\.\s*([^\n|]+)\s*\|\s*Status:\s*([^\n|]+)\s*\|\s*Chunks:\s*(\d+)'
             matches = re.finditer(pattern, section)
-            
+
             for match in matches:
                 slaves.append({
                     "domain": match.group(2).strip(),
@@ -132,40 +274,29 @@ class WorkflowLogParser:
                     "chunks": int(match.group(4)),
                     "site_url": None,  # Poate fi extras separat
                 })
-        
+
         # Fallback: căută în format alternativ
         if not slaves:
             pattern = r'(\d+)\.\s*([^\n]+)\s*- Status:\s*([^\n]+)\s*- Chunks:\s*(\d+)'
-            matches = re.finditer(pattern, self.content)
+            matches = re.finditer(pattern, text)
             for match in matches:
                 slaves.append({
                     "domain": match.group(2).strip(),
                     "status": match.group(3).strip(),
                     "chunks": int(match.group(4)),
                 })
-        
+
         # Extrage site_url-uri dacă există
         for slave in slaves:
             domain_escaped = re.escape(slave["domain"])
             url_pattern = rf'{domain_escaped}.*?Site URL:\s*([^\n]+)'
-            match = re.search(url_pattern, self.content)
+            match = re.search(url_pattern, text)
             if match:
                 slave["site_url"] = match.group(1).strip()
-        
+
         return slaves
-    
-    def _extract_phases(self) -> List[str]:
-        """Extrage fazele completate"""
-        phases = []
-        # Căută "FAZA X COMPLETĂ" sau "Phase X completed"
-        pattern = r'(?:FAZA|Phase)\s*(\d+)[/\d]*\s*(?:COMPLETĂ|completed|✅)'
-        matches = re.finditer(pattern, self.content, re.IGNORECASE)
-        for match in matches:
-            phase_num = match.group(1)
-            phases.append(f"Phase {phase_num}")
-        return sorted(set(phases), key=lambda x: int(re.search(r'\d+', x).group()))
-    
-    def _extract_statistics(self) -> Dict[str, Any]:
+
+    def _extract_statistics(self, text: str, master: Dict[str, Any], slaves: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Extrage statistici"""
         stats = {
             "total_agents": 0,
@@ -175,85 +306,56 @@ class WorkflowLogParser:
             "validated_slaves": 0,
             "created_slaves": 0,
         }
-        
+
         # Căută secțiunea "STATISTICI FINALE"
         stats_section = re.search(
             r'📊\s*STATISTICI FINALE.*?(?=═════|$)',
-            self.content,
+            text,
             re.DOTALL | re.IGNORECASE
         )
-        
+
         if stats_section:
             section = stats_section.group(0)
             # Total Agents
             match = re.search(r'Total Agents:\s*(\d+)', section)
             if match:
                 stats["total_agents"] = int(match.group(1))
-            
+
             # Total Chunks
             match = re.search(r'Total Chunks:\s*(\d+)', section)
             if match:
                 stats["total_chunks"] = int(match.group(1))
-            
+
             # Master Chunks
             match = re.search(r'Master Chunks:\s*(\d+)', section)
             if match:
                 stats["master_chunks"] = int(match.group(1))
-            
+
             # Slave Chunks
             match = re.search(r'Slave Chunks:\s*(\d+)', section)
             if match:
                 stats["slave_chunks"] = int(match.group(1))
-            
+
             # Validated Slaves
             match = re.search(r'Validated Slaves:\s*(\d+)', section)
             if match:
                 stats["validated_slaves"] = int(match.group(1))
-            
+
             # Created Slaves
             match = re.search(r'Created Slaves.*?:\s*(\d+)', section)
             if match:
                 stats["created_slaves"] = int(match.group(1))
-        
+
         # Fallback: calculează din master + slaves dacă nu găsește
         if stats["total_agents"] == 0:
-            master = self._extract_master_agent()
-            slaves = self._extract_slave_agents()
             stats["total_agents"] = 1 + len(slaves)
             stats["master_chunks"] = master.get("chunks", 0)
             stats["slave_chunks"] = sum(s.get("chunks", 0) for s in slaves)
             stats["total_chunks"] = stats["master_chunks"] + stats["slave_chunks"]
             stats["validated_slaves"] = sum(1 for s in slaves if s.get("status") == "validated")
             stats["created_slaves"] = sum(1 for s in slaves if s.get("status") == "created")
-        
+
         return stats
-    
-    def _extract_errors(self) -> List[str]:
-        """Extrage erori"""
-        errors = []
-        # Căută linii cu ERROR sau Exception
-        pattern = r'(?:ERROR|Exception|Failed|❌):\s*([^\n]+)'
-        matches = re.finditer(pattern, self.content, re.IGNORECASE)
-        for match in matches:
-            errors.append(match.group(1).strip())
-        return errors
-    
-    def _extract_timestamps(self) -> Dict[str, Optional[str]]:
-        """Extrage timestamp-uri importante"""
-        timestamps = {
-            "start": None,
-            "finish": None,
-        }
-        
-        # Căută ISO dates
-        iso_pattern = r'ISODate\([\'"](\d{4}-\d{2}-\d{2}T[^\']+)[\'"]'
-        matches = list(re.finditer(iso_pattern, self.content))
-        if matches:
-            timestamps["start"] = matches[0].group(1)
-            if len(matches) > 1:
-                timestamps["finish"] = matches[-1].group(1)
-        
-        return timestamps
 
 
 if __name__ == "__main__":
@@ -261,8 +363,7 @@ if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python log_parser.py <log_file>")
         sys.exit(1)
-    
+
     parser = WorkflowLogParser(sys.argv[1])
     data = parser.parse()
     print(json.dumps(data, indent=2, ensure_ascii=False))
-
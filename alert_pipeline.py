@@ -0,0 +1,383 @@
+"""
+Alert Pipeline
+Windowed, coalescing alert delivery for alert storms.
+
+Alerts submitted within a window (time or size bound) are grouped by
+(agent, type, severity). A group of one is stored as a regular alert; a
+larger group becomes a single digest alert carrying the individual items.
+Each flush persists all alerts with one insert_many, sends one
+notification per alert/digest, and triggers each auto-action once per
+(action, agent, target). Notification channels back off exponentially
+on failure and deliver what queued up once they recover; an alert is
+marked notification_sent only once every channel delivered it.
+
+Usage:
+    from alert_pipeline import get_alert_pipeline
+
+    pipeline = get_alert_pipeline()
+    pipeline.submit(agent_id, "rank_drop", "Rank drop ...", severity="high",
+                    metadata={"keyword": "x"}, auto_action="rollback")
+    pipeline.flush()   # before reading alerts back
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from alerts_system import AlertsSystem
+
+logger = logging.getLogger(__name__)
+
+ALERT_WINDOW_SECONDS = float(os.getenv("ALERT_WINDOW_SECONDS", "5"))
+ALERT_WINDOW_MAX = int(os.getenv("ALERT_WINDOW_MAX", "1000"))
+ALERT_BUFFER_MAX = int(os.getenv("ALERT_BUFFER_MAX", "20000"))
+DIGEST_MAX_ITEMS = int(os.getenv("ALERT_DIGEST_MAX_ITEMS", "200"))
+AUTO_ACTION_DEDUP_SECONDS = float(os.getenv("ALERT_AUTO_ACTION_DEDUP_SECONDS", "3600"))
+SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL") or None
+
+SEVERITY_ORDER = ["critical", "high", "medium", "low"]
+
+# channel(alert_document) → raises on failure
+Channel = Callable[[Dict], Any]
+
+
+class _ChannelState:
+    __slots__ = ("send", "backoff", "retry_at", "pending", "failures")
+
+    def __init__(self, send: Channel):
+        self.send = send
+        self.backoff = 0.0
+        self.retry_at = 0.0
+        self.pending: List[Dict] = []
+        self.failures = 0
+
+
+class AlertPipeline:
+    """Buffers alerts and flushes them as coalesced digests"""
+
+    def __init__(
+        self,
+        alerts: Optional[AlertsSystem] = None,
+        window_seconds: float = ALERT_WINDOW_SECONDS,
+        max_window: int = ALERT_WINDOW_MAX,
+        channels: Optional[Dict[str, Channel]] = None,
+        max_backoff: float = 600.0,
+        max_pending_per_channel: int = 500,
+        max_buffer: int = ALERT_BUFFER_MAX
+    ):
+        """
+        Args:
+            alerts: AlertsSystem used for persistence and auto-actions
+            window_seconds: Maximum seconds an alert stays buffered
+            max_window: Flush early once this many alerts are buffered
+            channels: name → callable(alert_doc); default: log (+ Slack if SLACK_WEBHOOK_URL)
+            max_backoff: Upper bound for a failing channel's retry delay
+            max_pending_per_channel: Oldest undelivered notifications are dropped above this
+            max_buffer: Oldest unstored alerts are dropped above this while Mongo is failing
+        """
+        self.alerts = alerts or AlertsSystem()
+        self.window_seconds = window_seconds
+        self.max_window = max_window
+        self.max_backoff = max_backoff
+        self.max_pending_per_channel = max_pending_per_channel
+        self.max_buffer = max_buffer
+
+        if channels is None:
+            channels = {"log": self.alerts._send_notification}
+            if SLACK_WEBHOOK_URL:
+                channels["slack"] = _slack_channel(SLACK_WEBHOOK_URL)
+        self._channels = {name: _ChannelState(send) for name, send in channels.items()}
+
+        self._buffer: List[Dict] = []
+        # alert id → channels that have not delivered it yet
+        self._undelivered: Dict[str, set] = {}
+        self._actions_seen: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.metrics = {
+            "submitted": 0,
+            "stored": 0,
+            "digests": 0,
+            "notifications_sent": 0,
+            "notifications_failed": 0,
+            "notifications_dropped": 0,
+            "alerts_dropped": 0,
+            "auto_actions": 0,
+            "auto_actions_deduplicated": 0
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the background flusher (idempotent)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="AlertPipeline", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        """Flush everything and stop the background flusher"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=30)
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.window_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error in alert pipeline flush loop: {e}")
+
+    # ------------------------------------------------------------------
+    # Enqueue
+    # ------------------------------------------------------------------
+
+    def submit(
+        self,
+        agent_id: str,
+        alert_type: str,
+        message: str,
+        severity: str = "medium",
+        metadata: Optional[Dict] = None,
+        auto_action: Optional[str] = None
+    ):
+        """Queue an alert (same arguments as AlertsSystem.create_alert); never blocks on Mongo"""
+        with self._lock:
+            self._buffer.append({
+                "agent_id": agent_id,
+                "alert_type": alert_type,
+                "message": message,
+                "severity": severity,
+                "metadata": metadata or {},
+                "auto_action": auto_action,
+                "created_at": datetime.now(timezone.utc)
+            })
+            self.metrics["submitted"] += 1
+            size = len(self._buffer)
+        if self._thread is None:
+            self.start()
+        if size >= self.max_window:
+            self._wakeup.set()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    # ------------------------------------------------------------------
+    # Flush
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _coalesce(items: List[Dict]) -> Dict:
+        """One stored alert for a (agent, type, severity) group"""
+        first = items[0]
+        if len(items) == 1:
+            return {**first, "metadata": dict(first["metadata"])}
+
+        keywords = [i["metadata"].get("keyword") for i in items if i["metadata"].get("keyword")]
+        domains = [i["metadata"].get("domain") for i in items if i["metadata"].get("domain")]
+        subjects = keywords or domains
+        preview = ", ".join(str(s) for s in subjects[:5])
+        more = f" (+{len(subjects) - 5} more)" if len(subjects) > 5 else ""
+        actions = Counter(i["auto_action"] for i in items if i["auto_action"])
+
+        return {
+            "agent_id": first["agent_id"],
+            "alert_type": first["alert_type"],
+            "severity": first["severity"],
+            "message": f"{len(items)} × {first['alert_type']} alerts: {preview}{more}" if subjects
+                       else f"{len(items)} × {first['alert_type']} alerts: {first['message']}",
+            "metadata": {
+                "digest": True,
+                "count": len(items),
+                "items": [
+                    {"message": i["message"], **i["metadata"]} for i in items[:DIGEST_MAX_ITEMS]
+                ],
+                "truncated": max(0, len(items) - DIGEST_MAX_ITEMS),
+                "first_at": min(i["created_at"] for i in items),
+                "last_at": max(i["created_at"] for i in items)
+            },
+            # the auto-actions of the items are triggered per target, not per digest
+            "auto_action": actions.most_common(1)[0][0] if actions else None,
+            "created_at": datetime.now(timezone.utc)
+        }
+
+    def flush(self) -> int:
+        """Persist, notify and trigger auto-actions for everything buffered; returns alerts stored"""
+        with self._flush_lock:
+            with self._lock:
+                items, self._buffer = self._buffer, []
+
+            stored = 0
+            if items:
+                groups: Dict[Tuple, List[Dict]] = {}
+                for item in items:
+                    groups.setdefault((item["agent_id"], item["alert_type"], item["severity"]), []).append(item)
+
+                documents = []
+                for key in sorted(groups, key=lambda k: SEVERITY_ORDER.index(k[2]) if k[2] in SEVERITY_ORDER else 99):
+                    document = self._coalesce(groups[key])
+                    document.update({
+                        "status": "active",
+                        "acknowledged_at": None,
+                        "resolved_at": None,
+                        "notification_sent": False
+                    })
+                    documents.append((document, groups[key]))
+
+                try:
+                    ids = self.alerts.create_alerts_bulk([d for d, _ in documents])
+                except Exception as e:
+                    logger.error(f"❌ Could not store {len(items)} alerts: {e}")
+                    with self._lock:
+                        # keep them for the next window instead of losing the storm, up to max_buffer
+                        self._buffer[:0] = items
+                        overflow = len(self._buffer) - self.max_buffer
+                        if overflow > 0:
+                            del self._buffer[:overflow]
+                            self.metrics["alerts_dropped"] += overflow
+                    if overflow > 0:
+                        logger.warning(f"⚠️ Alert buffer full, dropped {overflow} oldest alerts")
+                    return 0
+
+                stored = len(ids)
+                self.metrics["stored"] += stored
+                self.metrics["digests"] += sum(1 for d, _ in documents if d["metadata"].get("digest"))
+
+                for (document, group), alert_id in zip(documents, ids):
+                    document["_id"] = alert_id
+                    self._undelivered[alert_id] = set(self._channels)
+                    for channel in self._channels.values():
+                        channel.pending.append(document)
+                    self._trigger_actions(alert_id, group)
+
+                logger.info(f"🚨 Alert window: {len(items)} alerts → {stored} stored ({self.metrics['digests']} digests total)")
+
+            self._notify()
+            return stored
+
+    def _trigger_actions(self, alert_id: str, items: List[Dict]):
+        now = time.monotonic()
+        for item in items:
+            action = item["auto_action"]
+            if not action:
+                continue
+            target = item["metadata"].get("keyword") or item["metadata"].get("domain") or item["agent_id"]
+            key = (action, item["agent_id"], target)
+            seen_at = self._actions_seen.get(key)
+            if seen_at is not None and now - seen_at < AUTO_ACTION_DEDUP_SECONDS:
+                self.metrics["auto_actions_deduplicated"] += 1
+                continue
+            self._actions_seen[key] = now
+            self.metrics["auto_actions"] += 1
+            try:
+                self.alerts._trigger_auto_action(alert_id, action)
+            except Exception as e:
+                logger.error(f"❌ Auto-action {action} for {target} failed: {e}")
+
+        if len(self._actions_seen) > 50_000:
+            self._actions_seen = {
+                k: t for k, t in self._actions_seen.items() if now - t < AUTO_ACTION_DEDUP_SECONDS
+            }
+
+    def _notify(self):
+        now = time.monotonic()
+        delivered: Dict[str, List[str]] = {}
+        for name, channel in self._channels.items():
+            if not channel.pending or now < channel.retry_at:
+                continue
+            while channel.pending:
+                document = channel.pending[0]
+                try:
+                    channel.send(document)
+                except Exception as e:
+                    channel.failures += 1
+                    channel.backoff = min(self.max_backoff, max(1.0, channel.backoff * 2))
+                    channel.retry_at = now + channel.backoff
+                    self.metrics["notifications_failed"] += 1
+                    logger.warning(f"⚠️ Channel {name} failed ({e}); retrying in {channel.backoff:.0f}s")
+                    break
+                channel.pending.pop(0)
+                channel.backoff = 0.0
+                self.metrics["notifications_sent"] += 1
+                delivered.setdefault(name, []).append(document["_id"])
+
+            overflow = len(channel.pending) - self.max_pending_per_channel
+            if overflow > 0:
+                # dropped on this channel: these alerts stay notification_sent=False
+                for document in channel.pending[:overflow]:
+                    self._undelivered.pop(document["_id"], None)
+                del channel.pending[:overflow]
+                self.metrics["notifications_dropped"] += overflow
+
+        complete = []
+        for name, alert_ids in delivered.items():
+            for alert_id in alert_ids:
+                remaining = self._undelivered.get(alert_id)
+                if remaining is None:
+                    continue
+                remaining.discard(name)
+                if not remaining:
+                    del self._undelivered[alert_id]
+                    complete.append(alert_id)
+        try:
+            for name, alert_ids in delivered.items():
+                self.alerts.mark_notified(alert_ids, channel=name)
+            if complete:
+                self.alerts.mark_notified(complete)
+        except Exception as e:
+            logger.debug(f"Could not mark alerts notified: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            "pending": self.pending_count(),
+            "channels": {
+                name: {"pending": len(c.pending), "failures": c.failures, "backoff": c.backoff}
+                for name, c in self._channels.items()
+            }
+        }
+
+
+def _slack_channel(webhook_url: str) -> Channel:
+    """Plain-text Slack webhook; non-200 responses count as failures (backoff)"""
+    import requests
+
+    icons = {"critical": "🔴", "high": "🟠", "medium": "🟡", "low": "🔵"}
+
+    def send(alert: Dict):
+        text = f"{icons.get(alert['severity'], '⚪')} *{alert['alert_type']}* ({alert['agent_id']}): {alert['message']}"
+        response = requests.post(webhook_url, json={"text": text}, timeout=10)
+        if response.status_code != 200:
+            raise RuntimeError(f"Slack returned {response.status_code}")
+
+    return send
+
+
+_default_pipeline: Optional[AlertPipeline] = None
+_default_lock = threading.Lock()
+
+
+def get_alert_pipeline() -> AlertPipeline:
+    """Process-wide pipeline, flushed at interpreter exit"""
+    global _default_pipeline
+    with _default_lock:
+        if _default_pipeline is None:
+            _default_pipeline = AlertPipeline()
+            atexit.register(_default_pipeline.close)
+        return _default_pipeline
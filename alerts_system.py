@@ -96,6 +96,35 @@ class AlertsSystem:
         
         return alert_id
     
+    def create_alerts_bulk(self, alerts: List[Dict]) -> List[str]:
+        """
+        Store prepared alert documents with one insert_many (no notification / auto-action;
+        alert_pipeline.AlertPipeline handles those per digest)
+        
+        Returns:
+            Alert IDs, in input order
+        """
+        if not alerts:
+            return []
+        result = self.alerts_collection.insert_many(alerts, ordered=True)
+        return [str(alert_id) for alert_id in result.inserted_ids]
+    
+    def mark_notified(self, alert_ids: List[str], channel: Optional[str] = None):
+        """
+        Flag delivered notifications.
+        
+        Args:
+            alert_ids: Alert IDs
+            channel: Record delivery on this channel only (notified_channels.<channel>);
+                None → every channel delivered, set notification_sent
+        """
+        now = datetime.now(timezone.utc)
+        update = {f"notified_channels.{channel}": now} if channel else {"notification_sent": True, "notified_at": now}
+        self.alerts_collection.update_many(
+            {"_id": {"$in": [ObjectId(alert_id) for alert_id in alert_ids]}},
+            {"$set": update}
+        )
+    
     def check_rank_drops(
         self,
         agent_id: str,
@@ -104,6 +133,9 @@ class AlertsSystem:
         """
         Check for rank drops >= threshold positions
         
+        Polls the two latest runs; serp_alert_engine.SERPAlertEngine evaluates
+        the same rule incrementally as results are written.
+        
         Args:
             agent_id: Agent ID
             threshold: Minimum drop to trigger alert (default: 3)
@@ -142,7 +174,7 @@ class AlertsSystem:
             previous_pos = previous_results.get(keyword)
             
             if previous_pos and current_pos:
-                drop = previous_pos - current_pos
+                drop = current_pos - previous_pos  # higher position number = lower in SERP
                 if drop >= threshold:
                     severity = "critical" if drop >= 5 else "high"
                     alert_id = self.create_alert(
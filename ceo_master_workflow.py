@@ -13,8 +13,12 @@ WORKFLOW COMPLET:
 7. FAZA 7: Transformare competitori în agenți AI (paralel GPU)
 8. FAZA 8: Organogramă master-slave cu raportare ierarhică
 
+Fazele rulează ca graf de dependențe (2, 3, 4 în paralel după 1; 6 și 7 în paralel după 5),
+cu checkpoint în ceo_workflow_executions după fiecare fază.
+
 Utilizare:
     python3 ceo_master_workflow.py --site-url https://example.com --mode full
+    python3 ceo_master_workflow.py --site-url https://example.com --resume-latest
 """
 
 import asyncio
@@ -23,7 +27,8 @@ import os
 import json
 import logging
 import time
-from typing import Dict, List, Any, Optional
+from typing import Awaitable, Callable, Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pymongo import MongoClient
 from bson import ObjectId
@@ -46,6 +51,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Termen limită per agent competitor (faza 7): peste el task-ul e anulat și competitorul marcat timed_out
+PHASE7_TASK_TIMEOUT = float(os.getenv("PHASE7_TASK_TIMEOUT", "900"))
+
+
+@dataclass(frozen=True)
+class WorkflowPhase:
+    """Nod în graful de faze: rulează când toate `deps` s-au terminat"""
+    key: str
+    title: str
+    deps: Tuple[str, ...]
+    run: Callable[[Dict[str, Any]], Awaitable[Tuple[Dict[str, Any], Dict[str, Any]]]]
+    required: bool = False  # eșec → workflow-ul se oprește (altfel doar dependentele sunt sărite)
+
 
 class CEOMasterWorkflow:
     """
@@ -80,19 +98,66 @@ class CEOMasterWorkflow:
         
         logger.info("✅ CEO Master Workflow initialized")
     
+    # =========================================================================
+    # GRAF DE FAZE
+    # =========================================================================
+    
+    def _phase_graph(self) -> List[WorkflowPhase]:
+        """
+        Dependențele reale de date dintre faze:
+        
+            1 ─┬─ 2 (LangChain)
+               ├─ 3 (voce DeepSeek)
+               └─ 4 (subdomenii + keywords) ── 5 (Google) ─┬─ 6 (hartă CEO, are nevoie și de 4)
+                                                           └─ 7 (agenți competitori) ── 8 (organigramă)
+        """
+        return [
+            WorkflowPhase("phase1_master_agent", "FAZA 1/8: Creare Agent Master (Qwen GPU + Qdrant)",
+                          (), self._run_phase1, required=True),
+            WorkflowPhase("phase2_langchain", "FAZA 2/8: Integrare LangChain (Orchestrare + Memorie)",
+                          ("phase1_master_agent",), self._run_phase2),
+            WorkflowPhase("phase3_deepseek_voice", "FAZA 3/8: DeepSeek devine 'vocea' Agent Master",
+                          ("phase1_master_agent",), self._run_phase3),
+            WorkflowPhase("phase4_site_decomposition", "FAZA 4/8: DeepSeek descompune site (Subdomenii + Keywords)",
+                          ("phase1_master_agent",), self._run_phase4),
+            WorkflowPhase("phase5_competitor_discovery", "FAZA 5/8: Google Search pentru keywords + Descoperire competitori",
+                          ("phase4_site_decomposition",), self._run_phase5),
+            WorkflowPhase("phase6_ceo_map", "FAZA 6/8: Creare Hartă Competitivă CEO (Ranking + Poziții)",
+                          ("phase4_site_decomposition", "phase5_competitor_discovery"), self._run_phase6),
+            WorkflowPhase("phase7_competitor_agents", "FAZA 7/8: Transformare competitori în agenți AI (Paralel GPU)",
+                          ("phase5_competitor_discovery",), self._run_phase7),
+            WorkflowPhase("phase8_orgchart", "FAZA 8/8: Organogramă Master-Slave + Raportare Ierarhică",
+                          ("phase7_competitor_agents",), self._run_phase8),
+        ]
+    
+    def latest_failed_execution(self, site_url: str) -> Optional[str]:
+        """ID-ul ultimei execuții eșuate / întrerupte pentru site (candidat pentru reluare)"""
+        execution = self.db.ceo_workflow_executions.find_one(
+            {"site_url": site_url, "status": {"$in": ["failed", "in_progress"]}},
+            sort=[("_id", -1)],
+            projection={"_id": 1}
+        )
+        return str(execution["_id"]) if execution else None
+    
     async def execute_full_workflow(
         self, 
         site_url: str,
         results_per_keyword: int = 15,
-        parallel_gpu_agents: int = 5
+        parallel_gpu_agents: int = 5,
+        resume_execution_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Execută workflow-ul COMPLET CEO
         
+        Fazele independente rulează concurent; fiecare fază e salvată (checkpoint) în
+        ceo_workflow_executions imediat ce se termină, iar o execuție eșuată poate fi reluată
+        de la ultima fază completă (fără a recrea agentul master).
+        
         Args:
             site_url: URL-ul site-ului master
             results_per_keyword: Câte rezultate Google per keyword (default 15)
             parallel_gpu_agents: Câți agenți să proceseze în paralel pe GPU (default 5)
+            resume_execution_id: ID-ul unei execuții anterioare de reluat (opțional)
         
         Returns:
             Dict cu toate rezultatele workflow-ului
@@ -105,315 +170,74 @@ class CEOMasterWorkflow:
         logger.info(f"Parallel GPU agents: {parallel_gpu_agents}")
         
         workflow_start = time.time()
-        results = {
+        phases = self._phase_graph()
+        outputs: Dict[str, Dict[str, Any]] = {}
+        
+        previous = None
+        if resume_execution_id:
+            previous = self.db.ceo_workflow_executions.find_one({"_id": ObjectId(resume_execution_id)})
+            if not previous:
+                raise ValueError(f"Execution {resume_execution_id} not found")
+        
+        if previous:
+            execution_id = previous["_id"]
+            results = {k: v for k, v in previous.items() if k not in ("_id", "checkpoints")}
+            results.setdefault("phases", {})
+            # Fazele complete se refolosesc; cele eșuate / neîncepute se rulează din nou
+            for key, output in (previous.get("checkpoints") or {}).items():
+                if results["phases"].get(key, {}).get("status") == "completed":
+                    outputs[key] = output
+            # O fază care se reia produce date noi: dependentele ei (tranzitiv) nu mai sunt valide
+            stale = self._stale_dependents(phases, outputs)
+            for key in stale:
+                outputs.pop(key, None)
+            if stale:
+                logger.info(f"♻️ Checkpoint-uri invalidate (depind de faze reluate): {sorted(stale)}")
+            results["resumed_at"] = datetime.now(timezone.utc).isoformat()
+            self.db.ceo_workflow_executions.update_one(
+                {"_id": execution_id},
+                {"$set": {"status": "in_progress", "resumed_at": results["resumed_at"]}, "$inc": {"resume_count": 1}}
+            )
+            logger.info(f"♻️ Reluare execuție {execution_id}: {len(outputs)}/{len(phases)} faze deja complete")
+        else:
+            results = {
+                "site_url": site_url,
+                "start_time": datetime.now(timezone.utc).isoformat(),
+                "status": "in_progress",
+                "phases": {}
+            }
+            execution_id = self.db.ceo_workflow_executions.insert_one({**results, "checkpoints": {}}).inserted_id
+            results.pop("_id", None)
+        
+        ctx = {
             "site_url": site_url,
-            "start_time": datetime.now(timezone.utc).isoformat(),
-            "phases": {}
+            "results_per_keyword": results_per_keyword,
+            "parallel_gpu_agents": parallel_gpu_agents,
+            "outputs": outputs,
         }
         
         try:
-            # =================================================================
-            # FAZA 1: Creare Agent Master cu Qwen GPU paralel + chunks Qdrant
-            # =================================================================
-            logger.info("\n" + "="*80)
-            logger.info("📍 FAZA 1/8: Creare Agent Master (Qwen GPU + Qdrant)")
-            logger.info("="*80)
-            
-            phase1_start = time.time()
-            
-            # Track: CREATE_MASTER
-            if self.workflow_tracker:
-                try:
-                    from workflow_tracking_system import WorkflowStep, StepStatus
-                    self.workflow_tracker.track_step(
-                        step=WorkflowStep.CREATE_MASTER,
-                        status=StepStatus.IN_PROGRESS,
-                        details={"url": site_url, "started_at": datetime.now(timezone.utc).isoformat()}
-                    )
-                except Exception as e:
-                    logger.warning(f"Could not track CREATE_MASTER step: {e}")
-            
-            master_agent_result = await self._phase1_create_master_agent(site_url)
-            phase1_duration = time.time() - phase1_start
-            
-            # Complete: CREATE_MASTER
-            if self.workflow_tracker and master_agent_result.get("agent_id"):
-                try:
-                    from workflow_tracking_system import WorkflowStep
-                    self.workflow_tracker.complete_step(
-                        step=WorkflowStep.CREATE_MASTER,
-                        agent_id=master_agent_result["agent_id"],
-                        details={
-                            "agent_id": master_agent_result["agent_id"],
-                            "chunks_created": master_agent_result.get("chunks_count", 0),
-                            "pages_scraped": master_agent_result.get("pages_count", 0)
-                        },
-                        metadata={"duration_seconds": phase1_duration}
-                    )
-                except Exception as e:
-                    logger.warning(f"Could not complete CREATE_MASTER step: {e}")
-            
-            results["phases"]["phase1_master_agent"] = {
-                "status": "completed" if master_agent_result["success"] else "failed",
-                "duration_seconds": round(phase1_duration, 2),
-                "agent_id": master_agent_result.get("agent_id"),
-                "chunks_created": master_agent_result.get("chunks_count", 0),
-                "pages_scraped": master_agent_result.get("pages_count", 0)
-            }
-            
-            if not master_agent_result["success"]:
-                raise Exception(f"Phase 1 failed: {master_agent_result.get('error')}")
-            
-            master_agent_id = master_agent_result["agent_id"]
-            logger.info(f"✅ FAZA 1 COMPLETĂ! Agent Master ID: {master_agent_id}")
-            
-            # Track: CRAWL_SPLIT_EMBED
-            if self.workflow_tracker:
-                try:
-                    from workflow_tracking_system import WorkflowStep, StepStatus
-                    self.workflow_tracker.complete_step(
-                        step=WorkflowStep.CRAWL_SPLIT_EMBED,
-                        agent_id=master_agent_id,
-                        details={"chunks_count": master_agent_result.get("chunks_count", 0)}
-                    )
-                    self.workflow_tracker.complete_step(
-                        step=WorkflowStep.QDRANT_STORAGE,
-                        agent_id=master_agent_id,
-                        details={"vectors_stored": master_agent_result.get("chunks_count", 0)}
-                    )
-                except Exception as e:
-                    logger.warning(f"Could not track CRAWL/QDRANT steps: {e}")
-            
-            # =================================================================
-            # FAZA 2: Integrare LangChain pentru orchestrare + memorie
-            # =================================================================
-            logger.info("\n" + "="*80)
-            logger.info("📍 FAZA 2/8: Integrare LangChain (Orchestrare + Memorie)")
-            logger.info("="*80)
-            
-            phase2_start = time.time()
-            
-            # Track: LANGCHAIN_CHAINS
-            if self.workflow_tracker:
-                try:
-                    from workflow_tracking_system import WorkflowStep, StepStatus
-                    self.workflow_tracker.track_step(
-                        step=WorkflowStep.LANGCHAIN_CHAINS,
-                        agent_id=master_agent_id,
-                        status=StepStatus.IN_PROGRESS
-                    )
-                except Exception as e:
-                    logger.warning(f"Could not track LANGCHAIN step: {e}")
-            
-            langchain_result = await self._phase2_integrate_langchain(master_agent_id)
-            phase2_duration = time.time() - phase2_start
-            
-            # Complete: LANGCHAIN_CHAINS
-            if self.workflow_tracker and langchain_result.get("success"):
-                try:
-                    from workflow_tracking_system import WorkflowStep
-                    self.workflow_tracker.complete_step(
-                        step=WorkflowStep.LANGCHAIN_CHAINS,
-                        agent_id=master_agent_id,
-                        details={"memory_enabled": langchain_result.get("memory_enabled")}
-                    )
-                except Exception as e:
-                    logger.warning(f"Could not complete LANGCHAIN step: {e}")
-            
-            results["phases"]["phase2_langchain"] = {
-                "status": "completed" if langchain_result["success"] else "failed",
-                "duration_seconds": round(phase2_duration, 2),
-                "memory_enabled": langchain_result.get("memory_enabled"),
-                "conversation_id": langchain_result.get("conversation_id")
-            }
-            
-            logger.info(f"✅ FAZA 2 COMPLETĂ! LangChain integrat cu memorie")
-            
-            # =================================================================
-            # FAZA 3: DeepSeek devine 'vocea' agentului master
-            # =================================================================
-            logger.info("\n" + "="*80)
-            logger.info("📍 FAZA 3/8: DeepSeek devine 'vocea' Agent Master")
-            logger.info("="*80)
-            
-            phase3_start = time.time()
-            voice_result = await self._phase3_deepseek_voice_integration(master_agent_id)
-            phase3_duration = time.time() - phase3_start
-            
-            results["phases"]["phase3_deepseek_voice"] = {
-                "status": "completed" if voice_result["success"] else "failed",
-                "duration_seconds": round(phase3_duration, 2),
-                "personality_created": voice_result.get("personality_created"),
-                "identity_document": voice_result.get("identity_document")
-            }
-            
-            logger.info(f"✅ FAZA 3 COMPLETĂ! DeepSeek identificat cu agent master")
-            
-            # =================================================================
-            # FAZA 4: DeepSeek descompune site în subdomenii + keywords
-            # =================================================================
-            logger.info("\n" + "="*80)
-            logger.info("📍 FAZA 4/8: DeepSeek descompune site (Subdomenii + Keywords)")
-            logger.info("="*80)
-            
-            phase4_start = time.time()
-            
-            # Track: DEEPSEEK_SUBDOMAINS_KEYWORDS
-            if self.workflow_tracker:
-                try:
-                    from workflow_tracking_system import WorkflowStep, StepStatus
-                    self.workflow_tracker.track_step(
-                        step=WorkflowStep.DEEPSEEK_SUBDOMAINS_KEYWORDS,
-                        agent_id=master_agent_id,
-                        status=StepStatus.IN_PROGRESS
-                    )
-                except Exception as e:
-                    logger.warning(f"Could not track DEEPSEEK_SUBDOMAINS_KEYWORDS step: {e}")
-            
-            analysis_result = await self._phase4_deepseek_decompose_site(master_agent_id)
-            phase4_duration = time.time() - phase4_start
-            
-            # Complete: DEEPSEEK_SUBDOMAINS_KEYWORDS
-            if self.workflow_tracker and analysis_result.get("success"):
-                try:
-                    from workflow_tracking_system import WorkflowStep
-                    total_keywords = sum(len(sd.get("keywords", [])) for sd in analysis_result.get("subdomains", []))
-                    self.workflow_tracker.complete_step(
-                        step=WorkflowStep.DEEPSEEK_SUBDOMAINS_KEYWORDS,
-                        agent_id=master_agent_id,
-                        details={
-                            "subdomains_count": len(analysis_result.get("subdomains", [])),
-                            "total_keywords": total_keywords
-                        }
-                    )
-                except Exception as e:
-                    logger.warning(f"Could not complete DEEPSEEK_SUBDOMAINS_KEYWORDS step: {e}")
-            
-            results["phases"]["phase4_site_decomposition"] = {
-                "status": "completed" if analysis_result["success"] else "failed",
-                "duration_seconds": round(phase4_duration, 2),
-                "subdomains_count": len(analysis_result.get("subdomains", [])),
-                "keywords_per_subdomain": [
-                    {
-                        "subdomain": sd["name"],
-                        "keywords_count": len(sd.get("keywords", []))
-                    }
-                    for sd in analysis_result.get("subdomains", [])
-                ],
-                "total_keywords": sum(len(sd.get("keywords", [])) for sd in analysis_result.get("subdomains", []))
-            }
-            
-            logger.info(f"✅ FAZA 4 COMPLETĂ! {len(analysis_result.get('subdomains', []))} subdomenii, "
-                       f"{results['phases']['phase4_site_decomposition']['total_keywords']} keywords")
-            
-            # =================================================================
-            # FAZA 5: Google Search pentru fiecare keyword
-            # =================================================================
-            logger.info("\n" + "="*80)
-            logger.info("📍 FAZA 5/8: Google Search pentru keywords + Descoperire competitori")
-            logger.info("="*80)
-            
-            phase5_start = time.time()
-            discovery_result = await self._phase5_google_search_competitors(
-                master_agent_id, 
-                results_per_keyword
-            )
-            phase5_duration = time.time() - phase5_start
-            
-            results["phases"]["phase5_competitor_discovery"] = {
-                "status": "completed" if discovery_result["success"] else "failed",
-                "duration_seconds": round(phase5_duration, 2),
-                "competitors_found": len(discovery_result.get("competitors", [])),
-                "keywords_searched": discovery_result.get("keywords_searched", 0),
-                "total_urls_analyzed": discovery_result.get("total_urls_analyzed", 0)
-            }
-            
-            logger.info(f"✅ FAZA 5 COMPLETĂ! {len(discovery_result.get('competitors', []))} competitori descoperiți")
-            
-            # =================================================================
-            # FAZA 6: Creare Hartă Competitivă CEO
-            # =================================================================
-            logger.info("\n" + "="*80)
-            logger.info("📍 FAZA 6/8: Creare Hartă Competitivă CEO (Ranking + Poziții)")
-            logger.info("="*80)
-            
-            phase6_start = time.time()
-            ceo_map_result = await self._phase6_create_ceo_competitive_map(
-                master_agent_id,
-                discovery_result.get("competitors", []),
-                analysis_result.get("subdomains", [])
-            )
-            phase6_duration = time.time() - phase6_start
-            
-            results["phases"]["phase6_ceo_map"] = {
-                "status": "completed" if ceo_map_result["success"] else "failed",
-                "duration_seconds": round(phase6_duration, 2),
-                "map_id": ceo_map_result.get("map_id"),
-                "master_position_avg": ceo_map_result.get("master_position_avg"),
-                "market_coverage": ceo_map_result.get("market_coverage")
-            }
-            
-            logger.info(f"✅ FAZA 6 COMPLETĂ! Hartă CEO creată (ID: {ceo_map_result.get('map_id')})")
-            
-            # =================================================================
-            # FAZA 7: Transformare competitori în agenți AI (paralel GPU)
-            # =================================================================
-            logger.info("\n" + "="*80)
-            logger.info("📍 FAZA 7/8: Transformare competitori în agenți AI (Paralel GPU)")
-            logger.info("="*80)
-            
-            phase7_start = time.time()
-            agents_creation_result = await self._phase7_create_competitor_agents_parallel(
-                discovery_result.get("competitors", []),
-                parallel_gpu_agents,
-                master_agent_id=master_agent_id  # Pass master ID!
-            )
-            phase7_duration = time.time() - phase7_start
-            
-            results["phases"]["phase7_competitor_agents"] = {
-                "status": "completed" if agents_creation_result["success"] else "failed",
-                "duration_seconds": round(phase7_duration, 2),
-                "agents_created": len(agents_creation_result.get("agent_ids", [])),
-                "failed_agents": len(agents_creation_result.get("failed", [])),
-                "parallel_gpu_count": parallel_gpu_agents
-            }
-            
-            logger.info(f"✅ FAZA 7 COMPLETĂ! {len(agents_creation_result.get('agent_ids', []))} agenți competitori creați")
-            
-            # =================================================================
-            # FAZA 8: Organogramă master-slave cu raportare ierarhică
-            # =================================================================
-            logger.info("\n" + "="*80)
-            logger.info("📍 FAZA 8/8: Organogramă Master-Slave + Raportare Ierarhică")
-            logger.info("="*80)
-            
-            phase8_start = time.time()
-            orgchart_result = await self._phase8_create_master_slave_orgchart(
-                master_agent_id,
-                agents_creation_result.get("agent_ids", [])
-            )
-            phase8_duration = time.time() - phase8_start
-            
-            results["phases"]["phase8_orgchart"] = {
-                "status": "completed" if orgchart_result["success"] else "failed",
-                "duration_seconds": round(phase8_duration, 2),
-                "orgchart_id": orgchart_result.get("orgchart_id"),
-                "total_agents": orgchart_result.get("total_agents"),
-                "hierarchy_levels": orgchart_result.get("hierarchy_levels")
-            }
-            
-            logger.info(f"✅ FAZA 8 COMPLETĂ! Organogramă creată cu {orgchart_result.get('total_agents')} agenți")
+            await self._run_phase_graph(phases, ctx, results, execution_id)
             
             # =================================================================
             # FINALIZARE WORKFLOW
             # =================================================================
             workflow_duration = time.time() - workflow_start
+            master_agent_id = outputs["phase1_master_agent"]["agent_id"]
             
             results["status"] = "completed"
+            results["master_agent_id"] = master_agent_id
+            incomplete = {key: phase["status"] for key, phase in results["phases"].items()
+                          if phase.get("status") in ("failed", "skipped")}
+            if incomplete:
+                results["incomplete_phases"] = incomplete
             results["end_time"] = datetime.now(timezone.utc).isoformat()
             results["total_duration_seconds"] = round(workflow_duration, 2)
             results["total_duration_minutes"] = round(workflow_duration / 60, 2)
             
+            discovery_result = outputs.get("phase5_competitor_discovery", {})
+            agents_creation_result = outputs.get("phase7_competitor_agents", {})
+            
             logger.info("\n" + "="*80)
             logger.info("🎉 CEO MASTER WORKFLOW - COMPLETED!")
             logger.info("="*80)
@@ -421,15 +245,12 @@ class CEOMasterWorkflow:
             logger.info(f"🎯 Master Agent ID: {master_agent_id}")
             logger.info(f"📊 Competitori descoperiți: {len(discovery_result.get('competitors', []))}")
             logger.info(f"🤖 Agenți competitori creați: {len(agents_creation_result.get('agent_ids', []))}")
-            logger.info(f"🗺️  Hartă CEO ID: {ceo_map_result.get('map_id')}")
-            logger.info(f"📈 Organogramă ID: {orgchart_result.get('orgchart_id')}")
+            logger.info(f"🗺️  Hartă CEO ID: {outputs.get('phase6_ceo_map', {}).get('map_id')}")
+            logger.info(f"📈 Organogramă ID: {outputs.get('phase8_orgchart', {}).get('orgchart_id')}")
+            for key, phase in sorted(results["phases"].items(), key=lambda kv: -kv[1].get("duration_seconds", 0)):
+                logger.info(f"   ⏱️  {key}: {phase.get('duration_seconds', 0)}s")
             logger.info("="*80)
             
-            # Salvează rezultatele complete în MongoDB
-            self.db.ceo_workflow_executions.insert_one(results)
-            
-            return results
-            
         except Exception as e:
             logger.error(f"❌ CEO Workflow failed: {e}")
             import traceback
@@ -439,8 +260,260 @@ class CEOMasterWorkflow:
             results["error"] = str(e)
             results["end_time"] = datetime.now(timezone.utc).isoformat()
             results["total_duration_seconds"] = round(time.time() - workflow_start, 2)
-            
-            return results
+        
+        # Starea finală (fazele au fost deja salvate individual)
+        self.db.ceo_workflow_executions.update_one(
+            {"_id": execution_id},
+            {"$set": {k: v for k, v in results.items() if k != "phases"}}
+        )
+        results["execution_id"] = str(execution_id)
+        return results
+    
+    @staticmethod
+    def _stale_dependents(phases: List[WorkflowPhase], outputs: Dict[str, Any]) -> set:
+        """Fazele cu checkpoint care depind (direct sau tranzitiv) de o fază fără checkpoint"""
+        rerun = {phase.key for phase in phases if phase.key not in outputs}
+        stale = set()
+        changed = True
+        while changed:
+            changed = False
+            for phase in phases:
+                if phase.key in outputs and phase.key not in stale and any(d in rerun or d in stale for d in phase.deps):
+                    stale.add(phase.key)
+                    changed = True
+        return stale
+    
+    async def _run_phase_graph(
+        self,
+        phases: List[WorkflowPhase],
+        ctx: Dict[str, Any],
+        results: Dict[str, Any],
+        execution_id: ObjectId
+    ):
+        """
+        Pornește fiecare fază imediat ce dependențele ei s-au terminat cu succes.
+        O fază care aruncă excepție (sau o fază `required` eșuată) oprește workflow-ul;
+        o fază opțională eșuată nu contează ca terminată: dependentele ei sunt sărite
+        (nu rulează pe date goale) și se reiau la resume.
+        """
+        outputs = ctx["outputs"]
+        by_key = {phase.key: phase for phase in phases}
+        done = set(outputs)
+        blocked: set = set()  # faze eșuate sau sărite
+        running: Dict[asyncio.Task, WorkflowPhase] = {}
+        errors: List[str] = []
+        
+        def skip_blocked():
+            changed = True
+            while changed:
+                changed = False
+                for phase in phases:
+                    if phase.key in done or phase.key in blocked or phase in running.values():
+                        continue
+                    failed_deps = [dep for dep in phase.deps if dep in blocked]
+                    if failed_deps:
+                        blocked.add(phase.key)
+                        changed = True
+                        summary = {"status": "skipped", "reason": f"dependency failed: {', '.join(failed_deps)}"}
+                        results["phases"][phase.key] = summary
+                        self.db.ceo_workflow_executions.update_one(
+                            {"_id": execution_id}, {"$set": {f"phases.{phase.key}": summary}}
+                        )
+                        logger.warning(f"⏭️ {phase.key}: sărită ({summary['reason']})")
+        
+        def ready(phase: WorkflowPhase) -> bool:
+            return (
+                phase.key not in done
+                and phase.key not in blocked
+                and all(dep in done for dep in phase.deps)
+                and phase not in running.values()
+            )
+        
+        while True:
+            if not errors:
+                for phase in phases:
+                    if ready(phase):
+                        logger.info("\n" + "="*80)
+                        logger.info(f"📍 {phase.title}")
+                        logger.info("="*80)
+                        running[asyncio.create_task(self._run_phase(phase, ctx))] = phase
+            if not running:
+                break
+            
+            finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                phase = running.pop(task)
+                try:
+                    output, summary = task.result()
+                except Exception as e:
+                    logger.error(f"❌ {phase.key} a aruncat excepție: {e}")
+                    summary = {"status": "failed", "error": str(e)}
+                    output = None
+                    errors.append(f"{phase.key}: {e}")
+                
+                results["phases"][phase.key] = summary
+                update = {f"phases.{phase.key}": summary}
+                if output is not None and output.get("success"):
+                    outputs[phase.key] = output
+                    update[f"checkpoints.{phase.key}"] = output
+                    done.add(phase.key)
+                else:
+                    blocked.add(phase.key)
+                    if output is not None and phase.required:
+                        errors.append(f"{phase.key}: {output.get('error')}")
+                self.db.ceo_workflow_executions.update_one({"_id": execution_id}, {"$set": update})
+                logger.info(f"✅ {phase.key}: {summary['status']} în {summary.get('duration_seconds')}s")
+            skip_blocked()
+        
+        if errors:
+            raise Exception(f"Phase failed: {'; '.join(errors)}")
+        missing = [key for key in by_key if key not in done and key not in blocked]
+        if missing:
+            raise Exception(f"Phases not executed: {missing}")
+    
+    async def _run_phase(self, phase: WorkflowPhase, ctx: Dict[str, Any]):
+        started_at = datetime.now(timezone.utc).isoformat()
+        phase_start = time.time()
+        output, summary = await phase.run(ctx)
+        summary = {
+            "status": "completed" if output.get("success") else "failed",
+            "started_at": started_at,
+            "duration_seconds": round(time.time() - phase_start, 2),
+            **summary
+        }
+        if not output.get("success") and output.get("error"):
+            summary["error"] = output["error"]
+        return output, summary
+    
+    # --- adaptoare: ctx → fază → (output, sumar pentru results["phases"]) ---
+    
+    def _track(self, method: str, step_name: str, **kwargs):
+        if not self.workflow_tracker:
+            return
+        try:
+            from workflow_tracking_system import WorkflowStep, StepStatus
+            if method == "track_step":
+                kwargs.setdefault("status", StepStatus.IN_PROGRESS)
+            getattr(self.workflow_tracker, method)(step=getattr(WorkflowStep, step_name), **kwargs)
+        except Exception as e:
+            logger.warning(f"Could not {method} {step_name}: {e}")
+    
+    @staticmethod
+    def _master_id(ctx: Dict[str, Any]) -> str:
+        return ctx["outputs"]["phase1_master_agent"]["agent_id"]
+    
+    async def _run_phase1(self, ctx: Dict[str, Any]):
+        site_url = ctx["site_url"]
+        self._track("track_step", "CREATE_MASTER",
+                    details={"url": site_url, "started_at": datetime.now(timezone.utc).isoformat()})
+        phase_start = time.time()
+        result = await self._phase1_create_master_agent(site_url)
+        
+        if result.get("agent_id"):
+            master_agent_id = result["agent_id"]
+            self._track("complete_step", "CREATE_MASTER", agent_id=master_agent_id,
+                        details={
+                            "agent_id": master_agent_id,
+                            "chunks_created": result.get("chunks_count", 0),
+                            "pages_scraped": result.get("pages_count", 0)
+                        },
+                        metadata={"duration_seconds": time.time() - phase_start})
+            self._track("complete_step", "CRAWL_SPLIT_EMBED", agent_id=master_agent_id,
+                        details={"chunks_count": result.get("chunks_count", 0)})
+            self._track("complete_step", "QDRANT_STORAGE", agent_id=master_agent_id,
+                        details={"vectors_stored": result.get("chunks_count", 0)})
+            logger.info(f"✅ FAZA 1 COMPLETĂ! Agent Master ID: {master_agent_id}")
+        
+        return result, {
+            "agent_id": result.get("agent_id"),
+            "chunks_created": result.get("chunks_count", 0),
+            "pages_scraped": result.get("pages_count", 0)
+        }
+    
+    async def _run_phase2(self, ctx: Dict[str, Any]):
+        master_agent_id = self._master_id(ctx)
+        self._track("track_step", "LANGCHAIN_CHAINS", agent_id=master_agent_id)
+        result = await self._phase2_integrate_langchain(master_agent_id)
+        if result.get("success"):
+            self._track("complete_step", "LANGCHAIN_CHAINS", agent_id=master_agent_id,
+                        details={"memory_enabled": result.get("memory_enabled")})
+        return result, {
+            "memory_enabled": result.get("memory_enabled"),
+            "conversation_id": result.get("conversation_id")
+        }
+    
+    async def _run_phase3(self, ctx: Dict[str, Any]):
+        result = await self._phase3_deepseek_voice_integration(self._master_id(ctx))
+        return result, {
+            "personality_created": result.get("personality_created"),
+            "identity_document": result.get("identity_document")
+        }
+    
+    async def _run_phase4(self, ctx: Dict[str, Any]):
+        master_agent_id = self._master_id(ctx)
+        self._track("track_step", "DEEPSEEK_SUBDOMAINS_KEYWORDS", agent_id=master_agent_id)
+        result = await self._phase4_deepseek_decompose_site(master_agent_id)
+        subdomains = result.get("subdomains", [])
+        total_keywords = sum(len(sd.get("keywords", [])) for sd in subdomains)
+        if result.get("success"):
+            self._track("complete_step", "DEEPSEEK_SUBDOMAINS_KEYWORDS", agent_id=master_agent_id,
+                        details={"subdomains_count": len(subdomains), "total_keywords": total_keywords})
+        return result, {
+            "subdomains_count": len(subdomains),
+            "keywords_per_subdomain": [
+                {
+                    "subdomain": sd["name"],
+                    "keywords_count": len(sd.get("keywords", []))
+                }
+                for sd in subdomains
+            ],
+            "total_keywords": total_keywords
+        }
+    
+    async def _run_phase5(self, ctx: Dict[str, Any]):
+        result = await self._phase5_google_search_competitors(self._master_id(ctx), ctx["results_per_keyword"])
+        return result, {
+            "competitors_found": len(result.get("competitors", [])),
+            "keywords_searched": result.get("keywords_searched", 0),
+            "total_urls_analyzed": result.get("total_urls_analyzed", 0)
+        }
+    
+    async def _run_phase6(self, ctx: Dict[str, Any]):
+        outputs = ctx["outputs"]
+        result = await self._phase6_create_ceo_competitive_map(
+            self._master_id(ctx),
+            outputs["phase5_competitor_discovery"].get("competitors", []),
+            outputs["phase4_site_decomposition"].get("subdomains", [])
+        )
+        return result, {
+            "map_id": result.get("map_id"),
+            "master_position_avg": result.get("master_position_avg"),
+            "market_coverage": result.get("market_coverage")
+        }
+    
+    async def _run_phase7(self, ctx: Dict[str, Any]):
+        result = await self._phase7_create_competitor_agents_parallel(
+            ctx["outputs"]["phase5_competitor_discovery"].get("competitors", []),
+            ctx["parallel_gpu_agents"],
+            master_agent_id=self._master_id(ctx)  # Pass master ID!
+        )
+        return result, {
+            "agents_created": len(result.get("agent_ids", [])),
+            "failed_agents": len(result.get("failed", [])),
+            "timed_out_agents": result.get("timed_out", 0),
+            "parallel_gpu_count": ctx["parallel_gpu_agents"]
+        }
+    
+    async def _run_phase8(self, ctx: Dict[str, Any]):
+        result = await self._phase8_create_master_slave_orgchart(
+            self._master_id(ctx),
+            ctx["outputs"]["phase7_competitor_agents"].get("agent_ids", [])
+        )
+        return result, {
+            "orgchart_id": result.get("orgchart_id"),
+            "total_agents": result.get("total_agents"),
+            "hierarchy_levels": result.get("hierarchy_levels")
+        }
     
     # =========================================================================
     # IMPLEMENTARE FAZE INDIVIDUALE
@@ -471,7 +544,7 @@ class CEOMasterWorkflow:
                 # - Upload chunks la Qdrant
                 # - Salvare în MongoDB
                 
-                result = self.agent_creator.create_site_agent(site_url)
+                result = await asyncio.to_thread(self.agent_creator.create_site_agent, site_url)
                 
                 # Găsește agentul după domain (construction_agent_creator poate returna ID invalid)
                 agent = self.db.site_agents.find_one({"domain": domain}, sort=[("_id", -1)])
@@ -538,7 +611,7 @@ class CEOMasterWorkflow:
             logger.info(f"🎤 DeepSeek devine vocea agentului {agent_id}")
             
             # Obține context complet agent
-            full_context = self.deepseek_analyzer.get_full_agent_context(agent_id)
+            full_context = await asyncio.to_thread(self.deepseek_analyzer.get_full_agent_context, agent_id)
             
             # Prompt pentru DeepSeek să se identifice cu agentul
             identity_prompt = f"""
@@ -573,7 +646,8 @@ Răspunde în format JSON cu acest document de identitate.
 """
             
             # Trimite la DeepSeek
-            response = self.llm.chat(
+            response = await asyncio.to_thread(
+                self.llm.chat,
                 messages=[
                     {"role": "system", "content": "Ești un expert în brand identity și AI agent personality design."},
                     {"role": "user", "content": identity_prompt}
@@ -627,7 +701,7 @@ Răspunde în format JSON cu acest document de identitate.
             logger.info(f"🔬 DeepSeek descompune site-ul agentului {agent_id}")
             
             # Folosește DeepSeekCompetitiveAnalyzer existent
-            analysis = self.deepseek_analyzer.analyze_for_competition_discovery(agent_id)
+            analysis = await asyncio.to_thread(self.deepseek_analyzer.analyze_for_competition_discovery, agent_id)
             
             # Salvează analiza
             self.db.competitive_analysis.insert_one({
@@ -660,7 +734,8 @@ Răspunde în format JSON cu acest document de identitate.
             logger.info(f"🔍 Google Search pentru agent {agent_id}")
             
             # Folosește GoogleCompetitorDiscovery existent
-            discovery = self.google_discovery.discover_competitors_for_agent(
+            discovery = await asyncio.to_thread(
+                self.google_discovery.discover_competitors_for_agent,
                 agent_id=agent_id,
                 results_per_keyword=results_per_keyword,
                 use_api=False  # Folosește scraping pentru unlimited queries
@@ -743,68 +818,87 @@ Răspunde în format JSON cu acest document de identitate.
             
             slave_ids = []
             failed = []
-            
-            # Procesează competitori în batch-uri paralele pentru utilizare maximă GPU
-            total_batches = (len(competitors) + parallel_count - 1) // parallel_count
-            
-            for batch_num in range(total_batches):
-                batch_start = batch_num * parallel_count
-                batch_end = min(batch_start + parallel_count, len(competitors))
-                batch_competitors = competitors[batch_start:batch_end]
-                
-                logger.info(f"   ⚡ Processing batch {batch_num + 1}/{total_batches} ({len(batch_competitors)} competitors in parallel on {num_gpus} GPU-uri)")
-                
-                # Creează task-uri paralele pentru batch-ul curent
-                batch_tasks = []
-                for idx, competitor in enumerate(batch_competitors):
-                    # Distribuie pe GPU-uri diferite (round-robin) pentru utilizare uniformă
-                    gpu_id = idx % num_gpus if num_gpus > 0 else None
-                    
-                    logger.info(f"      📍 Task {batch_start + idx}: {competitor.get('domain', 'unknown')[:30]}... → GPU {gpu_id}")
-                    
-                    # Creează coroutine pentru fiecare competitor cu GPU specific
-                    task = self.learning_system.create_slave_from_competitor(
+            timed_out = 0
+            total = len(competitors)
+            queue = list(enumerate(competitors))
+            queue.reverse()  # pop() din coadă păstrează ordinea SERP
+            phase_start = time.monotonic()
+            
+            def report(idx: int, status: str):
+                done = len(slave_ids) + len(failed)
+                elapsed = time.monotonic() - phase_start
+                rate = done / elapsed if elapsed > 0 else 0.0
+                eta = (total - done) / rate if rate > 0 else 0.0
+                logger.info(
+                    f"      {status} [{idx+1}/{total}] done {done}/{total} | "
+                    f"{rate * 60:.1f} agents/min | ETA {eta / 60:.1f} min"
+                )
+            
+            async def worker(slot: int):
+                # Fiecare slot are GPU-ul lui (round-robin) → fereastra de N creări rămâne plină:
+                # de îndată ce un competitor se termină, slotul ia următorul, fără să aștepte batch-ul
+                nonlocal timed_out
+                gpu_id = slot % num_gpus if num_gpus > 0 else None
+                while queue:
+                    idx, competitor = queue.pop()
+                    logger.info(f"      📍 Task {idx}: {competitor.get('domain', 'unknown')[:30]}... → GPU {gpu_id}")
+                    task = asyncio.ensure_future(self.learning_system.create_slave_from_competitor(
                         competitor_url=competitor.get("url"),
                         master_agent_id=master_agent_id,
                         keyword=competitor.get("keyword", "unknown"),
                         serp_position=competitor.get("serp_position", 0),
                         gpu_id=gpu_id  # Pasează GPU ID pentru distribuție
-                    )
-                    batch_tasks.append((task, competitor, batch_start + idx))
-                
-                # Rulează batch-ul în paralel - toate GPU-urile active simultan
-                results = await asyncio.gather(*[task for task, _, _ in batch_tasks], return_exceptions=True)
-                
-                # Procesează rezultatele batch-ului
-                for (_, competitor, idx), result in zip(batch_tasks, results):
+                    ))
                     try:
-                        if isinstance(result, Exception):
-                            raise result
-                        
+                        finished, _ = await asyncio.wait({task}, timeout=PHASE7_TASK_TIMEOUT)
+                        if not finished:
+                            # Termen limită ferm: task-ul e anulat, competitorul marcat timed_out,
+                            # iar slotul trece la următorul (un site blocat nu ține faza pe loc)
+                            task.cancel()
+                            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                            timed_out += 1
+                            failed.append({
+                                "url": competitor.get("url"),
+                                "error": f"timed out after {PHASE7_TASK_TIMEOUT}s",
+                                "timed_out": True
+                            })
+                            report(idx, f"⏱️ Timed out after {PHASE7_TASK_TIMEOUT}s, cancelled")
+                            continue
+                        result = task.result()
                         if result.get("success"):
                             slave_ids.append(result["slave_agent_id"])
-                            logger.info(f"      ✅ [{idx+1}/{len(competitors)}] SLAVE created: {result['slave_agent_id']}")
+                            report(idx, f"✅ SLAVE created: {result['slave_agent_id']}")
                         else:
                             failed.append({
                                 "url": competitor.get("url"),
                                 "error": result.get("error")
                             })
-                            logger.warning(f"      ❌ [{idx+1}/{len(competitors)}] Failed: {result.get('error')}")
-                            
+                            report(idx, f"❌ Failed: {result.get('error')}")
+                    except asyncio.CancelledError:
+                        task.cancel()
+                        raise
                     except Exception as e:
-                        logger.error(f"      ❌ [{idx+1}/{len(competitors)}] Exception: {e}")
                         failed.append({
                             "url": competitor.get("url"),
                             "error": str(e)
                         })
+                        report(idx, f"❌ Exception: {e}")
             
-            logger.info(f"✅ Phase 7 completed: {len(slave_ids)} slaves created, {len(failed)} failed")
+            await asyncio.gather(*[worker(slot) for slot in range(max(1, min(parallel_count, total)))])
+            
+            elapsed = time.monotonic() - phase_start
+            logger.info(
+                f"✅ Phase 7 completed: {len(slave_ids)} slaves created, {len(failed)} failed "
+                f"({timed_out} timed out after {PHASE7_TASK_TIMEOUT}s) in {elapsed / 60:.1f} min"
+            )
             
             return {
                 "success": True,
                 "agent_ids": slave_ids,
                 "failed": failed,
-                "total_processed": len(competitors)
+                "timed_out": timed_out,
+                "total_processed": len(competitors),
+                "duration_seconds": round(elapsed, 2)
             }
             
         except Exception as e:
@@ -902,14 +996,25 @@ async def main():
     parser.add_argument('--site-url', required=True, help='URL site master')
     parser.add_argument('--results-per-keyword', type=int, default=15, help='Rezultate Google per keyword')
     parser.add_argument('--parallel-gpu', type=int, default=5, help='Agenți paralel pe GPU')
+    parser.add_argument('--resume', help='ID execuție de reluat (fazele complete nu se mai rulează)')
+    parser.add_argument('--resume-latest', action='store_true', help='Reia ultima execuție eșuată pentru --site-url')
     
     args = parser.parse_args()
     
     workflow = CEOMasterWorkflow()
+    resume_id = args.resume
+    if args.resume_latest and not resume_id:
+        resume_id = workflow.latest_failed_execution(args.site_url)
+        if resume_id:
+            logger.info(f"♻️ Reluare execuție {resume_id}")
+        else:
+            logger.info("Nicio execuție eșuată de reluat - pornesc una nouă")
+    
     result = await workflow.execute_full_workflow(
         site_url=args.site_url,
         results_per_keyword=args.results_per_keyword,
-        parallel_gpu_agents=args.parallel_gpu
+        parallel_gpu_agents=args.parallel_gpu,
+        resume_execution_id=resume_id
     )
     
     print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -38,6 +38,7 @@ try:
 except ImportError:
     HuggingFaceEmbeddings = None
 from qdrant_client import QdrantClient
+from qdrant_tenancy import get_tenant_client
 
 # Qwen Memory
 from qwen_memory import QwenMemory
@@ -77,12 +78,12 @@ class ChatMemoryIntegration:
         # Qdrant pentru vector store
         self.qdrant_url = os.getenv("QDRANT_URL", "http://127.0.0.1:6333")
         self.qdrant_api_key = os.getenv("QDRANT_API_KEY")
-        self.qdrant_client = QdrantClient(
+        self.qdrant_client = get_tenant_client(QdrantClient(
             url=self.qdrant_url,
             api_key=self.qdrant_api_key,
             prefer_grpc=True,
             force_disable_check_same_thread=True
-        )
+        ))
     
     async def save_chat_interaction(
         self,
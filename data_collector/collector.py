@@ -179,6 +179,13 @@ def save_interaction(
         
         logger.info(f"✅ Saved interaction {interaction_id} from {provider_name} (topic: {topic})")
         
+        # Contoare incrementale pentru auto-training (pragul e verificat aici, nu pe chat)
+        try:
+            from training_trigger import get_training_trigger
+            get_training_trigger().record_interaction(agent_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Training trigger update failed: {e}")
+        
         return interaction_id
         
     except Exception as e:
@@ -11,11 +11,16 @@ def get_embedder():
 
 
 from qdrant_client import QdrantClient
-from qdrant_client.models import (
-    Distance, VectorParams, PointStruct,
-    HnswConfigDiff, OptimizersConfigDiff
-)
+from qdrant_client.models import Distance, PointStruct
 from config.database_config import QDRANT_HOST, QDRANT_PORT, QDRANT_COLLECTION
+import qdrant_profiles
+from qdrant_tenancy import get_tenant_client
+
+# Cache-ul de rezultate al căutării vector (golit după scrieri)
+try:
+    from langchain_agents.tools.vector_search_tool import invalidate_search_cache
+except ImportError:
+    invalidate_search_cache = None
 
 
 # ========= Embedding Provider: TEI (GPU) / Ollama / ST fallback =========
@@ -166,7 +171,7 @@ class EmbeddingProvider:
 
 class QdrantVectorizer:
     def __init__(self):
-        self.client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT,)
+        self.client = get_tenant_client(QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT,))
         self.collection_name = QDRANT_COLLECTION
         self.embedder = EmbeddingProvider(
             backend=os.getenv("EMBED_BACKEND", "tei"),
@@ -210,12 +215,8 @@ class QdrantVectorizer:
 
     def create_collection(self):
         try:
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(size=self._vector_size, distance=Distance.COSINE),
-                hnsw_config=HnswConfigDiff(m=16, ef_construct=200),
-                optimizers_config=OptimizersConfigDiff(memmap_threshold=20000, indexing_threshold=20000),
-            )
+            # profilul site_content: indexuri url/domain/language, int8 în RAM, vectori pe disc
+            qdrant_profiles.create_collection(self.client, self.collection_name, self._vector_size, Distance.COSINE)
             print(f"✅ Qdrant collection '{self.collection_name}' created (size={self._vector_size})")
         except Exception as e:
             print(f"ℹ️ Create collection: {e}")
@@ -248,6 +249,8 @@ class QdrantVectorizer:
             pid = self._normalize_id(content_id)
             point = PointStruct(id=pid, vector=embedding, payload=metadata)
             self.client.upsert(collection_name=self.collection_name, points=[point])
+            if invalidate_search_cache is not None:
+                invalidate_search_cache(self.collection_name)
             print(f"✅ Upsert în Qdrant (1 punct) pentru {pid}")
         except Exception as e:
             print(f"❌ Error storing in Qdrant: {e}")
@@ -266,6 +269,8 @@ class QdrantVectorizer:
                 print("ℹ️ Nu sunt puncte de upsert.")
                 return
             self.client.upsert(collection_name=self.collection_name, points=points)
+            if invalidate_search_cache is not None:
+                invalidate_search_cache(self.collection_name)
             print(f"✅ Batch upsert to Qdrant: {len(points)} points")
         except Exception as e:
             print(f"❌ Error in batch upsert: {e}")
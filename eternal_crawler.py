@@ -12,6 +12,7 @@ from bs4 import BeautifulSoup
 
 # Import local
 import ro_crawler_config as config
+from mongo_bulk_writer import MongoBulkWriter
 from adapters.hybrid_scraper import get_hybrid_scraper
 from adapters.lambda_scraper import LambdaScraper
 
@@ -33,6 +34,9 @@ class EternalCrawler:
         self.queue = self.db[config.COLLECTION_QUEUE]
         self.sites = self.db[config.COLLECTION_SITES]
         
+        # Write-behind pentru update-urile per URL (queue status + sites)
+        self.writer = MongoBulkWriter(max_batch=500, flush_interval=2.0).start()
+        
         # Select Scraper Strategy
         if getattr(config, 'USE_AWS_LAMBDA', False):
             logger.info("🌩️ POWER UP: Using AWS Lambda Swarm for scraping!")
@@ -120,7 +124,8 @@ class EternalCrawler:
             
         if self.domain_counts.get(domain, 0) >= config.MAX_PAGES_PER_DOMAIN:
             logger.info(f"⏭️ Skipping {url} (Domain limit reached: {self.domain_counts.get(domain, 0)})")
-            self.queue.update_one(
+            self.writer.update_one(
+                self.queue,
                 {"_id": url_doc['_id']},
                 {"$set": {"status": "completed", "reason": "limit_reached", "completed_at": datetime.now(timezone.utc)}}
             )
@@ -156,7 +161,8 @@ class EternalCrawler:
                 f.write(content)
             
             # 4. Update DB
-            self.sites.update_one(
+            self.writer.update_one(
+                self.sites,
                 {"url": url},
                 {"$set": {
                     "domain": domain,
@@ -171,7 +177,8 @@ class EternalCrawler:
             
             self.domain_counts[domain] = self.domain_counts.get(domain, 0) + 1
             
-            self.queue.update_one(
+            self.writer.update_one(
+                self.queue,
                 {"_id": url_doc['_id']},
                 {"$set": {"status": "completed", "completed_at": datetime.now(timezone.utc)}}
             )
@@ -183,7 +190,8 @@ class EternalCrawler:
             
         except Exception as e:
             logger.warning(f"❌ Failed {url}: {e}")
-            self.queue.update_one(
+            self.writer.update_one(
+                self.queue,
                 {"_id": url_doc['_id']},
                 {
                     "$set": {"status": "failed", "last_error": str(e)},
@@ -232,3 +240,5 @@ if __name__ == "__main__":
         asyncio.run(crawler.run())
     except KeyboardInterrupt:
         logger.info("🛑 Crawler stopped by user")
+    finally:
+        crawler.writer.close()
@@ -43,6 +43,12 @@ except ImportError as e:
     print(f"⚠️  Import warning: {e}")
     print("   Some modules may not be available, using fallbacks")
 
+# Cache-ul de rezultate al căutării vector (golit după scrieri)
+try:
+    from langchain_agents.tools.vector_search_tool import invalidate_search_cache
+except ImportError:
+    invalidate_search_cache = None
+
 logger = logging.getLogger(__name__)
 
 class FullSlaveAgentCreator:
@@ -248,6 +254,8 @@ Răspunde JSON:
                         vectors=embeddings,
                         payloads=[{'chunk_index': i, 'content': chunk} for i, chunk in enumerate(chunks)]
                     )
+                    if invalidate_search_cache is not None:
+                        invalidate_search_cache(collection_name)
                     logger.info(f"   ✅ Vectors stored in Qdrant: {collection_name}")
                 except Exception as e:
                     logger.error(f"   ❌ Qdrant storage failed: {e}")
@@ -6,6 +6,7 @@ from pymongo import MongoClient
 from bson import ObjectId
 from sentence_transformers import SentenceTransformer
 from qdrant_client import QdrantClient
+from qdrant_tenancy import get_tenant_client
 from qdrant_client.models import Distance, VectorParams, PointStruct
 import time
 
@@ -19,7 +20,7 @@ if device == "cuda":
 # Connect
 mongo_client = MongoClient("mongodb://localhost:27017/")
 db = mongo_client["ai_agents_db"]
-qdrant_client = QdrantClient(url="http://127.0.0.1:6333")
+qdrant_client = get_tenant_client(QdrantClient(url="http://127.0.0.1:6333"))
 
 # Load model cu GPU
 print("\n📦 Loading SentenceTransformer model...")
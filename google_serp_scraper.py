@@ -21,7 +21,13 @@ class GoogleSerpScraper:
     Folosește Brave Search API pentru a obține rezultate organice
     """
     
-    def __init__(self):
+    def __init__(self, registry=None):
+        """
+        Args:
+            registry: SERPKeywordRegistry opțional - dacă e dat, batch-urile
+                      refolosesc snapshot-ul zilei în loc să refacă fetch-ul
+        """
+        self.registry = registry
         self.brave_api_key = os.getenv("BRAVE_API_KEY")
         self.brave_base_url = "https://api.search.brave.com/res/v1/web/search"
         
@@ -160,7 +166,8 @@ class GoogleSerpScraper:
         self, 
         keywords: List[str], 
         num_results: int = 20,
-        country: str = "ro"
+        country: str = "ro",
+        agent_id: Optional[str] = None
     ) -> Dict[str, List[Dict]]:
         """
         Caută multiple keywords în batch
@@ -169,10 +176,22 @@ class GoogleSerpScraper:
             keywords: Lista de keywords
             num_results: Rezultate per keyword
             country: Țara
+            agent_id: Agent care urmărește keywords (pentru registry)
         
         Returns:
             Dict mapping keyword → results
         """
+        if self.registry is not None:
+            # Un fetch per keyword per zi, partajat între toți agenții
+            return self.registry.get_or_fetch_many(
+                keywords,
+                market=country,
+                fetcher=lambda kw: self.search_keyword(kw, num_results=num_results, country=country),
+                depth=num_results,
+                agent_id=agent_id,
+                delay=1.0
+            )
+        
         results_map = {}
         
         for i, keyword in enumerate(keywords, 1):
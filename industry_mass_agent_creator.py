@@ -9,13 +9,16 @@ Sistem pentru transformarea întregii industrii de construcții din România
 import asyncio
 import logging
 import traceback
+from collections import deque
 from typing import List, Dict, Optional
 from datetime import datetime, timezone, timedelta
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument
 from bson import ObjectId
 from llm_orchestrator import LLMOrchestrator
 from ceo_master_workflow import CEOMasterWorkflow
 from industry_transformation_logger import IndustryTransformationLogger
+from mongo_bulk_writer import get_bulk_writer
+from adaptive_pipeline import AdaptivePipeline, AIMDController, Stage, SKIP
 
 logger = logging.getLogger(__name__)
 
@@ -446,35 +449,33 @@ class MassAgentCreator:
         # Collections
         self.agents_collection = self.db["site_agents"]
         self.mass_creation_progress = self.db["mass_agent_creation_progress"]
+        # Rezultat per (batch, domeniu) - servește și ca checkpoint pentru resume
+        self.mass_creation_results = self.db["mass_agent_creation_results"]
+        self.mass_creation_results.create_index([("batch_id", 1), ("status", 1)])
         
         logger.info("✅ Mass Agent Creator initialized")
     
-    async def create_agent_for_company(self, company: Dict, priority: int = 0) -> Dict:
-        """
-        Creează un agent master pentru o companie
-        
-        Args:
-            company: Dict cu datele companiei
-            priority: Prioritate (0 = normal, 1 = high)
+    def _check_existing(self, company: Dict) -> Optional[Dict]:
+        """Rezultatul final dacă agentul nu trebuie creat (fără domeniu / există deja)"""
+        domain = company.get("domeniu", "")
+        if not domain:
+            return {"success": False, "error": "No domain provided"}
         
-        Returns:
-            Dict cu rezultatul creării
-        """
+        # Verifică dacă agentul există deja
+        existing = self.agents_collection.find_one({"domain": domain})
+        if existing:
+            return {
+                "success": True,
+                "agent_id": str(existing["_id"]),
+                "status": "already_exists",
+                "domain": domain
+            }
+        return None
+    
+    async def _run_agent_workflow(self, company: Dict) -> Dict:
+        """Rulează CEOMasterWorkflow pentru o companie nouă"""
+        domain = company.get("domeniu", "")
         try:
-            domain = company.get("domeniu", "")
-            if not domain:
-                return {"success": False, "error": "No domain provided"}
-            
-            # Verifică dacă agentul există deja
-            existing = self.agents_collection.find_one({"domain": domain})
-            if existing:
-                return {
-                    "success": True,
-                    "agent_id": str(existing["_id"]),
-                    "status": "already_exists",
-                    "domain": domain
-                }
-            
             # Construiește URL
             if not domain.startswith("http"):
                 site_url = f"https://{domain}"
@@ -516,6 +517,31 @@ class MassAgentCreator:
                     "domain": domain
                 }
                 
+        except Exception as e:
+            logger.error(f"Error creating agent for {domain or 'unknown'}: {e}")
+            logger.error(traceback.format_exc())
+            return {
+                "success": False,
+                "error": str(e),
+                "domain": domain or "unknown"
+            }
+    
+    async def create_agent_for_company(self, company: Dict, priority: int = 0) -> Dict:
+        """
+        Creează un agent master pentru o companie
+        
+        Args:
+            company: Dict cu datele companiei
+            priority: Prioritate (0 = normal, 1 = high)
+        
+        Returns:
+            Dict cu rezultatul creării
+        """
+        try:
+            existing = self._check_existing(company)
+            if existing:
+                return existing
+            return await self._run_agent_workflow(company)
         except Exception as e:
             logger.error(f"Error creating agent for {company.get('domeniu', 'unknown')}: {e}")
             logger.error(traceback.format_exc())
@@ -525,19 +551,62 @@ class MassAgentCreator:
                 "domain": company.get("domeniu", "unknown")
             }
     
+    def _record_result(self, batch_id: str, company: Dict, result: Dict, writer):
+        """Persistă rezultatul (checkpoint) și actualizează contoarele batch-ului"""
+        domain = company.get("domeniu") or result.get("domain") or "unknown"
+        if result.get("success"):
+            counter = "already_exists" if result.get("status") == "already_exists" else "created"
+        else:
+            counter = "failed"
+        
+        # Checkpoint durabil (scriere directă): un agent creat nu se reface la resume
+        previous = self.mass_creation_results.find_one_and_update(
+            {"_id": f"{batch_id}:{domain}"},
+            {
+                "$set": {
+                    "batch_id": batch_id,
+                    "domain": domain,
+                    "status": counter,
+                    "agent_id": result.get("agent_id"),
+                    "error": result.get("error"),
+                    "finished_at": datetime.now(timezone.utc)
+                },
+                "$inc": {"attempts": 1}
+            },
+            projection={"status": 1},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        increments = {counter: 1}
+        # O companie reîncercată la resume își mută contorul (ex: failed → created)
+        if previous and previous.get("status") in ("created", "already_exists", "failed"):
+            increments[previous["status"]] = increments.get(previous["status"], 0) - 1
+        writer.update_one(
+            self.mass_creation_progress,
+            {"batch_id": batch_id},
+            {"$inc": increments}
+        )
+    
     async def create_mass_agents(
         self,
         companies: List[Dict],
         max_parallel: Optional[int] = None,  # Auto-calculează dacă None
-        batch_id: Optional[str] = None
+        batch_id: Optional[str] = None,
+        resume: bool = True
     ) -> Dict:
         """
         Creează agenți în masă pentru o listă de companii
         
+        Pipeline pe etape (check → create → persist), fiecare cu coada și
+        pool-ul ei. Pool-ul etapei "create" e adaptiv (AIMD din CPU/RAM/latență),
+        plafonat la max_parallel. Rezultatele sunt scrise pe măsură ce apar,
+        iar un batch reluat (același batch_id) sare peste companiile terminate.
+        
         Args:
             companies: Lista de companii
-            max_parallel: Numărul maxim de agenți creați în paralel (None = auto-calculează)
-            batch_id: ID-ul batch-ului (opțional)
+            max_parallel: Plafonul de agenți creați în paralel (None = auto-calculează)
+            batch_id: ID-ul batch-ului (opțional; dat explicit pentru resume)
+            resume: Sare peste companiile deja procesate în acest batch
         
         Returns:
             Dict cu rezultatele
@@ -557,51 +626,93 @@ class MassAgentCreator:
             if not batch_id:
                 batch_id = f"batch_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}"
             
-            logger.info(f"🏗️ Starting mass agent creation: {len(companies)} companies, {max_parallel} parallel, batch_id: {batch_id}")
-            
-            # Creează entry pentru tracking
-            progress_entry = {
-                "batch_id": batch_id,
-                "total_companies": len(companies),
-                "created": 0,
-                "failed": 0,
-                "already_exists": 0,
-                "in_progress": 0,
-                "started_at": datetime.now(timezone.utc),
-                "status": "running"
-            }
-            self.mass_creation_progress.insert_one(progress_entry)
+            # Checkpoint: companiile terminate cu succes în acest batch; cele eșuate se reîncearcă
+            done_domains = set()
+            failed_domains = set()
+            if resume:
+                for doc in self.mass_creation_results.find({"batch_id": batch_id}, {"domain": 1, "status": 1}):
+                    if doc.get("status") == "failed":
+                        failed_domains.add(doc["domain"])
+                    else:
+                        done_domains.add(doc["domain"])
             
-            # Procesează companiile în batch-uri paralele
-            semaphore = asyncio.Semaphore(max_parallel)
-            results = []
+            logger.info(
+                f"🏗️ Starting mass agent creation: {len(companies)} companies, up to {max_parallel} parallel, "
+                f"batch_id: {batch_id}"
+                + (f", resuming ({len(done_domains)} already done, {len(failed_domains)} failed to retry)"
+                   if done_domains or failed_domains else "")
+            )
             
-            async def create_with_semaphore(company):
-                async with semaphore:
-                    result = await self.create_agent_for_company(company)
-                    results.append(result)
-                    
-                    # Actualizează progresul
-                    if result.get("success"):
-                        if result.get("status") == "already_exists":
-                            self.mass_creation_progress.update_one(
-                                {"batch_id": batch_id},
-                                {"$inc": {"already_exists": 1}}
-                            )
-                        else:
-                            self.mass_creation_progress.update_one(
-                                {"batch_id": batch_id},
-                                {"$inc": {"created": 1}}
-                            )
-                    else:
-                        self.mass_creation_progress.update_one(
-                            {"batch_id": batch_id},
-                            {"$inc": {"failed": 1}}
-                        )
+            # Creează entry pentru tracking (păstrat la resume)
+            self.mass_creation_progress.update_one(
+                {"batch_id": batch_id},
+                {
+                    "$setOnInsert": {
+                        "batch_id": batch_id,
+                        "created": 0,
+                        "failed": 0,
+                        "already_exists": 0,
+                        "in_progress": 0,
+                        "started_at": datetime.now(timezone.utc)
+                    },
+                    "$set": {
+                        "total_companies": len(companies),
+                        "status": "running",
+                        "max_parallel": max_parallel
+                    }
+                },
+                upsert=True
+            )
             
-            # Rulează toate creările
-            tasks = [create_with_semaphore(company) for company in companies]
-            await asyncio.gather(*tasks, return_exceptions=True)
+            # Contoarele $inc per companie sunt comasate în bulk writes
+            writer = get_bulk_writer()
+            recent_results = deque(maxlen=100)
+            skipped = {"resumed": 0, "retried": 0}
+            
+            async def check_stage(company):
+                domain = company.get("domeniu", "")
+                if domain and domain in done_domains:
+                    skipped["resumed"] += 1
+                    return SKIP
+                if domain in failed_domains:
+                    skipped["retried"] += 1
+                existing = self._check_existing(company)
+                if existing:
+                    self._record_result(batch_id, company, existing, writer)
+                    recent_results.append(existing)
+                    return SKIP
+                return company
+            
+            async def create_stage(company):
+                return company, await self._run_agent_workflow(company)
+            
+            async def persist_stage(item):
+                company, result = item
+                self._record_result(batch_id, company, result, writer)
+                recent_results.append(result)
+                return SKIP
+            
+            controller = AIMDController(
+                min_limit=min(2, max_parallel),
+                max_limit=max_parallel,
+                initial=min(2, max_parallel)
+            )
+            pipeline = AdaptivePipeline([
+                Stage("check", check_stage, workers=4),
+                Stage("create", create_stage, controller=controller),
+                Stage("persist", persist_stage, workers=2)
+            ])
+            
+            pipeline_stats = await pipeline.run(companies)
+            writer.flush(self.mass_creation_progress)
+            
+            # Totaluri din checkpoint (include rezultatele din rulări anterioare ale batch-ului)
+            totals = {"created": 0, "already_exists": 0, "failed": 0}
+            for row in self.mass_creation_results.aggregate([
+                {"$match": {"batch_id": batch_id}},
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+            ]):
+                totals[row["_id"]] = row["count"]
             
             # Finalizează progresul
             self.mass_creation_progress.update_one(
@@ -609,7 +720,9 @@ class MassAgentCreator:
                 {
                     "$set": {
                         "status": "completed",
-                        "completed_at": datetime.now(timezone.utc)
+                        "completed_at": datetime.now(timezone.utc),
+                        "pipeline": pipeline_stats,
+                        "parallelism_history": controller.history[-50:]
                     }
                 }
             )
@@ -617,13 +730,17 @@ class MassAgentCreator:
             summary = {
                 "batch_id": batch_id,
                 "total": len(companies),
-                "created": sum(1 for r in results if r.get("success") and r.get("status") == "created"),
-                "already_exists": sum(1 for r in results if r.get("success") and r.get("status") == "already_exists"),
-                "failed": sum(1 for r in results if not r.get("success")),
-                "results": results
+                "created": totals["created"],
+                "already_exists": totals["already_exists"],
+                "failed": totals["failed"],
+                "skipped_resumed": skipped["resumed"],
+                "retried_failed": skipped["retried"],
+                "pipeline": pipeline_stats,
+                # Doar ultimele rezultate; lista completă e în mass_agent_creation_results
+                "results": list(recent_results)
             }
             
-            logger.info(f"✅ Mass agent creation completed: {summary}")
+            logger.info(f"✅ Mass agent creation completed: {totals} ({pipeline_stats['elapsed_seconds']}s)")
             return summary
             
         except Exception as e:
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+⚡ Inference Backends - Embedders și cross-encoder pe CPU, fp32 / int8 / ONNX
+
+Aceeași interfață indiferent de backend:
+- load_sentence_embedder(model) → obiect cu .encode(texts, ...) ca SentenceTransformer
+- load_cross_encoder(model)     → (tokenizer, model) apelabil ca AutoModelForSequenceClassification
+
+Backend-uri (INFERENCE_BACKEND sau argument explicit):
+- torch: fp32, comportamentul actual
+- int8:  torch dynamic quantization pe straturile Linear (fără export, fără dependențe noi)
+- onnx:  export ONNX + quantizare dinamică int8 prin onnxruntime/optimum (cache în ONNX_CACHE_DIR)
+
+Orice backend indisponibil cade pe torch fp32, cu warning.
+
+Usage:
+    python inference_backends.py --kind embed --model all-MiniLM-L6-v2 --backends torch,int8,onnx
+    python inference_backends.py --kind rerank --model BAAI/bge-reranker-v2-m3
+"""
+
+import argparse
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import torch
+    HAS_TORCH = True
+except ImportError:
+    HAS_TORCH = False
+
+try:
+    from sentence_transformers import SentenceTransformer
+    HAS_SENTENCE_TRANSFORMERS = True
+except ImportError:
+    HAS_SENTENCE_TRANSFORMERS = False
+
+try:
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    HAS_OPTIMUM = True
+except ImportError:
+    HAS_OPTIMUM = False
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "int8", "onnx")
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", os.path.expanduser("~/.cache/onnx_models"))
+# Configurația de quantizare ONNX pentru embedders (arm64 | avx2 | avx512 | avx512_vnni)
+ONNX_QUANT_CONFIG = os.getenv("ONNX_QUANT_CONFIG", "avx2")
+
+# Pragurile de paritate față de fp32
+MIN_EMBED_COSINE = 0.99
+MAX_RERANK_RANK_CHANGE = 0.1
+
+
+def _resolve(backend: Optional[str]) -> str:
+    backend = (backend or INFERENCE_BACKEND).lower()
+    if backend not in BACKENDS:
+        logger.warning(f"⚠️ Unknown inference backend '{backend}', using torch")
+        return "torch"
+    return backend
+
+
+def _quantize_torch(model):
+    """int8 dinamic pe nn.Linear (activări cuantizate la runtime, doar CPU)"""
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _onnx_dir(model_id: str, kind: str) -> str:
+    return os.path.join(ONNX_CACHE_DIR, kind, model_id.replace("/", "__"))
+
+
+# ----------------------------------------------------------------------
+# Embedders
+# ----------------------------------------------------------------------
+
+def _quantized_onnx_embedder(model_name: str):
+    """
+    ONNX int8 (sentence-transformers >= 3.2): export + quantizare dinamică o singură dată
+    în ONNX_CACHE_DIR, apoi încărcare explicită a fișierului quantizat (nu model.onnx fp32)
+    """
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    path = _onnx_dir(model_name, "embed")
+    file_name = f"onnx/model_qint8_{ONNX_QUANT_CONFIG}.onnx"
+    if not os.path.exists(os.path.join(path, file_name)):
+        model = SentenceTransformer(model_name, device="cpu", backend="onnx")
+        model.save_pretrained(path)
+        export_dynamic_quantized_onnx_model(model, ONNX_QUANT_CONFIG, path)
+    return SentenceTransformer(path, device="cpu", backend="onnx", model_kwargs={"file_name": file_name})
+
+
+def load_sentence_embedder(model_name: str, backend: Optional[str] = None, device: str = "cpu"):
+    """
+    SentenceTransformer (sau echivalent) pe backend-ul cerut
+
+    Returns:
+        Obiect cu .encode(texts, batch_size=..., convert_to_numpy=..., normalize_embeddings=...)
+    """
+    if not HAS_SENTENCE_TRANSFORMERS:
+        raise ImportError("sentence-transformers is required for embedders")
+
+    backend = _resolve(backend)
+    if backend == "torch" or device != "cpu":
+        return SentenceTransformer(model_name, device=device)
+
+    if backend == "onnx":
+        try:
+            model = _quantized_onnx_embedder(model_name)
+            logger.info(f"⚡ {model_name}: ONNX int8 ({ONNX_QUANT_CONFIG})")
+            return model
+        except Exception as e:
+            logger.warning(
+                f"⚠️ ONNX int8 embedder unavailable for {model_name} ({e}), using torch int8 dynamic quantization"
+            )
+
+    model = SentenceTransformer(model_name, device="cpu")
+    try:
+        model = _quantize_torch(model)
+        logger.info(f"⚡ {model_name}: int8 dynamic quantization")
+    except Exception as e:
+        logger.warning(f"⚠️ int8 quantization failed for {model_name} ({e}), using fp32")
+    return model
+
+
+class EmbeddingsAdapter:
+    """
+    Interfața LangChain Embeddings (embed_documents / embed_query) peste un embedder
+    încărcat cu load_sentence_embedder
+    """
+
+    def __init__(self, model_name: str, backend: Optional[str] = None, normalize: bool = True, batch_size: int = 64):
+        self.model_name = model_name
+        self.model = load_sentence_embedder(model_name, backend)
+        self.normalize = normalize
+        self.batch_size = batch_size
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.model.encode(
+            list(texts), batch_size=self.batch_size,
+            normalize_embeddings=self.normalize, convert_to_numpy=True
+        )
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+# ----------------------------------------------------------------------
+# Cross-encoder
+# ----------------------------------------------------------------------
+
+def export_quantized_onnx(model_id: str) -> str:
+    """
+    Export ONNX + quantizare dinamică int8 (o singură dată, apoi din cache)
+
+    Returns:
+        Directorul cu model_quantized.onnx
+    """
+    target = _onnx_dir(model_id, "rerank")
+    if os.path.exists(os.path.join(target, "model_quantized.onnx")):
+        return target
+
+    os.makedirs(target, exist_ok=True)
+    model = ORTModelForSequenceClassification.from_pretrained(model_id, export=True)
+    model.save_pretrained(target)
+    quantizer = ORTQuantizer.from_pretrained(target)
+    quantizer.quantize(
+        save_dir=target,
+        quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    )
+    logger.info(f"💾 Quantized ONNX export for {model_id} → {target}")
+    return target
+
+
+def load_cross_encoder(model_id: str, device: str = "cpu", backend: Optional[str] = None) -> Tuple[object, object]:
+    """
+    Tokenizer + model de clasificare pe backend-ul cerut (gata de inferență)
+
+    Returns:
+        (tokenizer, model); model(**enc).logits are aceeași formă pe orice backend
+    """
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    backend = _resolve(backend)
+    tokenizer = AutoTokenizer.from_pretrained(model_id, use_fast=True)
+
+    if backend == "onnx" and device == "cpu":
+        if HAS_OPTIMUM:
+            try:
+                path = export_quantized_onnx(model_id)
+                model = ORTModelForSequenceClassification.from_pretrained(path, file_name="model_quantized.onnx")
+                logger.info(f"⚡ {model_id}: ONNX int8 backend")
+                return tokenizer, model
+            except Exception as e:
+                logger.warning(f"⚠️ ONNX cross-encoder unavailable for {model_id} ({e}), using int8")
+        else:
+            logger.warning("⚠️ optimum[onnxruntime] not installed, using int8")
+        backend = "int8"
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_id)
+    model.eval()
+    if backend == "int8" and device == "cpu":
+        try:
+            model = _quantize_torch(model)
+            logger.info(f"⚡ {model_id}: int8 dynamic quantization")
+        except Exception as e:
+            logger.warning(f"⚠️ int8 quantization failed for {model_id} ({e}), using fp32")
+    else:
+        model.to(device)
+    return tokenizer, model
+
+
+# ----------------------------------------------------------------------
+# Paritate + benchmark
+# ----------------------------------------------------------------------
+
+def embed_parity(reference, candidate, texts: Sequence[str]) -> Dict:
+    """Cosinus între vectorii fp32 și cei ai backend-ului testat"""
+    a = np.asarray(reference.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True))
+    b = np.asarray(candidate.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True))
+    cosine = np.sum(a * b, axis=1)
+    return {
+        "mean_cosine": round(float(cosine.mean()), 5),
+        "min_cosine": round(float(cosine.min()), 5),
+        "ok": bool(cosine.min() >= MIN_EMBED_COSINE)
+    }
+
+
+def rerank_parity(reference: Callable[[str, List[str]], List[float]], candidate: Callable[[str, List[str]], List[float]],
+                  query: str, docs: List[str]) -> Dict:
+    """Delta de scor + câte poziții din clasament se schimbă"""
+    a = np.asarray(reference(query, docs), dtype=np.float64)
+    b = np.asarray(candidate(query, docs), dtype=np.float64)
+    delta = np.abs(a - b)
+    rank_a = np.argsort(-a, kind="stable")
+    rank_b = np.argsort(-b, kind="stable")
+    changed = float(np.mean(rank_a != rank_b)) if len(docs) else 0.0
+    return {
+        "max_score_delta": round(float(delta.max()), 5) if len(docs) else 0.0,
+        "mean_score_delta": round(float(delta.mean()), 5) if len(docs) else 0.0,
+        "rank_positions_changed": round(changed, 3),
+        "ok": changed <= MAX_RERANK_RANK_CHANGE
+    }
+
+
+def benchmark(fn: Callable[[], int], repeats: int = 3) -> Dict:
+    """
+    Args:
+        fn: rulează un batch și întoarce numărul de itemi procesați
+
+    Returns:
+        items/sec (cel mai bun din `repeats`, după un warm-up)
+    """
+    fn()
+    best = None
+    items = 0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        items = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return {"items": items, "seconds": round(best, 4), "items_per_sec": round(items / best, 1) if best else 0.0}
+
+
+def _sample_texts(n: int) -> List[str]:
+    base = [
+        "Servicii de protecție la foc și ignifugare pentru construcții industriale",
+        "Prețuri stingătoare și verificare anuală ISU în București",
+        "How to choose a fire alarm system for a small office",
+        "Montaj sisteme de detecție incendiu, mentenanță și service autorizat",
+        "Ghid complet pentru audit de securitate la incendiu",
+    ]
+    return [f"{base[i % len(base)]} #{i}" for i in range(n)]
+
+
+def _score_fn(tokenizer, model):
+    def score(query: str, docs: List[str]) -> List[float]:
+        with torch.inference_mode():
+            enc = tokenizer([query] * len(docs), docs, padding=True, truncation=True, max_length=512, return_tensors="pt")
+            return model(**enc).logits.squeeze(-1).float().tolist()
+    return score
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Parity + throughput: fp32 vs int8 vs ONNX pe CPU")
+    parser.add_argument("--kind", choices=["embed", "rerank"], default="embed")
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--backends", default="torch,int8,onnx")
+    parser.add_argument("--samples", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    if HAS_TORCH:
+        logger.info(f"🧵 torch threads: {torch.get_num_threads()}")
+
+    texts = _sample_texts(args.samples)
+    backends = [_resolve(b) for b in args.backends.split(",") if b.strip()]
+    report = {}
+
+    if args.kind == "embed":
+        model_name = args.model or "all-MiniLM-L6-v2"
+        reference = load_sentence_embedder(model_name, "torch")
+        for backend in backends:
+            model = reference if backend == "torch" else load_sentence_embedder(model_name, backend)
+            report[backend] = {
+                "throughput": benchmark(lambda: len(model.encode(texts, batch_size=args.batch_size, convert_to_numpy=True))),
+                "parity": embed_parity(reference, model, texts[:64])
+            }
+    else:
+        model_id = args.model or "BAAI/bge-reranker-v2-m3"
+        query = "verificare stingătoare preț București"
+        reference = _score_fn(*load_cross_encoder(model_id, "cpu", "torch"))
+        for backend in backends:
+            score = reference if backend == "torch" else _score_fn(*load_cross_encoder(model_id, "cpu", backend))
+            report[backend] = {
+                "throughput": benchmark(lambda: len(score(query, texts[:args.batch_size]))),
+                "parity": rerank_parity(reference, score, query, texts[:64])
+            }
+
+    baseline = report.get("torch", {}).get("throughput", {}).get("items_per_sec")
+    print(f"\n{'backend':<8} {'items/s':>10} {'speedup':>8}  parity")
+    for backend, result in report.items():
+        speed = result["throughput"]["items_per_sec"]
+        speedup = f"{speed / baseline:.2f}x" if baseline else "-"
+        print(f"{backend:<8} {speed:>10} {speedup:>8}  {result['parity']}")
+
+
+if __name__ == "__main__":
+    main()
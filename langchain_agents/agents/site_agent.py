@@ -86,7 +86,8 @@ class SiteAgent:
             search_tool = Tool(
                 name="search_site_content",
                 description="Caută informații relevante în conținutul site-ului. Folosește când utilizatorul întreabă despre servicii, produse, contact, sau alte informații despre site.",
-                func=lambda query: self.vector_search_tool.search_relevant(query, k=5)
+                func=lambda query: self.vector_search_tool.search_relevant(query, k=5),
+                coroutine=lambda query: self.vector_search_tool.asearch_relevant(query, k=5)
             )
             tools.append(search_tool)
         
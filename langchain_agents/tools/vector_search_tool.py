@@ -1,159 +1,441 @@
 """
 Vector Search Tool - Tool LangChain pentru căutare semantică în Qdrant
 
-Integrează Qdrant prin QdrantVectorStore din LangChain pentru RAG.
+Toate tool-urile din proces folosesc un singur backend (get_search_backend()):
+- modelul de embeddings și clientul Qdrant vin din resource_registry (încărcate o dată)
+- handle-urile per agent sunt refolosite între apeluri (create_vector_search_tool)
+- căutările async concurente sunt grupate: un singur embed_documents pentru toate
+  query-urile și un singur search_batch per colecție
+- rezultatele stau într-un cache LRU mărginit, invalidat când colecția se schimbă
+  (re-ingest) - explicit prin invalidate_search_cache() de scriitorii din același proces,
+  altfel detectat prin (țintă alias, points_count), verificat cel mult la VECTOR_CACHE_CHECK_SECONDS
+
+Usage:
+    tool = create_vector_search_tool(agent_id)
+    docs = tool.search("servicii oferite")              # sync
+    docs = await tool.asearch("servicii oferite")       # async, grupat cu alte query-uri
 """
 
+import asyncio
+import atexit
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timezone
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
 
 # LangChain imports
 try:
-    from langchain_core.tools import tool
-    from langchain_community.vectorstores import Qdrant as LangchainQdrant
-    from langchain_huggingface import HuggingFaceEmbeddings
+    from langchain_core.tools import StructuredTool
 except ImportError:
     try:
-        from langchain.tools import tool
-        from langchain.vectorstores import Qdrant as LangchainQdrant
-        from langchain_huggingface import HuggingFaceEmbeddings
+        from langchain.tools import StructuredTool
     except ImportError:
-        tool = None
-        LangchainQdrant = None
-        HuggingFaceEmbeddings = None
+        StructuredTool = None
 
-from qdrant_client import QdrantClient
-import os
+from resource_registry import get_registry
 
 logger = logging.getLogger(__name__)
 
 QDRANT_URL = os.getenv("QDRANT_URL", "http://127.0.0.1:6333")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+EMBEDDING_MODEL = "BAAI/bge-large-en-v1.5"
 
+VECTOR_CACHE_SIZE = int(os.getenv("VECTOR_CACHE_SIZE", "2048"))
+VECTOR_CACHE_TTL = float(os.getenv("VECTOR_CACHE_TTL", "600"))
+VECTOR_CACHE_CHECK_SECONDS = float(os.getenv("VECTOR_CACHE_CHECK_SECONDS", "30"))
+VECTOR_BATCH_WINDOW_MS = float(os.getenv("VECTOR_BATCH_WINDOW_MS", "5"))
+VECTOR_BATCH_MAX = int(os.getenv("VECTOR_BATCH_MAX", "64"))
 
-class VectorSearchTool:
+# (collection, query, k)
+QueryKey = Tuple[str, str, int]
+
+
+class VectorSearchBackend:
     """
-    Tool pentru căutare semantică în Qdrant
+    Embeddings + Qdrant partajate, cache de rezultate și grupare a query-urilor concurente
     """
-    
-    def __init__(self, agent_id: str, collection_name: Optional[str] = None):
-        self.agent_id = agent_id
-        self.collection_name = collection_name or f"agent_{agent_id}"
-        
-        # Embeddings
+
+    def __init__(
+        self,
+        cache_size: int = VECTOR_CACHE_SIZE,
+        cache_ttl: float = VECTOR_CACHE_TTL,
+        check_every: float = VECTOR_CACHE_CHECK_SECONDS,
+        batch_window_ms: float = VECTOR_BATCH_WINDOW_MS,
+        batch_max: int = VECTOR_BATCH_MAX
+    ):
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.check_every = check_every
+        self.batch_window = batch_window_ms / 1000.0
+        self.batch_max = batch_max
+
+        self._embeddings = None
+        self._client = None
+        self._init_lock = threading.Lock()
+
+        # key → (stored_at, documents)
+        self._cache: "OrderedDict[QueryKey, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # collection → (checked_at, points_count)
+        self._versions: Dict[str, Tuple[float, Optional[int]]] = {}
+
+        # per event loop: query-uri în așteptare + timer-ul de flush
+        self._pending: Dict[int, List[Tuple[QueryKey, asyncio.Future]]] = {}
+        self._timers: Dict[int, asyncio.TimerHandle] = {}
+
+        self._handles: Dict[Tuple[str, str], "VectorSearchTool"] = {}
+        self._handles_lock = threading.Lock()
+
+        self.metrics = {
+            "queries": 0,
+            "cache_hits": 0,
+            "batches": 0,
+            "batched_queries": 0,
+            "embedded": 0,
+            "invalidations": 0,
+            "errors": 0
+        }
+
+    # ------------------------------------------------------------------
+    # Resurse
+    # ------------------------------------------------------------------
+
+    @property
+    def embeddings(self):
+        # INFERENCE_BACKEND=int8/onnx → model cuantizat
+        if self._embeddings is None:
+            with self._init_lock:
+                if self._embeddings is None:
+                    self._embeddings = get_registry().hf_embeddings(EMBEDDING_MODEL, device='cpu', normalize=True)
+        return self._embeddings
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._init_lock:
+                if self._client is None:
+                    from qdrant_tenancy import get_tenant_client
+                    self._client = get_tenant_client(get_registry().qdrant(QDRANT_URL, api_key=QDRANT_API_KEY))
+        return self._client
+
+    def handle(self, agent_id: str, collection_name: Optional[str] = None) -> "VectorSearchTool":
+        """Handle-ul (refolosit) pentru un agent / colecție"""
+        collection_name = collection_name or f"agent_{agent_id}"
+        key = (agent_id, collection_name)
+        with self._handles_lock:
+            tool = self._handles.get(key)
+            if tool is None:
+                tool = VectorSearchTool(agent_id, collection_name, backend=self)
+                self._handles[key] = tool
+            return tool
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    def _alias_target(self, collection_name: str) -> Optional[str]:
+        for description in self.client.get_aliases().aliases:
+            if description.alias_name == collection_name:
+                return description.collection_name
+        return None
+
+    def _collection_version(self, collection_name: str) -> Optional[Tuple[Optional[str], int]]:
+        """(colecția spre care indică alias-ul, points_count): un rebuild cu swap de alias schimbă ținta"""
         try:
-            self.embeddings = HuggingFaceEmbeddings(
-                model_name="BAAI/bge-large-en-v1.5",
-                model_kwargs={'device': 'cpu'},
-                encode_kwargs={'normalize_embeddings': True}
-            )
+            return self._alias_target(collection_name), self.client.count(collection_name, exact=False).count
         except Exception as e:
-            logger.error(f"❌ Failed to initialize embeddings: {e}")
-            self.embeddings = None
-        
-        # Qdrant Vector Store
+            logger.debug(f"Could not read version of {collection_name}: {e}")
+            return None
+
+    def _version_due(self, collection_name: str) -> bool:
+        checked = self._versions.get(collection_name)
+        return checked is None or time.monotonic() - checked[0] >= self.check_every
+
+    def _check_version(self, collection_name: str):
+        """Golește cache-ul colecției dacă numărul de puncte s-a schimbat (re-ingest în alt proces)"""
+        if not self._version_due(collection_name):
+            return
+        checked = self._versions.get(collection_name)
+        version = self._collection_version(collection_name)
+        if checked is not None and version != checked[1]:
+            self.invalidate(collection_name)
+        self._versions[collection_name] = (time.monotonic(), version)
+
+    @staticmethod
+    def _copy(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Apelanții primesc copii: o listă modificată de un tool nu strică cache-ul"""
+        return [{**doc, "metadata": dict(doc.get("metadata") or {})} for doc in documents]
+
+    def _cache_get(self, key: QueryKey, check: bool = True) -> Optional[List[Dict[str, Any]]]:
+        if self.cache_size <= 0:
+            return None
+        if check:
+            self._check_version(key[0])
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.cache_ttl:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            self.metrics["cache_hits"] += 1
+            return self._copy(entry[1])
+
+    def _cache_put(self, key: QueryKey, documents: List[Dict[str, Any]]):
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic(), self._copy(documents))
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def invalidate(self, collection_name: Optional[str] = None):
+        """Golește cache-ul (o colecție sau tot) - apelat după re-ingest"""
+        with self._cache_lock:
+            if collection_name is None:
+                self._cache.clear()
+                self._versions.clear()
+            else:
+                for key in [k for k in self._cache if k[0] == collection_name]:
+                    del self._cache[key]
+                self._versions.pop(collection_name, None)
+        self.metrics["invalidations"] += 1
+
+    # ------------------------------------------------------------------
+    # Căutare
+    # ------------------------------------------------------------------
+
+    def _search_many(self, keys: List[QueryKey]) -> Dict[QueryKey, List[Dict[str, Any]]]:
+        """Un embed_documents pentru toate query-urile, un search_batch per colecție"""
+        from qdrant_client import models
+        import qdrant_profiles
+
+        unique = list(dict.fromkeys(keys))
+        texts = list(dict.fromkeys(query for _, query, _ in unique))
+        vectors = dict(zip(texts, self.embeddings.embed_documents(texts)))
+        self.metrics["embedded"] += len(texts)
+
+        by_collection: Dict[str, List[QueryKey]] = {}
+        for key in unique:
+            by_collection.setdefault(key[0], []).append(key)
+
+        results: Dict[QueryKey, List[Dict[str, Any]]] = {}
+        for collection_name, collection_keys in by_collection.items():
+            params = qdrant_profiles.search_params_for(collection_name)
+            requests = [
+                models.SearchRequest(vector=list(vectors[query]), limit=k, with_payload=True, params=params)
+                for _, query, k in collection_keys
+            ]
+            batches = self.client.search_batch(collection_name, requests=requests)
+            for key, hits in zip(collection_keys, batches):
+                results[key] = [
+                    {
+                        "content": (hit.payload or {}).get("page_content", ""),
+                        "metadata": (hit.payload or {}).get("metadata", {}),
+                        "score": float(hit.score)
+                    }
+                    for hit in hits
+                ]
+            self.metrics["batches"] += 1
+            self.metrics["batched_queries"] += len(collection_keys)
+
+        for key, documents in results.items():
+            self._cache_put(key, documents)
+        return results
+
+    def search(self, collection_name: str, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        key = (collection_name, query, k)
+        self.metrics["queries"] += 1
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        return self._search_many([key])[key]
+
+    async def asearch(self, collection_name: str, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Ca search(), dar query-urile venite în aceeași fereastră se execută împreună"""
+        key = (collection_name, query, k)
+        self.metrics["queries"] += 1
+        if self.cache_size > 0 and self._version_due(collection_name):
+            # count() e un request HTTP: nu blocăm event loop-ul
+            await asyncio.to_thread(self._check_version, collection_name)
+        cached = self._cache_get(key, check=False)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        loop_id = id(loop)
+        future = loop.create_future()
+        pending = self._pending.setdefault(loop_id, [])
+        pending.append((key, future))
+
+        if len(pending) >= self.batch_max:
+            self._flush(loop)
+        elif loop_id not in self._timers:
+            self._timers[loop_id] = loop.call_later(self.batch_window, self._flush, loop)
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop):
+        loop_id = id(loop)
+        timer = self._timers.pop(loop_id, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(loop_id, [])
+        if batch:
+            loop.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[QueryKey, asyncio.Future]]):
         try:
-            self.vectorstore = LangchainQdrant(
-                client=QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY),
-                collection_name=self.collection_name,
-                embeddings=self.embeddings
-            )
-            logger.info(f"✅ VectorSearchTool initialized for agent {agent_id}")
+            results = await asyncio.to_thread(self._search_many, [key for key, _ in batch])
         except Exception as e:
-            logger.error(f"❌ Failed to initialize Qdrant vectorstore: {e}")
-            self.vectorstore = None
-    
+            self.metrics["errors"] += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in batch:
+            if not future.done():
+                future.set_result(results.get(key, []))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {**self.metrics, "cached": len(self._cache), "handles": len(self._handles)}
+
+    def close(self):
+        self._cache.clear()
+        self._handles.clear()
+
+
+_default_backend: Optional[VectorSearchBackend] = None
+_default_lock = threading.Lock()
+
+
+def get_search_backend() -> VectorSearchBackend:
+    """Backend-ul partajat la nivel de proces"""
+    global _default_backend
+    with _default_lock:
+        if _default_backend is None:
+            _default_backend = VectorSearchBackend()
+            atexit.register(_default_backend.close)
+        return _default_backend
+
+
+def invalidate_search_cache(collection_name: Optional[str] = None):
+    """
+    Apelat de scriitori după upsert / swap de alias. Nu creează backend-ul:
+    fără căutări în acest proces nu există cache de golit.
+    """
+    if _default_backend is not None:
+        _default_backend.invalidate(collection_name)
+
+
+class VectorSearchTool:
+    """
+    Tool pentru căutare semantică în Qdrant
+    """
+
+    def __init__(self, agent_id: str, collection_name: Optional[str] = None,
+                 backend: Optional[VectorSearchBackend] = None):
+        self.agent_id = agent_id
+        self.collection_name = collection_name or f"agent_{agent_id}"
+        self.backend = backend or get_search_backend()
+
     def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
         """
         Caută în vectori similari
-        
+
         Args:
             query: Query de căutare
             k: Număr de rezultate
-        
+
         Returns:
             Lista de documente similare
         """
-        if not self.vectorstore:
-            logger.warning("⚠️ Vectorstore not available")
+        try:
+            return self.backend.search(self.collection_name, query, k=k)
+        except Exception as e:
+            logger.error(f"❌ Error searching vectors: {e}")
             return []
-        
+
+    async def asearch(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Varianta async a search(); grupată cu celelalte căutări concurente"""
         try:
-            results = self.vectorstore.similarity_search_with_score(query, k=k)
-            
-            documents = []
-            for doc, score in results:
-                documents.append({
-                    "content": doc.page_content,
-                    "metadata": doc.metadata,
-                    "score": float(score)
-                })
-            
-            return documents
-            
+            return await self.backend.asearch(self.collection_name, query, k=k)
         except Exception as e:
             logger.error(f"❌ Error searching vectors: {e}")
             return []
-    
+
+    @staticmethod
+    def _format(query: str, documents: List[Dict[str, Any]]) -> str:
+        if not documents:
+            return "Nu s-au găsit informații relevante."
+
+        result_text = f"Informații relevante pentru '{query}':\n\n"
+        for i, doc in enumerate(documents, 1):
+            result_text += f"{i}. {doc['content'][:500]}...\n"
+            result_text += f"   (Relevanță: {doc['score']:.2%})\n\n"
+
+        return result_text
+
     def search_relevant(self, query: str, k: int = 5) -> str:
         """
         Caută și returnează text relevant pentru context
-        
+
         Args:
             query: Query de căutare
             k: Număr de rezultate
-        
+
         Returns:
             Text concatenat cu rezultatele relevante
         """
-        documents = self.search(query, k=k)
-        
-        if not documents:
-            return "Nu s-au găsit informații relevante."
-        
-        result_text = f"Informații relevante pentru '{query}':\n\n"
-        for i, doc in enumerate(documents, 1):
-            result_text += f"{i}. {doc['content'][:500]}...\n"
-            result_text += f"   (Relevanță: {1 - doc['score']:.2%})\n\n"
-        
-        return result_text
+        return self._format(query, self.search(query, k=k))
+
+    async def asearch_relevant(self, query: str, k: int = 5) -> str:
+        """Varianta async a search_relevant()"""
+        return self._format(query, await self.asearch(query, k=k))
 
 
 def create_vector_search_tool(agent_id: str) -> Optional[VectorSearchTool]:
     """
-    Creează un tool de căutare vectorială pentru un agent
-    
+    Returnează tool-ul de căutare vectorială al unui agent (refolosit între apeluri)
+
     Args:
         agent_id: ID-ul agentului
-    
+
     Returns:
         VectorSearchTool sau None
     """
     try:
-        return VectorSearchTool(agent_id)
+        return get_search_backend().handle(agent_id)
     except Exception as e:
         logger.error(f"❌ Failed to create VectorSearchTool: {e}")
         return None
 
 
-# Tool LangChain decorator (dacă este disponibil)
-if tool:
-    @tool
-    def search_site_content(query: str, agent_id: str) -> str:
-        """
-        Caută informații relevante în conținutul site-ului agentului.
-        
-        Args:
-            query: Întrebarea sau termenul de căutare
-            agent_id: ID-ul agentului
-        
-        Returns:
-            Text cu informații relevante
-        """
-        search_tool = create_vector_search_tool(agent_id)
-        if not search_tool:
-            return "Tool de căutare nu este disponibil."
-        
-        return search_tool.search_relevant(query, k=5)
+def _search_site_content(query: str, agent_id: str) -> str:
+    search_tool = create_vector_search_tool(agent_id)
+    if not search_tool:
+        return "Tool de căutare nu este disponibil."
+    return search_tool.search_relevant(query, k=5)
+
+
+async def _asearch_site_content(query: str, agent_id: str) -> str:
+    search_tool = create_vector_search_tool(agent_id)
+    if not search_tool:
+        return "Tool de căutare nu este disponibil."
+    return await search_tool.asearch_relevant(query, k=5)
+
 
+# Tool LangChain (dacă este disponibil)
+if StructuredTool:
+    search_site_content = StructuredTool.from_function(
+        func=_search_site_content,
+        coroutine=_asearch_site_content,
+        name="search_site_content",
+        description=(
+            "Caută informații relevante în conținutul site-ului agentului. "
+            "Args: query - întrebarea sau termenul de căutare; agent_id - ID-ul agentului."
+        )
+    )
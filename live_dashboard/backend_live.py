@@ -29,6 +29,8 @@ logger = logging.getLogger(__name__)
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from websocket_fanout import FanoutHub, SlowConsumerPolicy
+
 # FastAPI app
 app = FastAPI(title="Live AI Dashboard", description="Real-time monitoring pentru toate nodurile AI")
 
@@ -45,35 +47,41 @@ app.add_middleware(
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Set[WebSocket] = set()
+        # Bounded per-client send queues; only full-state snapshots coalesce for slow clients
+        self.hub = FanoutHub(max_queue=32, policy=SlowConsumerPolicy.DROP_OLDEST)
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.active_connections.add(websocket)
+        self.hub.add(websocket, websocket)
         logger.info(f"✅ New WebSocket connection. Total: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket):
         self.active_connections.discard(websocket)
+        self.hub.remove(websocket)
         logger.info(f"❌ WebSocket disconnected. Remaining: {len(self.active_connections)}")
 
-    async def broadcast(self, message: dict):
-        """Broadcast message to all connected clients"""
+    def send_personal(self, websocket: WebSocket, message: dict, coalesce_key: Optional[str] = None):
+        """Queue a message for one client (same writer as broadcasts, so order is kept)"""
+        self.hub.send_to(websocket, message, coalesce_key=coalesce_key)
+
+    async def broadcast(self, message: dict, coalesce_key: Optional[str] = None):
+        """
+        Broadcast message to all connected clients (serialized once, non-blocking).
+        coalesce_key: only for full-state snapshots, where a newer one supersedes a pending one
+        """
+        # Drop clients whose writer stopped on a send error
+        self.active_connections.intersection_update(self.hub.connections.keys())
         if not self.active_connections:
             return
         
-        disconnected = set()
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting to client: {e}")
-                disconnected.add(connection)
-        
-        # Remove disconnected clients
-        for conn in disconnected:
-            self.disconnect(conn)
+        self.hub.publish(message, coalesce_key=coalesce_key)
 
 manager = ConnectionManager()
 
+# Periodic node/interaction snapshots: a newer one replaces a pending one
+SNAPSHOT_KEY = "snapshot"
+
 # MongoDB connection
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
 DB_NAME = "adbrain_ai"
@@ -447,7 +455,7 @@ async def websocket_endpoint(websocket: WebSocket):
     
     try:
         # Send initial data
-        await websocket.send_json({
+        manager.send_personal(websocket, {
             "type": "connected",
             "message": "Connected to Live Dashboard",
             "timestamp": datetime.now().isoformat()
@@ -461,16 +469,16 @@ async def websocket_endpoint(websocket: WebSocket):
                 
                 # Send back a pong if client sent ping
                 if data == "ping":
-                    await websocket.send_json({"type": "pong", "timestamp": datetime.now().isoformat()})
+                    manager.send_personal(websocket, {"type": "pong", "timestamp": datetime.now().isoformat()})
                 
             except asyncio.TimeoutError:
                 # Send periodic update even if no message received
                 nodes_status = await get_all_nodes_status()
-                await websocket.send_json({
+                manager.send_personal(websocket, {
                     "type": "update",
                     "data": nodes_status,
                     "timestamp": datetime.now().isoformat()
-                })
+                }, coalesce_key=SNAPSHOT_KEY)
             
     except WebSocketDisconnect:
         manager.disconnect(websocket)
@@ -515,7 +523,7 @@ async def broadcast_updates():
                     "timestamp": latest.get("timestamp")
                 }
             
-            await manager.broadcast(message)
+            await manager.broadcast(message, coalesce_key=SNAPSHOT_KEY)
             
         except Exception as e:
             logger.error(f"Error in broadcast_updates: {e}")
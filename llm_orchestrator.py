@@ -15,7 +15,8 @@ Usage:
 """
 
 import os
-from typing import Optional, Dict, List, Any
+import json
+from typing import Optional, Dict, Iterator, List, Any
 from openai import OpenAI
 import logging
 from datetime import datetime
@@ -147,6 +148,78 @@ class LLMOrchestrator:
         else:
             raise RuntimeError(f"LLM call failed: {result.get('error', 'Unknown error')}")
     
+    def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 2000
+    ) -> Iterator[str]:
+        """
+        Ca chat(model="auto"), dar întoarce textul fragment cu fragment (pentru TTS în streaming)
+        
+        Fallback-ul se face doar dacă providerul a eșuat înainte de primul fragment;
+        dacă toți providerii de streaming eșuează, răspunsul vine într-un singur fragment din chat().
+        """
+        self.stats["total_calls"] += 1
+        
+        for name, stream in (
+            ("qwen", lambda: self._stream_qwen_local(messages, temperature, max_tokens)),
+            ("deepseek", lambda: self._stream_deepseek(messages, temperature, max_tokens)),
+        ):
+            started = False
+            try:
+                for delta in stream():
+                    started = True
+                    yield delta
+                if started:
+                    self.stats[f"{name}_successes"] += 1
+                    return
+            except Exception as e:
+                if started:
+                    raise
+                logger.debug(f"Streaming via {name} unavailable: {e}")
+        
+        self.stats["total_calls"] -= 1  # chat() o numără din nou
+        yield self.chat(messages, model="auto", temperature=temperature, max_tokens=max_tokens)
+    
+    def _stream_qwen_local(self, messages, temperature, max_tokens) -> Iterator[str]:
+        self.stats["qwen_calls"] += 1
+        with requests.post(
+            "http://localhost:8000/v1/chat/completions",
+            json={
+                "model": "local-qwen",
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "stream": True
+            },
+            stream=True,
+            timeout=(5, 120)
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+    
+    def _stream_deepseek(self, messages, temperature, max_tokens) -> Iterator[str]:
+        self.stats["deepseek_calls"] += 1
+        stream = self.deepseek_client.chat.completions.create(
+            model="deepseek-chat",
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
     def _try_qwen_local(
         self,
         messages: List[Dict[str, str]],
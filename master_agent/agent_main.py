@@ -61,6 +61,21 @@ app.add_middleware(
 app.include_router(router, prefix="/api", tags=["master-agent"])
 
 
+@app.on_event("startup")
+async def preload_voice_models():
+    """Whisper + TTS încărcate la pornire, nu la prima cerere vocală (VOICE_PRELOAD=0 dezactivează)"""
+    if os.getenv("VOICE_PRELOAD", "1") == "0":
+        return
+    import asyncio
+    from voice.stt_service import get_stt_service
+    from voice.tts_service import get_tts_service
+    
+    await asyncio.gather(
+        asyncio.to_thread(get_stt_service().preload),
+        asyncio.to_thread(get_tts_service().preload)
+    )
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -74,6 +89,7 @@ async def root():
             "state": "/api/state",
             "profile": "/api/profile/{user_id}",
             "learn": "/api/learn",
+            "chat_stream": "/api/chat/stream",
             "websocket": "/api/ws/{user_id}"
         }
     })
@@ -8,7 +8,10 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from typing import Dict, Any, Optional
+import base64
+import threading
+import time
+from typing import Dict, Any, Iterator, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,6 +27,76 @@ class ChatAPI:
         self.actions_executor = actions_executor
         self.tts_service = tts_service
     
+    def _plan(self, user_id: str, message: str):
+        """
+        Detectează intenția și execută acțiunea
+        
+        Returns:
+            (response_text, action, confidence); response_text e None când răspunsul
+            trebuie generat liber de LLM
+        """
+        # Detectează intenția
+        intent_result = self.intent_planner.detect_intent(
+            message,
+            user_id=user_id,
+            context_memory=self.context_memory
+        )
+        
+        action = intent_result.get("action")
+        confidence = intent_result.get("confidence", 0)
+        
+        # Dacă avem o acțiune clară, execută-o
+        if action and confidence >= 0.7:
+            # Execută acțiunea
+            if action in ["build_jsonl", "start_finetune", "update_qdrant"]:
+                action_result = self.actions_executor.execute_action(
+                    action,
+                    user_id,
+                    callback=lambda job_id, status, result: self.profiles_db.update_job(job_id, status, result)
+                )
+                
+                # Salvează job-ul
+                if action_result.get("success"):
+                    job_id = action_result.get("job_id")
+                    self.profiles_db.add_job(user_id, action, job_id)
+                
+                # Generează răspuns
+                response_text = self.intent_planner.generate_response(intent_result, action_result)
+            elif action == "status_nodes":
+                from controllers.node_controller import get_node_controller
+                node_controller = get_node_controller()
+                status = node_controller.get_system_status()
+                response_text = node_controller.format_status_message(status)
+            elif action == "show_recent":
+                recent = self.profiles_db.get_recent_interactions(user_id, limit=5)
+                if recent:
+                    response_text = f"Ultimele {len(recent)} interacțiuni: " + ". ".join([
+                        f"{item.get('message', '')[:30]}..." for item in recent[:3]
+                    ])
+                else:
+                    response_text = "Nu ai interacțiuni recente."
+            else:
+                response_text = self.intent_planner.generate_response(intent_result)
+            return response_text, action, confidence
+        
+        # Nu s-a detectat acțiune clară - folosește orchestrator pentru răspuns inteligent
+        return None, None, confidence
+    
+    def _record(self, user_id: str, message: str, response_text: str, action: Optional[str]):
+        """
+        Salvează interacțiunea și preferințele
+        
+        Contoarele de auto-training nu se actualizează aici: ele numără setul din care se
+        construiește dataset-ul (`interactions`), incrementat de data_collector.save_interaction.
+        """
+        # Salvează interacțiunea
+        self.profiles_db.add_interaction(user_id, message, response_text, action)
+        self.context_memory.store_interaction(user_id, message, response_text, action)
+        
+        # Actualizează preferințe dacă avem acțiune
+        if action:
+            self.profiles_db.update_preferred_action(user_id, action, True)
+    
     def process_chat(self, user_id: str, message: str, generate_audio: bool = True) -> Dict[str, Any]:
         """
         Procesează un mesaj de chat
@@ -37,72 +110,12 @@ class ChatAPI:
             Dict cu text și audio_path
         """
         try:
-            # Detectează intenția
-            intent_result = self.intent_planner.detect_intent(
-                message,
-                user_id=user_id,
-                context_memory=self.context_memory
-            )
-            
-            action = intent_result.get("action")
-            confidence = intent_result.get("confidence", 0)
-            
-            # Dacă avem o acțiune clară, execută-o
-            if action and confidence >= 0.7:
-                # Execută acțiunea
-                if action in ["build_jsonl", "start_finetune", "update_qdrant"]:
-                    action_result = self.actions_executor.execute_action(
-                        action,
-                        user_id,
-                        callback=lambda job_id, status, result: self.profiles_db.update_job(job_id, status, result)
-                    )
-                    
-                    # Salvează job-ul
-                    if action_result.get("success"):
-                        job_id = action_result.get("job_id")
-                        self.profiles_db.add_job(user_id, action, job_id)
-                    
-                    # Generează răspuns
-                    response_text = self.intent_planner.generate_response(intent_result, action_result)
-                elif action == "status_nodes":
-                    from controllers.node_controller import get_node_controller
-                    node_controller = get_node_controller()
-                    status = node_controller.get_system_status()
-                    response_text = node_controller.format_status_message(status)
-                elif action == "show_recent":
-                    recent = self.profiles_db.get_recent_interactions(user_id, limit=5)
-                    if recent:
-                        response_text = f"Ultimele {len(recent)} interacțiuni: " + ". ".join([
-                            f"{item.get('message', '')[:30]}..." for item in recent[:3]
-                        ])
-                    else:
-                        response_text = "Nu ai interacțiuni recente."
-                else:
-                    response_text = self.intent_planner.generate_response(intent_result)
-            else:
-                # Nu s-a detectat acțiune clară - folosește orchestrator pentru răspuns inteligent
+            response_text, action, confidence = self._plan(user_id, message)
+            if response_text is None:
                 from skills.actions import generate_agent_response
                 response_text = generate_agent_response(message, {"user_id": user_id})
-                action = None
-            
-            # Salvează interacțiunea
-            self.profiles_db.add_interaction(user_id, message, response_text, action)
-            self.context_memory.store_interaction(user_id, message, response_text, action)
             
-            # Check auto-learning trigger
-            try:
-                from controllers.auto_trigger import get_auto_trigger
-                auto_trigger = get_auto_trigger(threshold=50)
-                trigger_result = auto_trigger.check_and_trigger_training()
-                
-                if trigger_result.get("triggered"):
-                    response_text += f"\n\n🚀 Training started automatically - {trigger_result.get('interactions_processed', 0)} interactions processed!"
-            except Exception as e:
-                logger.warning(f"Auto-trigger check failed: {e}")
-            
-            # Actualizează preferințe dacă avem acțiune
-            if action:
-                self.profiles_db.update_preferred_action(user_id, action, True)
+            self._record(user_id, message, response_text, action)
             
             # Generează audio
             audio_path = None
@@ -122,4 +135,76 @@ class ChatAPI:
                 "audio_path": None,
                 "error": str(e)
             }
-
+    
+    def stream_chat(self, user_id: str, message: str, generate_audio: bool = True,
+                    cancel: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Ca process_chat, dar răspunsul vine propoziție cu propoziție, fiecare cu audio-ul ei
+        (WAV base64), cât timp LLM-ul încă generează restul
+        
+        cancel: setat la deconectarea clientului → generarea LLM și sinteza se opresc
+        
+        Yields:
+            {"type": "sentence", "index", "text", "audio"} ... apoi
+            {"type": "done", "text", "action", "confidence", "time_to_first_audio"}
+        """
+        started = time.time()
+        first_audio = None
+        sentences = []
+        
+        def emit(sentence: str, audio: Optional[bytes]) -> Dict[str, Any]:
+            nonlocal first_audio
+            if audio is not None and first_audio is None:
+                first_audio = time.time() - started
+            sentences.append(sentence)
+            return {
+                "type": "sentence",
+                "index": len(sentences) - 1,
+                "text": sentence,
+                "audio": base64.b64encode(audio).decode("ascii") if audio else None
+            }
+        
+        try:
+            response_text, action, confidence = self._plan(user_id, message)
+            if response_text is None:
+                from skills.actions import stream_agent_response
+                chunks = stream_agent_response(message, {"user_id": user_id})
+            else:
+                chunks = [response_text]
+            
+            if generate_audio:
+                for sentence, audio in self.tts_service.stream_speech(chunks, cancel=cancel):
+                    yield emit(sentence, audio)
+            else:
+                from voice.tts_service import iter_sentences
+                for sentence in iter_sentences(chunks):
+                    if cancel is not None and cancel.is_set():
+                        break
+                    yield emit(sentence, None)
+            
+            if cancel is not None and cancel.is_set():
+                logger.info(f"🔌 Stream chat cancelled for {user_id} after {len(sentences)} sentences")
+                close = getattr(chunks, "close", None)
+                if close is not None:
+                    close()
+                return
+            
+            response_text = " ".join(sentences)
+            self._record(user_id, message, response_text, action)
+            
+            if first_audio is not None:
+                logger.info(f"🔊 Time to first audio: {first_audio:.2f}s (total {time.time() - started:.2f}s)")
+            yield {
+                "type": "done",
+                "text": response_text,
+                "action": action,
+                "confidence": confidence,
+                "time_to_first_audio": round(first_audio, 3) if first_audio is not None else None
+            }
+        except Exception as e:
+            logger.error(f"Error streaming chat: {e}")
+            yield {
+                "type": "done",
+                "text": f"Am întâmpinat o eroare: {str(e)}",
+                "error": str(e)
+            }
@@ -5,10 +5,15 @@ Rutele principale pentru FastAPI
 """
 
 from fastapi import APIRouter, File, UploadFile, WebSocket, WebSocketDisconnect
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional
+import asyncio
+import base64
+import json
 import logging
+import threading
 
 from memory.profiles_db import get_profiles_db
 from memory.context_memory import get_context_memory
@@ -117,6 +122,56 @@ async def chat_audio_endpoint(
         )
 
 
+def _ndjson(events: Iterator[Dict[str, Any]], cancel: threading.Event) -> StreamingResponse:
+    """
+    Evenimentele stream_chat ca NDJSON (un eveniment / linie), generate într-un thread.
+    Clientul deconectat → `cancel` oprește LLM-ul și sinteza din spatele generatorului.
+    """
+    async def body():
+        try:
+            async for event in iterate_in_threadpool(events):
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        finally:
+            cancel.set()
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """Chat cu răspuns propoziție cu propoziție (text + audio WAV base64 per propoziție)"""
+    cancel = threading.Event()
+    return _ndjson(chat_api.stream_chat(
+        request.user_id,
+        request.message,
+        generate_audio=request.generate_audio,
+        cancel=cancel
+    ), cancel)
+
+
+@router.post("/chat/audio/stream")
+async def chat_audio_stream_endpoint(
+    user_id: str,
+    audio_file: UploadFile = File(...)
+):
+    """Ca /chat/audio, dar răspunsul vocal începe după prima propoziție"""
+    content = await audio_file.read()
+    text = await asyncio.to_thread(stt_service.transcribe_bytes, content)
+    
+    if not text:
+        return JSONResponse(
+            status_code=400,
+            content={"error": "Could not transcribe audio"}
+        )
+    
+    cancel = threading.Event()
+    
+    def events():
+        yield {"type": "transcript", "text": text, "final": True}
+        yield from chat_api.stream_chat(user_id, text, generate_audio=True, cancel=cancel)
+    
+    return _ndjson(events(), cancel)
+
+
 @router.post("/execute")
 async def execute_endpoint(request: ExecuteRequest):
     """Endpoint pentru executarea acțiunilor"""
@@ -224,10 +279,24 @@ async def get_audio(filename: str):
         )
 
 
+async def _send_chat_stream(websocket: WebSocket, user_id: str, message: str):
+    """Trimite pe websocket fiecare propoziție (cu audio) imediat ce e sintetizată"""
+    cancel = threading.Event()
+    try:
+        async for event in iterate_in_threadpool(
+            chat_api.stream_chat(user_id, message, generate_audio=True, cancel=cancel)
+        ):
+            await websocket.send_json({**event, "type": f"response_{event['type']}"})
+    finally:
+        # websocket închis în timpul răspunsului: nu mai generăm pentru nimeni
+        cancel.set()
+
+
 @router.websocket("/ws/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: str):
     """WebSocket endpoint pentru comunicare în timp real"""
     await frontend_bridge.connect(websocket, user_id)
+    transcriber = None
     
     try:
         while True:
@@ -243,6 +312,24 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
                     "type": "response",
                     **result
                 })
+            elif message_type == "chat_stream":
+                await _send_chat_stream(websocket, user_id, data.get("message", ""))
+            elif message_type == "audio_start":
+                # Enunț nou: PCM 16-bit mono 16 kHz în mesaje audio_chunk (base64)
+                transcriber = stt_service.stream()
+            elif message_type == "audio_chunk":
+                if transcriber is None:
+                    transcriber = stt_service.stream()
+                pcm = base64.b64decode(data.get("data", ""))
+                partial = await asyncio.to_thread(transcriber.feed, pcm)
+                if partial is not None:
+                    await websocket.send_json({"type": "partial_transcript", "text": partial})
+            elif message_type == "audio_end":
+                text = await asyncio.to_thread(transcriber.finish) if transcriber else None
+                transcriber = None
+                await websocket.send_json({"type": "transcript", "text": text or "", "final": True})
+                if text:
+                    await _send_chat_stream(websocket, user_id, text)
             elif message_type == "ui_action":
                 action = data.get("action")
                 action_data = data.get("data", {})
@@ -9,7 +9,7 @@ import subprocess
 import threading
 import uuid
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterator, Optional, List
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,7 +17,7 @@ logger = logging.getLogger(__name__)
 # Import LLM Orchestrator
 import sys
 sys.path.insert(0, "/srv/hf/ai_agents")
-from llm_orchestrator import LLMOrchestrator
+from llm_orchestrator import LLMOrchestrator, get_orchestrator
 
 # Paths to scripts
 SCRIPTS = {
@@ -202,43 +202,40 @@ def get_actions_executor() -> ActionsExecutor:
 
 
 
+AGENT_SYSTEM_PROMPT = """Ești Master Agent, un asistent AI inteligent care controlează sistemul de învățare automată.
+    
+    Poți executa următoarele acțiuni:
+    - "build jsonl" sau "exportă date" - Exportă interacțiuni pentru training
+    - "start training" sau "pornește fine-tuning" - Pornește antrenarea modelului
+    - "update rag" sau "actualizează knowledge" - Actualizează baza vectorială
+    - "check status" sau "verifică status" - Verifică statusul sistemului
+    - "show stats" sau "arată statistici" - Afișează statistici
+    
+    Răspunde scurt, clar și prietenos. Confirmă acțiunea și spune ce se întâmplă.
+    """
+
+
 def generate_agent_response(user_message: str, context: Dict[str, Any]) -> str:
     """
     Generate response using LLM Orchestrator
     Folosește: Kimi K2 70B → Llama 3.1 70B → DeepSeek → Qwen local
     """
     try:
-        # Build system prompt
-        system_prompt = """Ești Master Agent, un asistent AI inteligent care controlează sistemul de învățare automată.
-        
-        Poți executa următoarele acțiuni:
-        - "build jsonl" sau "exportă date" - Exportă interacțiuni pentru training
-        - "start training" sau "pornește fine-tuning" - Pornește antrenarea modelului
-        - "update rag" sau "actualizează knowledge" - Actualizează baza vectorială
-        - "check status" sau "verifică status" - Verifică statusul sistemului
-        - "show stats" sau "arată statistici" - Afișează statistici
-        
-        Răspunde scurt, clar și prietenos. Confirmă acțiunea și spune ce se întâmplă.
-        """
-        
         # Initialize orchestrator
         orchestrator = LLMOrchestrator()
 
         # Call orchestrator (auto fallback: Kimi → Llama → DeepSeek → Qwen)
         response = orchestrator.chat(
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": AGENT_SYSTEM_PROMPT},
                 {"role": "user", "content": user_message}
             ],
             model="auto"  # Auto fallback
         )
         
-        # Extract response content
-        response_text = response.get("content", "Nu am putut genera răspuns.")
-        
-        # Log provider used
-        provider = response.get("provider", "unknown")
-        logger.info(f"Master Agent response generated via {provider}")
+        # chat() întoarce direct textul
+        response_text = response or "Nu am putut genera răspuns."
+        logger.info("Master Agent response generated")
         
         # Data Collector saves automatically (integrated in orchestrator)
         
@@ -247,3 +244,20 @@ def generate_agent_response(user_message: str, context: Dict[str, Any]) -> str:
     except Exception as e:
         logger.error(f"Error generating response: {e}")
         return f"Am întâmpinat o eroare: {str(e)}"
+
+
+def stream_agent_response(user_message: str, context: Dict[str, Any]) -> Iterator[str]:
+    """
+    Ca generate_agent_response, dar fragment cu fragment (pentru TTS propoziție cu propoziție)
+    """
+    try:
+        orchestrator = get_orchestrator()
+        yield from orchestrator.chat_stream(
+            messages=[
+                {"role": "system", "content": AGENT_SYSTEM_PROMPT},
+                {"role": "user", "content": user_message}
+            ]
+        )
+    except Exception as e:
+        logger.error(f"Error streaming response: {e}")
+        yield f"Am întâmpinat o eroare: {str(e)}"
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+⏱️ Voice Latency Benchmark
+Compară pipeline-ul vocal „tot odată” cu cel în streaming
+
+Măsoară:
+- încărcarea modelelor (cost plătit acum la pornire, nu la prima cerere)
+- STT: transcriere completă vs. prima transcriere parțială în streaming
+- TTS: time-to-first-audio când tot răspunsul e sintetizat la final vs. propoziție cu
+  propoziție cât timp „LLM-ul” generează (tokens simulați cu --token-delay sau LLM real cu --llm)
+
+Clipurile de test (samples/*.wav) sunt generate o singură dată cu TTS-ul configurat
+din samples/replies.txt, deci benchmark-ul rulează și pe o mașină nouă.
+
+Utilizare:
+    python3 benchmark_latency.py
+    python3 benchmark_latency.py --token-delay 0.05 --realtime
+    python3 benchmark_latency.py --llm
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import wave
+
+MASTER_AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MASTER_AGENT_DIR)
+sys.path.insert(1, os.path.dirname(MASTER_AGENT_DIR))  # llm_orchestrator (--llm)
+
+from voice.stt_service import STREAM_SAMPLE_RATE, STTService
+from voice.tts_service import TTSService
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "samples")
+REPLIES_FILE = os.path.join(SAMPLES_DIR, "replies.txt")
+CHUNK_SECONDS = 0.1
+
+
+def load_replies():
+    with open(REPLIES_FILE, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def ensure_clips(tts: TTSService, replies):
+    """samples/reply_N.wav (generate la prima rulare)"""
+    paths = []
+    for i, text in enumerate(replies):
+        path = os.path.join(SAMPLES_DIR, f"reply_{i}.wav")
+        if not os.path.exists(path):
+            audio = tts.synthesize_bytes(text)
+            if audio is None:
+                raise RuntimeError("TTS unavailable - cannot generate sample clips")
+            with open(path, "wb") as f:
+                f.write(audio)
+        paths.append(path)
+    return paths
+
+
+def pcm16_16k(path: str) -> bytes:
+    """Clip WAV → PCM 16-bit mono 16 kHz (formatul trimis de frontend pe websocket)"""
+    import numpy as np
+
+    with wave.open(path, "rb") as wav_file:
+        rate = wav_file.getframerate()
+        channels = wav_file.getnchannels()
+        samples = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype="<i2").astype(np.float32)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != STREAM_SAMPLE_RATE:
+        positions = np.linspace(0, len(samples) - 1, int(len(samples) * STREAM_SAMPLE_RATE / rate))
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+    return samples.astype("<i2").tobytes()
+
+
+def bench_stt(stt: STTService, clips, realtime: bool):
+    results = []
+    chunk_bytes = int(STREAM_SAMPLE_RATE * CHUNK_SECONDS) * 2
+    for path in clips:
+        started = time.time()
+        stt.transcribe(path)
+        full = time.time() - started
+
+        pcm = pcm16_16k(path)
+        session = stt.stream()
+        first_partial = None
+        started = time.time()
+        for offset in range(0, len(pcm), chunk_bytes):
+            if realtime:
+                time.sleep(CHUNK_SECONDS)
+            if session.feed(pcm[offset:offset + chunk_bytes]) is not None and first_partial is None:
+                first_partial = time.time() - started
+        session.finish()
+        results.append({
+            "clip": os.path.basename(path),
+            "audio_seconds": round(len(pcm) / 2 / STREAM_SAMPLE_RATE, 2),
+            "full_transcribe": round(full, 3),
+            "first_partial": round(first_partial, 3) if first_partial is not None else None,
+            "streaming_total": round(time.time() - started, 3)
+        })
+    return results
+
+
+def token_stream(text: str, delay: float):
+    """Simulează un LLM care generează câte un cuvânt la `delay` secunde"""
+    for word in text.split(" "):
+        time.sleep(delay)
+        yield word + " "
+
+
+def bench_tts(tts: TTSService, replies, token_delay: float, use_llm: bool):
+    results = []
+    for text in replies:
+        if use_llm:
+            from llm_orchestrator import get_orchestrator
+            messages = [{"role": "user", "content": f"Reformulează pe scurt: {text}"}]
+            make_stream = lambda: get_orchestrator().chat_stream(messages)
+        else:
+            make_stream = lambda: token_stream(text, token_delay)
+
+        # Tot odată: răspunsul complet, apoi sinteza completă
+        started = time.time()
+        full_text = "".join(make_stream())
+        tts.synthesize_bytes(full_text)
+        whole = time.time() - started
+
+        # Streaming: audio pentru prima propoziție cât timp restul se generează
+        started = time.time()
+        first_audio = None
+        sentences = 0
+        for _, audio in tts.stream_speech(make_stream()):
+            sentences += 1
+            if audio is not None and first_audio is None:
+                first_audio = time.time() - started
+        results.append({
+            "chars": len(full_text),
+            "sentences": sentences,
+            "whole_time_to_first_audio": round(whole, 3),
+            "streaming_time_to_first_audio": round(first_audio, 3) if first_audio is not None else None,
+            "streaming_total": round(time.time() - started, 3)
+        })
+    return results
+
+
+def summarize(rows, key):
+    values = [r[key] for r in rows if r.get(key) is not None]
+    return round(statistics.median(values), 3) if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark latență voce (Whisper + TTS)")
+    parser.add_argument("--token-delay", type=float, default=0.03, help="Secunde per cuvânt pentru LLM simulat")
+    parser.add_argument("--realtime", action="store_true", help="Trimite audio-ul STT în ritm real (100 ms / bucată)")
+    parser.add_argument("--llm", action="store_true", help="Folosește LLM-ul real (chat_stream) în loc de tokens simulați")
+    parser.add_argument("--skip-stt", action="store_true")
+    args = parser.parse_args()
+
+    replies = load_replies()
+    stt, tts = STTService(), TTSService()
+
+    started = time.time()
+    tts_loaded = tts.preload()
+    tts_load = time.time() - started
+    started = time.time()
+    stt_loaded = False if args.skip_stt else stt.preload()
+    stt_load = time.time() - started
+
+    report = {"model_load": {"tts": round(tts_load, 2), "stt": round(stt_load, 2)}}
+
+    if tts_loaded:
+        report["tts"] = bench_tts(tts, replies, args.token_delay, args.llm)
+        report["tts_median"] = {
+            "whole_time_to_first_audio": summarize(report["tts"], "whole_time_to_first_audio"),
+            "streaming_time_to_first_audio": summarize(report["tts"], "streaming_time_to_first_audio")
+        }
+        if stt_loaded:
+            report["stt"] = bench_stt(stt, ensure_clips(tts, replies), args.realtime)
+            report["stt_median"] = {
+                "full_transcribe": summarize(report["stt"], "full_transcribe"),
+                "first_partial": summarize(report["stt"], "first_partial")
+            }
+    else:
+        report["error"] = "TTS model not available"
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,16 @@
 """
 🎤 Speech-to-Text Service
 Folosește Whisper local pentru recunoaștere vocală
+
+Pe lângă transcrierea de fișiere, StreamingTranscriber primește audio în bucăți
+(PCM 16-bit mono, 16 kHz - formatul trimis de frontend pe websocket) și produce
+transcrieri parțiale cât timp utilizatorul încă vorbește.
 """
 
 import os
 import tempfile
+import threading
+import time
 from typing import Optional
 import logging
 
@@ -15,6 +21,12 @@ logger = logging.getLogger(__name__)
 WHISPER_MODEL_PATH = os.getenv("WHISPER_MODEL_PATH", "/opt/models/whisper-base")
 WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE", "ro")
 
+# Streaming: sample rate-ul așteptat de Whisper și cât audio nou declanșează o transcriere parțială
+STREAM_SAMPLE_RATE = 16000
+STT_PARTIAL_EVERY_SECONDS = float(os.getenv("STT_PARTIAL_EVERY_SECONDS", "1.0"))
+# Fereastra transcrisă la fiecare parțial (restul e deja „înghețat”)
+STT_WINDOW_SECONDS = float(os.getenv("STT_WINDOW_SECONDS", "20"))
+
 
 class STTService:
     """Serviciu pentru Speech-to-Text folosind Whisper"""
@@ -22,12 +34,27 @@ class STTService:
     def __init__(self):
         self.model = None
         self.model_loaded = False
+        # Modelul nu e thread-safe; serializăm încărcarea și inferența
+        self._lock = threading.Lock()
+    
+    def preload(self) -> bool:
+        """Încarcă modelul la pornirea serviciului (nu la prima cerere)"""
+        started = time.time()
+        self._load_model()
+        if self.model:
+            logger.info(f"🎤 Whisper preloaded in {time.time() - started:.1f}s")
+        return self.model is not None
     
     def _load_model(self):
         """Încarcă modelul Whisper"""
         if self.model_loaded:
             return
         
+        with self._lock:
+            if not self.model_loaded:
+                self._load_model_locked()
+    
+    def _load_model_locked(self):
         try:
             import whisper
             
@@ -69,10 +96,11 @@ class STTService:
         
         try:
             # Transcrie audio
-            result = self.model.transcribe(
-                audio_file_path,
-                language=WHISPER_LANGUAGE
-            )
+            with self._lock:
+                result = self.model.transcribe(
+                    audio_file_path,
+                    language=WHISPER_LANGUAGE
+                )
             
             text = result.get("text", "").strip()
             logger.info(f"Transcribed audio: {text[:50]}...")
@@ -111,6 +139,109 @@ class STTService:
             return None
 
 
+    def transcribe_array(self, audio, fast: bool = False) -> Optional[str]:
+        """
+        Transcrie audio float32 mono 16 kHz (numpy) fără fișier temporar
+        
+        Args:
+            audio: numpy.ndarray float32 în [-1, 1]
+            fast: decodare greedy (pentru parțiale)
+        """
+        self._load_model()
+        if not self.model:
+            return None
+        
+        try:
+            options = {"language": WHISPER_LANGUAGE, "condition_on_previous_text": False}
+            if fast:
+                # fără fallback pe temperaturi multiple: parțialele trebuie să fie rapide
+                options["temperature"] = 0.0
+            with self._lock:
+                result = self.model.transcribe(audio, **options)
+            return result.get("text", "").strip()
+        except Exception as e:
+            logger.error(f"Error transcribing audio chunk: {e}")
+            return None
+    
+    def stream(self) -> "StreamingTranscriber":
+        """Sesiune nouă de transcriere incrementală"""
+        return StreamingTranscriber(self)
+
+
+class StreamingTranscriber:
+    """
+    Transcriere incrementală pentru o sesiune (un enunț al utilizatorului)
+    
+    feed(pcm16) adaugă audio și întoarce o transcriere parțială la fiecare
+    STT_PARTIAL_EVERY_SECONDS de audio nou; finish() transcrie tot enunțul cu
+    decodarea completă. Audio-ul mai vechi de STT_WINDOW_SECONDS e transcris o
+    singură dată și păstrat ca text „înghețat”, deci costul unui parțial nu crește
+    cu lungimea enunțului.
+    """
+    
+    def __init__(self, service: STTService, sample_rate: int = STREAM_SAMPLE_RATE):
+        import numpy as np
+        
+        self._np = np
+        self.service = service
+        self.sample_rate = sample_rate
+        self._chunks = []
+        self._samples = 0
+        self._window_start = 0  # primul sample netranscris definitiv
+        self._frozen_text = ""
+        self._last_partial_at = 0
+        self.partial_text = ""
+        self.started_at = time.time()
+        self.first_partial_latency: Optional[float] = None
+    
+    def _audio(self, start: int = 0):
+        audio = self._np.concatenate(self._chunks) if self._chunks else self._np.zeros(0, dtype=self._np.float32)
+        if len(self._chunks) > 1:
+            self._chunks = [audio]
+        return audio[start:]
+    
+    def feed(self, pcm16: bytes) -> Optional[str]:
+        """
+        Adaugă o bucată PCM 16-bit little-endian mono
+        
+        Returns:
+            Transcrierea parțială actualizată sau None dacă nu s-a recalculat
+        """
+        if not pcm16:
+            return None
+        
+        samples = self._np.frombuffer(pcm16, dtype="<i2").astype(self._np.float32) / 32768.0
+        self._chunks.append(samples)
+        self._samples += len(samples)
+        
+        if self._samples - self._last_partial_at < STT_PARTIAL_EVERY_SECONDS * self.sample_rate:
+            return None
+        self._last_partial_at = self._samples
+        
+        window = int(STT_WINDOW_SECONDS * self.sample_rate)
+        if self._samples - self._window_start > window:
+            # Îngheață prima jumătate a ferestrei: nu mai e retranscrisă la fiecare parțial
+            freeze_end = self._window_start + window // 2
+            frozen = self.service.transcribe_array(self._audio(self._window_start)[:freeze_end - self._window_start], fast=True)
+            self._frozen_text = f"{self._frozen_text} {frozen or ''}".strip()
+            self._window_start = freeze_end
+        
+        text = self.service.transcribe_array(self._audio(self._window_start), fast=True)
+        if text is None:
+            return None
+        
+        self.partial_text = f"{self._frozen_text} {text}".strip()
+        if self.first_partial_latency is None:
+            self.first_partial_latency = time.time() - self.started_at
+        return self.partial_text
+    
+    def finish(self) -> Optional[str]:
+        """Transcrierea finală a întregului enunț (decodare completă)"""
+        if not self._samples:
+            return None
+        return self.service.transcribe_array(self._audio())
+
+
 # Singleton instance
 _stt_service_instance = None
 
@@ -2,11 +2,20 @@
 """
 🔊 Text-to-Speech Service
 Folosește Piper sau Coqui pentru generare vocală
+
+stream_speech() sintetizează răspunsul propoziție cu propoziție pe măsură ce
+LLM-ul generează textul: primul audio e gata după prima propoziție, nu după tot răspunsul.
 """
 
+import io
 import os
+import queue
+import re
+import threading
+import time
+import wave
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Iterator, List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,6 +26,47 @@ TTS_MODEL_PATH = os.getenv("TTS_MODEL_PATH", "/opt/models/piper/ro_RO-doru-mediu
 TTS_OUTPUT_DIR = os.getenv("TTS_OUTPUT_DIR", "/srv/hf/ai_agents/master_agent/voice/output")
 TTS_SAMPLE_RATE = int(os.getenv("TTS_SAMPLE_RATE", "22050"))
 
+# Propozițiile foarte scurte („Da.”) se lipesc de următoarea: un segment audio per cuvânt sună sacadat
+TTS_MIN_SENTENCE_CHARS = int(os.getenv("TTS_MIN_SENTENCE_CHARS", "25"))
+_SENTENCE_END = re.compile(r"(?<=[.!?…;:])\s+|\n+")
+
+
+def split_sentences(text: str) -> Tuple[List[str], str]:
+    """
+    Împarte textul în propoziții complete + restul neterminat
+    
+    Returns:
+        (propoziții complete, text rămas)
+    """
+    parts = _SENTENCE_END.split(text)
+    if len(parts) == 1:
+        return [], text
+    complete, rest = parts[:-1], parts[-1]
+    sentences = []
+    pending = ""
+    for part in complete:
+        pending = f"{pending} {part}".strip() if pending else part.strip()
+        if len(pending) >= TTS_MIN_SENTENCE_CHARS:
+            sentences.append(pending)
+            pending = ""
+    if pending:
+        # propoziția prea scurtă rămâne în buffer (cu separatorul, ca să nu se lipească de următorul token)
+        rest = f"{pending} {rest}"
+    return sentences, rest
+
+
+def iter_sentences(chunks: Iterable[str]) -> Iterator[str]:
+    """Propoziții complete dintr-un flux de fragmente text (tokens LLM)"""
+    buffer = ""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+        sentences, buffer = split_sentences(buffer)
+        yield from sentences
+    if buffer.strip():
+        yield buffer.strip()
+
 
 class TTSService:
     """Serviciu pentru Text-to-Speech"""
@@ -30,6 +80,29 @@ class TTSService:
         os.makedirs(self.output_dir, exist_ok=True)
         
         self.model_loaded = False
+        # Piper/Coqui nu sunt thread-safe; serializăm încărcarea și sinteza
+        self._lock = threading.RLock()
+    
+    def _ensure_loaded(self) -> bool:
+        if self.model_loaded:
+            return True
+        with self._lock:
+            if self.model_loaded:
+                return True
+            if self.engine == "piper":
+                return self._load_piper()
+            elif self.engine == "coqui":
+                return self._load_coqui()
+            logger.error(f"Unknown TTS engine: {self.engine}")
+            return False
+    
+    def preload(self) -> bool:
+        """Încarcă modelul la pornirea serviciului (nu la prima cerere)"""
+        started = time.time()
+        loaded = self._ensure_loaded()
+        if loaded:
+            logger.info(f"🔊 TTS ({self.engine}) preloaded in {time.time() - started:.1f}s")
+        return loaded
     
     def _load_piper(self):
         """Încarcă modelul Piper"""
@@ -84,13 +157,8 @@ class TTSService:
         Returns:
             Path către fișierul audio generat sau None
         """
-        if not self.model_loaded:
-            if self.engine == "piper":
-                if not self._load_piper():
-                    return None
-            elif self.engine == "coqui":
-                if not self._load_coqui():
-                    return None
+        if not self._ensure_loaded():
+            return None
         
         # Generează nume fișier
         if not output_filename:
@@ -100,17 +168,105 @@ class TTSService:
         output_path = os.path.join(self.output_dir, output_filename)
         
         try:
-            if self.engine == "piper":
-                return self._synthesize_piper(text, output_path)
-            elif self.engine == "coqui":
-                return self._synthesize_coqui(text, output_path)
-            else:
-                logger.error(f"Unknown TTS engine: {self.engine}")
-                return None
+            with self._lock:
+                if self.engine == "piper":
+                    return self._synthesize_piper(text, output_path)
+                elif self.engine == "coqui":
+                    return self._synthesize_coqui(text, output_path)
+                else:
+                    logger.error(f"Unknown TTS engine: {self.engine}")
+                    return None
         except Exception as e:
             logger.error(f"Error synthesizing speech: {e}")
             return None
     
+    def synthesize_bytes(self, text: str) -> Optional[bytes]:
+        """Sintetizează în memorie (WAV), fără fișier - pentru streaming"""
+        if not text.strip() or not self._ensure_loaded():
+            return None
+        
+        try:
+            buffer = io.BytesIO()
+            with self._lock:
+                if self.engine == "piper":
+                    with wave.open(buffer, "wb") as wav_file:
+                        self.piper_voice.synthesize(text, wav_file)
+                elif self.engine == "coqui":
+                    import numpy as np
+                    samples = np.asarray(self.coqui_tts.tts(text=text), dtype=np.float32)
+                    sample_rate = getattr(self.coqui_tts.synthesizer, "output_sample_rate", TTS_SAMPLE_RATE)
+                    with wave.open(buffer, "wb") as wav_file:
+                        wav_file.setnchannels(1)
+                        wav_file.setsampwidth(2)
+                        wav_file.setframerate(sample_rate)
+                        wav_file.writeframes((np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes())
+                else:
+                    logger.error(f"Unknown TTS engine: {self.engine}")
+                    return None
+            return buffer.getvalue()
+        except Exception as e:
+            logger.error(f"Error synthesizing speech chunk: {e}")
+            return None
+    
+    def stream_speech(self, text_chunks: Iterable[str],
+                      cancel: Optional[threading.Event] = None) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """
+        Audio propoziție cu propoziție dintr-un flux de text
+        
+        Fluxul (ex: tokens LLM) e consumat într-un thread separat, deci LLM-ul
+        continuă să genereze cât timp propoziția curentă e sintetizată.
+        Thread-ul se oprește (și închide fluxul) când generatorul e închis sau
+        când `cancel` e setat (ex: clientul s-a deconectat).
+        
+        Yields:
+            (propoziție, WAV bytes sau None dacă sinteza a eșuat)
+        """
+        sentences: "queue.Queue" = queue.Queue()
+        done = object()
+        stop = threading.Event()
+        source = iter(text_chunks)
+        
+        def stopped() -> bool:
+            return stop.is_set() or (cancel is not None and cancel.is_set())
+        
+        def chunks():
+            for chunk in source:
+                if stopped():
+                    return
+                yield chunk
+        
+        def produce():
+            try:
+                for sentence in iter_sentences(chunks()):
+                    if stopped():
+                        break
+                    sentences.put(sentence)
+            except Exception as e:
+                logger.error(f"Error reading text stream: {e}")
+            finally:
+                close = getattr(source, "close", None)
+                if stopped() and close is not None:
+                    # generatorul LLM nu mai e consumat: închide și request-ul din spate
+                    try:
+                        close()
+                    except Exception as e:
+                        logger.debug(f"Closing text stream: {e}")
+                sentences.put(done)
+        
+        threading.Thread(target=produce, name="TTSSentenceSplitter", daemon=True).start()
+        
+        try:
+            while not stopped():
+                try:
+                    sentence = sentences.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if sentence is done:
+                    break
+                yield sentence, self.synthesize_bytes(sentence)
+        finally:
+            stop.set()
+    
     def _synthesize_piper(self, text: str, output_path: str) -> Optional[str]:
         """Sintetizează folosind Piper"""
         try:
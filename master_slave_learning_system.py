@@ -21,6 +21,7 @@ Features:
 """
 
 import asyncio
+import hashlib
 import sys
 import os
 from typing import Dict, List, Any, Optional
@@ -36,6 +37,47 @@ from qdrant_context_enhancer import get_context_enhancer
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Map-reduce learning: câte extrageri per-slave rulează simultan și câți tokeni (prompt + răspuns) pot fi în zbor
+LEARN_CONCURRENCY = int(os.getenv("MASTER_LEARN_CONCURRENCY", "6"))
+LEARN_TOKEN_BUDGET = int(os.getenv("MASTER_LEARN_TOKEN_BUDGET", "40000"))
+# Reduce ierarhic: insights grupate până când promptul de agregare încape în context
+REDUCE_GROUP_SIZE = int(os.getenv("MASTER_REDUCE_GROUP_SIZE", "8"))
+REDUCE_MAX_CHARS = int(os.getenv("MASTER_REDUCE_MAX_CHARS", "12000"))
+LEARNING_PROMPT_VERSION = "v1"  # schimbarea promptului invalidează cache-ul de insights
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+class TokenBudget:
+    """Limită de concurență + tokeni în zbor pentru apeluri LLM paralele"""
+
+    def __init__(self, max_concurrency: int = LEARN_CONCURRENCY, max_tokens: int = LEARN_TOKEN_BUDGET):
+        self.max_concurrency = max_concurrency
+        self.max_tokens = max_tokens
+        self._in_flight_calls = 0
+        self._in_flight_tokens = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, tokens: int):
+        # un singur apel mai mare decât bugetul e lăsat să treacă singur
+        tokens = min(tokens, self.max_tokens)
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self._in_flight_calls < self.max_concurrency
+                and self._in_flight_tokens + tokens <= self.max_tokens
+            )
+            self._in_flight_calls += 1
+            self._in_flight_tokens += tokens
+        return tokens
+
+    async def release(self, tokens: int):
+        async with self._condition:
+            self._in_flight_calls -= 1
+            self._in_flight_tokens -= tokens
+            self._condition.notify_all()
+
 
 class MasterSlaveLearningSystem:
     """
@@ -49,6 +91,10 @@ class MasterSlaveLearningSystem:
         self.db = self.mongo[MONGODB_DATABASE]
         self.llm = get_orchestrator()
         self.context_enhancer = get_context_enhancer()
+        try:
+            self.db.master_learnings.create_index([("master_id", 1), ("slave_id", 1), ("fingerprint", 1)])
+        except Exception as e:
+            logger.debug(f"master_learnings index: {e}")
         logger.info("✅ Master-Slave Learning System initialized")
     
     async def create_slave_from_competitor(
@@ -225,56 +271,15 @@ class MasterSlaveLearningSystem:
                 raise Exception("Master or Slave not found")
             
             # Get content from both (from Qdrant)
-            master_content = await self._get_agent_content_summary(master_agent_id)
-            slave_content = await self._get_agent_content_summary(slave_agent_id)
-            
-            # Generate learning insights using LLM
-            learning_prompt = self._create_learning_prompt(
-                master_domain=master.get("domain"),
-                slave_domain=slave.get("domain"),
-                master_content=master_content,
-                slave_content=slave_content,
-                focus=learning_focus
+            master_content, slave_content = await asyncio.gather(
+                self._get_agent_content_summary(master_agent_id),
+                self._get_agent_content_summary(slave_agent_id)
             )
             
-            # Generate insights using LLM
-            response = self.llm.chat(
-                messages=[
-                    {"role": "system", "content": "You are a competitive intelligence AI analyst."},
-                    {"role": "user", "content": learning_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=3000
+            return await self._extract_slave_insights(
+                master, slave, master_content, slave_content, learning_focus
             )
             
-            # Extract content from response
-            if isinstance(response, dict):
-                insights = response.get("content", str(response))
-            else:
-                insights = str(response)
-            
-            # Save learning record
-            learning_record = {
-                "master_id": ObjectId(master_agent_id),
-                "slave_id": ObjectId(slave_agent_id),
-                "learning_focus": learning_focus,
-                "insights": insights,
-                "learned_at": datetime.now(timezone.utc)
-            }
-            
-            self.db.master_learnings.insert_one(learning_record)
-            
-            logger.info(f"✅ Master learned from slave!")
-            logger.info(f"   Insights generated: {len(insights)} bytes")
-            
-            return {
-                "success": True,
-                "master_id": master_agent_id,
-                "slave_id": slave_agent_id,
-                "insights": insights,
-                "learning_record_id": str(learning_record["_id"])
-            }
-            
         except Exception as e:
             logger.error(f"❌ Error in learning process: {e}")
             return {
@@ -282,6 +287,107 @@ class MasterSlaveLearningSystem:
                 "error": str(e)
             }
     
+    async def _chat(
+        self,
+        system: str,
+        prompt: str,
+        max_tokens: int,
+        budget: Optional[TokenBudget] = None
+    ) -> str:
+        """Apel LLM (sincron) într-un thread, sub bugetul de concurență/tokeni"""
+        reserved = 0
+        if budget is not None:
+            reserved = await budget.acquire(_estimate_tokens(system + prompt) + max_tokens)
+        try:
+            response = await asyncio.to_thread(
+                self.llm.chat,
+                messages=[
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.7,
+                max_tokens=max_tokens
+            )
+        finally:
+            if budget is not None:
+                await budget.release(reserved)
+        if isinstance(response, dict):
+            return response.get("content", str(response))
+        return str(response)
+    
+    @staticmethod
+    def _fingerprint(master_content: str, slave_content: str, focus: str) -> str:
+        """Cheie de cache: conținut master + slave + focus + versiunea promptului"""
+        raw = "\x1f".join([LEARNING_PROMPT_VERSION, focus, master_content, slave_content])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    
+    async def _extract_slave_insights(
+        self,
+        master: Dict[str, Any],
+        slave: Dict[str, Any],
+        master_content: str,
+        slave_content: str,
+        learning_focus: str,
+        budget: Optional[TokenBudget] = None
+    ) -> Dict[str, Any]:
+        """
+        MAP: insights pentru o pereche master/slave.
+        Dacă nici conținutul master, nici cel al slave-ului nu s-a schimbat, refolosește ultimul learning.
+        """
+        master_id, slave_id = master["_id"], slave["_id"]
+        fingerprint = self._fingerprint(master_content, slave_content, learning_focus)
+        
+        previous = await asyncio.to_thread(
+            self.db.master_learnings.find_one,
+            {"master_id": master_id, "slave_id": slave_id, "fingerprint": fingerprint},
+            sort=[("learned_at", -1)]
+        )
+        if previous and previous.get("insights"):
+            logger.info(f"   ♻️ {slave.get('domain')}: conținut neschimbat, insights din cache")
+            return {
+                "success": True,
+                "master_id": str(master_id),
+                "slave_id": str(slave_id),
+                "insights": previous["insights"],
+                "learning_record_id": str(previous["_id"]),
+                "cached": True
+            }
+        
+        # Generate learning insights using LLM
+        learning_prompt = self._create_learning_prompt(
+            master_domain=master.get("domain"),
+            slave_domain=slave.get("domain"),
+            master_content=master_content,
+            slave_content=slave_content,
+            focus=learning_focus
+        )
+        insights = await self._chat(
+            "You are a competitive intelligence AI analyst.", learning_prompt, max_tokens=3000, budget=budget
+        )
+        
+        # Save learning record
+        learning_record = {
+            "master_id": master_id,
+            "slave_id": slave_id,
+            "learning_focus": learning_focus,
+            "insights": insights,
+            "fingerprint": fingerprint,
+            "learned_at": datetime.now(timezone.utc)
+        }
+        
+        await asyncio.to_thread(self.db.master_learnings.insert_one, learning_record)
+        
+        logger.info(f"✅ Master learned from slave {slave.get('domain')}: {len(insights)} bytes")
+        
+        return {
+            "success": True,
+            "master_id": str(master_id),
+            "slave_id": str(slave_id),
+            "insights": insights,
+            "learning_record_id": str(learning_record["_id"]),
+            "cached": False
+        }
+    
     async def master_learns_from_all_slaves(
         self,
         master_agent_id: str
@@ -304,25 +410,48 @@ class MasterSlaveLearningSystem:
             
             logger.info(f"   Processing {len(slaves)} slave agents...")
             
-            # Learn from each slave
+            master = self.db.site_agents.find_one({"_id": ObjectId(master_agent_id)})
+            if not master:
+                raise Exception("Master not found")
+            
+            # MAP: extragere per-slave în paralel (sub buget), conținutul master citit o singură dată
+            master_content = await self._get_agent_content_summary(master_agent_id)
+            budget = TokenBudget()
+            
+            async def learn(slave: Dict[str, Any]) -> Dict[str, Any]:
+                try:
+                    slave_doc = await asyncio.to_thread(
+                        self.db.site_agents.find_one, {"_id": ObjectId(slave["agent_id"])}
+                    )
+                    if not slave_doc:
+                        return {"success": False, "error": "Slave not found"}
+                    slave_content = await self._get_agent_content_summary(slave["agent_id"])
+                    return await self._extract_slave_insights(
+                        master, slave_doc, master_content, slave_content, "all", budget=budget
+                    )
+                except Exception as e:
+                    logger.error(f"❌ Learning from {slave.get('domain')} failed: {e}")
+                    return {"success": False, "error": str(e)}
+            
+            results = await asyncio.gather(*(learn(slave) for slave in slaves))
+            
             all_insights = []
-            for slave in slaves:
-                result = await self.master_learns_from_slave(
-                    master_agent_id,
-                    slave["agent_id"],
-                    learning_focus="all"
-                )
+            cached = 0
+            for slave, result in zip(slaves, results):
                 if result.get("success"):
+                    cached += bool(result.get("cached"))
                     all_insights.append({
                         "slave_domain": slave["domain"],
                         "keyword": slave["keyword"],
                         "insights": result["insights"]
                     })
+            logger.info(f"   Map done: {len(all_insights)}/{len(slaves)} slaves ({cached} din cache)")
             
-            # Generate aggregated competitive intelligence
+            # REDUCE: agregare ierarhică până la sumarul executiv
             aggregated_insights = await self._aggregate_insights(
                 master_agent_id,
-                all_insights
+                all_insights,
+                budget=budget
             )
             
             # Save comprehensive learning
@@ -342,6 +471,7 @@ class MasterSlaveLearningSystem:
                 "success": True,
                 "master_id": master_agent_id,
                 "slaves_analyzed": len(slaves),
+                "insights_from_cache": cached,
                 "aggregated_insights": aggregated_insights,
                 "learning_record_id": str(comprehensive_learning["_id"])
             }
@@ -357,6 +487,10 @@ class MasterSlaveLearningSystem:
         """
         Extrage summary al conținutului unui agent din Qdrant
         """
+        # pymongo e sincron: nu blocăm event loop-ul în fan-out
+        return await asyncio.to_thread(self._load_agent_content_summary, agent_id)
+    
+    def _load_agent_content_summary(self, agent_id: str) -> str:
         try:
             # Get top content chunks from Qdrant
             agent = self.db.site_agents.find_one({"_id": ObjectId(agent_id)})
@@ -439,25 +573,81 @@ Be specific and actionable. Focus on practical insights.
 """
         return prompt
     
+    @staticmethod
+    def _format_insights(insights: List[Dict[str, Any]], max_chars: int) -> str:
+        """Text pentru prompt; fiecare insight primește o cotă egală din max_chars"""
+        if not insights:
+            return ""
+        share = max(200, max_chars // len(insights))
+        return "\n\n".join([
+            f"COMPETITOR: {insight['slave_domain']} (Keyword: {insight['keyword']})\n{insight['insights'][:share]}"
+            for insight in insights
+        ])
+    
+    async def _reduce_group(
+        self,
+        group: List[Dict[str, Any]],
+        level: int,
+        budget: Optional[TokenBudget] = None
+    ) -> Dict[str, Any]:
+        """Un pas de REDUCE: condensează un grup de insights într-unul singur"""
+        prompt = f"""You are a competitive intelligence analyst. Below are insights about {len(group)} competitors.
+
+{self._format_insights(group, REDUCE_MAX_CHARS)}
+
+Condense them into ONE compact brief (max ~500 words) that preserves:
+- patterns shared by several competitors (name them)
+- unique tactics worth copying, with the competitor that uses them
+- concrete, actionable recommendations
+Do not invent facts that are not in the insights.
+"""
+        summary = await self._chat(
+            "You are a concise competitive intelligence analyst.", prompt, max_tokens=1200, budget=budget
+        )
+        domains = ", ".join(str(insight["slave_domain"]) for insight in group)
+        keywords = sorted({str(insight["keyword"]) for insight in group if insight.get("keyword")})
+        return {
+            "slave_domain": f"[L{level}] {domains}",
+            "keyword": ", ".join(keywords),
+            "insights": summary
+        }
+    
     async def _aggregate_insights(
         self,
         master_agent_id: str,
-        all_insights: List[Dict[str, Any]]
+        all_insights: List[Dict[str, Any]],
+        budget: Optional[TokenBudget] = None
     ) -> str:
         """
-        Agregare insights de la toți competitors în raport strategic
+        Agregare insights de la toți competitors în raport strategic.
+        Dacă nu încap în REDUCE_MAX_CHARS, sunt condensate ierarhic în grupuri (în paralel)
+        până când promptul final încape în context.
         """
         try:
+            budget = budget or TokenBudget()
+            total_competitors = len(all_insights)
+            level = 1
+            while (
+                len(all_insights) > 1
+                and sum(len(i["insights"]) for i in all_insights) > REDUCE_MAX_CHARS
+            ):
+                groups = [
+                    all_insights[i:i + REDUCE_GROUP_SIZE]
+                    for i in range(0, len(all_insights), REDUCE_GROUP_SIZE)
+                ]
+                logger.info(f"   Reduce L{level}: {len(all_insights)} insights → {len(groups)} grupuri")
+                all_insights = list(await asyncio.gather(
+                    *(self._reduce_group(group, level, budget) for group in groups)
+                ))
+                level += 1
+            
             # Create aggregation prompt
-            insights_text = "\n\n".join([
-                f"COMPETITOR: {insight['slave_domain']} (Keyword: {insight['keyword']})\n{insight['insights']}"
-                for insight in all_insights
-            ])
+            insights_text = self._format_insights(all_insights, REDUCE_MAX_CHARS)
             
-            aggregation_prompt = f"""You are a strategic business analyst. You've analyzed {len(all_insights)} competitors.
+            aggregation_prompt = f"""You are a strategic business analyst. You've analyzed {total_competitors} competitors.
 
 INDIVIDUAL COMPETITOR INSIGHTS:
-{insights_text[:5000]}
+{insights_text}
 
 Generate a STRATEGIC EXECUTIVE SUMMARY for the CEO:
 
@@ -490,22 +680,10 @@ Make it CEO-friendly: clear, actionable, strategic.
 """
             
             # Generate aggregated insights
-            response = self.llm.chat(
-                messages=[
-                    {"role": "system", "content": "You are a strategic business analyst and CEO advisor."},
-                    {"role": "user", "content": aggregation_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=4000
+            return await self._chat(
+                "You are a strategic business analyst and CEO advisor.", aggregation_prompt, max_tokens=4000, budget=budget
             )
             
-            # Extract content
-            if isinstance(response, dict):
-                aggregated = response.get("content", str(response))
-            else:
-                aggregated = str(response)
-            return aggregated
-            
         except Exception as e:
             logger.error(f"Error aggregating insights: {e}")
             return "Error generating aggregated insights"
@@ -0,0 +1,344 @@
+"""
+Mongo Bulk Writer
+Write-behind batcher for high-volume MongoDB writers.
+
+Operations are buffered per collection and flushed as one
+bulk_write(ordered=False) when a batch fills up or the flush interval
+elapses. Updates targeting the same document inside a batch are merged
+into a single operation, so unordered execution stays safe.
+
+Usage:
+    from mongo_bulk_writer import get_bulk_writer
+
+    writer = get_bulk_writer()
+    writer.update_one(db.workflows, {"_id": wid}, {"$push": {"logs": entry}})
+    writer.flush(db.workflows)   # before reading back
+"""
+import asyncio
+import atexit
+import copy
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# on_error(collection_name, exception, operations)
+ErrorCallback = Callable[[str, Exception, List[Any]], None]
+
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def _each_items(value: Any) -> Optional[List[Any]]:
+    """Items of a $push/$addToSet value; None if it uses other modifiers ($slice, ...)"""
+    if isinstance(value, dict) and value and all(str(k).startswith("$") for k in value):
+        if set(value.keys()) == {"$each"}:
+            return list(value["$each"])
+        return None
+    return [value]
+
+
+def _merge_updates(current: Dict, incoming: Dict) -> Optional[Dict]:
+    """
+    Merge two update documents for the same target.
+    Returns None when the operators cannot be combined safely.
+    """
+    merged = copy.copy(current)
+    for operator, fields in incoming.items():
+        if operator not in merged:
+            merged[operator] = dict(fields)
+            continue
+        target = dict(merged[operator])
+        if operator in ("$set", "$unset"):
+            target.update(fields)
+        elif operator == "$setOnInsert":
+            for key, value in fields.items():
+                target.setdefault(key, value)
+        elif operator == "$inc":
+            for key, value in fields.items():
+                target[key] = target.get(key, 0) + value
+        elif operator in ("$push", "$addToSet"):
+            for key, value in fields.items():
+                if key not in target:
+                    target[key] = value
+                    continue
+                existing_items = _each_items(target[key])
+                incoming_items = _each_items(value)
+                if existing_items is None or incoming_items is None:
+                    return None
+                target[key] = {"$each": existing_items + incoming_items}
+        else:
+            return None
+        merged[operator] = target
+
+    # The same field must not appear under two operators
+    seen = set()
+    for fields in merged.values():
+        for key in fields:
+            if key in seen:
+                return None
+            seen.add(key)
+    return merged
+
+
+class _CollectionBuffer:
+    """Pending operations for one collection"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        # Ordered slots; each slot is a pymongo write model or a
+        # mergeable (filter, update, upsert) tuple
+        self.slots: List[Any] = []
+        # {merge_key: slot index} for updates that can be merged
+        self.update_index: Dict[Tuple, int] = {}
+        # Set when two unmergeable updates hit the same document in one batch
+        self.ordered = False
+
+    def __len__(self):
+        return len(self.slots)
+
+
+class MongoBulkWriter:
+    """Asynchronous write-behind batcher grouping writes into bulk_write per collection"""
+
+    def __init__(
+        self,
+        max_batch: int = 500,
+        flush_interval: float = 1.0,
+        on_error: Optional[ErrorCallback] = None,
+        max_pending: int = 50000
+    ):
+        """
+        Args:
+            max_batch: Flush a collection once it has this many pending operations
+            flush_interval: Maximum seconds an operation stays buffered
+            on_error: Callback invoked with (collection_name, exception, operations)
+            max_pending: Above this many buffered ops, writers flush inline (backpressure)
+        """
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.on_error = on_error
+        self.max_pending = max_pending
+
+        self._buffers: Dict[str, _CollectionBuffer] = {}
+        self._lock = threading.Lock()
+        # Serializes flushes so one collection's batches stay in order
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.metrics = {
+            "ops_enqueued": 0,
+            "ops_merged": 0,
+            "ops_written": 0,
+            "ops_failed": 0,
+            "bulk_writes": 0,
+            "errors": 0,
+            "last_flush_ms": 0.0
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the background flusher (idempotent)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="MongoBulkWriter", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        """Flush everything and stop the background flusher"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=30)
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error in bulk writer flush loop: {e}")
+
+    # ------------------------------------------------------------------
+    # Enqueue
+    # ------------------------------------------------------------------
+
+    def _buffer_for(self, collection) -> _CollectionBuffer:
+        name = collection.full_name
+        buffer = self._buffers.get(name)
+        if buffer is None:
+            buffer = _CollectionBuffer(collection)
+            self._buffers[name] = buffer
+        return buffer
+
+    def _after_enqueue(self, buffer_size: int, pending: int):
+        if self._thread is None:
+            self.start()
+        if pending >= self.max_pending and not _in_event_loop():
+            # Backpressure: a thread producer pays for the flush; an event loop
+            # must never block on Mongo, so it only wakes the background flusher
+            self.flush()
+        elif pending >= self.max_pending or buffer_size >= self.max_batch:
+            self._wakeup.set()
+
+    def add(self, collection, operation: Any):
+        """Queue any pymongo write model (InsertOne, UpdateOne, ReplaceOne, DeleteOne, ...)"""
+        with self._lock:
+            buffer = self._buffer_for(collection)
+            buffer.slots.append(operation)
+            self.metrics["ops_enqueued"] += 1
+            size, pending = len(buffer), self.pending_count()
+        self._after_enqueue(size, pending)
+
+    def insert_one(self, collection, document: Dict):
+        self.add(collection, InsertOne(document))
+
+    def update_one(self, collection, filter: Dict, update: Dict, upsert: bool = False, merge: bool = True):
+        """
+        Queue an update. With merge=True, an update for the same filter still
+        pending in this batch is combined into one operation ($set/$inc/$push/...).
+        """
+        with self._lock:
+            buffer = self._buffer_for(collection)
+            self.metrics["ops_enqueued"] += 1
+            key = None
+            if merge:
+                try:
+                    key = (repr(sorted(filter.items())), upsert)
+                except TypeError:
+                    key = None
+            if key is not None and key in buffer.update_index:
+                index = buffer.update_index[key]
+                _, current, _ = buffer.slots[index]
+                merged = _merge_updates(current, update)
+                if merged is not None:
+                    buffer.slots[index] = (filter, merged, upsert)
+                    self.metrics["ops_merged"] += 1
+                    return
+                # Keep both updates, but apply this batch in order
+                buffer.ordered = True
+            buffer.slots.append((filter, copy.copy(update), upsert))
+            if key is not None:
+                buffer.update_index[key] = len(buffer.slots) - 1
+            size, pending = len(buffer), self.pending_count()
+        self._after_enqueue(size, pending)
+
+    def pending_count(self) -> int:
+        return sum(len(buffer) for buffer in self._buffers.values())
+
+    # ------------------------------------------------------------------
+    # Flush
+    # ------------------------------------------------------------------
+
+    def _drain(self, name: Optional[str] = None) -> List[Tuple[str, Any, List[Any], bool]]:
+        """Swap out pending buffers and materialize write models"""
+        with self._lock:
+            names = [name] if name is not None else list(self._buffers.keys())
+            drained = []
+            for buffer_name in names:
+                buffer = self._buffers.pop(buffer_name, None)
+                if buffer is None or not buffer.slots:
+                    continue
+                operations = []
+                for slot in buffer.slots:
+                    if isinstance(slot, tuple):
+                        filter, update, upsert = slot
+                        operations.append(UpdateOne(filter, update, upsert=upsert))
+                    else:
+                        operations.append(slot)
+                drained.append((buffer_name, buffer.collection, operations, buffer.ordered))
+            return drained
+
+    def flush(self, collection=None) -> int:
+        """
+        Write pending operations now (all collections, or just `collection`).
+
+        Returns:
+            Number of operations written successfully
+        """
+        with self._flush_lock:
+            started = time.time()
+            written = 0
+            name = collection.full_name if collection is not None else None
+            for buffer_name, target, operations, ordered in self._drain(name):
+                for start in range(0, len(operations), self.max_batch):
+                    chunk = operations[start:start + self.max_batch]
+                    written += self._write(buffer_name, target, chunk, ordered)
+            if written:
+                self.metrics["last_flush_ms"] = round((time.time() - started) * 1000, 2)
+            return written
+
+    def _write(self, name: str, collection, operations: List[Any], ordered: bool = False) -> int:
+        try:
+            collection.bulk_write(operations, ordered=ordered)
+            self.metrics["bulk_writes"] += 1
+            self.metrics["ops_written"] += len(operations)
+            return len(operations)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            failed = len(write_errors)
+            if ordered and write_errors:
+                # Ordered batches stop at the first error
+                failed = len(operations) - write_errors[0].get("index", 0)
+            self.metrics["bulk_writes"] += 1
+            self.metrics["errors"] += 1
+            self.metrics["ops_failed"] += failed
+            self.metrics["ops_written"] += len(operations) - failed
+            logger.error(f"Bulk write to {name}: {failed}/{len(operations)} operations failed")
+            self._report(name, e, operations)
+            return len(operations) - failed
+        except Exception as e:
+            self.metrics["errors"] += 1
+            self.metrics["ops_failed"] += len(operations)
+            logger.error(f"Bulk write to {name} failed: {e}")
+            self._report(name, e, operations)
+            return 0
+
+    def _report(self, name: str, error: Exception, operations: List[Any]):
+        if self.on_error is None:
+            return
+        try:
+            self.on_error(name, error, operations)
+        except Exception as e:
+            logger.error(f"Error in bulk writer error callback: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = self.pending_count()
+        metrics = dict(self.metrics)
+        metrics["pending"] = pending
+        saved = metrics["ops_written"] + metrics["ops_merged"]
+        metrics["round_trip_reduction"] = round(saved / metrics["bulk_writes"], 1) if metrics["bulk_writes"] else 0
+        return metrics
+
+
+_default_writer: Optional[MongoBulkWriter] = None
+_default_lock = threading.Lock()
+
+
+def get_bulk_writer() -> MongoBulkWriter:
+    """Process-wide writer, flushed automatically at interpreter exit"""
+    global _default_writer
+    with _default_lock:
+        if _default_writer is None:
+            _default_writer = MongoBulkWriter().start()
+            atexit.register(_default_writer.close)
+        return _default_writer
@@ -26,6 +26,7 @@ sys.path.insert(0, '/srv/hf/ai_agents')
 from tools.construction_agent_creator import ConstructionAgentCreator
 from sentence_transformers import SentenceTransformer
 from qdrant_client import QdrantClient
+from qdrant_tenancy import get_tenant_client
 from qdrant_client.models import Distance, VectorParams, PointStruct
 
 def process_agent_on_gpu(gpu_id: int, agent_data: dict, results_queue: mp.Queue):
@@ -103,7 +104,7 @@ def process_agent_on_gpu(gpu_id: int, agent_data: dict, results_queue: mp.Queue)
         
         # STEP 4: Upload la Qdrant
         print(f"\n[GPU {gpu_id}] STEP 4/4: Upload către Qdrant...")
-        qdrant = QdrantClient(url="http://localhost:9306")
+        qdrant = get_tenant_client(QdrantClient(url="http://localhost:9306"))
         collection_name = f"agent_{agent_id_obj}_content"
         
         # Recreate collection
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+🎛️ Qdrant Profiles - Configurație declarativă per clasă de colecții
+
+Fiecare clasă de colecții (agent_*_content, construction_*, site_content, shared_*...) are un profil:
+- indexuri de payload pe câmpurile după care filtrăm (agent_id, url, domain, language)
+  → căutările filtrate folosesc indexul în loc de full scan
+- cuantizare scalar int8 / binară, păstrată în RAM, cu rescoring pe vectorii originali
+- parametri HNSW (m, ef_construct) și hnsw_ef la căutare
+- vectori / payload pe disc (RAM per milion de vectori 1024d: ~4GB float32 → ~1GB int8)
+
+Colecțiile existente sunt aduse la profil cu reconcile() (doar diferențele, fără recreare).
+
+Usage:
+    python qdrant_profiles.py --reconcile-all [--dry-run]
+    python qdrant_profiles.py --reconcile agent_123_content
+    python qdrant_profiles.py --benchmark site_content --samples 100 --top-k 10
+"""
+
+import argparse
+import logging
+import os
+import re
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client import models
+from qdrant_client.models import Distance, HnswConfigDiff, OptimizersConfigDiff, VectorParams
+
+logger = logging.getLogger(__name__)
+
+QDRANT_URL = os.getenv("QDRANT_URL", "http://127.0.0.1:6333")
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY") or None
+
+KEYWORD = models.PayloadSchemaType.KEYWORD
+INTEGER = models.PayloadSchemaType.INTEGER
+FLOAT = models.PayloadSchemaType.FLOAT
+
+
+@dataclass
+class CollectionProfile:
+    """Configurația dorită pentru o clasă de colecții"""
+    name: str
+    payload_indexes: Dict[str, object] = field(default_factory=dict)
+    quantization: Optional[str] = "scalar"     # scalar | binary | None
+    quantization_always_ram: bool = True
+    oversampling: float = 2.0                  # candidați cuantizați = limit * oversampling, apoi rescore
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    hnsw_ef: int = 128
+    on_disk_vectors: bool = False
+    on_disk_payload: bool = True
+    indexing_threshold: int = 20000
+
+    def quantization_config(self):
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8, quantile=0.99, always_ram=self.quantization_always_ram
+                )
+            )
+        if self.quantization == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=self.quantization_always_ram)
+            )
+        return None
+
+    def search_params(self) -> models.SearchParams:
+        quantization = None
+        if self.quantization:
+            quantization = models.QuantizationSearchParams(rescore=True, oversampling=self.oversampling)
+        return models.SearchParams(hnsw_ef=self.hnsw_ef, quantization=quantization)
+
+
+# Ordinea contează: primul pattern care se potrivește câștigă
+PROFILES: List[tuple] = [
+    (re.compile(r"^shared_\d+d$"), CollectionProfile(
+        name="shared",
+        payload_indexes={"source_collection": KEYWORD, "chunk_id": KEYWORD, "url": KEYWORD,
+                         "metadata.url": KEYWORD, "domain": KEYWORD, "language": KEYWORD},
+        on_disk_vectors=True,
+        hnsw_ef_construct=200,
+    )),
+    (re.compile(r"^agent_.+_content$"), CollectionProfile(
+        name="agent_content",
+        payload_indexes={"agent_id": KEYWORD, "chunk_id": KEYWORD, "metadata.url": KEYWORD, "language": KEYWORD},
+    )),
+    (re.compile(r"^construction_"), CollectionProfile(
+        name="construction",
+        payload_indexes={"domain": KEYWORD, "url": KEYWORD, "page_index": INTEGER, "language": KEYWORD},
+    )),
+    (re.compile(r"^mem_.+_(faq|pages)$"), CollectionProfile(
+        name="mirror",
+        payload_indexes={"url": KEYWORD, "domain": KEYWORD},
+    )),
+    (re.compile(r"^tenant_registry$"), CollectionProfile(
+        name="registry", quantization=None, on_disk_payload=False,
+    )),
+    (re.compile(r".*"), CollectionProfile(
+        name="default",
+        payload_indexes={"agent_id": KEYWORD, "url": KEYWORD, "domain": KEYWORD, "language": KEYWORD},
+    )),
+]
+
+# Colecția principală de conținut (config/database_config.QDRANT_COLLECTION): milioane de pagini
+# → vectori pe disc, cuantizare în RAM
+SITE_CONTENT_PROFILE = CollectionProfile(
+    name="site_content",
+    payload_indexes={"url": KEYWORD, "domain": KEYWORD, "language": KEYWORD, "agent_id": KEYWORD},
+    on_disk_vectors=True,
+    hnsw_ef_construct=200,
+)
+NAMED_PROFILES: Dict[str, CollectionProfile] = {}
+try:
+    from config.database_config import QDRANT_COLLECTION
+    NAMED_PROFILES[QDRANT_COLLECTION] = SITE_CONTENT_PROFILE
+except Exception:
+    pass
+
+
+def profile_for(collection_name: str) -> CollectionProfile:
+    # versiunile din spatele unui alias (`agent_1_content__v2026...`) au profilul alias-ului
+    collection_name = collection_name.split("__v", 1)[0]
+    if collection_name in NAMED_PROFILES:
+        return NAMED_PROFILES[collection_name]
+    for pattern, profile in PROFILES:
+        if pattern.match(collection_name):
+            return profile
+    return PROFILES[-1][1]
+
+
+def search_params_for(collection_name: str) -> models.SearchParams:
+    return profile_for(collection_name).search_params()
+
+
+def create_collection(client: QdrantClient, collection_name: str, vector_size: int,
+                      distance: Distance = Distance.COSINE, profile: Optional[CollectionProfile] = None,
+                      **overrides):
+    """create_collection cu profilul clasei + indexurile de payload"""
+    profile = profile or profile_for(collection_name)
+    kwargs = dict(
+        collection_name=collection_name,
+        vectors_config=VectorParams(size=int(vector_size), distance=distance, on_disk=profile.on_disk_vectors),
+        hnsw_config=HnswConfigDiff(m=profile.hnsw_m, ef_construct=profile.hnsw_ef_construct),
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=profile.indexing_threshold),
+        quantization_config=profile.quantization_config(),
+        on_disk_payload=profile.on_disk_payload,
+    )
+    kwargs.update(overrides)
+    result = client.create_collection(**kwargs)
+    _ensure_payload_indexes(client, collection_name, profile, existing={})
+    logger.info(f"🎛️ Created {collection_name} with profile '{profile.name}'")
+    return result
+
+
+def ensure_collection(client: QdrantClient, collection_name: str, vector_size: int,
+                      distance: Distance = Distance.COSINE) -> bool:
+    """Creează colecția cu profil dacă lipsește. return: True dacă a fost creată"""
+    if client.collection_exists(collection_name):
+        return False
+    create_collection(client, collection_name, vector_size, distance)
+    return True
+
+
+def _ensure_payload_indexes(client: QdrantClient, collection_name: str, profile: CollectionProfile,
+                            existing: Dict, dry_run: bool = False) -> List[str]:
+    created = []
+    for field_name, schema in profile.payload_indexes.items():
+        if field_name in existing:
+            continue
+        created.append(field_name)
+        if dry_run:
+            continue
+        try:
+            client.create_payload_index(collection_name=collection_name, field_name=field_name, field_schema=schema)
+        except Exception as e:
+            logger.warning(f"⚠️ Payload index {collection_name}.{field_name}: {e}")
+    return created
+
+
+def _quantization_kind(config) -> Optional[str]:
+    if config is None:
+        return None
+    if getattr(config, "scalar", None) is not None:
+        return "scalar"
+    if getattr(config, "binary", None) is not None:
+        return "binary"
+    return "product"
+
+
+def reconcile(client: QdrantClient, collection_name: str, profile: Optional[CollectionProfile] = None,
+              dry_run: bool = False) -> Dict:
+    """
+    Aduce o colecție existentă la profil (indexuri, cuantizare, HNSW, on_disk).
+    Optimizer-ul Qdrant reconstruiește segmentele în fundal; colecția rămâne disponibilă.
+    """
+    profile = profile or profile_for(collection_name)
+    info = client.get_collection(collection_name)
+    changes: Dict[str, object] = {}
+
+    hnsw = info.config.hnsw_config
+    if hnsw.m != profile.hnsw_m or hnsw.ef_construct != profile.hnsw_ef_construct:
+        changes["hnsw"] = {"m": profile.hnsw_m, "ef_construct": profile.hnsw_ef_construct}
+
+    if _quantization_kind(info.config.quantization_config) != profile.quantization:
+        changes["quantization"] = profile.quantization
+
+    vectors = info.config.params.vectors
+    if isinstance(vectors, VectorParams) and bool(vectors.on_disk) != profile.on_disk_vectors:
+        changes["on_disk_vectors"] = profile.on_disk_vectors
+
+    missing = _ensure_payload_indexes(client, collection_name, profile, info.payload_schema or {}, dry_run=True)
+    if missing:
+        changes["payload_indexes"] = missing
+
+    if changes and not dry_run:
+        update = {}
+        if "hnsw" in changes:
+            update["hnsw_config"] = HnswConfigDiff(m=profile.hnsw_m, ef_construct=profile.hnsw_ef_construct)
+        if "quantization" in changes:
+            update["quantization_config"] = profile.quantization_config() or models.Disabled.DISABLED
+        if "on_disk_vectors" in changes:
+            update["vectors_config"] = {"": models.VectorParamsDiff(on_disk=profile.on_disk_vectors)}
+        if update:
+            client.update_collection(collection_name=collection_name, **update)
+        _ensure_payload_indexes(client, collection_name, profile, info.payload_schema or {})
+
+    if changes:
+        logger.info(f"{'🔎' if dry_run else '✅'} {collection_name} [{profile.name}]: {changes}")
+    return {"collection": collection_name, "profile": profile.name, "changes": changes, "applied": bool(changes) and not dry_run}
+
+
+def reconcile_all(client: QdrantClient, dry_run: bool = False) -> List[Dict]:
+    results = []
+    for collection in client.get_collections().collections:
+        try:
+            results.append(reconcile(client, collection.name, dry_run=dry_run))
+        except Exception as e:
+            logger.error(f"❌ Reconcile {collection.name}: {e}")
+            results.append({"collection": collection.name, "error": str(e)})
+    return results
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def benchmark(client: QdrantClient, collection_name: str, samples: int = 50, top_k: int = 10,
+              query_filter: Optional[models.Filter] = None) -> Dict:
+    """
+    Recall@k și latență: căutarea cu profilul (HNSW + cuantizare + rescore) vs baseline exact (full scan).
+    Query-urile sunt vectori luați din colecție (fără embedder).
+    """
+    points, _ = client.scroll(
+        collection_name=collection_name, limit=samples, with_vectors=True, with_payload=False, scroll_filter=query_filter
+    )
+    queries = [p.vector for p in points if isinstance(p.vector, list)]
+    if not queries:
+        return {"collection": collection_name, "error": "no vectors"}
+
+    params = search_params_for(collection_name)
+    exact = models.SearchParams(exact=True)
+    recalls, fast_ms, exact_ms = [], [], []
+    for vector in queries:
+        started = time.perf_counter()
+        truth = client.search(collection_name=collection_name, query_vector=vector, limit=top_k,
+                              query_filter=query_filter, search_params=exact)
+        exact_ms.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        hits = client.search(collection_name=collection_name, query_vector=vector, limit=top_k,
+                             query_filter=query_filter, search_params=params)
+        fast_ms.append((time.perf_counter() - started) * 1000)
+
+        truth_ids = {h.id for h in truth}
+        if truth_ids:
+            recalls.append(len(truth_ids & {h.id for h in hits}) / len(truth_ids))
+
+    return {
+        "collection": collection_name,
+        "profile": profile_for(collection_name).name,
+        "samples": len(queries),
+        "top_k": top_k,
+        "recall": round(statistics.mean(recalls), 4) if recalls else None,
+        "min_recall": round(min(recalls), 4) if recalls else None,
+        "latency_ms": {"p50": round(_percentile(fast_ms, 0.5), 2), "p95": round(_percentile(fast_ms, 0.95), 2)},
+        "exact_latency_ms": {"p50": round(_percentile(exact_ms, 0.5), 2), "p95": round(_percentile(exact_ms, 0.95), 2)},
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Profiluri de configurare pentru colecțiile Qdrant")
+    parser.add_argument("--reconcile", nargs="*", default=[], help="Colecții de adus la profil")
+    parser.add_argument("--reconcile-all", action="store_true")
+    parser.add_argument("--dry-run", action="store_true", help="Doar afișează diferențele")
+    parser.add_argument("--benchmark", nargs="*", default=[], help="Recall/latență vs căutare exactă")
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY, timeout=120)
+
+    if args.reconcile_all:
+        results = reconcile_all(client, dry_run=args.dry_run)
+        changed = [r for r in results if r.get("changes")]
+        print(f"🎛️ {len(changed)}/{len(results)} colecții {'de modificat' if args.dry_run else 'modificate'}")
+    for name in args.reconcile:
+        print(reconcile(client, name, dry_run=args.dry_run))
+    for name in args.benchmark:
+        print(benchmark(client, name, samples=args.samples, top_k=args.top_k))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+🔁 Qdrant Reindex - Reindexare fără downtime prin colecții shadow + alias
+
+Căutările folosesc mereu un alias (ex: `agent_123`), care indică spre o colecție versionată
+(`agent_123__v20260101120000`). O reindexare:
+1. creează colecția shadow (profil din qdrant_profiles, indexare HNSW oprită pe durata încărcării)
+2. upsert în batch-uri paralele
+3. pornește indexarea și așteaptă status green
+4. validează: index green + număr de puncte + recall pe eșantion (fiecare punct trebuie să se regăsească în top-k)
+5. delta final: scrierile făcute în sursă pe durata rebuild-ului sunt reaplicate în shadow
+6. mută alias-ul atomic (delete + create într-o singură operație)
+7. păstrează versiunea anterioară pentru rollback; versiunile mai vechi → snapshot + ștergere
+
+Usage:
+    python qdrant_reindex.py --status agent_123
+    python qdrant_reindex.py --rollback agent_123
+    python qdrant_reindex.py --copy agent_123          # rebuild din colecția curentă (ex: schimbare profil)
+"""
+
+import argparse
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client import models
+from qdrant_client.models import Distance, OptimizersConfigDiff, PointStruct
+
+import qdrant_profiles
+
+logger = logging.getLogger(__name__)
+
+QDRANT_URL = os.getenv("QDRANT_URL", "http://127.0.0.1:6333")
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY") or None
+
+VERSION_SEP = "__v"
+
+
+def versioned_name(alias: str) -> str:
+    return f"{alias}{VERSION_SEP}{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}"
+
+
+def batched(points: Iterable[PointStruct], size: int) -> Iterator[List[PointStruct]]:
+    batch = []
+    for point in points:
+        batch.append(point)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class AliasReindexer:
+    """Rebuild shadow → validare → swap atomic de alias, cu rollback"""
+
+    def __init__(self, client: QdrantClient, workers: int = 4, batch_size: int = 256,
+                 keep_versions: int = 1, snapshot_dropped: bool = True):
+        """
+        workers: upsert-uri paralele
+        keep_versions: versiuni anterioare păstrate pentru rollback
+        snapshot_dropped: snapshot înainte de ștergerea versiunilor vechi
+        """
+        self.client = client
+        self.workers = workers
+        self.batch_size = batch_size
+        self.keep_versions = keep_versions
+        self.snapshot_dropped = snapshot_dropped
+
+    # ------------------------------------------------------------------
+    # Alias-uri și versiuni
+    # ------------------------------------------------------------------
+
+    def current_target(self, alias: str) -> Optional[str]:
+        for description in self.client.get_aliases().aliases:
+            if description.alias_name == alias:
+                return description.collection_name
+        return None
+
+    def versions(self, alias: str) -> List[str]:
+        """Colecțiile versionate ale alias-ului, cele mai noi primele"""
+        prefix = f"{alias}{VERSION_SEP}"
+        names = [c.name for c in self.client.get_collections().collections if c.name.startswith(prefix)]
+        return sorted(names, reverse=True)
+
+    def _switch(self, alias: str, target: str):
+        """Mutare atomică: căutările văd fie versiunea veche, fie cea nouă, niciodată un amestec"""
+        operations = []
+        if self.current_target(alias) is not None:
+            operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias)))
+        operations.append(models.CreateAliasOperation(
+            create_alias=models.CreateAlias(collection_name=target, alias_name=alias)
+        ))
+        self.client.update_collection_aliases(change_aliases_operations=operations)
+
+    def _swap(self, alias: str, target: str):
+        """
+        Mută alias-ul pe target. Colecție reală cu numele alias-ului (dinainte de alias-uri):
+        alias-ul se creează întâi (are prioritate la rezolvarea numelui), apoi legacy e ștearsă.
+        Doar dacă serverul refuză alias-ul peste o colecție existentă rămâne fereastra delete → create.
+        """
+        if self.current_target(alias) is not None or not self.client.collection_exists(alias):
+            self._switch(alias, target)
+            return
+
+        if self.snapshot_dropped:
+            self._snapshot(alias)
+        try:
+            self._switch(alias, target)
+        except Exception as e:
+            logger.warning(f"⚠️ Alias {alias} cannot shadow legacy collection ({e}); delete + create")
+            self.client.delete_collection(collection_name=alias)
+            self._switch(alias, target)
+        else:
+            self.client.delete_collection(collection_name=alias)
+            # ștergerea nu trebuie să fi luat alias-ul cu ea
+            if self.current_target(alias) != target:
+                self._switch(alias, target)
+        logger.info(f"🔁 Legacy collection {alias} replaced by alias")
+
+    def _snapshot(self, collection_name: str):
+        try:
+            snapshot = self.client.create_snapshot(collection_name=collection_name)
+            logger.info(f"📸 Snapshot {collection_name}: {getattr(snapshot, 'name', snapshot)}")
+        except Exception as e:
+            logger.warning(f"⚠️ Snapshot {collection_name}: {e}")
+
+    def _prune(self, alias: str):
+        current = self.current_target(alias)
+        previous = [name for name in self.versions(alias) if name != current]
+        for name in previous[self.keep_versions:]:
+            if self.snapshot_dropped:
+                self._snapshot(name)
+            self.client.delete_collection(collection_name=name)
+            logger.info(f"🗑️ Dropped old version {name}")
+
+    # ------------------------------------------------------------------
+    # Rebuild
+    # ------------------------------------------------------------------
+
+    def _load(self, shadow: str, points: Iterable[PointStruct]) -> int:
+        loaded = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = []
+            for batch in batched(points, self.batch_size):
+                pending.append(pool.submit(self.client.upsert, collection_name=shadow, points=batch, wait=True))
+                loaded += len(batch)
+                # backpressure: nu ținem în memorie mai mult de 2 batch-uri per worker
+                if len(pending) >= self.workers * 2:
+                    pending.pop(0).result()
+            for future in pending:
+                future.result()
+        return loaded
+
+    def _wait_indexed(self, shadow: str, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            status = self.client.get_collection(shadow).status
+            if status == models.CollectionStatus.GREEN:
+                return True
+            time.sleep(2)
+        logger.warning(f"⚠️ {shadow} not green after {timeout}s")
+        return False
+
+    def sample_recall(self, collection_name: str, samples: int = 50, top_k: int = 10) -> Optional[float]:
+        """
+        Fracțiunea de puncte eșantionate care se regăsesc în top-k căutând după propriul vector.
+        Colecții cu vectori numiți: se caută pe primul vector dens al punctului.
+        """
+        count = self.client.count(collection_name=collection_name, exact=True).count
+        if not count:
+            return None
+        points, _ = self.client.scroll(
+            collection_name=collection_name, limit=min(count, samples * 4), with_vectors=True, with_payload=False
+        )
+        sample = random.sample(points, min(samples, len(points)))
+        params = qdrant_profiles.search_params_for(collection_name)
+        found = 0
+        searched = 0
+        for point in sample:
+            query_vector = _dense_query(point.vector)
+            if query_vector is None:
+                continue
+            hits = self.client.search(
+                collection_name=collection_name, query_vector=query_vector, limit=top_k, search_params=params
+            )
+            found += any(hit.id == point.id for hit in hits)
+            searched += 1
+        return found / searched if searched else None
+
+    def rebuild(self, alias: str, points: Iterable[PointStruct], vector_size: int,
+                distance: Distance = Distance.COSINE, expected_count: Optional[int] = None,
+                min_recall: float = 0.95, validate: Optional[Callable[[str], bool]] = None,
+                index_timeout: float = 1800, delta: Optional[Callable[[str], Dict]] = None,
+                vectors_config=None) -> Dict:
+        """
+        points: iterabil (poate fi generator) cu punctele noii versiuni
+        expected_count: numărul așteptat de puncte (default: câte au fost încărcate)
+        validate: verificare suplimentară (primește numele colecției shadow)
+        delta: reaplică în shadow scrierile făcute în sursă pe durata rebuild-ului
+               (primește numele colecției shadow; vezi sync_from_collection)
+        vectors_config: config explicit (ex: vectori numiți), altfel un vector de vector_size
+        return: {"alias", "collection", "previous", "points", "recall", "swapped", "seconds"}
+        """
+        started = time.time()
+        profile = qdrant_profiles.profile_for(alias)
+        shadow = versioned_name(alias)
+        previous = self.current_target(alias) or (alias if self.client.collection_exists(alias) else None)
+
+        # indexing_threshold=0 → fără construire HNSW în timpul încărcării
+        overrides = {"vectors_config": vectors_config} if vectors_config is not None else {}
+        qdrant_profiles.create_collection(
+            self.client, shadow, vector_size, distance, profile=profile,
+            optimizers_config=OptimizersConfigDiff(indexing_threshold=0), **overrides,
+        )
+        loaded = self._load(shadow, points)
+        self.client.update_collection(
+            collection_name=shadow, optimizers_config=OptimizersConfigDiff(indexing_threshold=profile.indexing_threshold)
+        )
+        indexed = self._wait_indexed(shadow, index_timeout)
+
+        count = self.client.count(collection_name=shadow, exact=True).count
+        expected = loaded if expected_count is None else expected_count
+        recall = self.sample_recall(shadow)
+        result = {"alias": alias, "collection": shadow, "previous": previous, "points": count,
+                  "expected": expected, "recall": recall, "swapped": False}
+
+        problems = []
+        if not indexed:
+            problems.append(f"index not green after {index_timeout}s")
+        if count < expected:
+            problems.append(f"count {count} < {expected}")
+        if recall is not None and recall < min_recall:
+            problems.append(f"recall {recall:.3f} < {min_recall}")
+        if validate is not None and not validate(shadow):
+            problems.append("custom validation failed")
+        if problems:
+            logger.error(f"❌ {alias}: shadow {shadow} rejected ({', '.join(problems)}); alias unchanged")
+            self.client.delete_collection(collection_name=shadow)
+            result["errors"] = problems
+            result["seconds"] = round(time.time() - started, 1)
+            return result
+
+        if delta is not None:
+            result["delta"] = delta(shadow)
+        self._swap(alias, shadow)
+        self._prune(alias)
+        result["swapped"] = True
+        result["seconds"] = round(time.time() - started, 1)
+        logger.info(f"✅ {alias} → {shadow}: {count} points, recall {recall}, {result['seconds']}s")
+        return result
+
+    def rollback(self, alias: str) -> Optional[str]:
+        """Alias înapoi pe versiunea anterioară păstrată"""
+        current = self.current_target(alias)
+        previous = [name for name in self.versions(alias) if name != current and (current is None or name < current)]
+        if not previous:
+            logger.warning(f"⚠️ {alias}: no previous version to roll back to")
+            return None
+        self._switch(alias, previous[0])
+        logger.info(f"↩️ {alias} → {previous[0]}")
+        return previous[0]
+
+
+def _dense_query(vector):
+    """Vectorul de căutare al unui punct: listă simplă sau (nume, listă) pentru vectori numiți"""
+    if isinstance(vector, dict):
+        for name, value in vector.items():
+            if isinstance(value, list) and value and not isinstance(value[0], list):
+                return (name, value)
+        return None
+    return vector or None
+
+
+def points_from_collection(client: QdrantClient, collection_name: str,
+                           transform: Optional[Callable[[List], List[PointStruct]]] = None,
+                           batch: int = 256) -> Iterator[PointStruct]:
+    """
+    Punctele unei colecții existente (cu vectori).
+    transform: re-embed / modificare payload per batch (ex: după schimbarea modelului)
+    """
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=collection_name, limit=batch, offset=offset, with_payload=True, with_vectors=True
+        )
+        if transform is not None:
+            yield from transform(records)
+        else:
+            for record in records:
+                yield PointStruct(id=record.id, vector=record.vector, payload=record.payload or {})
+        if offset is None:
+            break
+
+
+def sync_from_collection(client: QdrantClient, source: str, shadow: str,
+                         transform: Optional[Callable[[List], List[PointStruct]]] = None,
+                         point_id: Optional[Callable] = None, batch: int = 256) -> Dict:
+    """
+    Delta final înainte de swap: aduce shadow la zi cu sursa (scrierile din timpul rebuild-ului).
+    - fără transform: punctele lipsă sau cu vector/payload diferit se copiază
+    - cu transform (re-embed): point_id(record) dă id-ul din shadow; doar punctele lipsă sau cu
+      payload diferit trec prin transform, restul nu se re-vectorizează
+    Punctele șterse din sursă între timp se șterg și din shadow.
+    return: {"upserted", "deleted"}
+    """
+    point_id = point_id or (lambda record: record.id)
+    compare_vectors = transform is None
+    seen = set()
+    upserted = 0
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=source, limit=batch, offset=offset, with_payload=True, with_vectors=compare_vectors
+        )
+        targets = {point_id(record): record for record in records}
+        seen.update(targets)
+        existing = {
+            point.id: point
+            for point in client.retrieve(
+                collection_name=shadow, ids=list(targets), with_payload=True, with_vectors=compare_vectors
+            )
+        } if targets else {}
+        changed = [
+            record for target, record in targets.items()
+            if target not in existing
+            or (existing[target].payload or {}) != (record.payload or {})
+            or (compare_vectors and existing[target].vector != record.vector)
+        ]
+        if changed:
+            if transform is not None:
+                points = transform(changed)
+            else:
+                points = [PointStruct(id=r.id, vector=r.vector, payload=r.payload or {}) for r in changed]
+            if points:
+                client.upsert(collection_name=shadow, points=points, wait=True)
+                upserted += len(points)
+        if offset is None:
+            break
+
+    stale = []
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=shadow, limit=batch, offset=offset, with_payload=False, with_vectors=False
+        )
+        stale.extend(record.id for record in records if record.id not in seen)
+        if offset is None:
+            break
+    for start in range(0, len(stale), batch):
+        client.delete(
+            collection_name=shadow, points_selector=models.PointIdsList(points=stale[start:start + batch]), wait=True
+        )
+
+    if upserted or stale:
+        logger.info(f"🔁 Delta {source} → {shadow}: {upserted} upserted, {len(stale)} deleted")
+    return {"upserted": upserted, "deleted": len(stale)}
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Reindexare Qdrant prin alias + colecții versionate")
+    parser.add_argument("--status", nargs="*", default=[])
+    parser.add_argument("--rollback", nargs="*", default=[])
+    parser.add_argument("--copy", nargs="*", default=[], help="Rebuild din colecția curentă (profil nou, fără re-embed)")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY, timeout=120)
+    reindexer = AliasReindexer(client, workers=args.workers)
+
+    for alias in args.status:
+        print({"alias": alias, "current": reindexer.current_target(alias), "versions": reindexer.versions(alias)})
+    for alias in args.rollback:
+        reindexer.rollback(alias)
+    for alias in args.copy:
+        source = reindexer.current_target(alias) or alias
+        params = client.get_collection(source).config.params.vectors
+        # vectori numiți: config-ul se copiază integral, primul vector dă dimensiunea implicită
+        first = next(iter(params.values())) if isinstance(params, dict) else params
+        print(reindexer.rebuild(
+            alias, points_from_collection(client, source), first.size, first.distance,
+            delta=lambda shadow: sync_from_collection(client, source, shadow),
+            vectors_config=params if isinstance(params, dict) else None,
+        ))
+
+
+if __name__ == "__main__":
+    main()
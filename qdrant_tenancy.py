@@ -0,0 +1,589 @@
+#!/usr/bin/env python3
+"""
+🏢 Qdrant Tenancy - O colecție partajată per model de embedding, partiționată pe agent_id
+
+Modul per-agent (default) creează câte o colecție pentru fiecare agent
+(`agent_{id}_content`, `construction_{domain}`, `mem_{site}_pages`...) → mii de grafuri HNSW.
+În modul partajat (QDRANT_STORAGE_MODE=shared):
+- punctele stau în `shared_{dim}d` (o colecție per dimensiune de embedding = per model)
+- fiecare punct are payload `tenant_id` (index keyword, is_tenant) + `source_collection`;
+  `tenant_id` e câmp dedicat, setat mereu de client (payload-ul apelantului poate avea
+  propriul `agent_id`, care nu e folosit pentru partiționare)
+- ID-urile sunt namespaced (uuid5(source_collection:id)), ID-ul original rămâne în `source_id`
+
+TenantQdrantClient are aceeași interfață ca QdrantClient: apelanții păstrează
+numele vechi de colecții, iar clientul le traduce în (colecție partajată + filtru tenant).
+
+Migrare fără downtime (per colecție veche):
+1. registry → "migrating": citirile merg încă pe colecția veche, scrierile merg în ambele
+2. copiere scroll → upsert (idempotentă, ID-uri deterministe), verificare număr puncte
+3. registry → "shared": citiri și scrieri doar pe colecția partajată
+4. așteptare REGISTRY_TTL (procesele cu starea veche în cache mai scriu în colecția veche),
+   apoi copiere finală a punctelor lipsă; abia după aceasta colecția veche poate fi ștearsă
+
+Usage:
+    python qdrant_tenancy.py --migrate agent_123_content construction_firma_ro
+    python qdrant_tenancy.py --migrate-all [--drop-legacy]
+    python qdrant_tenancy.py --status
+"""
+
+import argparse
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from qdrant_client import QdrantClient
+from qdrant_client import models
+from qdrant_client.models import (
+    Distance, FieldCondition, Filter, HnswConfigDiff, MatchAny, MatchValue, PointStruct, VectorParams
+)
+
+import qdrant_profiles
+
+logger = logging.getLogger(__name__)
+
+QDRANT_URL = os.getenv("QDRANT_URL", "http://127.0.0.1:6333")
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY") or None
+STORAGE_MODE = os.getenv("QDRANT_STORAGE_MODE", "per_agent")  # per_agent | shared
+
+SHARED_PREFIX = "shared_"
+REGISTRY_COLLECTION = "tenant_registry"
+TENANT_FIELD = "tenant_id"
+SOURCE_FIELD = "source_collection"
+SOURCE_ID_FIELD = "source_id"
+REGISTRY_TTL = 60.0
+
+# Nume vechi → tenant (restul numelui e folosit ca atare); sufixele cunoscute nu intră în tenant
+_AGENT_SUFFIXES = ("content", "conversations")
+_LEGACY_PATTERNS = [
+    re.compile(rf"^agent_(?P<agent>.+?)_(?:{'|'.join(_AGENT_SUFFIXES)})$"),
+    re.compile(rf"^agent_(?P<agent>(?!.*_(?:{'|'.join(_AGENT_SUFFIXES)})$).+)$"),
+    re.compile(r"^construction_(?P<agent>.+)$"),
+    re.compile(r"^mem_(?P<agent>.+?)_(?:faq|pages)$"),
+    re.compile(r"^mirror_(?P<agent>.+)$"),
+]
+
+
+def tenant_for(collection_name: str) -> str:
+    """agent_id derivat din numele vechi al colecției"""
+    for pattern in _LEGACY_PATTERNS:
+        match = pattern.match(collection_name)
+        if match:
+            return match.group("agent")
+    return collection_name
+
+
+def shared_collection_name(vector_size: int) -> str:
+    return f"{SHARED_PREFIX}{int(vector_size)}d"
+
+
+def shared_point_id(source_collection: str, point_id: Any) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source_collection}:{point_id}"))
+
+
+def _restore_id(point):
+    """ID-ul original al punctului (compatibilitate cu apelanții)"""
+    payload = getattr(point, "payload", None) or {}
+    source_id = payload.get(SOURCE_ID_FIELD)
+    if source_id is None:
+        return point
+    try:
+        return point.model_copy(update={"id": source_id})
+    except AttributeError:
+        point.id = source_id
+        return point
+
+
+def _merge_filter(base: Optional[Filter], conditions: List[FieldCondition]) -> Filter:
+    if base is None:
+        return Filter(must=conditions)
+    must = list(base.must or []) + conditions
+    return Filter(must=must, should=base.should, must_not=base.must_not)
+
+
+class TenantRegistry:
+    """Starea fiecărei colecții vechi: per_agent | migrating | shared (în Qdrant, colecția tenant_registry)"""
+
+    def __init__(self, client: QdrantClient):
+        self.client = client
+        self._cache: Dict[str, Tuple[float, Optional[Dict]]] = {}
+        self._lock = threading.Lock()
+        self._ensured = False
+
+    def _ensure(self):
+        if self._ensured:
+            return
+        if not self.client.collection_exists(REGISTRY_COLLECTION):
+            self.client.create_collection(
+                collection_name=REGISTRY_COLLECTION,
+                vectors_config=VectorParams(size=1, distance=Distance.DOT)
+            )
+        self._ensured = True
+
+    def get(self, legacy_name: str) -> Optional[Dict]:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(legacy_name)
+        if cached and now - cached[0] < REGISTRY_TTL:
+            return cached[1]
+        self._ensure()
+        points = self.client.retrieve(
+            collection_name=REGISTRY_COLLECTION, ids=[shared_point_id(REGISTRY_COLLECTION, legacy_name)], with_payload=True
+        )
+        entry = dict(points[0].payload) if points else None
+        # lipsa din registry nu se memorează: o migrare pornită între timp trebuie văzută imediat
+        if entry is not None:
+            with self._lock:
+                self._cache[legacy_name] = (now, entry)
+        return entry
+
+    def set(self, legacy_name: str, status: str, shared_name: str, **extra):
+        self._ensure()
+        entry = {
+            "legacy": legacy_name,
+            "status": status,
+            "shared": shared_name,
+            TENANT_FIELD: tenant_for(legacy_name),
+            "updated_at": time.time(),
+            **extra
+        }
+        self.client.upsert(
+            collection_name=REGISTRY_COLLECTION,
+            points=[PointStruct(id=shared_point_id(REGISTRY_COLLECTION, legacy_name), vector=[1.0], payload=entry)]
+        )
+        with self._lock:
+            self._cache[legacy_name] = (time.monotonic(), entry)
+
+    def all(self) -> List[Dict]:
+        self._ensure()
+        entries, offset = [], None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=REGISTRY_COLLECTION, limit=256, offset=offset, with_payload=True
+            )
+            entries.extend(dict(p.payload) for p in points)
+            if offset is None:
+                return entries
+
+
+class TenantQdrantClient:
+    """
+    QdrantClient cu nume de colecții vechi traduse în colecții partajate.
+    Metodele netratate explicit sunt delegate clientului real.
+    """
+
+    def __init__(self, client: QdrantClient, mode: str = STORAGE_MODE, hnsw_m: int = 16, payload_m: int = 16):
+        self.client = client
+        self.mode = mode
+        self.hnsw_m = hnsw_m
+        self.payload_m = payload_m
+        self.registry = TenantRegistry(client) if mode == "shared" else None
+        self._ensured_shared: set = set()
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    # ------------------------------------------------------------------
+    # Rutare
+    # ------------------------------------------------------------------
+
+    def ensure_shared(self, vector_size: int, distance: Distance = Distance.COSINE) -> str:
+        name = shared_collection_name(vector_size)
+        if name in self._ensured_shared:
+            return name
+        if not self.client.collection_exists(name):
+            profile = qdrant_profiles.profile_for(name)
+            qdrant_profiles.create_collection(
+                self.client, name, vector_size, distance, profile=profile,
+                # payload_m: sub-graf HNSW per tenant; m: graf global pentru căutări cross-agent
+                hnsw_config=HnswConfigDiff(m=self.hnsw_m, payload_m=self.payload_m, ef_construct=profile.hnsw_ef_construct),
+            )
+            logger.info(f"🏢 Created shared collection {name}")
+        try:
+            tenant_schema = models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD, is_tenant=True)
+        except AttributeError:
+            tenant_schema = models.PayloadSchemaType.KEYWORD
+        try:
+            self.client.create_payload_index(collection_name=name, field_name=TENANT_FIELD, field_schema=tenant_schema)
+        except Exception as e:
+            logger.debug(f"Payload index {name}.{TENANT_FIELD}: {e}")
+        self._ensured_shared.add(name)
+        return name
+
+    def _route(self, collection_name: str) -> Tuple[str, Optional[Dict]]:
+        """
+        Returns:
+            ("legacy", None) | ("migrating", entry) | ("shared", entry)
+        """
+        if self.mode != "shared" or not is_legacy_tenant_collection(collection_name):
+            return "legacy", None
+        entry = self.registry.get(collection_name)
+        if entry is None:
+            # Colecție veche nemigrată → rămâne pe ea; tenant nou → direct în shared
+            if self.client.collection_exists(collection_name):
+                return "legacy", None
+            return "shared", None
+        return entry["status"], entry
+
+    @staticmethod
+    def _tenant_conditions(collection_name: str) -> List[FieldCondition]:
+        return [
+            FieldCondition(key=TENANT_FIELD, match=MatchValue(value=tenant_for(collection_name))),
+            FieldCondition(key=SOURCE_FIELD, match=MatchValue(value=collection_name)),
+        ]
+
+    def _shared_for(self, collection_name: str, entry: Optional[Dict], vector_size: Optional[int] = None) -> Optional[str]:
+        if entry and entry.get("shared"):
+            return entry["shared"]
+        if vector_size:
+            return self.ensure_shared(vector_size)
+        return None
+
+    def _shared_selector(self, collection_name: str, selector):
+        """Selector de puncte (listă de ID-uri, PointIdsList, Filter, FilterSelector) tradus pentru colecția partajată"""
+        conditions = self._tenant_conditions(collection_name)
+        if isinstance(selector, models.FilterSelector):
+            return models.FilterSelector(filter=_merge_filter(selector.filter, conditions))
+        if isinstance(selector, Filter):
+            return _merge_filter(selector, conditions)
+        if isinstance(selector, models.PointIdsList):
+            return models.PointIdsList(points=[shared_point_id(collection_name, i) for i in selector.points])
+        return [shared_point_id(collection_name, i) for i in selector]
+
+    def _to_shared_points(self, collection_name: str, points: Sequence[PointStruct]) -> List[PointStruct]:
+        tenant = tenant_for(collection_name)
+        converted = []
+        for point in points:
+            payload = dict(point.payload or {})
+            payload[TENANT_FIELD] = tenant
+            payload[SOURCE_FIELD] = collection_name
+            payload[SOURCE_ID_FIELD] = point.id
+            converted.append(PointStruct(id=shared_point_id(collection_name, point.id), vector=point.vector, payload=payload))
+        return converted
+
+    # ------------------------------------------------------------------
+    # API compatibil QdrantClient
+    # ------------------------------------------------------------------
+
+    def collection_exists(self, collection_name: str) -> bool:
+        status, _ = self._route(collection_name)
+        if status == "legacy":
+            return self.client.collection_exists(collection_name)
+        return True
+
+    def get_collection(self, collection_name: str):
+        status, entry = self._route(collection_name)
+        if status in ("legacy", "migrating"):
+            return self.client.get_collection(collection_name)
+        shared = self._shared_for(collection_name, entry)
+        if shared is None:
+            raise ValueError(f"Collection {collection_name} has no points in shared storage yet")
+        return self.client.get_collection(shared)
+
+    def create_collection(self, collection_name: str, vectors_config: VectorParams = None, **kwargs):
+        status, _ = self._route(collection_name)
+        if status == "legacy":
+            return self.client.create_collection(collection_name=collection_name, vectors_config=vectors_config, **kwargs)
+        if isinstance(vectors_config, dict):
+            vectors_config = VectorParams(**vectors_config)
+        shared = self.ensure_shared(vectors_config.size, vectors_config.distance)
+        self.registry.set(collection_name, "shared", shared)
+        return True
+
+    def recreate_collection(self, collection_name: str, vectors_config: VectorParams = None, **kwargs):
+        status, _ = self._route(collection_name)
+        if status == "legacy":
+            return self.client.recreate_collection(collection_name=collection_name, vectors_config=vectors_config, **kwargs)
+        self.delete_collection(collection_name)
+        return self.create_collection(collection_name, vectors_config)
+
+    def delete_collection(self, collection_name: str, **kwargs):
+        status, entry = self._route(collection_name)
+        if status != "legacy":
+            shared = self._shared_for(collection_name, entry)
+            if shared:
+                self.client.delete(
+                    collection_name=shared,
+                    points_selector=models.FilterSelector(filter=Filter(must=self._tenant_conditions(collection_name)))
+                )
+        if status != "shared" and self.client.collection_exists(collection_name):
+            return self.client.delete_collection(collection_name=collection_name, **kwargs)
+        return True
+
+    def upsert(self, collection_name: str, points: Sequence[PointStruct], **kwargs):
+        status, entry = self._route(collection_name)
+        if status in ("legacy", "migrating"):
+            result = self.client.upsert(collection_name=collection_name, points=points, **kwargs)
+            if status == "legacy":
+                return result
+        if not points:
+            return None
+        shared = self._shared_for(collection_name, entry, len(points[0].vector))
+        if entry is None:
+            self.registry.set(collection_name, "shared", shared)
+        return self.client.upsert(collection_name=shared, points=self._to_shared_points(collection_name, points), **kwargs)
+
+    def delete(self, collection_name: str, points_selector, **kwargs):
+        status, entry = self._route(collection_name)
+        if status in ("legacy", "migrating"):
+            result = self.client.delete(collection_name=collection_name, points_selector=points_selector, **kwargs)
+            if status == "legacy":
+                return result
+        shared = self._shared_for(collection_name, entry)
+        if shared is None:
+            return None
+        return self.client.delete(
+            collection_name=shared, points_selector=self._shared_selector(collection_name, points_selector), **kwargs
+        )
+
+    def set_payload(self, collection_name: str, payload: Dict, points=None, **kwargs):
+        status, entry = self._route(collection_name)
+        if status in ("legacy", "migrating"):
+            result = self.client.set_payload(collection_name=collection_name, payload=payload, points=points, **kwargs)
+            if status == "legacy":
+                return result
+        shared = self._shared_for(collection_name, entry)
+        if shared is None:
+            return None
+        # fără selector: toate punctele colecției vechi, adică filtrul tenant
+        selector = self._shared_selector(collection_name, points if points is not None else Filter())
+        return self.client.set_payload(collection_name=shared, payload=payload, points=selector, **kwargs)
+
+    def retrieve(self, collection_name: str, ids: Sequence, **kwargs):
+        status, entry = self._route(collection_name)
+        if status in ("legacy", "migrating"):
+            return self.client.retrieve(collection_name=collection_name, ids=ids, **kwargs)
+        shared = self._shared_for(collection_name, entry)
+        if shared is None:
+            return []
+        kwargs["with_payload"] = True  # source_id e necesar pentru ID-ul original
+        points = self.client.retrieve(
+            collection_name=shared, ids=self._shared_selector(collection_name, ids), **kwargs
+        )
+        return [_restore_id(p) for p in points]
+
+    def create_payload_index(self, collection_name: str, field_name: str, **kwargs):
+        status, entry = self._route(collection_name)
+        if status in ("legacy", "migrating"):
+            result = self.client.create_payload_index(collection_name=collection_name, field_name=field_name, **kwargs)
+            if status == "legacy":
+                return result
+        shared = self._shared_for(collection_name, entry)
+        if shared is None:
+            return None
+        return self.client.create_payload_index(collection_name=shared, field_name=field_name, **kwargs)
+
+    def search(self, collection_name: str, query_vector, query_filter: Optional[Filter] = None, **kwargs):
+        status, entry = self._route(collection_name)
+        if status in ("legacy", "migrating"):
+            return self.client.search(collection_name=collection_name, query_vector=query_vector, query_filter=query_filter, **kwargs)
+        shared = self._shared_for(collection_name, entry, len(query_vector))
+        hits = self.client.search(
+            collection_name=shared,
+            query_vector=query_vector,
+            query_filter=_merge_filter(query_filter, self._tenant_conditions(collection_name)),
+            **kwargs
+        )
+        return [_restore_id(hit) for hit in hits]
+
+    def search_batch(self, collection_name: str, requests: Sequence[models.SearchRequest], **kwargs):
+        """Mai multe căutări într-un singur request; filtrul tenant e adăugat fiecărei cereri"""
+        status, entry = self._route(collection_name)
+        if status in ("legacy", "migrating") or not requests:
+            return self.client.search_batch(collection_name=collection_name, requests=requests, **kwargs)
+        shared = self._shared_for(collection_name, entry, len(requests[0].vector))
+        conditions = self._tenant_conditions(collection_name)
+        tenant_requests = [
+            models.SearchRequest(**{**request.dict(exclude_none=True), "filter": _merge_filter(request.filter, conditions)})
+            for request in requests
+        ]
+        batches = self.client.search_batch(collection_name=shared, requests=tenant_requests, **kwargs)
+        return [[_restore_id(hit) for hit in hits] for hits in batches]
+
+    def query_points(self, collection_name: str, query=None, query_filter: Optional[Filter] = None, **kwargs):
+        status, entry = self._route(collection_name)
+        if status in ("legacy", "migrating"):
+            return self.client.query_points(collection_name=collection_name, query=query, query_filter=query_filter, **kwargs)
+        size = len(query) if isinstance(query, (list, tuple)) else None
+        shared = self._shared_for(collection_name, entry, size)
+        response = self.client.query_points(
+            collection_name=shared,
+            query=query,
+            query_filter=_merge_filter(query_filter, self._tenant_conditions(collection_name)),
+            **kwargs
+        )
+        response.points = [_restore_id(p) for p in response.points]
+        return response
+
+    def scroll(self, collection_name: str, scroll_filter: Optional[Filter] = None, **kwargs):
+        status, entry = self._route(collection_name)
+        if status in ("legacy", "migrating"):
+            return self.client.scroll(collection_name=collection_name, scroll_filter=scroll_filter, **kwargs)
+        shared = self._shared_for(collection_name, entry)
+        if shared is None:
+            return [], None
+        points, offset = self.client.scroll(
+            collection_name=shared,
+            scroll_filter=_merge_filter(scroll_filter, self._tenant_conditions(collection_name)),
+            **kwargs
+        )
+        return [_restore_id(p) for p in points], offset
+
+    def count(self, collection_name: str, count_filter: Optional[Filter] = None, **kwargs):
+        status, entry = self._route(collection_name)
+        if status in ("legacy", "migrating"):
+            return self.client.count(collection_name=collection_name, count_filter=count_filter, **kwargs)
+        shared = self._shared_for(collection_name, entry)
+        if shared is None:
+            return models.CountResult(count=0)
+        return self.client.count(
+            collection_name=shared,
+            count_filter=_merge_filter(count_filter, self._tenant_conditions(collection_name)),
+            **kwargs
+        )
+
+    # ------------------------------------------------------------------
+    # Cross-agent
+    # ------------------------------------------------------------------
+
+    def search_agents(self, agent_ids: Sequence[str], query_vector, limit: int = 10,
+                      query_filter: Optional[Filter] = None, **kwargs):
+        """Un singur request peste mai mulți agenți (doar în modul shared)"""
+        condition = FieldCondition(key=TENANT_FIELD, match=MatchAny(any=[str(a) for a in agent_ids]))
+        return self.client.search(
+            collection_name=shared_collection_name(len(query_vector)),
+            query_vector=query_vector,
+            query_filter=_merge_filter(query_filter, [condition]),
+            limit=limit,
+            **kwargs
+        )
+
+    # ------------------------------------------------------------------
+    # Migrare
+    # ------------------------------------------------------------------
+
+    def _copy(self, collection_name: str, shared: str, batch: int, only_missing: bool = False) -> int:
+        """
+        Scroll colecția veche → upsert în cea partajată.
+        only_missing: doar punctele absente (un punct actualizat după comutare nu e suprascris cu versiunea veche)
+        """
+        copied, offset = 0, None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=collection_name, limit=batch, offset=offset, with_payload=True, with_vectors=True
+            )
+            if points and only_missing:
+                present = {
+                    p.id for p in self.client.retrieve(
+                        collection_name=shared, ids=[shared_point_id(collection_name, p.id) for p in points],
+                        with_payload=False, with_vectors=False
+                    )
+                }
+                points = [p for p in points if shared_point_id(collection_name, p.id) not in present]
+            if points:
+                self.client.upsert(
+                    collection_name=shared,
+                    points=self._to_shared_points(
+                        collection_name,
+                        [PointStruct(id=p.id, vector=p.vector, payload=p.payload or {}) for p in points]
+                    )
+                )
+                copied += len(points)
+            if offset is None:
+                return copied
+
+    def migrate(self, collection_name: str, batch: int = 256, drop_legacy: bool = False,
+                settle: float = REGISTRY_TTL) -> Dict:
+        """
+        Copiază o colecție veche în colecția partajată, fără oprirea citirilor/scrierilor.
+        settle: cât se așteaptă după comutare ca toate procesele să vadă noua stare (cache-ul registry)
+        """
+        if self.mode != "shared":
+            raise RuntimeError("Migration requires QDRANT_STORAGE_MODE=shared")
+        info = self.client.get_collection(collection_name)
+        params = info.config.params.vectors
+        shared = self.ensure_shared(params.size, params.distance)
+
+        # 1) dual-write de acum înainte; citirile rămân pe colecția veche
+        self.registry.set(collection_name, "migrating", shared)
+        started = time.time()
+        copied = self._copy(collection_name, shared, batch)
+
+        # 2) verificare înainte de comutarea citirilor
+        legacy_count = self.client.count(collection_name=collection_name, exact=True).count
+        shared_count = self.client.count(
+            collection_name=shared, count_filter=Filter(must=self._tenant_conditions(collection_name)), exact=True
+        ).count
+        if shared_count < legacy_count:
+            logger.error(f"❌ {collection_name}: {shared_count}/{legacy_count} points copied, staying on legacy")
+            return {"collection": collection_name, "status": "migrating", "copied": copied,
+                    "legacy_count": legacy_count, "shared_count": shared_count}
+
+        # 3) comutare; procesele cu intrarea "migrating" în cache scriu încă și în colecția veche
+        self.registry.set(collection_name, "shared", shared, points=shared_count)
+        if settle > 0:
+            logger.info(f"⏳ {collection_name}: waiting {settle:.0f}s for registry caches to expire")
+            time.sleep(settle)
+
+        # 4) copiere finală: ce a ajuns doar în colecția veche înainte ca toți să vadă comutarea
+        delta = self._copy(collection_name, shared, batch, only_missing=True)
+        if delta:
+            logger.info(f"🔁 {collection_name}: {delta} late points copied after switch")
+
+        # ștergerea e sigură doar după copierea finală
+        if drop_legacy:
+            self.client.delete_collection(collection_name=collection_name)
+        elapsed = round(time.time() - started, 1)
+        logger.info(f"✅ {collection_name} → {shared}: {shared_count + delta} points in {elapsed}s")
+        return {"collection": collection_name, "status": "shared", "shared": shared,
+                "points": shared_count + delta, "late_points": delta, "seconds": elapsed,
+                "dropped_legacy": drop_legacy}
+
+
+def is_legacy_tenant_collection(name: str) -> bool:
+    return not name.startswith(SHARED_PREFIX) and name != REGISTRY_COLLECTION and tenant_for(name) != name
+
+
+def get_tenant_client(client: Optional[QdrantClient] = None, **kwargs) -> TenantQdrantClient:
+    """Client compatibil; în modul per_agent se comportă exact ca QdrantClient"""
+    if client is None:
+        client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY, **kwargs)
+    if isinstance(client, TenantQdrantClient):
+        return client
+    return TenantQdrantClient(client)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Migrare colecții per-agent → colecții partajate pe model")
+    parser.add_argument("--migrate", nargs="*", default=[], help="Colecții de migrat")
+    parser.add_argument("--migrate-all", action="store_true", help="Toate colecțiile per-agent")
+    parser.add_argument("--drop-legacy", action="store_true", help="Șterge colecția veche după verificare")
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--status", action="store_true")
+    args = parser.parse_args()
+
+    tenants = TenantQdrantClient(QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY, timeout=120), mode="shared")
+
+    if args.status:
+        for entry in sorted(tenants.registry.all(), key=lambda e: e["legacy"]):
+            print(f"{entry['legacy']:<50} {entry['status']:<10} {entry.get('shared', '')} {entry.get('points', '')}")
+        return
+
+    names = list(args.migrate)
+    if args.migrate_all:
+        names += [c.name for c in tenants.client.get_collections().collections if is_legacy_tenant_collection(c.name)]
+
+    for name in dict.fromkeys(names):
+        try:
+            print(tenants.migrate(name, batch=args.batch, drop_legacy=args.drop_legacy))
+        except Exception as e:
+            logger.error(f"❌ Migration failed for {name}: {e}")
+
+
+if __name__ == "__main__":
+    main()
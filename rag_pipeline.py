@@ -9,14 +9,15 @@ import json
 import logging
 from typing import List, Dict, Optional, Tuple
 from tools.deepseek_client import reasoner_chat
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime, timezone
 import requests
-from qdrant_client import QdrantClient
 from qdrant_client.models import Filter, FieldCondition, MatchValue
-from langchain_huggingface import HuggingFaceEmbeddings
-from pymongo import MongoClient
 from bson import ObjectId
+from retrieval.bm25 import build_from_mongo, get_index_cache, reciprocal_rank_fusion
+from qdrant_tenancy import get_tenant_client
+from qdrant_profiles import search_params_for
+from resource_registry import get_registry
 
 logger = logging.getLogger(__name__)
 
@@ -45,19 +46,13 @@ class RAGPipeline:
         self.config = config
         
         # Setup embeddings
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="BAAI/bge-large-en-v1.5",
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
-        )
+        self.embeddings = get_registry().hf_embeddings("BAAI/bge-large-en-v1.5", device='cpu', normalize=True)
         
-        # Setup Qdrant
-        self.qdrant_client = QdrantClient(
-            url=config.get('qdrant_url', 'http://localhost:9306')
-        )
+        # Setup Qdrant (QDRANT_STORAGE_MODE=shared → agent_{id}_content rutat în colecția partajată)
+        self.qdrant_client = get_tenant_client(get_registry().qdrant(config.get('qdrant_url', 'http://localhost:9306')))
         
         # Setup MongoDB
-        self.mongo_client = MongoClient(config.get('mongodb_uri', 'mongodb://localhost:9308'))
+        self.mongo_client = get_registry().mongo(config.get('mongodb_uri', 'mongodb://localhost:9308'))
         self.db = self.mongo_client[config.get('mongodb_db', 'ai_agents_db')]
         
         # Configurații Qwen (Learning Engine)
@@ -73,6 +68,12 @@ class RAGPipeline:
         self.similarity_threshold = config.get('similarity_threshold', 0.7)
         self.confidence_threshold = config.get('confidence_threshold', 0.7)
         self.max_search_results = config.get('max_search_results', 5)
+        
+        # Hybrid retrieval: BM25 pe site_chunks + vector, fuzionate RRF
+        self.hybrid_search = config.get('hybrid_search', True)
+        self.hybrid_weights = config.get('hybrid_weights', {'vector': 1.0, 'bm25': 1.0})
+        self.rrf_k = config.get('rrf_k', 60)
+        self.bm25_cache = get_index_cache()
     
     async def ask_question(self, question: str, agent_id: str, conversation_history: List[Dict] = None) -> RAGResponse:
         """
@@ -166,6 +167,81 @@ class RAGPipeline:
         return response
     
     async def _semantic_search(self, query: str, agent_id: str) -> List[SearchResult]:
+        """Căutare hibridă: vector (Qdrant) + BM25 (site_chunks) în paralel, fuziune RRF"""
+        if not self.hybrid_search:
+            return await asyncio.to_thread(self._vector_search, query, agent_id)
+        
+        vector_results, lexical_results = await asyncio.gather(
+            asyncio.to_thread(self._vector_search, query, agent_id),
+            asyncio.to_thread(self._lexical_search, query, agent_id)
+        )
+        if not lexical_results:
+            return vector_results
+        
+        by_chunk = {r.chunk_id: r for r in lexical_results}
+        by_chunk.update({r.chunk_id: r for r in vector_results})
+        fused = reciprocal_rank_fusion(
+            {
+                "vector": [r.chunk_id for r in vector_results],
+                "bm25": [r.chunk_id for r in lexical_results]
+            },
+            self.hybrid_weights,
+            k=self.rrf_k
+        )
+        # chunk-urile găsite doar de BM25 n-au similaritate vector: primesc scorul RRF
+        # normalizat la maximul posibil (1.0 = primul în ambele liste)
+        vector_ids = {r.chunk_id for r in vector_results}
+        best = sum(w for w in self.hybrid_weights.values() if w > 0) / (self.rrf_k + 1) or 1.0
+        results = [
+            by_chunk[chunk_id] if chunk_id in vector_ids else replace(by_chunk[chunk_id], score=min(1.0, score / best))
+            for chunk_id, score in fused[:self.max_search_results]
+        ]
+        logger.info(f"Hybrid search: {len(vector_results)} vector + {len(lexical_results)} BM25 → {len(results)} chunks")
+        return results
+    
+    def _bm25_index(self, agent_id: str):
+        query = {"agent_id": ObjectId(agent_id)}
+        return self.bm25_cache.get(
+            ("site_chunks", agent_id),
+            loader=lambda: build_from_mongo(self.db.site_chunks, query, id_field="chunk_id", text_fields=("content",)),
+            version=lambda: self.db.site_chunks.count_documents(query)
+        )
+    
+    def _lexical_search(self, query: str, agent_id: str) -> List[SearchResult]:
+        """BM25 peste chunk-urile agentului (coduri produs, SKU, fraze exacte)"""
+        try:
+            hits = self._bm25_index(agent_id).search(query, top_k=self.max_search_results)
+            if not hits:
+                return []
+            
+            chunks = {
+                str(c["chunk_id"]): c
+                for c in self.db.site_chunks.find(
+                    {"agent_id": ObjectId(agent_id), "chunk_id": {"$in": [chunk_id for chunk_id, _ in hits]}},
+                    {"chunk_id": 1, "content": 1, "metadata": 1}
+                )
+            }
+            results = []
+            for chunk_id, bm25_score in hits:
+                chunk = chunks.get(chunk_id)
+                if not chunk:
+                    continue
+                metadata = chunk.get('metadata') or {}
+                results.append(SearchResult(
+                    content=chunk.get('content', ''),
+                    metadata=metadata,
+                    # scor BM25 brut; înlocuit cu scorul fuzionat în _semantic_search
+                    score=bm25_score,
+                    chunk_id=chunk_id,
+                    source_url=metadata.get('url', '')
+                ))
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error in BM25 search: {e}")
+            return []
+    
+    def _vector_search(self, query: str, agent_id: str) -> List[SearchResult]:
         """Căutare semantică în indexul vectorial"""
         try:
             # Generează embedding pentru query
@@ -179,6 +255,7 @@ class RAGPipeline:
                 query_vector=query_embedding,
                 limit=self.max_search_results,
                 score_threshold=self.similarity_threshold,
+                search_params=search_params_for(collection_name),
                 query_filter=Filter(
                     must=[
                         FieldCondition(
@@ -196,7 +273,7 @@ class RAGPipeline:
                     content=result.payload['content'],
                     metadata=result.payload['metadata'],
                     score=result.score,
-                    chunk_id=result.payload['chunk_id'],
+                    chunk_id=str(result.payload['chunk_id']),
                     source_url=result.payload['metadata'].get('url', '')
                 )
                 results.append(search_result)
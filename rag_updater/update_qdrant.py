@@ -5,12 +5,19 @@
 
 import os
 import json
+import uuid
+import argparse
 from datetime import datetime
 from typing import List, Dict
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client.models import (
+    Distance, PointStruct, Filter, FieldCondition, MatchAny, HasIdCondition, FilterSelector
+)
 from sentence_transformers import SentenceTransformer
-from data_collector.collector import get_interactions_for_training
+from data_collector.collector import get_interactions_for_training, get_mongo_collection
+
+import qdrant_profiles
+from qdrant_reindex import AliasReindexer, points_from_collection, sync_from_collection
 
 # Configurare
 QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
@@ -23,6 +30,27 @@ def get_embeddings(texts: List[str], model) -> List[List[float]]:
     return model.encode(texts, show_progress_bar=True).tolist()
 
 
+def interaction_point_id(interaction_id) -> str:
+    """ID stabil per interacțiune (rulările succesive nu se mai suprascriu între ele)"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"interaction:{interaction_id}"))
+
+
+def delete_legacy_duplicates(qdrant: QdrantClient, points: List[PointStruct]):
+    """
+    Colecțiile mem_auto vechi au id-uri întregi (poziția în batch): aceeași interacțiune,
+    re-upsertată cu id uuid, ar apărea de două ori. Se șterg punctele vechi ale interacțiunilor din batch.
+    """
+    if not points:
+        return
+    qdrant.delete(
+        collection_name=COLLECTION_NAME,
+        points_selector=FilterSelector(filter=Filter(
+            must=[FieldCondition(key="interaction_id", match=MatchAny(any=[p.payload["interaction_id"] for p in points]))],
+            must_not=[HasIdCondition(has_id=[p.id for p in points])]
+        ))
+    )
+
+
 def update_qdrant_collection(
     limit: int = 1000,
     batch_size: int = 100
@@ -39,18 +67,19 @@ def update_qdrant_collection(
     # Conectare Qdrant
     qdrant = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
     
-    # Verifică dacă colecția există
+    # Verifică dacă colecția există (direct sau ca alias după un --rebuild)
     collections = qdrant.get_collections()
-    collection_exists = any(c.name == COLLECTION_NAME for c in collections.collections)
+    collection_exists = (
+        any(c.name == COLLECTION_NAME for c in collections.collections)
+        or AliasReindexer(qdrant).current_target(COLLECTION_NAME) is not None
+    )
     
     if not collection_exists:
         print(f"📦 Creating collection: {COLLECTION_NAME}")
-        qdrant.create_collection(
-            collection_name=COLLECTION_NAME,
-            vectors_config=VectorParams(
-                size=384,  # all-MiniLM-L6-v2 dimension
-                distance=Distance.COSINE
-            )
+        qdrant_profiles.create_collection(
+            qdrant, COLLECTION_NAME,
+            384,  # all-MiniLM-L6-v2 dimension
+            Distance.COSINE
         )
     
     # Obține interacțiuni noi (care nu au fost procesate pentru Qdrant)
@@ -99,11 +128,10 @@ def update_qdrant_collection(
         embeddings = get_embeddings(texts, embedding_model)
         
         # Creează points pentru Qdrant
-        for j, (embedding, metadata) in enumerate(zip(embeddings, metadata_list)):
-            point_id = i + j
+        for embedding, metadata in zip(embeddings, metadata_list):
             points.append(
                 PointStruct(
-                    id=point_id,
+                    id=interaction_point_id(metadata["interaction_id"]),
                     vector=embedding,
                     payload=metadata
                 )
@@ -118,6 +146,7 @@ def update_qdrant_collection(
             collection_name=COLLECTION_NAME,
             points=points
         )
+        delete_legacy_duplicates(qdrant, points)
         
         print(f"✅ Updated Qdrant collection with {len(points)} new points")
         
@@ -129,16 +158,81 @@ def update_qdrant_collection(
         print("⚠️  No points to upload")
 
 
+def rebuild_qdrant_collection(batch_size: int = 100, workers: int = 4) -> Dict:
+    """
+    Re-embed complet (ex: după schimbarea EMBEDDING_MODEL) fără downtime:
+    interacțiunile din colecția curentă sunt re-vectorizate într-o colecție shadow,
+    validate, apoi alias-ul COLLECTION_NAME e mutat atomic pe ea.
+    """
+    from bson import ObjectId
+
+    qdrant = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+    reindexer = AliasReindexer(qdrant, workers=workers, batch_size=batch_size)
+    embedding_model = SentenceTransformer(EMBEDDING_MODEL)
+    interactions = get_mongo_collection()
+    # punctele vechi cu id întreg și cele uuid ale aceleiași interacțiuni devin un singur punct
+    emitted = set()
+
+    def reembed(records) -> List[PointStruct]:
+        records = [r for r in records if (r.payload or {}).get("interaction_id") not in emitted]
+        ids = [r.payload.get("interaction_id") for r in records if (r.payload or {}).get("interaction_id")]
+        docs = {
+            str(d["_id"]): d
+            for d in interactions.find({"_id": {"$in": [ObjectId(i) for i in ids if ObjectId.is_valid(i)]}},
+                                       {"prompt": 1, "response": 1})
+        }
+        kept = []
+        for r in records:
+            interaction_id = (r.payload or {}).get("interaction_id")
+            if interaction_id in docs and interaction_id not in emitted:
+                emitted.add(interaction_id)
+                kept.append(r)
+        if not kept:
+            return []
+        texts = [f"{docs[r.payload['interaction_id']]['prompt']}\n\n{docs[r.payload['interaction_id']]['response']}" for r in kept]
+        vectors = get_embeddings(texts, embedding_model)
+        return [
+            PointStruct(id=interaction_point_id(r.payload["interaction_id"]), vector=v, payload=r.payload)
+            for r, v in zip(kept, vectors)
+        ]
+
+    def redo(records) -> List[PointStruct]:
+        # delta: interacțiunile adăugate/modificate în timpul rebuild-ului se re-vectorizează
+        emitted.difference_update((r.payload or {}).get("interaction_id") for r in records)
+        return reembed(records)
+
+    def delta(shadow: str) -> Dict:
+        return sync_from_collection(
+            qdrant, source, shadow, transform=redo, batch=batch_size,
+            point_id=lambda r: interaction_point_id((r.payload or {}).get("interaction_id")),
+        )
+
+    source = reindexer.current_target(COLLECTION_NAME) or COLLECTION_NAME
+    return reindexer.rebuild(
+        COLLECTION_NAME,
+        points_from_collection(qdrant, source, transform=reembed, batch=batch_size),
+        vector_size=embedding_model.get_sentence_embedding_dimension(),
+        delta=delta,
+    )
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Actualizează colecția Qdrant mem_auto")
+    parser.add_argument("--rebuild", action="store_true", help="Re-embed complet în colecție shadow + swap de alias")
+    args = parser.parse_args()
+
     print("=" * 80)
     print("🔄 UPDATE QDRANT COLLECTION")
     print("=" * 80)
     print()
     
-    update_qdrant_collection(
-        limit=1000,
-        batch_size=100
-    )
+    if args.rebuild:
+        print(rebuild_qdrant_collection())
+    else:
+        update_qdrant_collection(
+            limit=1000,
+            batch_size=100
+        )
     
     print()
     print("✅ Qdrant update completed!")
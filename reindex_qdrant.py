@@ -19,6 +19,13 @@ from bson import ObjectId
 from qdrant_client import QdrantClient
 from qdrant_client.models import Distance, VectorParams, PointStruct
 from langchain_huggingface import HuggingFaceEmbeddings
+from qdrant_reindex import AliasReindexer
+
+# Cache-ul de rezultate al căutării vector (golit după scrieri)
+try:
+    from langchain_agents.tools.vector_search_tool import invalidate_search_cache
+except ImportError:
+    invalidate_search_cache = None
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -63,6 +70,23 @@ class QdrantReindexer:
             encode_kwargs={'normalize_embeddings': True}
         )
         logger.info("✅ Embedding model loaded")
+        
+        self.alias_reindexer = AliasReindexer(self.qdrant_client, workers=4, batch_size=128) if self.qdrant_client else None
+    
+    def source_vector_size(self, collection_name: str, points: list) -> int:
+        """Dimensiunea din config-ul colecției curente (alias sau legacy); colecție nouă → dimensiunea embedding-ului"""
+        target = self.alias_reindexer.current_target(collection_name) or collection_name
+        if self.qdrant_client.collection_exists(target):
+            vectors = self.qdrant_client.get_collection(target).config.params.vectors
+            size = next(iter(vectors.values())).size if isinstance(vectors, dict) else vectors.size
+            if points and len(points[0].vector) != size:
+                # model de embedding schimbat: versiunea nouă urmează vectorii noi
+                logger.warning(
+                    f"⚠️ Dimensiunea embedding-ului ({len(points[0].vector)}) diferă de colecția {target} ({size})"
+                )
+                return len(points[0].vector)
+            return size
+        return len(points[0].vector)
     
     def get_agent_content(self, agent_id: str) -> list:
         """Obține conținutul agentului din MongoDB"""
@@ -225,6 +249,121 @@ class QdrantReindexer:
                 else:
                     raise
     
+    def _upsert_with_curl(self, collection_name: str, points: list) -> int:
+        """Upsert prin curl (fallback când QdrantClient nu funcționează); return: numărul de vectori din colecție"""
+        import json
+        
+        # Salvează vectorii în Qdrant (în batch-uri pentru performanță)
+        logger.info(f"💾 Salvez {len(points)} vectori în Qdrant...")
+        batch_size = 50  # Batch mai mic pentru stabilitate
+        import requests
+        import time
+        
+        for i in range(0, len(points), batch_size):
+            batch = points[i:i + batch_size]
+            max_retries = 3
+            retry_delay = 1
+            
+            for attempt in range(max_retries):
+                try:
+                    # Folosește curl pentru upsert (mai stabil decât requests)
+                    import subprocess
+                    import json
+                    
+                    # Convertește PointStruct la dict pentru JSON
+                    batch_dict = []
+                    for point in batch:
+                        batch_dict.append({
+                            "id": point.id,
+                            "vector": point.vector,
+                            "payload": point.payload
+                        })
+                    
+                    payload_json = json.dumps({"points": batch_dict})
+                    
+                    curl_cmd = [
+                        "curl", "-X", "PUT",
+                        f"{QDRANT_URL}/collections/{collection_name}/points",
+                        "-H", "Content-Type: application/json",
+                        "-d", payload_json,
+                        "-s", "-w", "%{http_code}"
+                    ]
+                    
+                    result = subprocess.run(
+                        curl_cmd,
+                        capture_output=True,
+                        text=True,
+                        timeout=60
+                    )
+                    
+                    # Verifică status code
+                    output = result.stdout
+                    status_code = 0
+                    if output and len(output) >= 3:
+                        try:
+                            status_code = int(output[-3:])
+                        except:
+                            pass
+                    
+                    if status_code in [200, 201] or result.returncode == 0:
+                        logger.info(f"   ✅ Batch {i//batch_size + 1}/{(len(points)-1)//batch_size + 1} salvat ({len(batch)} vectori)")
+                        break  # Succes, iesi din retry loop
+                    else:
+                        error_msg = f"Status {status_code} sau return code {result.returncode}: {result.stderr[:200] if result.stderr else output[:200]}"
+                        if attempt < max_retries - 1:
+                            logger.warning(f"⚠️ Eroare batch {i//batch_size + 1} (attempt {attempt + 1}): {error_msg}. Retrying...")
+                            time.sleep(retry_delay)
+                            retry_delay *= 2
+                            continue
+                        else:
+                            raise Exception(error_msg)
+                            
+                except subprocess.TimeoutExpired as e:
+                    if attempt < max_retries - 1:
+                        logger.warning(f"⚠️ Timeout batch {i//batch_size + 1} (attempt {attempt + 1}): {e}. Retrying în {retry_delay}s...")
+                        time.sleep(retry_delay)
+                        retry_delay *= 2
+                        continue
+                    else:
+                        logger.error(f"❌ Timeout la batch-ul {i//batch_size + 1} după {max_retries} încercări")
+                        raise
+                except Exception as e:
+                    if attempt < max_retries - 1:
+                        logger.warning(f"⚠️ Eroare batch {i//batch_size + 1} (attempt {attempt + 1}): {e}. Retrying...")
+                        time.sleep(retry_delay)
+                        retry_delay *= 2
+                        continue
+                    else:
+                        logger.error(f"❌ Eroare la salvarea batch-ului {i//batch_size + 1}: {e}")
+                        raise
+            
+            # Mic delay între batch-uri pentru a nu suprasolicita Qdrant
+            if i + batch_size < len(points):
+                time.sleep(0.5)
+        
+        # Verifică rezultatul folosind curl
+        import subprocess
+        result = subprocess.run(
+            ["curl", "-s", f"{QDRANT_URL}/collections/{collection_name}"],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+        
+        if result.returncode == 0 and result.stdout:
+            try:
+                data = json.loads(result.stdout)
+                if data.get("status") == "ok":
+                    collection_info = data.get("result", {})
+                    vectors_count = collection_info.get("points_count", 0)
+                else:
+                    vectors_count = len(points)  # Fallback
+            except:
+                vectors_count = len(points)  # Fallback
+        else:
+            vectors_count = len(points)  # Fallback
+        return vectors_count
+    
     def index_agent_content(self, agent_id: str, agent_doc: dict, force_recreate: bool = False) -> dict:
         """
         Indexează conținutul unui agent în Qdrant
@@ -261,7 +400,14 @@ class QdrantReindexer:
             logger.info(f"📄 Găsite {len(chunks)} chunk-uri în MongoDB")
             
             # Creează sau verifică colecția Qdrant
-            existing_points = self.create_qdrant_collection(collection_name, force_recreate)
+            if self.qdrant_client is not None:
+                # --force nu mai șterge colecția: versiunea nouă e construită alături și înlocuiește alias-ul
+                existing_points = (
+                    self.qdrant_client.count(collection_name=collection_name, exact=True).count
+                    if self.qdrant_client.collection_exists(collection_name) else 0
+                )
+            else:
+                existing_points = self.create_qdrant_collection(collection_name, force_recreate)
             
             if not force_recreate and existing_points > 0:
                 logger.info(f"⏭️  Colecția '{collection_name}' are deja {existing_points} vectori. Folosește --force pentru reindexare completă.")
@@ -315,115 +461,18 @@ class QdrantReindexer:
                     'error': 'Failed to generate embeddings'
                 }
             
-            # Salvează vectorii în Qdrant (în batch-uri pentru performanță)
-            logger.info(f"💾 Salvez {len(points)} vectori în Qdrant...")
-            batch_size = 50  # Batch mai mic pentru stabilitate
-            import requests
-            import time
-            
-            for i in range(0, len(points), batch_size):
-                batch = points[i:i + batch_size]
-                max_retries = 3
-                retry_delay = 1
-                
-                for attempt in range(max_retries):
-                    try:
-                        # Folosește curl pentru upsert (mai stabil decât requests)
-                        import subprocess
-                        import json
-                        
-                        # Convertește PointStruct la dict pentru JSON
-                        batch_dict = []
-                        for point in batch:
-                            batch_dict.append({
-                                "id": point.id,
-                                "vector": point.vector,
-                                "payload": point.payload
-                            })
-                        
-                        payload_json = json.dumps({"points": batch_dict})
-                        
-                        curl_cmd = [
-                            "curl", "-X", "PUT",
-                            f"{QDRANT_URL}/collections/{collection_name}/points",
-                            "-H", "Content-Type: application/json",
-                            "-d", payload_json,
-                            "-s", "-w", "%{http_code}"
-                        ]
-                        
-                        result = subprocess.run(
-                            curl_cmd,
-                            capture_output=True,
-                            text=True,
-                            timeout=60
-                        )
-                        
-                        # Verifică status code
-                        output = result.stdout
-                        status_code = 0
-                        if output and len(output) >= 3:
-                            try:
-                                status_code = int(output[-3:])
-                            except:
-                                pass
-                        
-                        if status_code in [200, 201] or result.returncode == 0:
-                            logger.info(f"   ✅ Batch {i//batch_size + 1}/{(len(points)-1)//batch_size + 1} salvat ({len(batch)} vectori)")
-                            break  # Succes, iesi din retry loop
-                        else:
-                            error_msg = f"Status {status_code} sau return code {result.returncode}: {result.stderr[:200] if result.stderr else output[:200]}"
-                            if attempt < max_retries - 1:
-                                logger.warning(f"⚠️ Eroare batch {i//batch_size + 1} (attempt {attempt + 1}): {error_msg}. Retrying...")
-                                time.sleep(retry_delay)
-                                retry_delay *= 2
-                                continue
-                            else:
-                                raise Exception(error_msg)
-                                
-                    except subprocess.TimeoutExpired as e:
-                        if attempt < max_retries - 1:
-                            logger.warning(f"⚠️ Timeout batch {i//batch_size + 1} (attempt {attempt + 1}): {e}. Retrying în {retry_delay}s...")
-                            time.sleep(retry_delay)
-                            retry_delay *= 2
-                            continue
-                        else:
-                            logger.error(f"❌ Timeout la batch-ul {i//batch_size + 1} după {max_retries} încercări")
-                            raise
-                    except Exception as e:
-                        if attempt < max_retries - 1:
-                            logger.warning(f"⚠️ Eroare batch {i//batch_size + 1} (attempt {attempt + 1}): {e}. Retrying...")
-                            time.sleep(retry_delay)
-                            retry_delay *= 2
-                            continue
-                        else:
-                            logger.error(f"❌ Eroare la salvarea batch-ului {i//batch_size + 1}: {e}")
-                            raise
-                
-                # Mic delay între batch-uri pentru a nu suprasolicita Qdrant
-                if i + batch_size < len(points):
-                    time.sleep(0.5)
-            
-            # Verifică rezultatul folosind curl
-            import subprocess
-            result = subprocess.run(
-                ["curl", "-s", f"{QDRANT_URL}/collections/{collection_name}"],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode == 0 and result.stdout:
-                try:
-                    data = json.loads(result.stdout)
-                    if data.get("status") == "ok":
-                        collection_info = data.get("result", {})
-                        vectors_count = collection_info.get("points_count", 0)
-                    else:
-                        vectors_count = len(points)  # Fallback
-                except:
-                    vectors_count = len(points)  # Fallback
+            if self.qdrant_client is not None:
+                # Rebuild în colecție shadow + swap atomic de alias (căutările nu văd colecția pe jumătate)
+                swap = self.alias_reindexer.rebuild(
+                    collection_name, points, vector_size=self.source_vector_size(collection_name, points)
+                )
+                if not swap['swapped']:
+                    raise Exception(f"Validare eșuată pentru colecția nouă: {swap.get('errors')}")
+                vectors_count = swap['points']
             else:
-                vectors_count = len(points)  # Fallback
+                vectors_count = self._upsert_with_curl(collection_name, points)
+            if invalidate_search_cache is not None:
+                invalidate_search_cache(collection_name)
             
             # Actualizează vector_collection în MongoDB
             self.agents_collection.update_one(
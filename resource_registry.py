@@ -0,0 +1,261 @@
+"""
+Resource Registry
+Process-wide, lazily created, shared clients and models.
+
+Mongo and Qdrant clients are thread-safe connection pools and embedding models
+take seconds to load, so each is created once per process (per URI / model)
+and handed out to every caller. Clients are pinged at most every
+`check_every` seconds when handed out; a failed ping marks the entry unhealthy
+but keeps the instance (MongoClient and QdrantClient reconnect on their own,
+and closing a pool other threads are using would break their in-flight calls).
+
+Usage:
+    from resource_registry import get_registry
+
+    registry = get_registry()
+    db = registry.mongo_db()                       # MONGODB_URI / MONGODB_DATABASE
+    qdrant = registry.qdrant("http://localhost:9306")
+    embeddings = registry.hf_embeddings("BAAI/bge-large-en-v1.5")
+
+FastAPI:
+    from resource_registry import install_lifecycle
+    install_lifecycle(app, warmup=[lambda r: r.mongo(MONGODB_URI), lambda r: r.qdrant("http://localhost:9306")])
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MONGO_URI = os.getenv("MONGODB_URI", "mongodb://127.0.0.1:27017")
+DEFAULT_MONGO_DB = os.getenv("MONGODB_DATABASE", os.getenv("MONGO_DB", "ai_agents_db"))
+DEFAULT_QDRANT_URL = os.getenv("QDRANT_URL", "http://127.0.0.1:6333")
+DEFAULT_QDRANT_API_KEY = os.getenv("QDRANT_API_KEY") or None
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+
+
+class _Entry:
+    __slots__ = ("value", "checked", "check", "close", "healthy", "error")
+
+    def __init__(self, value: Any, check: Optional[Callable[[Any], Any]], close: Optional[Callable[[Any], Any]]):
+        self.value = value
+        self.checked = time.monotonic()
+        self.check = check
+        self.close = close
+        self.healthy = True
+        self.error: Optional[str] = None
+
+
+class ResourceRegistry:
+    """Shared resources keyed by (kind, config); created on first use"""
+
+    def __init__(self, check_every: float = 30.0):
+        self.check_every = check_every
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._metrics = {"created": 0, "hits": 0, "failed_checks": 0}
+
+    def _key_lock(self, key: Hashable) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def shared(self, key: Hashable, factory: Callable[[], Any],
+               check: Optional[Callable[[Any], Any]] = None,
+               close: Optional[Callable[[Any], Any]] = None) -> Any:
+        """
+        Instance for `key`, created once with `factory`.
+        check: called at most every `check_every` seconds; raising → entry marked unhealthy, instance kept
+        close: called on shutdown
+        """
+        entry = self._entries.get(key)
+        if entry is not None and (entry.check is None or time.monotonic() - entry.checked < self.check_every):
+            self._metrics["hits"] += 1
+            return entry.value
+
+        # One loader per key: concurrent first requests wait instead of loading the model twice
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.check is None or time.monotonic() - entry.checked < self.check_every:
+                    self._metrics["hits"] += 1
+                    return entry.value
+                self._check(key, entry)
+                self._metrics["hits"] += 1
+                return entry.value
+
+            started = time.monotonic()
+            value = factory()
+            self._entries[key] = _Entry(value, check, close)
+            self._metrics["created"] += 1
+            logger.info(f"Resource {key} ready in {time.monotonic() - started:.2f}s")
+            return value
+
+    def _check(self, key: Hashable, entry: _Entry) -> bool:
+        """Ping; the result is recorded on the entry, the instance is never replaced"""
+        try:
+            entry.check(entry.value)
+        except Exception as e:
+            if entry.healthy:
+                logger.warning(f"Resource {key} failed health check: {e}")
+            entry.healthy, entry.error = False, str(e)[:200]
+            self._metrics["failed_checks"] += 1
+        else:
+            if not entry.healthy:
+                logger.info(f"Resource {key} healthy again")
+            entry.healthy, entry.error = True, None
+        entry.checked = time.monotonic()
+        return entry.healthy
+
+    def _close(self, key: Hashable, entry: _Entry):
+        self._entries.pop(key, None)
+        if entry.close is not None:
+            try:
+                entry.close(entry.value)
+            except Exception as e:
+                logger.debug(f"Closing {key}: {e}")
+
+    # ------------------------------------------------------------------
+    # Mongo
+    # ------------------------------------------------------------------
+
+    def mongo(self, uri: Optional[str] = None, **kwargs):
+        """Pooled MongoClient per URI"""
+        from pymongo import MongoClient
+
+        uri = uri or DEFAULT_MONGO_URI
+        kwargs.setdefault("maxPoolSize", MONGO_MAX_POOL_SIZE)
+        return self.shared(
+            ("mongo", uri),
+            lambda: MongoClient(uri, **kwargs),
+            check=lambda client: client.admin.command("ping"),
+            close=lambda client: client.close(),
+        )
+
+    def mongo_db(self, name: Optional[str] = None, uri: Optional[str] = None):
+        return self.mongo(uri)[name or DEFAULT_MONGO_DB]
+
+    # ------------------------------------------------------------------
+    # Qdrant
+    # ------------------------------------------------------------------
+
+    def qdrant(self, url: Optional[str] = None, host: Optional[str] = None, port: Optional[int] = None,
+               api_key: Optional[str] = None, timeout: Optional[int] = None):
+        """QdrantClient per endpoint (host/port and url forms share the same client)"""
+        from qdrant_client import QdrantClient
+
+        if url is None:
+            url = f"http://{host}:{port}" if host else DEFAULT_QDRANT_URL
+        api_key = api_key if api_key is not None else DEFAULT_QDRANT_API_KEY
+        kwargs = {"url": url, "api_key": api_key}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        return self.shared(
+            ("qdrant", url.rstrip("/"), api_key),
+            lambda: QdrantClient(**kwargs),
+            check=lambda client: client.get_collections(),
+            close=lambda client: client.close(),
+        )
+
+    # ------------------------------------------------------------------
+    # Embedding models
+    # ------------------------------------------------------------------
+
+    def hf_embeddings(self, model_name: str, device: str = "cpu", normalize: bool = True):
+        """LangChain HuggingFaceEmbeddings (or EmbeddingsAdapter when INFERENCE_BACKEND != torch)"""
+        from inference_backends import INFERENCE_BACKEND, EmbeddingsAdapter
+
+        def load():
+            if INFERENCE_BACKEND != "torch":
+                return EmbeddingsAdapter(model_name, normalize=normalize)
+            from langchain_huggingface import HuggingFaceEmbeddings
+            return HuggingFaceEmbeddings(
+                model_name=model_name,
+                model_kwargs={"device": device},
+                encode_kwargs={"normalize_embeddings": normalize},
+            )
+
+        return self.shared(("hf_embeddings", model_name, device, normalize, INFERENCE_BACKEND), load)
+
+    def sentence_embedder(self, model_name: str, device: str = "cpu"):
+        """SentenceTransformer-compatible model on the configured inference backend"""
+        from inference_backends import INFERENCE_BACKEND, load_sentence_embedder
+
+        return self.shared(
+            ("sentence_embedder", model_name, device, INFERENCE_BACKEND),
+            lambda: load_sentence_embedder(model_name, device=device),
+        )
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def warmup(self, loaders: Iterable[Callable[["ResourceRegistry"], Any]] = ()):
+        """Create resources ahead of the first request (FastAPI startup)"""
+        for loader in loaders:
+            try:
+                loader(self)
+            except Exception as e:
+                logger.warning(f"Warmup failed: {e}")
+
+    def health(self) -> Dict[str, Dict[str, Any]]:
+        """Ping every client that has a health check"""
+        report = {}
+        for key, entry in list(self._entries.items()):
+            if entry.check is None:
+                continue
+            started = time.monotonic()
+            if self._check(key, entry):
+                report[str(key)] = {"ok": True, "ms": round((time.monotonic() - started) * 1000, 1)}
+            else:
+                report[str(key)] = {"ok": False, "error": entry.error}
+        return report
+
+    def close(self):
+        for key, entry in list(self._entries.items()):
+            self._close(key, entry)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self._metrics,
+            "resources": [str(k) for k in self._entries],
+            "unhealthy": [str(k) for k, e in list(self._entries.items()) if not e.healthy],
+        }
+
+
+_default_registry: Optional[ResourceRegistry] = None
+_default_lock = threading.Lock()
+
+
+def get_registry() -> ResourceRegistry:
+    """Process-wide registry, closed at interpreter exit"""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = ResourceRegistry()
+            atexit.register(_default_registry.close)
+        return _default_registry
+
+
+def install_lifecycle(app, warmup: Iterable[Callable[[ResourceRegistry], Any]] = ()):
+    """
+    Warm up on FastAPI startup, close clients on shutdown.
+    warmup: callables receiving the registry, e.g. lambda r: r.hf_embeddings("BAAI/bge-large-en-v1.5")
+    """
+    registry = get_registry()
+    warmup = list(warmup)
+
+    async def _startup():
+        import asyncio
+        # model loads are CPU-bound: keep the event loop responsive
+        await asyncio.to_thread(registry.warmup, warmup)
+
+    async def _shutdown():
+        registry.close()
+
+    app.add_event_handler("startup", _startup)
+    app.add_event_handler("shutdown", _shutdown)
+    return registry
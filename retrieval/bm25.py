@@ -0,0 +1,227 @@
+from __future__ import annotations
+import logging
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from heapq import nlargest
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+# Index lexical BM25 în memorie + fuziune RRF cu rezultatele vector.
+# Tokenizarea păstrează codurile de produs / SKU întregi ("ABC-123.45") ȘI părțile lor,
+# iar diacriticele sunt eliminate ("ușă" == "usa").
+
+logger = logging.getLogger(__name__)
+
+_CODE = re.compile(r"\w+(?:[-./]\w+)*", re.UNICODE)
+_PHRASE = re.compile(r'"([^"]+)"')
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return text.lower()
+
+
+def tokenize(text: str) -> List[str]:
+    tokens: List[str] = []
+    for match in _CODE.findall(normalize_text(text)):
+        if any(sep in match for sep in "-./"):
+            tokens.append(match)
+            tokens.extend(p for p in re.split(r"[-./]", match) if p)
+        else:
+            tokens.append(match)
+    return tokens
+
+
+def parse_query(query: str) -> Tuple[List[str], List[str]]:
+    """(termeni, fraze exacte între ghilimele)"""
+    phrases = [normalize_text(p).strip() for p in _PHRASE.findall(query or "")]
+    return tokenize(query), [p for p in phrases if p]
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)   # term -> [(doc_idx, tf)]
+        self.doc_ids: List[Hashable] = []
+        self.doc_len: List[int] = []
+        self.doc_text: List[str] = []        # text normalizat, pentru fraze exacte
+        self.doc_meta: List[Dict] = []
+        self._position: Dict[Hashable, int] = {}
+        self.total_len = 0
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def add(self, doc_id: Hashable, text: str, meta: Optional[Dict] = None):
+        idx = len(self.doc_ids)
+        tokens = tokenize(text)
+        for term, tf in Counter(tokens).items():
+            self.postings[term].append((idx, tf))
+        self._position[doc_id] = idx
+        self.doc_ids.append(doc_id)
+        self.doc_len.append(len(tokens))
+        self.doc_text.append(normalize_text(text))
+        self.doc_meta.append(meta or {})
+        self.total_len += len(tokens)
+
+    def _idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        n = len(self.doc_ids)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, top_k: int = 20, where: Optional[Callable[[Dict], bool]] = None) -> List[Tuple[Hashable, float]]:
+        """
+        query: termeni liberi + opțional "fraze exacte" (obligatorii)
+        where: filtru pe meta (ex: domeniu)
+        return: [(doc_id, score)] desc
+        """
+        terms, phrases = parse_query(query)
+        if not terms or not self.doc_ids:
+            return []
+        avgdl = self.total_len / len(self.doc_ids) or 1.0
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(term)
+            for idx, tf in postings:
+                norm = tf + self.k1 * (1 - self.b + self.b * self.doc_len[idx] / avgdl)
+                scores[idx] += idf * tf * (self.k1 + 1) / norm
+
+        candidates = scores.items()
+        if phrases:
+            candidates = [(i, s) for i, s in candidates if all(p in self.doc_text[i] for p in phrases)]
+        if where is not None:
+            candidates = [(i, s) for i, s in candidates if where(self.doc_meta[i])]
+        return [(self.doc_ids[i], s) for i, s in nlargest(top_k, candidates, key=lambda x: x[1])]
+
+    def meta(self, doc_id: Hashable) -> Dict:
+        idx = self._position.get(doc_id)
+        return self.doc_meta[idx] if idx is not None else {}
+
+
+def build_from_mongo(collection, query: Dict, id_field: str = "_id", text_fields: Sequence[str] = ("content",),
+                     meta_fields: Sequence[str] = ()) -> BM25Index:
+    index = BM25Index()
+    projection = {f: 1 for f in (id_field, *text_fields, *meta_fields)}
+    for doc in collection.find(query, projection):
+        text = "\n".join(str(doc.get(f) or "") for f in text_fields)
+        if text.strip():
+            index.add(str(doc.get(id_field)), text, {f: doc.get(f) for f in meta_fields})
+    return index
+
+
+def build_from_qdrant(client, collection_name: str, text_field: str = "text",
+                      meta_fields: Sequence[str] = ("url",), batch: int = 1000) -> BM25Index:
+    """Index peste payload-urile unei colecții Qdrant (id = point id)"""
+    index = BM25Index()
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name, limit=batch, offset=offset, with_payload=True, with_vectors=False
+        )
+        for point in points:
+            payload = point.payload or {}
+            text = str(payload.get(text_field) or "")
+            if text.strip():
+                index.add(str(point.id), text, {f: payload.get(f) for f in meta_fields})
+        if offset is None:
+            break
+    return index
+
+
+def reciprocal_rank_fusion(rankings: Dict[str, Sequence[Hashable]], weights: Optional[Dict[str, float]] = None,
+                           k: int = 60) -> List[Tuple[Hashable, float]]:
+    """
+    rankings: {"vector": [id...], "bm25": [id...]} fiecare listă ordonată desc
+    weights: pondere per listă (default 1.0)
+    return: [(id, scor RRF)] desc; scor = Σ w / (k + rank)
+    """
+    weights = weights or {}
+    fused: Dict[Hashable, float] = defaultdict(float)
+    for name, ids in rankings.items():
+        w = weights.get(name, 1.0)
+        if w <= 0:
+            continue
+        for rank, doc_id in enumerate(ids, 1):
+            fused[doc_id] += w / (k + rank)
+    return sorted(fused.items(), key=lambda x: x[1], reverse=True)
+
+
+class IndexCache:
+    """
+    Index-uri BM25 per cheie (agent / domeniu / colecție), reconstruite doar când
+    versiunea sursei se schimbă (ex: count_documents), verificată cel mult o dată la `check_every` secunde.
+    Doar primul build al unei chei e sincron; verificarea și rebuild-ul ulterior rulează
+    într-un thread, iar între timp cererile primesc indexul vechi.
+    """
+
+    def __init__(self, check_every: float = 300.0, max_indexes: int = 64):
+        self.check_every = check_every
+        self.max_indexes = max_indexes
+        self._entries: Dict[Hashable, Dict] = {}
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+
+    def _build(self, key: Hashable, loader: Callable[[], BM25Index], current: Hashable) -> BM25Index:
+        started = time.monotonic()
+        index = loader()
+        logger.info(f"🔤 BM25 index {key}: {len(index)} docs în {time.monotonic() - started:.2f}s")
+        with self._lock:
+            self._entries[key] = {"index": index, "version": current, "checked": time.monotonic()}
+            while len(self._entries) > self.max_indexes:
+                oldest = min(self._entries, key=lambda k: self._entries[k]["checked"])
+                del self._entries[oldest]
+        return index
+
+    def _refresh(self, key: Hashable, entry: Dict, loader: Callable[[], BM25Index], version: Callable[[], Hashable]):
+        try:
+            current = version()
+            if current == entry["version"]:
+                entry["checked"] = time.monotonic()
+            else:
+                self._build(key, loader, current)
+        except Exception as e:
+            logger.warning(f"⚠️ BM25 refresh {key} eșuat: {e}")
+            entry["checked"] = time.monotonic()
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, key: Hashable, loader: Callable[[], BM25Index], version: Callable[[], Hashable]) -> BM25Index:
+        with self._lock:
+            entry = self._entries.get(key)
+            stale = entry is not None and time.monotonic() - entry["checked"] >= self.check_every
+            start_refresh = stale and key not in self._refreshing
+            if start_refresh:
+                self._refreshing.add(key)
+        if entry is None:
+            return self._build(key, loader, version())
+        if start_refresh:
+            threading.Thread(
+                target=self._refresh, args=(key, entry, loader, version), name="BM25Refresh", daemon=True
+            ).start()
+        return entry["index"]
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+_default_cache: Optional[IndexCache] = None
+
+
+def get_index_cache() -> IndexCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = IndexCache()
+    return _default_cache
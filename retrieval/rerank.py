@@ -1,7 +1,9 @@
 from __future__ import annotations
-import os, torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from typing import List, Tuple
+import os, re, torch
+from typing import List, Optional, Tuple
+
+from .rerank_cache import RerankCache, text_hash
+from inference_backends import load_cross_encoder
 
 # Modele bune:
 #  - "BAAI/bge-reranker-v2-m3" (rapid, foarte ok)
@@ -9,13 +11,40 @@ from typing import List, Tuple
 MODEL_ID = os.getenv("RERANK_MODEL", "BAAI/bge-reranker-v2-m3")
 DEVICE = os.getenv("RERANK_DEVICE", "cuda:0") if torch.cuda.is_available() else "cpu"
 BATCH = int(os.getenv("RERANK_BATCH", "16"))
+# torch (fp32) | int8 | onnx — backend-urile cuantizate se aplică doar pe CPU
+RERANK_BACKEND = os.getenv("RERANK_BACKEND", os.getenv("INFERENCE_BACKEND", "torch"))
+PASSAGE_CHARS = int(os.getenv("RERANK_PASSAGE_CHARS", "1200"))  # ~300 tokens, încape lângă query în 512
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def best_passage(query: str, text: str, max_chars: int = PASSAGE_CHARS) -> str:
+    """
+    Fereastra de text (max_chars, pas max_chars/2) cu cei mai mulți termeni din query.
+    Selecție lexicală ieftină: modelul vede conținutul relevant, nu doar începutul paginii.
+    """
+    text = text or ""
+    if len(text) <= max_chars:
+        return text
+    terms = {t for t in _TOKEN.findall(query.lower()) if len(t) > 2}
+    if not terms:
+        return text[:max_chars]
+    best, best_hits = 0, -1
+    step = max(1, max_chars // 2)
+    for start in range(0, len(text) - step, step):
+        window = _TOKEN.findall(text[start:start + max_chars].lower())
+        hits = sum(1 for w in window if w in terms)
+        if hits > best_hits:
+            best, best_hits = start, hits
+    return text[best:best + max_chars]
+
 
 class Reranker:
-    def __init__(self, model_id: str = MODEL_ID, device: str = DEVICE):
-        self.tokenizer = AutoTokenizer.from_pretrained(model_id, use_fast=True)
-        self.model = AutoModelForSequenceClassification.from_pretrained(model_id)
-        self.model.to(device)
-        self.model.eval()
+    def __init__(self, model_id: str = MODEL_ID, device: str = DEVICE, cache: Optional[RerankCache] = None,
+                 backend: str = RERANK_BACKEND):
+        self.model_id = model_id
+        self.cache = cache
+        self.tokenizer, self.model = load_cross_encoder(model_id, device, backend)
         self.device = device
 
     @torch.inference_mode()
@@ -32,6 +61,22 @@ class Reranker:
             scores.extend(out.detach().float().cpu().tolist())
         return scores
 
+    def score_cached(self, query: str, texts: List[str]) -> List[float]:
+        """score_pairs doar pentru perechile (query, text) care lipsesc din cache"""
+        if self.cache is None:
+            return self.score_pairs(query, texts)
+        hashes = [text_hash(t) for t in texts]
+        known = self.cache.get_many(query, texts)
+        todo = {}
+        for h, t in zip(hashes, texts):
+            if h not in known and h not in todo:
+                todo[h] = t
+        if todo:
+            fresh = dict(zip(todo.keys(), self.score_pairs(query, list(todo.values()))))
+            self.cache.put_many(query, fresh)
+            known.update(fresh)
+        return [known[h] for h in hashes]
+
     def rerank(self, query: str, docs: List[Tuple[str,str]]) -> List[Tuple[str,str,float]]:
         """
         docs: listă de (doc_id, text)
@@ -41,7 +86,7 @@ class Reranker:
         texts = [d[1] for d in docs]
         if not texts:
             return []
-        scores = self.score_pairs(query, texts)
+        scores = self.score_cached(query, texts)
         ranked = list(zip(ids, texts, scores))
         ranked.sort(key=lambda x: x[2], reverse=True)
         return ranked
@@ -0,0 +1,128 @@
+from __future__ import annotations
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cache pentru scoruri cross-encoder: (query_hash, doc_hash) -> score
+#  - tier 1: LRU în memorie (microsecunde)
+#  - tier 2: colecție Mongo (supraviețuiește restart-urilor, partajat între procese)
+# doc_hash e calculat pe textul trimis efectiv modelului → conținut schimbat = cache invalid
+
+CACHE_TTL_DAYS = 30
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Query-uri aproape identice (majuscule/spații) → aceeași cheie"""
+    return _WS.sub(" ", (query or "").strip().lower())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+
+class RerankCache:
+    def __init__(self, collection=None, max_items: int = 50000, model_id: str = "", writer=None):
+        """
+        collection: colecție Mongo pentru tier-ul persistent (opțional)
+        max_items: capacitatea LRU-ului din memorie
+        model_id: intră în cheie (alt model = alte scoruri)
+        writer: MongoBulkWriter pentru scrieri write-behind (opțional)
+        """
+        self.collection = collection
+        self.max_items = max_items
+        self.model_id = model_id
+        self.writer = writer
+        self._lru: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "mongo_hits": 0, "misses": 0}
+        if collection is not None:
+            try:
+                collection.create_index("created_at", expireAfterSeconds=CACHE_TTL_DAYS * 86400)
+            except Exception as e:
+                logger.info(f"ℹ️ Rerank cache index: {e}")
+
+    def query_key(self, query: str) -> str:
+        return text_hash(f"{self.model_id}\n{normalize_query(query)}")
+
+    @staticmethod
+    def _mongo_id(qh: str, dh: str) -> str:
+        return f"{qh}:{dh}"
+
+    def get_many(self, query: str, texts: Iterable[str]) -> Dict[str, float]:
+        """
+        return: doc_hash -> score pentru textele găsite în cache
+        """
+        qh = self.query_key(query)
+        hashes = list(dict.fromkeys(text_hash(t) for t in texts))
+        found: Dict[str, float] = {}
+        missing: List[str] = []
+        with self._lock:
+            for dh in hashes:
+                key = (qh, dh)
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    found[dh] = self._lru[key]
+                else:
+                    missing.append(dh)
+        self.stats["memory_hits"] += len(found)
+
+        if missing and self.collection is not None:
+            try:
+                ids = [self._mongo_id(qh, dh) for dh in missing]
+                from_mongo = {
+                    d["doc_hash"]: float(d["score"])
+                    for d in self.collection.find({"_id": {"$in": ids}}, {"doc_hash": 1, "score": 1})
+                }
+            except Exception as e:
+                logger.warning(f"⚠️ Rerank cache read: {e}")
+                from_mongo = {}
+            if from_mongo:
+                self.stats["mongo_hits"] += len(from_mongo)
+                found.update(from_mongo)
+                self._remember(qh, from_mongo)
+
+        self.stats["misses"] += len(hashes) - len(found)
+        return found
+
+    def put_many(self, query: str, scores: Dict[str, float]):
+        """scores: doc_hash -> score"""
+        if not scores:
+            return
+        qh = self.query_key(query)
+        self._remember(qh, scores)
+        if self.collection is None:
+            return
+        now = datetime.now(timezone.utc)
+        try:
+            for dh, score in scores.items():
+                doc = {"query_hash": qh, "doc_hash": dh, "score": float(score), "model": self.model_id, "created_at": now}
+                if self.writer is not None:
+                    self.writer.update_one(self.collection, {"_id": self._mongo_id(qh, dh)}, {"$set": doc}, upsert=True)
+                else:
+                    self.collection.update_one({"_id": self._mongo_id(qh, dh)}, {"$set": doc}, upsert=True)
+        except Exception as e:
+            logger.warning(f"⚠️ Rerank cache write: {e}")
+
+    def _remember(self, qh: str, scores: Dict[str, float]):
+        with self._lock:
+            for dh, score in scores.items():
+                key = (qh, dh)
+                self._lru[key] = score
+                self._lru.move_to_end(key)
+            while len(self._lru) > self.max_items:
+                self._lru.popitem(last=False)
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats["memory_items"] = len(self._lru)
+        lookups = stats["memory_hits"] + stats["mongo_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 3) if lookups else 0
+        return stats
@@ -1,5 +1,8 @@
 from __future__ import annotations
+import logging
 import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from langchain_ollama import OllamaEmbeddings
 import os
 from typing import List, Dict, Tuple
@@ -13,58 +16,195 @@ def get_embedder():
 from qdrant_client import QdrantClient
 from qdrant_client.models import Filter, FieldCondition, MatchValue, PointStruct
 from database.qdrant_vectorizer import QdrantVectorizer
-from config.database_config import QDRANT_HOST, QDRANT_PORT, QDRANT_COLLECTION
+from qdrant_tenancy import get_tenant_client
+from qdrant_profiles import search_params_for
+from config.database_config import (
+    QDRANT_HOST, QDRANT_PORT, QDRANT_COLLECTION,
+    MONGODB_URI, MONGODB_DATABASE, MONGODB_COLLECTION,
+)
+from pymongo import MongoClient
 
-from .rerank import Reranker
+from .rerank import Reranker, MODEL_ID, best_passage
+from .rerank_cache import RerankCache
+from .bm25 import build_from_mongo, get_index_cache, reciprocal_rank_fusion
+
+logger = logging.getLogger(__name__)
 
 TOP_K_VECTOR = int(os.getenv("TOP_K_VECTOR", "50"))   # candidați din vector search
 TOP_K_FINAL  = int(os.getenv("TOP_K_FINAL",  "8"))    # returnați după rerank
+# diferență minimă de scor vector (top-1 față de top-2 și la granița top_k) pentru a sări peste rerank (<=0 dezactivează)
+RERANK_SKIP_MARGIN = float(os.getenv("RERANK_SKIP_MARGIN", "0.15"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "50000"))
+# hybrid: BM25 pe aceleași pagini, fuzionat RRF cu vector search (pondere 0 dezactivează lista)
+TOP_K_BM25   = int(os.getenv("TOP_K_BM25", "50"))
+TOP_K_RERANK = int(os.getenv("TOP_K_RERANK", "30"))  # candidați fuzionați trimiși la cross-encoder
+HYBRID_VECTOR_WEIGHT = float(os.getenv("HYBRID_VECTOR_WEIGHT", "1.0"))
+HYBRID_BM25_WEIGHT   = float(os.getenv("HYBRID_BM25_WEIGHT", "1.0"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+
+def order_is_unambiguous(vec_scores: List[float], top_k: int, margin: float) -> bool:
+    """
+    True dacă primul candidat domină (separat de al doilea cu cel puțin `margin`) și
+    granița dintre rangul top_k și top_k+1 e separată tot de `margin` în scor vector
+    → rerank-ul nu poate schimba nici primul rezultat, nici ce intră în top_k.
+    """
+    if margin <= 0:
+        return False
+    ordered = sorted(vec_scores, reverse=True)
+    if len(ordered) > 1 and ordered[0] - ordered[1] < margin:
+        return False
+    return len(ordered) <= top_k or ordered[top_k - 1] - ordered[top_k] >= margin
 
 class SemanticSearcher:
     def __init__(self):
         self.qv = QdrantVectorizer()
-        self.qc = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT,)
+        self.qc = get_tenant_client(QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT,))
         self.col = QDRANT_COLLECTION
-        self.reranker = Reranker()
+        self.mongo = MongoClient(MONGODB_URI)
+        self.db = self.mongo[MONGODB_DATABASE]
+        self.content = self.db[MONGODB_COLLECTION]
+        try:
+            from mongo_bulk_writer import get_bulk_writer
+            writer = get_bulk_writer()
+        except Exception:
+            writer = None
+        self.rerank_cache = RerankCache(
+            self.db["rerank_score_cache"], max_items=RERANK_CACHE_SIZE, model_id=MODEL_ID, writer=writer
+        )
+        self.reranker = Reranker(cache=self.rerank_cache)
+        self.rerank_skipped = 0
+        self.bm25_cache = get_index_cache()
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid")
 
-    def search(self, query: str, domain: str | None = None) -> List[Dict]:
-        # 1) embedd pentru query
-        qv = self.qv.embedder.embed_text(query)
+    def _bm25_index(self, domain: str | None = None):
+        """
+        Index BM25 peste paginile domeniului (sau toată colecția fără domeniu),
+        reconstruit în fundal când se schimbă numărul de documente
+        """
+        query = {"domain": domain} if domain else {}
+        version = (lambda: self.content.count_documents(query)) if domain else self.content.estimated_document_count
+        return self.bm25_cache.get(
+            ("semantic_search", self.content.full_name, domain),
+            loader=lambda: build_from_mongo(
+                self.content, query, id_field="url", text_fields=("title", "content"), meta_fields=("domain", "title")
+            ),
+            version=version,
+        )
 
-        # 2) filtrare opțională pe domeniu
+    def _vector_hits(self, query: str, domain: str | None, limit: int) -> List[Dict]:
+        qv = self.qv.embedder.embed_text(query)
         qfilter = None
         if domain:
             qfilter = Filter(must=[FieldCondition(key="domain", match=MatchValue(value=domain))])
-
-        # 3) vector search (rapid)
         hits = self.qc.search(
-            collection_name=self.col, query_vector=qv, limit=TOP_K_VECTOR, query_filter=qfilter
+            collection_name=self.col, query_vector=qv, limit=limit, query_filter=qfilter,
+            search_params=search_params_for(self.col),
         )
+        return [
+            {
+                "id": str(h.id),
+                "url": (h.payload or {}).get("url") or "",
+                "title": (h.payload or {}).get("title") or "",
+                "score_vec": float(h.score),
+            }
+            for h in hits
+        ]
 
-        # 4) pregătire pt rerank
-        doc_pairs: List[Tuple[str,str]] = []
+    def _bm25_hits(self, query: str, domain: str | None, limit: int) -> List[Tuple[str, float]]:
+        try:
+            return self._bm25_index(domain).search(query, top_k=limit)
+        except Exception as e:
+            logger.warning(f"⚠️ BM25 indisponibil: {e}")
+            return []
+
+    def _load_texts(self, urls: List[str]) -> Dict[str, str]:
+        """Conținutul complet din Mongo (payload-ul Qdrant are doar url/title/domain)"""
+        if not urls:
+            return {}
+        try:
+            return {
+                d["url"]: d.get("content") or d.get("text") or ""
+                for d in self.content.find({"url": {"$in": urls}}, {"url": 1, "content": 1, "text": 1})
+            }
+        except Exception as e:
+            logger.warning(f"⚠️ Nu pot încărca textele pentru rerank: {e}")
+            return {}
+
+    def search(self, query: str, domain: str | None = None) -> List[Dict]:
+        return self._search(query, domain, HYBRID_VECTOR_WEIGHT, HYBRID_BM25_WEIGHT, TOP_K_FINAL)
+
+    def search_hybrid(self, query: str, top_k: int = TOP_K_FINAL, alpha: float = 0.7,
+                      lang: str | None = None, domain: str | None = None) -> List[Dict]:
+        """alpha = pondere vector, 1-alpha = pondere BM25 (lang: payload-ul nu are încă limba)"""
+        return self._search(query, domain, alpha, 1.0 - alpha, top_k)
+
+    def search_vectors(self, query: str, top_k: int = TOP_K_FINAL,
+                       lang: str | None = None, domain: str | None = None) -> List[Dict]:
+        return self._search(query, domain, 1.0, 0.0, top_k)
+
+    def _search(self, query: str, domain: str | None, w_vec: float, w_bm25: float, top_k: int) -> List[Dict]:
+        # 1-3) vector search și BM25 în paralel
+        vec_future = self._pool.submit(self._vector_hits, query, domain, TOP_K_VECTOR) if w_vec > 0 else None
+        bm25_future = self._pool.submit(self._bm25_hits, query, domain, TOP_K_BM25) if w_bm25 > 0 else None
+        vec_hits = vec_future.result() if vec_future else []
+        bm25_hits = bm25_future.result() if bm25_future else []
+
+        # 4) fuziune RRF pe URL + pregătire pt rerank
         payloads: Dict[str, Dict] = {}
-        for h in hits:
-            pid = str(h.id)
-            url = (h.payload or {}).get("url") or ""
-            title = (h.payload or {}).get("title") or ""
-            text = f"{title}\n{url}\n"
-            # nu avem text complet în payload, dar titlu+url ajută; dacă vrei, poți adăuga text în payload la ingest
-            doc_pairs.append((pid, text))
-            payloads[pid] = {"url": url, "title": title, "score_vec": float(h.score)}
-
-        # 5) rerank (precis)
-        ranked = self.reranker.rerank(query, doc_pairs)[:TOP_K_FINAL]
+        for h in vec_hits:
+            payloads.setdefault(h["url"] or h["id"], h)
+        bm25_scores = dict(bm25_hits)
+        index = self._bm25_index(domain) if bm25_hits else None
+        for url, _ in bm25_hits:
+            if url not in payloads:
+                meta = index.meta(url)
+                payloads[url] = {
+                    "id": str(uuid.uuid5(uuid.NAMESPACE_URL, url)),
+                    "url": url,
+                    "title": meta.get("title") or "",
+                    "score_vec": 0.0,
+                }
+        fused = reciprocal_rank_fusion(
+            {"vector": [h["url"] or h["id"] for h in vec_hits], "bm25": [url for url, _ in bm25_hits]},
+            {"vector": w_vec, "bm25": w_bm25},
+            k=RRF_K,
+        )[:TOP_K_RERANK]
+        rrf_scores = dict(fused)
+        candidates = [payloads[key] for key, _ in fused]
+
+        # 5a) ordinea e deja clară din scorurile vector (și BM25 nu aduce nimic nou) → fără cross-encoder
+        vec_keys = {h["url"] or h["id"] for h in vec_hits}
+        lexical_new = any(url not in vec_keys for url, _ in bm25_hits)
+        if not lexical_new and order_is_unambiguous([c["score_vec"] for c in candidates], top_k, RERANK_SKIP_MARGIN):
+            self.rerank_skipped += 1
+            ordered = sorted(candidates, key=lambda c: c["score_vec"], reverse=True)
+            ranked = [(c["url"] or c["id"], "", None) for c in ordered[:top_k]]
+        else:
+            # 5b) rerank (precis) pe pasajul cel mai relevant din conținutul complet
+            texts = self._load_texts([c["url"] for c in candidates if c["url"]])
+            doc_pairs: List[Tuple[str,str]] = []
+            for c in candidates:
+                passage = best_passage(query, texts.get(c["url"], ""))
+                doc_pairs.append((c["url"] or c["id"], f"{c['title']}\n{c['url']}\n{passage}"))
+            ranked = self.reranker.rerank(query, doc_pairs)[:top_k]
 
         # 6) combină
         out = []
-        for pid, text, score_cross in ranked:
-            meta = payloads.get(pid, {})
+        for key, text, score_cross in ranked:
+            meta = payloads.get(key, {})
             out.append({
-                "id": pid,
+                "id": meta.get("id", key),
                 "title": meta.get("title",""),
                 "url": meta.get("url",""),
                 "score_vec": meta.get("score_vec", 0.0),
+                "score_bm25": bm25_scores.get(key),
+                "score_rrf": rrf_scores.get(key, 0.0),
                 "score_cross": score_cross,
             })
         return out
+
+    def get_rerank_stats(self) -> Dict:
+        stats = self.rerank_cache.get_stats()
+        stats["skipped_by_margin"] = self.rerank_skipped
+        return stats
@@ -7,7 +7,9 @@ Analizează fiecare keyword pentru:
 - Stadiu funnel: awareness/consideration/decision/post-purchase
 - Tip trafic: B2B/B2C/local/global
 
-Folosește Qwen local pentru analiză rapidă + DeepSeek pentru decizii complexe
+Folosește Qwen local pentru analiză rapidă + DeepSeek pentru decizii complexe.
+Keywords evidente sunt clasificate local (kNN pe embeddings, vezi
+local_intent_classifier); doar cele sub pragul de confidence ajung la LLM.
 """
 
 import os
@@ -16,29 +18,78 @@ sys.path.insert(0, '/srv/hf/ai_agents')
 
 import logging
 from typing import Dict, List, Any
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
 import re
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 
 from llm_orchestrator import get_orchestrator
+from seo_intelligence.local_intent_classifier import get_local_intent_classifier
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Cache valid 30 zile
+CACHE_MAX_AGE_DAYS = 30
+
 
 class KeywordIntentAnalyzer:
     """
     Analizează intent-ul și caracteristicile fiecărui keyword
     """
     
-    def __init__(self):
+    def __init__(self, use_local_classifier: bool = True, local_threshold: float = 0.85):
+        """
+        Args:
+            use_local_classifier: Clasificare locală înainte de LLM
+            local_threshold: Confidence calibrat minim pentru a accepta răspunsul local
+        """
         self.llm = get_orchestrator()  # DeepSeek + Qwen fallback
         self.mongo_client = MongoClient("mongodb://localhost:27017/")
         self.db = self.mongo_client["ai_agents_db"]
         
+        self.local_classifier = None
+        self.local_threshold = local_threshold
+        if use_local_classifier:
+            try:
+                self.local_classifier = get_local_intent_classifier(self.db)
+            except Exception as e:
+                logger.warning(f"⚠️  Local intent classifier disabled: {e}")
+        
         logger.info("✅ Keyword Intent Analyzer initialized")
     
+    def _classify_locally(self, keywords: List[str]) -> Dict[str, Dict]:
+        """
+        Keywords clasificate local cu confidence peste prag
+        """
+        if not self.local_classifier or not keywords:
+            return {}
+        try:
+            predictions = self.local_classifier.predict_batch(keywords)
+        except Exception as e:
+            logger.warning(f"⚠️  Local intent classification failed: {e}")
+            return {}
+        
+        accepted = {}
+        analyzed_at = datetime.now(timezone.utc).isoformat()
+        for keyword, prediction in zip(keywords, predictions):
+            if prediction and prediction["confidence"] >= self.local_threshold:
+                prediction["analyzed_at"] = analyzed_at
+                accepted[keyword] = prediction
+        
+        self.local_classifier.stats["local"] += len(accepted)
+        self.local_classifier.stats["escalated"] += len(keywords) - len(accepted)
+        return accepted
+    
+    def _learn(self, analyses: Dict[str, Dict]):
+        """Răspunsurile LLM escaladate intră în setul de antrenare local"""
+        if self.local_classifier and analyses:
+            try:
+                self.local_classifier.add_examples(analyses)
+            except Exception as e:
+                logger.warning(f"⚠️  Failed to update local intent classifier: {e}")
+    
     def analyze_intent(self, keyword: str, serp_results: List[Dict] = None, context: Dict = None) -> Dict:
         """
         Analizează intent-ul unui keyword bazat pe keyword text + SERP context
@@ -53,6 +104,15 @@ class KeywordIntentAnalyzer:
         """
         logger.info(f"🔍 Analyzing intent for keyword: '{keyword}'")
         
+        # Tier local: fără SERP context, keywords evidente nu ajung la LLM
+        if not serp_results:
+            local = self._classify_locally([keyword])
+            if keyword in local:
+                analysis = local[keyword]
+                self._save_analysis(keyword, analysis)
+                logger.info(f"⚡ Local intent: {analysis['intent']} / {analysis['funnel_stage']} ({analysis['confidence']})")
+                return analysis
+        
         # Build prompt pentru LLM
         prompt = self._build_intent_prompt(keyword, serp_results, context)
         
@@ -88,9 +148,11 @@ class KeywordIntentAnalyzer:
             # Add metadata
             analysis["keyword"] = keyword
             analysis["analyzed_at"] = datetime.now(timezone.utc).isoformat()
+            analysis.setdefault("source", "llm")
             
             # Save în MongoDB
             self._save_analysis(keyword, analysis)
+            self._learn({keyword: analysis})
             
             logger.info(f"✅ Intent analysis complete: {analysis['intent']} / {analysis['funnel_stage']}")
             
@@ -100,29 +162,184 @@ class KeywordIntentAnalyzer:
             logger.error(f"❌ Error analyzing intent: {e}")
             return self._fallback_analysis(keyword)
     
-    def analyze_batch(self, keywords: List[str], context: Dict = None) -> List[Dict]:
+    def analyze_batch(
+        self,
+        keywords: List[str],
+        context: Dict = None,
+        chunk_size: int = 25,
+        max_concurrency: int = 4
+    ) -> List[Dict]:
         """
         Analizează multiple keywords în batch
+        
+        - cache rezolvat pentru toată lista într-un singur query
+        - keywords necache-uite împachetate câte `chunk_size` într-un singur prompt
+        - max `max_concurrency` apeluri LLM simultan
+        - rezultatele salvate printr-un singur bulk_write
+        
+        Returns:
+            Analize în ordinea keywords primite
         """
         logger.info(f"📦 Batch analyzing {len(keywords)} keywords")
         
-        results = []
-        for i, keyword in enumerate(keywords, 1):
-            logger.info(f"  [{i}/{len(keywords)}] Analyzing: {keyword}")
-            
-            # Check cache
-            cached = self._get_cached_analysis(keyword)
-            if cached:
-                logger.info(f"     ✅ Using cached analysis")
-                results.append(cached)
+        unique_keywords = list(dict.fromkeys(keywords))
+        analyses = self._get_cached_analyses(unique_keywords)
+        logger.info(f"   ✅ {len(analyses)} cached, {len(unique_keywords) - len(analyses)} to analyze")
+        
+        uncached = [k for k in unique_keywords if k not in analyses]
+        
+        local = self._classify_locally(uncached)
+        if local:
+            logger.info(f"   ⚡ {len(local)} classified locally, {len(uncached) - len(local)} escalated to LLM")
+            analyses.update(local)
+        uncached = [k for k in uncached if k not in local]
+        
+        chunks = [uncached[i:i + chunk_size] for i in range(0, len(uncached), chunk_size)]
+        
+        to_save = {}
+        if chunks:
+            with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+                futures = {
+                    executor.submit(self._analyze_chunk, chunk, context): chunk
+                    for chunk in chunks
+                }
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    try:
+                        chunk_results = future.result()
+                    except Exception as e:
+                        logger.error(f"❌ Error analyzing chunk of {len(chunk)} keywords: {e}")
+                        chunk_results = {}
+                    
+                    for keyword in chunk:
+                        if keyword in chunk_results:
+                            analyses[keyword] = chunk_results[keyword]
+                            to_save[keyword] = chunk_results[keyword]
+                        else:
+                            # Nesalvat în cache: se reîncearcă la următorul batch
+                            analyses[keyword] = self._fallback_analysis(keyword)
+                            analyses[keyword]["keyword"] = keyword
+        
+        self._save_analyses({**local, **to_save})
+        self._learn(to_save)
+        
+        results = [analyses[keyword] for keyword in keywords]
+        logger.info(f"✅ Batch analysis complete: {len(results)} keywords ({len(chunks)} LLM calls)")
+        return results
+    
+    def _analyze_chunk(self, keywords: List[str], context: Dict = None) -> Dict[str, Dict]:
+        """
+        Un singur apel LLM pentru mai multe keywords
+        
+        Returns:
+            Dict keyword → analiză (doar keywords prezente valid în răspuns)
+        """
+        prompt = self._build_batch_intent_prompt(keywords, context)
+        
+        response = self.llm.chat(
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        "Ești un expert SEO care analizează intent-ul keyword-urilor. "
+                        "Răspunde DOAR cu JSON valid, fără text adițional."
+                    )
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            temperature=0.3,
+            max_tokens=min(8000, 200 * len(keywords) + 200)
+        )
+        
+        if isinstance(response, dict):
+            content = response.get("content", "")
+        else:
+            content = str(response)
+        
+        return self._parse_batch_response(content, keywords)
+    
+    def _build_batch_intent_prompt(self, keywords: List[str], context: Dict = None) -> str:
+        """
+        Prompt structurat pentru mai multe keywords (răspuns indexat pe "id")
+        """
+        prompt = "Analizează intent-ul următoarelor keywords SEO:\n\nKEYWORDS:\n"
+        for i, keyword in enumerate(keywords):
+            prompt += f'{i}. "{keyword}"\n'
+        
+        if context:
+            prompt += f"""
+CONTEXT BUSINESS:
+- Industrie: {context.get('industry', 'N/A')}
+- Produse/Servicii: {', '.join(context.get('products', []))}
+"""
+        
+        prompt += """
+
+Returnează JSON cu câte un obiect pentru FIECARE keyword, în aceeași ordine:
+
+{
+  "results": [
+    {
+      "id": <numărul keyword-ului din listă>,
+      "intent": "<informativ | comercial | tranzactional | navigational>",
+      "funnel_stage": "<awareness | consideration | decision | post-purchase>",
+      "traffic_type": "<B2B | B2C | local | global | mixed>",
+      "confidence": <0.0-1.0>,
+      "reasoning": "<explicație foarte scurtă în română>",
+      "modifiers": ["<local, urgent, cheap, best, how to, etc>"],
+      "user_intent_description": "<ce vrea user-ul când caută asta>"
+    }
+  ]
+}
+
+EXPLICAȚII:
+- Intent informativ: user caută informații generale (ghiduri, explicații)
+- Intent comercial: user compară opțiuni, cercetează (reviews, comparații)
+- Intent tranzacțional: user vrea să cumpere/angajeze acum (cumpără, ofertă, preț)
+- Intent navigational: user caută un brand specific
+
+Răspunde DOAR cu JSON-ul, fără text adițional.
+"""
+        return prompt
+    
+    def _parse_batch_response(self, content: str, keywords: List[str]) -> Dict[str, Dict]:
+        """
+        Parsează răspunsul multi-keyword; ignoră intrările invalide
+        """
+        try:
+            json_match = re.search(r'\{[\s\S]*\}', content)
+            if not json_match:
+                raise ValueError("No JSON found in response")
+            data = json.loads(json_match.group(0))
+        except Exception as e:
+            logger.warning(f"⚠️  Failed to parse batch LLM response: {e}")
+            return {}
+        
+        required_fields = ["intent", "funnel_stage", "traffic_type", "confidence"]
+        analyzed_at = datetime.now(timezone.utc).isoformat()
+        parsed = {}
+        
+        for item in data.get("results", []):
+            if not isinstance(item, dict):
+                continue
+            try:
+                index = int(item.pop("id"))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if not 0 <= index < len(keywords):
+                continue
+            if any(field not in item for field in required_fields):
                 continue
             
-            # Analyze
-            analysis = self.analyze_intent(keyword, context=context)
-            results.append(analysis)
+            item["keyword"] = keywords[index]
+            item["analyzed_at"] = analyzed_at
+            item["source"] = "llm"
+            parsed[keywords[index]] = item
         
-        logger.info(f"✅ Batch analysis complete: {len(results)} keywords")
-        return results
+        return parsed
     
     def _build_intent_prompt(self, keyword: str, serp_results: List[Dict] = None, context: Dict = None) -> str:
         """
@@ -240,7 +457,8 @@ Răspunde DOAR cu JSON-ul, fără text adițional.
             "confidence": 0.5,
             "reasoning": "Fallback analysis based on keyword pattern matching",
             "modifiers": [],
-            "user_intent_description": f"User searching for '{keyword}'"
+            "user_intent_description": f"User searching for '{keyword}'",
+            "source": "fallback"
         }
     
     def _save_analysis(self, keyword: str, analysis: Dict):
@@ -256,24 +474,58 @@ Răspunde DOAR cu JSON-ul, fără text adițional.
         except Exception as e:
             logger.error(f"Failed to save analysis: {e}")
     
-    def _get_cached_analysis(self, keyword: str) -> Dict:
+    def _save_analyses(self, analyses: Dict[str, Dict]):
         """
-        Obține analiza cached din MongoDB
+        Salvează mai multe analize într-un singur bulk_write
+        """
+        if not analyses:
+            return
+        try:
+            self.db.keyword_intent_analysis.bulk_write(
+                [
+                    UpdateOne({"keyword": keyword}, {"$set": analysis}, upsert=True)
+                    for keyword, analysis in analyses.items()
+                ],
+                ordered=False
+            )
+        except Exception as e:
+            logger.error(f"Failed to save analyses: {e}")
+    
+    @staticmethod
+    def _is_fresh(cached: Dict, cutoff: datetime) -> bool:
+        analyzed_at = cached.get("analyzed_at")
+        if not analyzed_at:
+            return False
+        try:
+            analyzed_date = datetime.fromisoformat(str(analyzed_at).replace("Z", "+00:00"))
+        except ValueError:
+            return False
+        if analyzed_date.tzinfo is None:
+            analyzed_date = analyzed_date.replace(tzinfo=timezone.utc)
+        return analyzed_date > cutoff
+    
+    def _get_cached_analyses(self, keywords: List[str]) -> Dict[str, Dict]:
+        """
+        Obține analizele cached pentru o listă de keywords (un singur query)
         """
+        if not keywords:
+            return {}
         try:
-            cached = self.db.keyword_intent_analysis.find_one({"keyword": keyword})
-            if cached:
-                # Check if not too old (30 days)
-                if "analyzed_at" in cached:
-                    from dateutil import parser
-                    analyzed_date = parser.parse(cached["analyzed_at"])
-                    age_days = (datetime.now(timezone.utc) - analyzed_date).days
-                    if age_days < 30:
-                        return cached
-            return None
+            cutoff = datetime.now(timezone.utc) - timedelta(days=CACHE_MAX_AGE_DAYS)
+            return {
+                cached["keyword"]: cached
+                for cached in self.db.keyword_intent_analysis.find({"keyword": {"$in": keywords}})
+                if self._is_fresh(cached, cutoff)
+            }
         except Exception as e:
-            logger.error(f"Failed to get cached analysis: {e}")
-            return None
+            logger.error(f"Failed to get cached analyses: {e}")
+            return {}
+    
+    def _get_cached_analysis(self, keyword: str) -> Dict:
+        """
+        Obține analiza cached din MongoDB
+        """
+        return self._get_cached_analyses([keyword]).get(keyword)
 
 
 # Test
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+🎯 LOCAL INTENT CLASSIFIER - SEO Intelligence v2.0
+
+Clasificator de intent rulat local (CPU), construit din analizele LLM
+deja salvate în `keyword_intent_analysis`:
+- embedding per keyword (sentence-transformers sau, fără model, n-grame hash-uite)
+- vot kNN ponderat cu similaritatea pentru intent / funnel_stage / traffic_type
+- confidence calibrat leave-one-out pe setul de antrenare (binning izotonic)
+
+Sub pragul de confidence keyword-ul merge la LLM, iar răspunsul LLM
+este adăugat înapoi în setul de antrenare.
+
+Usage:
+    classifier = get_local_intent_classifier(db)   # fit o singură dată per proces
+    prediction = classifier.predict("pret laptop gaming")
+    if prediction and prediction["confidence"] >= classifier.threshold:
+        ...
+"""
+
+import os
+import logging
+import threading
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from resource_registry import get_registry
+
+try:
+    from sentence_transformers import SentenceTransformer
+    HAS_SENTENCE_TRANSFORMERS = True
+except ImportError:
+    HAS_SENTENCE_TRANSFORMERS = False
+
+logger = logging.getLogger(__name__)
+
+INTENT_EMBED_MODEL = os.getenv("INTENT_EMBED_MODEL", "all-MiniLM-L6-v2")
+
+LABEL_FIELDS = ["intent", "funnel_stage", "traffic_type"]
+
+# Analize care NU intră în setul de antrenare (predicții proprii / reguli)
+UNTRUSTED_SOURCES = ["local_knn", "fallback"]
+
+
+class HashingEmbedder:
+    """
+    Embedding fără model: n-grame de caractere (3-5) + cuvinte, hash-uite
+    într-un vector normalizat. Suficient pentru keywords scurte.
+    """
+
+    def __init__(self, dim: int = 2048):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        text = " ".join(text.lower().split())
+        padded = f" {text} "
+        features = [f"w:{word}" for word in text.split()]
+        for n in (3, 4, 5):
+            features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        return features
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                vectors[row, zlib.crc32(feature.encode("utf-8")) % self.dim] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+class SentenceEmbedder:
+    """Wrapper sentence-transformers pe CPU, cu vectori normalizați"""
+
+    def __init__(self, model_name: str = INTENT_EMBED_MODEL):
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(
+            self.model.encode(texts, batch_size=128, normalize_embeddings=True, convert_to_numpy=True),
+            dtype=np.float32
+        )
+
+
+class LocalIntentClassifier:
+    """
+    kNN pe embeddings peste analizele LLM cache-uite
+    """
+
+    def __init__(
+        self,
+        db,
+        k: int = 10,
+        threshold: float = 0.85,
+        min_examples: int = 50,
+        min_label_confidence: float = 0.6,
+        max_examples: int = 50000,
+        embedder=None,
+        recalibrate_every: int = 200
+    ):
+        """
+        Args:
+            db: Database MongoDB (ai_agents_db)
+            k: Număr vecini
+            threshold: Sub acest confidence calibrat → escaladare la LLM
+            min_examples: Sub acest număr de exemple clasificatorul nu răspunde
+            min_label_confidence: Confidence LLM minim pentru a folosi analiza ca exemplu
+            max_examples: Plafon exemple încărcate (cele mai recente)
+            embedder: Obiect cu encode(texts) → np.ndarray normalizat
+            recalibrate_every: Recalibrare după atâtea exemple noi
+        """
+        self.db = db
+        self.k = k
+        self.threshold = threshold
+        self.min_examples = min_examples
+        self.min_label_confidence = min_label_confidence
+        self.max_examples = max_examples
+        self.recalibrate_every = recalibrate_every
+
+        if embedder is not None:
+            self.embedder = embedder
+        elif HAS_SENTENCE_TRANSFORMERS:
+            try:
+                self.embedder = SentenceEmbedder()
+            except Exception as e:
+                logger.warning(f"⚠️  Embedding model unavailable ({e}), using hashing embedder")
+                self.embedder = HashingEmbedder()
+        else:
+            self.embedder = HashingEmbedder()
+
+        self._lock = threading.Lock()
+        self.keywords: List[str] = []
+        self.labels: Dict[str, List[str]] = {field: [] for field in LABEL_FIELDS}
+        self.vectors: Optional[np.ndarray] = None
+        self._index: Dict[str, int] = {}
+        # Bins (limită superioară scor brut, acuratețe observată)
+        self._calibration: List[tuple] = []
+        self._added_since_calibration = 0
+
+        self.stats = {"local": 0, "escalated": 0, "learned": 0}
+
+    # ------------------------------------------------------------------
+    # Training set
+    # ------------------------------------------------------------------
+
+    def _is_trainable(self, analysis: Dict) -> bool:
+        if analysis.get("source") in UNTRUSTED_SOURCES:
+            return False
+        if str(analysis.get("reasoning", "")).startswith("Fallback"):
+            return False
+        try:
+            confidence = float(analysis.get("confidence", 0))
+        except (TypeError, ValueError):
+            return False
+        return confidence >= self.min_label_confidence and all(analysis.get(f) for f in LABEL_FIELDS)
+
+    def fit(self) -> "LocalIntentClassifier":
+        """
+        Încarcă exemplele din keyword_intent_analysis, calculează embeddings și calibrează
+        """
+        projection = {"keyword": 1, "confidence": 1, "reasoning": 1, "source": 1, "analyzed_at": 1}
+        projection.update({field: 1 for field in LABEL_FIELDS})
+        try:
+            docs = list(
+                self.db.keyword_intent_analysis
+                .find({"source": {"$nin": UNTRUSTED_SOURCES}}, projection)
+                .sort("analyzed_at", -1)
+                .limit(self.max_examples)
+            )
+        except Exception as e:
+            logger.error(f"Failed to load intent training set: {e}")
+            return self
+
+        examples = {}
+        for doc in docs:
+            keyword = doc.get("keyword")
+            if keyword and keyword not in examples and self._is_trainable(doc):
+                examples[keyword] = doc
+
+        keywords = list(examples.keys())
+        vectors = self.embedder.encode(keywords) if keywords else None
+
+        with self._lock:
+            self.keywords = keywords
+            self.labels = {field: [examples[k][field] for k in keywords] for field in LABEL_FIELDS}
+            self.vectors = vectors
+            self._index = {keyword: i for i, keyword in enumerate(keywords)}
+            self._calibrate()
+
+        logger.info(f"🎯 Local intent classifier: {len(keywords)} examples, {len(self._calibration)} calibration bins")
+        return self
+
+    def add_example(self, keyword: str, analysis: Dict):
+        """Adaugă (sau actualizează) un răspuns LLM escaladat în setul de antrenare"""
+        self.add_examples({keyword: analysis})
+
+    def add_examples(self, analyses: Dict[str, Dict]):
+        trainable = {k: a for k, a in analyses.items() if k and self._is_trainable(a)}
+        if not trainable:
+            return
+        keywords = list(trainable.keys())
+        vectors = self.embedder.encode(keywords)
+
+        with self._lock:
+            new_rows = []
+            for row, keyword in enumerate(keywords):
+                analysis = trainable[keyword]
+                index = self._index.get(keyword)
+                if index is not None:
+                    self.vectors[index] = vectors[row]
+                    for field in LABEL_FIELDS:
+                        self.labels[field][index] = analysis[field]
+                    continue
+                self._index[keyword] = len(self.keywords)
+                self.keywords.append(keyword)
+                for field in LABEL_FIELDS:
+                    self.labels[field].append(analysis[field])
+                new_rows.append(vectors[row])
+
+            if new_rows:
+                stacked = np.vstack(new_rows)
+                self.vectors = stacked if self.vectors is None else np.vstack([self.vectors, stacked])
+
+            self.stats["learned"] += len(keywords)
+            self._added_since_calibration += len(keywords)
+            if self._added_since_calibration >= self.recalibrate_every:
+                self._calibrate()
+
+    # ------------------------------------------------------------------
+    # Prediction
+    # ------------------------------------------------------------------
+
+    def _vote(self, similarities: np.ndarray, exclude: Optional[int] = None) -> Dict:
+        """Vot ponderat pe top-k vecini pentru un singur keyword"""
+        if exclude is not None:
+            similarities = similarities.copy()
+            similarities[exclude] = -np.inf
+        k = min(self.k, len(similarities) - (1 if exclude is not None else 0))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        weights = np.clip(similarities[top], 0.0, None)
+        total = float(weights.sum()) or 1.0
+
+        prediction = {}
+        for field in LABEL_FIELDS:
+            scores: Dict[str, float] = {}
+            for index, weight in zip(top, weights):
+                label = self.labels[field][index]
+                scores[label] = scores.get(label, 0.0) + float(weight)
+            label, score = max(scores.items(), key=lambda item: item[1])
+            prediction[field] = label
+            prediction[f"{field}_share"] = score / total
+
+        # Scor brut: acordul vecinilor × cât de aproape e cel mai apropiat vecin
+        prediction["raw_score"] = prediction["intent_share"] * float(similarities[top].max())
+        prediction["neighbors"] = [self.keywords[i] for i in top[np.argsort(-similarities[top])][:3]]
+        return prediction
+
+    def _calibrate(self, sample_size: int = 2000, bins: int = 10):
+        """
+        Leave-one-out pe un eșantion: scor brut → acuratețe intent observată.
+        Acuratețea e făcută monotonă (crescătoare cu scorul brut).
+        """
+        self._added_since_calibration = 0
+        n = len(self.keywords)
+        if n < self.min_examples:
+            self._calibration = []
+            return
+
+        rng = np.random.default_rng(0)
+        sample = rng.choice(n, size=min(sample_size, n), replace=False)
+        similarities = self.vectors[sample] @ self.vectors.T
+
+        scored = []
+        for row, index in enumerate(sample):
+            prediction = self._vote(similarities[row], exclude=int(index))
+            scored.append((prediction["raw_score"], prediction["intent"] == self.labels["intent"][index]))
+        scored.sort(key=lambda item: item[0])
+
+        # Bins egale ca număr de exemple: [scor maxim, corecte, total]
+        size = max(1, len(scored) // bins)
+        blocks = []
+        for start in range(0, len(scored), size):
+            chunk = scored[start:start + size]
+            blocks.append([chunk[-1][0], sum(1 for _, correct in chunk if correct), len(chunk)])
+
+        # Pool-adjacent-violators: acuratețea nu scade când scorul brut crește
+        merged = []
+        for block in blocks:
+            merged.append(block)
+            while len(merged) > 1 and merged[-2][1] / merged[-2][2] > merged[-1][1] / merged[-1][2]:
+                last = merged.pop()
+                merged[-1] = [last[0], merged[-1][1] + last[1], merged[-1][2] + last[2]]
+
+        calibration = [(upper, correct / total) for upper, correct, total in merged]
+        self._calibration = calibration
+
+    def _calibrated(self, raw_score: float) -> float:
+        for upper, accuracy in self._calibration:
+            if raw_score <= upper:
+                return accuracy
+        return self._calibration[-1][1]
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._calibration) and len(self.keywords) >= self.min_examples
+
+    def predict_batch(self, keywords: List[str]) -> List[Optional[Dict]]:
+        """
+        Clasifică mai multe keywords (un singur encode + o singură înmulțire de matrici)
+
+        Returns:
+            Analiză per keyword (format KeywordIntentAnalyzer) sau None dacă nu e gata
+        """
+        if not keywords or not self.ready:
+            return [None] * len(keywords)
+
+        query_vectors = self.embedder.encode(keywords)
+        with self._lock:
+            similarities = query_vectors @ self.vectors.T
+            predictions = [self._vote(similarities[row]) for row in range(len(keywords))]
+            confidences = [self._calibrated(p["raw_score"]) for p in predictions]
+
+        results = []
+        for keyword, prediction, confidence in zip(keywords, predictions, confidences):
+            results.append({
+                "keyword": keyword,
+                "intent": prediction["intent"],
+                "funnel_stage": prediction["funnel_stage"],
+                "traffic_type": prediction["traffic_type"],
+                "confidence": round(confidence, 3),
+                "reasoning": f"Local kNN (similar: {', '.join(prediction['neighbors'])})",
+                "modifiers": [],
+                "user_intent_description": f"User searching for '{keyword}'",
+                "source": "local_knn"
+            })
+        return results
+
+    def predict(self, keyword: str) -> Optional[Dict]:
+        return self.predict_batch([keyword])[0]
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats["examples"] = len(self.keywords)
+        stats["ready"] = self.ready
+        stats["embedder"] = type(self.embedder).__name__
+        total = stats["local"] + stats["escalated"]
+        stats["local_rate"] = round(stats["local"] / total, 3) if total else 0
+        return stats
+
+
+def get_local_intent_classifier(db) -> LocalIntentClassifier:
+    """
+    Clasificatorul partajat per bază de date: embeddings + calibrare se calculează
+    o singură dată, apoi toți analizorii învață în aceeași instanță
+    """
+    return get_registry().shared(
+        ("local_intent_classifier", db.name),
+        lambda: LocalIntentClassifier(db).fit()
+    )
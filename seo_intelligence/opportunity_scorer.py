@@ -9,7 +9,9 @@ Calculează opportunity score pentru fiecare keyword:
 - business_relevance (cât de relevant pentru business)
 - opportunity_score = (volume * relevance) / difficulty
 
-Folosește Qwen GPU pentru analiză SERP detaliată
+Folosește Qwen GPU pentru analiză SERP detaliată.
+score_frame / score_batch calculează scorurile coloanar (numpy) pentru
+toate keywords deodată, cu rezultate identice cu score_keyword.
 """
 
 import os
@@ -21,7 +23,9 @@ from typing import Dict, List, Any
 from datetime import datetime, timezone
 import json
 import re
-from pymongo import MongoClient
+import numpy as np
+from urllib.parse import urlparse
+from pymongo import MongoClient, UpdateOne
 import requests
 
 from llm_orchestrator import get_orchestrator
@@ -29,6 +33,12 @@ from llm_orchestrator import get_orchestrator
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+BIG_BRANDS = ["wikipedia", "gov.ro", "edu.ro", ".gov", ".edu"]
+LOCATION_WORDS = ["bucuresti", "romania", "cluj", "timisoara"]
+VOLUME_COMMERCIAL_WORDS = ["pret", "firma", "best", "top"]
+RELEVANCE_COMMERCIAL_WORDS = ["pret", "oferta", "firma", "companie", "cumpara"]
+RELEVANCE_LOCAL_WORDS = ["bucuresti", "romania", "cluj", "timisoara", "local"]
+
 
 class OpportunityScorer:
     """
@@ -115,13 +125,25 @@ class OpportunityScorer:
         self,
         keywords: List[str],
         serp_data_map: Dict[str, Dict] = None,
-        business_context: Dict = None
+        business_context: Dict = None,
+        vectorized: bool = True
     ) -> List[Dict]:
         """
         Scorează multiple keywords în batch
+        
+        Args:
+            vectorized: True → score_frame (coloanar, un singur bulk_write);
+                        False → score_keyword pentru fiecare keyword
         """
         logger.info(f"📦 Batch scoring {len(keywords)} keywords")
         
+        if vectorized:
+            frame = self.score_frame(keywords, serp_data_map, business_context)
+            results = self.frame_to_records(frame)
+            self._save_scores(results)
+            logger.info(f"✅ Batch scoring complete: {len(results)} keywords")
+            return results
+        
         results = []
         for i, keyword in enumerate(keywords, 1):
             logger.info(f"  [{i}/{len(keywords)}] Scoring: {keyword}")
@@ -139,6 +161,253 @@ class OpportunityScorer:
         logger.info(f"✅ Batch scoring complete: {len(results)} keywords")
         return results
     
+    def score_agent(self, agent_id: str, business_context: Dict = None, market: str = "ro") -> List[Dict]:
+        """
+        Re-scorează toate keywords unui agent din snapshot-urile SERP ale zilei
+        (serp_keyword_snapshots), după un SERP run
+        """
+        from serp_keyword_registry import SERPKeywordRegistry
+        
+        view = SERPKeywordRegistry(self.db, default_market=market).get_agent_view(agent_id)
+        serp_data_map = {keyword: {"results": results} for keyword, results in view.items()}
+        return self.score_batch(list(serp_data_map.keys()), serp_data_map, business_context)
+    
+    # ------------------------------------------------------------------
+    # Scoring coloanar
+    # ------------------------------------------------------------------
+    
+    def _serp_columns(self, keywords: List[str], serp_data_map: Dict[str, Dict] = None) -> Dict[str, Any]:
+        """
+        Un singur pas peste toate rezultatele SERP → coloane numerice per keyword
+        
+        Parsarea string-urilor (domain, brand, titlu) rămâne per rezultat;
+        agregările se fac pe array-uri plate (keyword_index, valoare).
+        """
+        n = len(keywords)
+        has_serp = np.zeros(n, dtype=bool)
+        num_results = np.zeros(n, dtype=np.int64)
+        top_len = np.zeros(n, dtype=np.int64)
+        has_ads = np.zeros(n, dtype=bool)
+        failed = np.zeros(n, dtype=bool)
+        top_competitors: List[List[str]] = [[] for _ in range(n)]
+        
+        # Rânduri plate pentru primele 10 rezultate ale fiecărui keyword
+        row_keyword: List[int] = []
+        row_brand: List[bool] = []
+        row_optimized: List[bool] = []
+        domain_pairs = set()
+        domain_cache: Dict[str, str] = {}
+        
+        for i, keyword in enumerate(keywords):
+            serp_data = serp_data_map.get(keyword) if serp_data_map else None
+            if not serp_data or "results" not in serp_data:
+                continue
+            
+            try:
+                results = serp_data.get("results", [])
+                keyword_lower = keyword.lower()
+                rows = []
+                domains = set()
+                competitors = []
+                for rank, result in enumerate(results[:10]):
+                    url = result.get("url", "")
+                    domain = domain_cache.get(url)
+                    if domain is None:
+                        domain = self._extract_domain(url)
+                        domain_cache[url] = domain
+                    if domain:
+                        domains.add(domain)
+                        if rank < 5:
+                            competitors.append(domain)
+                    rows.append((
+                        any(brand in url.lower() for brand in BIG_BRANDS),
+                        keyword_lower in result.get("title", "").lower()
+                    ))
+                
+                has_serp[i] = True
+                num_results[i] = len(results)
+                top_len[i] = len(rows)
+                has_ads[i] = bool(serp_data.get("has_ads", False))
+                top_competitors[i] = competitors
+                domain_pairs.update((i, domain) for domain in domains)
+                for brand, optimized in rows:
+                    row_keyword.append(i)
+                    row_brand.append(brand)
+                    row_optimized.append(optimized)
+            except Exception as e:
+                # Aceeași semantică ca score_keyword: date invalide → fallback score
+                logger.error(f"❌ Error scoring keyword: {e}")
+                failed[i] = True
+        
+        row_keyword_arr = np.asarray(row_keyword, dtype=np.int64)
+        brand_count = np.bincount(row_keyword_arr, weights=np.asarray(row_brand, dtype=np.float64), minlength=n)
+        optimized_count = np.bincount(row_keyword_arr, weights=np.asarray(row_optimized, dtype=np.float64), minlength=n)
+        domain_count = np.bincount(
+            np.asarray([i for i, _ in domain_pairs], dtype=np.int64), minlength=n
+        ).astype(np.float64)
+        
+        return {
+            "has_serp": has_serp,
+            "num_results": num_results,
+            "top_len": top_len,
+            "has_ads": has_ads,
+            "brand_count": brand_count,
+            "optimized_count": optimized_count,
+            "domain_count": domain_count,
+            "top_competitors": top_competitors,
+            "failed": failed
+        }
+    
+    @staticmethod
+    def _contains_any(texts: List[str], words: List[str]) -> np.ndarray:
+        return np.fromiter((any(w in text for w in words) for text in texts), dtype=bool, count=len(texts))
+    
+    def _volume_column(self, keywords_lower: List[str]) -> np.ndarray:
+        """Vectorizat _estimate_search_volume"""
+        word_count = np.fromiter((len(k.split()) for k in keywords_lower), dtype=np.int64, count=len(keywords_lower))
+        base = np.select(
+            [word_count == 1, word_count == 2, word_count == 3],
+            [5000, 2000, 800],
+            default=300
+        ).astype(np.int64)
+        # int() trunchiază; volumele sunt pozitive → floor
+        local = self._contains_any(keywords_lower, LOCATION_WORDS)
+        base = np.where(local, np.floor(base * 0.3), base).astype(np.int64)
+        commercial = self._contains_any(keywords_lower, VOLUME_COMMERCIAL_WORDS)
+        base = np.where(commercial, np.floor(base * 1.5), base).astype(np.int64)
+        return base
+    
+    def _relevance_column(self, keywords_lower: List[str], business_context: Dict = None) -> np.ndarray:
+        """Vectorizat _calculate_business_relevance (aceeași ordine a adunărilor)"""
+        n = len(keywords_lower)
+        if not business_context:
+            return np.full(n, 0.7)
+        
+        terms = [p.lower() for p in business_context.get("products", [])]
+        terms += [s.lower() for s in business_context.get("services", [])]
+        industry = business_context.get("industry", "")
+        
+        relevance = np.zeros(n)
+        relevance = relevance + np.where(self._contains_any(keywords_lower, terms), 0.4, 0.0)
+        relevance = relevance + np.where(self._contains_any(keywords_lower, RELEVANCE_COMMERCIAL_WORDS), 0.3, 0.0)
+        relevance = relevance + np.where(self._contains_any(keywords_lower, RELEVANCE_LOCAL_WORDS), 0.2, 0.0)
+        if industry:
+            relevance = relevance + np.where(self._contains_any(keywords_lower, [industry.lower()]), 0.1, 0.0)
+        return np.minimum(relevance + 0.3, 1.0)
+    
+    def score_frame(
+        self,
+        keywords: List[str],
+        serp_data_map: Dict[str, Dict] = None,
+        business_context: Dict = None
+    ) -> Dict[str, Any]:
+        """
+        Scorează toate keywords coloanar și returnează tabelul sortat
+        descrescător după opportunity_score
+        
+        Returns:
+            Dict coloană → array/listă (aceeași lungime, aceeași ordine)
+        """
+        keywords = list(keywords)
+        keywords_lower = [k.lower() for k in keywords]
+        serp = self._serp_columns(keywords, serp_data_map)
+        has_serp = serp["has_serp"]
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Competition: bază număr rezultate + ads + diversitate domenii
+            diversity = np.where(serp["num_results"] > 0, serp["domain_count"] / 10.0, 0.5)
+            competition = np.minimum(serp["num_results"] / 10.0, 1.0) * 0.4
+            competition = competition + np.where(serp["has_ads"], 0.3, 0.0)
+            competition = competition + diversity * 0.3
+            competition = np.where(has_serp, np.minimum(competition, 1.0), 0.5)
+            
+            # Difficulty: branduri mari + titluri optimizate + 0.2
+            top_len = serp["top_len"]
+            nonempty = top_len > 0
+            difficulty = np.where(nonempty, (serp["brand_count"] / top_len) * 0.5, 0.0)
+            difficulty = difficulty + np.where(nonempty, (serp["optimized_count"] / top_len) * 0.3, 0.0)
+            difficulty = difficulty + 0.2
+            difficulty = np.where(has_serp, np.minimum(difficulty, 1.0), 0.5)
+        
+        volume = self._volume_column(keywords_lower)
+        relevance = self._relevance_column(keywords_lower, business_context)
+        
+        # Opportunity: (volume_normalized * relevance) / difficulty, scalat 0-10
+        volume_normalized = np.minimum(volume / 10000.0, 1.0)
+        opportunity = np.minimum((volume_normalized * relevance) / np.maximum(difficulty, 0.1) * 10.0, 10.0)
+        
+        # Keywords cu date SERP invalide → _fallback_score
+        failed = serp["failed"]
+        if failed.any():
+            fallback = self._fallback_score("")
+            volume = np.where(failed, fallback["search_volume"], volume)
+            competition = np.where(failed, fallback["competition_level"], competition)
+            difficulty = np.where(failed, fallback["difficulty_score"], difficulty)
+            relevance = np.where(failed, fallback["business_relevance"], relevance)
+            opportunity = np.where(failed, fallback["opportunity_score"], opportunity)
+        
+        low_difficulty = difficulty < 0.5
+        recommendation = np.select(
+            [
+                (opportunity >= 7.0) & low_difficulty,
+                opportunity >= 7.0,
+                (opportunity >= 4.0) & low_difficulty,
+                opportunity >= 4.0,
+                relevance > 0.8
+            ],
+            [
+                "HIGH PRIORITY - Excellent opportunity, low difficulty",
+                "HIGH PRIORITY - High value despite difficulty",
+                "MEDIUM PRIORITY - Good quick win",
+                "MEDIUM PRIORITY - Moderate opportunity",
+                "LOW PRIORITY - High relevance but tough competition"
+            ],
+            default="LOW PRIORITY - Consider alternatives"
+        ).astype(object)
+        if failed.any():
+            recommendation[failed] = self._fallback_score("")["recommendation"]
+        
+        # Sortare stabilă descrescătoare (ca list.sort(reverse=True))
+        order = np.argsort(-opportunity, kind="stable")
+        top_competitors = serp["top_competitors"]
+        return {
+            "keyword": [keywords[i] for i in order],
+            "search_volume": volume[order],
+            "competition_level": competition[order],
+            "difficulty_score": difficulty[order],
+            "business_relevance": relevance[order],
+            "opportunity_score": opportunity[order],
+            "top_competitors": [top_competitors[i] if not failed[i] else [] for i in order],
+            "recommendation": recommendation[order],
+            "scored_at": datetime.now(timezone.utc).isoformat()
+        }
+    
+    @staticmethod
+    def frame_to_records(frame: Dict[str, Any]) -> List[Dict]:
+        """Tabel coloanar → listă de dict-uri (formatul score_keyword)"""
+        columns = {
+            "search_volume": frame["search_volume"].tolist(),
+            "competition_level": frame["competition_level"].tolist(),
+            "difficulty_score": frame["difficulty_score"].tolist(),
+            "business_relevance": frame["business_relevance"].tolist(),
+            "opportunity_score": frame["opportunity_score"].tolist(),
+            "recommendation": frame["recommendation"].tolist()
+        }
+        return [
+            {
+                "keyword": keyword,
+                "search_volume": int(columns["search_volume"][i]),
+                "competition_level": columns["competition_level"][i],
+                "difficulty_score": columns["difficulty_score"][i],
+                "business_relevance": columns["business_relevance"][i],
+                "opportunity_score": columns["opportunity_score"][i],
+                "top_competitors": frame["top_competitors"][i],
+                "recommendation": columns["recommendation"][i],
+                "scored_at": frame["scored_at"]
+            }
+            for i, keyword in enumerate(frame["keyword"])
+        ]
+    
     def _estimate_search_volume(self, keyword: str, serp_data: Dict = None) -> int:
         """
         Estimează search volume pentru keyword
@@ -377,7 +646,6 @@ class OpportunityScorer:
         Extrage domain din URL
         """
         try:
-            from urllib.parse import urlparse
             parsed = urlparse(url)
             domain = parsed.netloc.replace("www.", "")
             return domain
@@ -412,6 +680,20 @@ class OpportunityScorer:
             )
         except Exception as e:
             logger.error(f"Failed to save score: {e}")
+    
+    def _save_scores(self, scores: List[Dict]):
+        """
+        Salvează toate scorurile într-un singur bulk_write
+        """
+        if not scores:
+            return
+        try:
+            self.db.keyword_opportunity_scores.bulk_write(
+                [UpdateOne({"keyword": score["keyword"]}, {"$set": score}, upsert=True) for score in scores],
+                ordered=False
+            )
+        except Exception as e:
+            logger.error(f"Failed to save scores: {e}")
 
 
 # Test
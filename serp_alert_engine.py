@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+⚡ SERP Alert Engine - Evaluare incrementală a alertelor pe măsură ce se scriu rezultatele SERP
+
+În loc să compare ultimele două run-uri la fiecare poll (AlertsSystem.check_rank_drops /
+check_new_competitors), engine-ul primește fiecare rezultat SERP în momentul scrierii și
+păstrează în memorie o stare compactă per agent:
+- ultima poziție a master-ului pentru fiecare keyword
+- setul de competitori cunoscuți (org_graph + intrări noi deja semnalate)
+
+Starea e salvată periodic (snapshot) în serp_alert_state, deci repornirea procesului nu
+re-declanșează alertele. Alertele trec printr-un sink cu deduplicare și limită per agent,
+apoi prin AlertPipeline (digest-uri, scriere în lot) - nimic sincron pe calea de ingestie SERP.
+
+Usage:
+    from serp_alert_engine import get_alert_engine
+
+    schemas = SERPMongoDBSchemas(bulk_writer=get_bulk_writer(), alert_engine=get_alert_engine())
+    # sau direct:
+    get_alert_engine().consume(results)
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from pymongo import MongoClient, UpdateOne
+
+from alerts_system import AlertsSystem, AlertType
+from alert_pipeline import AlertPipeline
+
+logger = logging.getLogger(__name__)
+
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27018/")
+MONGODB_DATABASE = os.getenv("MONGODB_DATABASE", "ai_agents_db")
+
+RANK_DROP_THRESHOLD = int(os.getenv("SERP_ALERT_DROP_THRESHOLD", "3"))
+NEW_COMPETITOR_TOP_N = int(os.getenv("SERP_ALERT_TOP_N", "10"))
+SNAPSHOT_EVERY_SECONDS = float(os.getenv("SERP_ALERT_SNAPSHOT_SECONDS", "60"))
+DEDUP_WINDOW_SECONDS = float(os.getenv("SERP_ALERT_DEDUP_SECONDS", str(6 * 3600)))
+MAX_ALERTS_PER_AGENT_HOUR = int(os.getenv("SERP_ALERT_MAX_PER_HOUR", "30"))
+
+
+class AlertSink:
+    """
+    Trimite alerte în AlertPipeline, cu:
+    - deduplicare: aceeași cheie nu e emisă de două ori în `dedup_window` secunde
+    - limită: maxim `max_per_hour` alerte per agent pe oră (restul sunt numărate ca suprimate)
+
+    emit() întoarce "emitted" | "deduplicated" | "rate_limited"; dacă pipeline-ul aruncă,
+    alerta nu e considerată trimisă (nici pentru deduplicare, nici pentru limită).
+    """
+
+    def __init__(self, pipeline: AlertPipeline, dedup_window: float = DEDUP_WINDOW_SECONDS,
+                 max_per_hour: int = MAX_ALERTS_PER_AGENT_HOUR):
+        self.pipeline = pipeline
+        self.dedup_window = dedup_window
+        self.max_per_hour = max_per_hour
+        self._seen: Dict[Tuple, float] = {}
+        self._sent: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._metrics = {"emitted": 0, "deduplicated": 0, "rate_limited": 0}
+
+    def _admit(self, agent_id: str, key: Tuple, now: float) -> str:
+        with self._lock:
+            seen_at = self._seen.get(key)
+            if seen_at is not None and now - seen_at < self.dedup_window:
+                self._metrics["deduplicated"] += 1
+                return "deduplicated"
+
+            sent = self._sent.setdefault(agent_id, deque())
+            while sent and now - sent[0] > 3600:
+                sent.popleft()
+            if len(sent) >= self.max_per_hour:
+                self._metrics["rate_limited"] += 1
+                return "rate_limited"
+
+            sent.append(now)
+            self._seen[key] = now
+            if len(self._seen) > 100_000:
+                self._seen = {k: t for k, t in self._seen.items() if now - t < self.dedup_window}
+            return "admitted"
+
+    def _release(self, agent_id: str, key: Tuple, now: float):
+        """Anulează _admit pentru o alertă care nu a ajuns în pipeline"""
+        with self._lock:
+            if self._seen.get(key) == now:
+                del self._seen[key]
+            sent = self._sent.get(agent_id)
+            if sent and now in sent:
+                sent.remove(now)
+
+    def emit(self, agent_id: str, alert_type: str, key: Tuple, **alert) -> str:
+        """key: identitatea alertei pentru deduplicare (ex: (keyword, poziție anterioară, poziție))"""
+        key = (agent_id, alert_type) + tuple(key)
+        now = time.monotonic()
+        status = self._admit(agent_id, key, now)
+        if status != "admitted":
+            return status
+        try:
+            self.pipeline.submit(agent_id=agent_id, alert_type=alert_type, **alert)
+        except Exception:
+            self._release(agent_id, key, now)
+            raise
+        self._metrics["emitted"] += 1
+        return "emitted"
+
+    def get_metrics(self) -> Dict[str, int]:
+        return dict(self._metrics)
+
+
+class _AgentState:
+    __slots__ = ("domain", "positions", "known", "baseline_run", "dirty")
+
+    def __init__(self, domain: str, positions: Dict[str, Tuple[int, Any]], known: Set[str],
+                 baseline_run: Any = None):
+        self.domain = domain
+        self.positions = positions  # keyword → (poziție master, run_id)
+        self.known = known  # domenii competitori deja cunoscuți / semnalați
+        self.baseline_run = baseline_run  # primul run al unui agent fără stare: doar învață, nu alertează
+        self.dirty = False
+
+
+class SERPAlertEngine:
+    """Reguli rank drop + competitor nou, evaluate incremental per rezultat SERP"""
+
+    def __init__(
+        self,
+        db=None,
+        sink: Optional[AlertSink] = None,
+        drop_threshold: int = RANK_DROP_THRESHOLD,
+        top_n: int = NEW_COMPETITOR_TOP_N,
+        snapshot_every: float = SNAPSHOT_EVERY_SECONDS
+    ):
+        if db is None:
+            db = MongoClient(MONGODB_URI)[MONGODB_DATABASE]
+        self.db = db
+        self.state_collection = db.serp_alert_state
+        self.sink = sink or AlertSink(AlertPipeline(AlertsSystem(db.client)))
+        self.drop_threshold = drop_threshold
+        self.top_n = top_n
+        self.snapshot_every = snapshot_every
+        self._agents: Dict[str, _AgentState] = {}
+        self._lock = threading.RLock()
+        self._last_snapshot = time.monotonic()
+        self._metrics = {"results_consumed": 0, "rank_drops": 0, "new_competitors": 0, "snapshots": 0,
+                         "emit_failures": 0}
+
+    # ------------------------------------------------------------------
+    # Stare
+    # ------------------------------------------------------------------
+
+    def _load_known_competitors(self, agent_id: str) -> Set[str]:
+        """Competitorii din org_graph (o singură interogare site_agents cu $in)"""
+        slave_ids = [
+            ObjectId(rel["slave_agent_id"])
+            for rel in self.db.org_graph.find({"master_agent_id": agent_id}, {"slave_agent_id": 1})
+            if ObjectId.is_valid(str(rel.get("slave_agent_id")))
+        ]
+        if not slave_ids:
+            return set()
+        return {
+            slave.get("domain", "")
+            for slave in self.db.site_agents.find({"_id": {"$in": slave_ids}}, {"domain": 1})
+            if slave.get("domain")
+        }
+
+    def _load_state(self, agent_id: str, run_id: Any) -> _AgentState:
+        """Starea unui agent nou urmărit, din snapshot / site_agents / org_graph (I/O Mongo, fără lock)"""
+        snapshot = self.state_collection.find_one({"_id": agent_id})
+        if snapshot:
+            state = _AgentState(
+                snapshot.get("domain", ""),
+                {kw: (pos, None) for kw, pos in snapshot.get("positions", [])},
+                set(snapshot.get("known_competitors", []))
+            )
+        else:
+            agent = self.db.site_agents.find_one(
+                {"_id": ObjectId(agent_id)} if ObjectId.is_valid(agent_id) else {"_id": agent_id},
+                {"domain": 1}
+            )
+            state = _AgentState((agent or {}).get("domain", ""), {}, set(), baseline_run=run_id)
+            state.dirty = True
+        state.known |= self._load_known_competitors(agent_id)
+        return state
+
+    def _ensure_states(self, parsed: List[Tuple]):
+        """Încarcă în afara lock-ului starea agenților văzuți prima dată în batch"""
+        missing: Dict[str, Any] = {}
+        for agent_id, _, _, _, run_id, _ in parsed:
+            if agent_id not in self._agents and agent_id not in missing:
+                missing[agent_id] = run_id
+        loaded = {agent_id: self._load_state(agent_id, run_id) for agent_id, run_id in missing.items()}
+        if loaded:
+            with self._lock:
+                for agent_id, state in loaded.items():
+                    # alt thread l-a încărcat între timp: starea lui are deja rezultate aplicate
+                    self._agents.setdefault(agent_id, state)
+
+    def snapshot(self) -> int:
+        """Scrie starea agenților modificați în serp_alert_state"""
+        with self._lock:
+            dirty = [(agent_id, state) for agent_id, state in self._agents.items() if state.dirty]
+            operations = [
+                UpdateOne(
+                    {"_id": agent_id},
+                    {"$set": {
+                        "domain": state.domain,
+                        # listă de perechi: keyword-urile pot conține "." / "$"
+                        "positions": [[kw, pos] for kw, (pos, _) in state.positions.items()],
+                        "known_competitors": sorted(state.known),
+                        "updated_at": datetime.now(timezone.utc)
+                    }},
+                    upsert=True
+                )
+                for agent_id, state in dirty
+            ]
+            for _, state in dirty:
+                state.dirty = False
+            self._last_snapshot = time.monotonic()
+
+        if operations:
+            try:
+                self.state_collection.bulk_write(operations, ordered=False)
+                self._metrics["snapshots"] += 1
+            except Exception as e:
+                logger.error(f"❌ Alert state snapshot failed: {e}")
+                with self._lock:
+                    for _, state in dirty:
+                        state.dirty = True
+                return 0
+        return len(operations)
+
+    # ------------------------------------------------------------------
+    # Evaluare
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _position(result: Dict) -> Optional[int]:
+        position = result.get("rank", result.get("position"))
+        return int(position) if position else None
+
+    def _parse(self, result: Dict) -> Optional[Tuple]:
+        agent_id = result.get("agent_id")
+        keyword = result.get("keyword")
+        position = self._position(result)
+        domain = result.get("domain", "")
+        if not agent_id or not keyword or position is None or not domain:
+            return None
+        return str(agent_id), keyword, position, domain, result.get("run_id", result.get("serp_run_id")), result
+
+    def consume(self, results: Iterable[Dict]) -> List[Dict]:
+        """
+        Evaluează un batch de rezultate SERP (documente serp_results: agent_id, keyword, rank/position,
+        domain, run_id). Rezultatele unui keyword trebuie să vină în ordinea poziției.
+
+        Returns:
+            Alertele trimise în pipeline: [{"agent_id", "alert_type", "subject"}]
+        """
+        parsed = [item for item in map(self._parse, results) if item is not None]
+        self._ensure_states(parsed)
+
+        emitted = []
+        with self._lock:
+            for agent_id, keyword, position, domain, run_id, result in parsed:
+                self._metrics["results_consumed"] += 1
+                state = self._agents[agent_id]
+                if domain == state.domain:
+                    alert = self._on_master_position(agent_id, state, keyword, position, run_id)
+                else:
+                    alert = self._on_competitor(agent_id, state, keyword, position, domain, result, run_id)
+                if alert:
+                    emitted.append({"agent_id": agent_id, "alert_type": alert[0], "subject": alert[1]})
+
+            snapshot_due = time.monotonic() - self._last_snapshot >= self.snapshot_every
+
+        if snapshot_due:
+            self.snapshot()
+        return emitted
+
+    def _on_master_position(self, agent_id: str, state: _AgentState, keyword: str,
+                            position: int, run_id: Any) -> Optional[Tuple[str, str]]:
+        previous = state.positions.get(keyword)
+        if previous is not None and run_id is not None and previous[1] == run_id:
+            # același run: master apare de mai multe ori → contează cea mai bună poziție
+            if position < previous[0]:
+                state.positions[keyword] = (position, run_id)
+                state.dirty = True
+            return None
+
+        previous_pos = previous[0] if previous is not None else None
+        drop = position - previous_pos if previous is not None else 0
+        if previous is None or drop < self.drop_threshold:
+            state.positions[keyword] = (position, run_id)
+            state.dirty = True
+            return None
+
+        # poziția nouă devine referință doar după ce alerta a plecat; altfel căderea se re-detectează
+        status = self._emit(
+            agent_id, AlertType.RANK_DROP.value, (keyword, previous_pos, position),
+            message=f"Rank drop detected for '{keyword}': #{previous_pos} → #{position} (drop: {drop} positions)",
+            severity="critical" if drop >= 5 else "high",
+            metadata={
+                "keyword": keyword,
+                "previous_position": previous_pos,
+                "current_position": position,
+                "drop": drop,
+                "run_id": str(run_id) if run_id is not None else None
+            },
+            auto_action="rollback" if drop >= 5 else None
+        )
+        if status in ("emitted", "deduplicated"):
+            state.positions[keyword] = (position, run_id)
+            state.dirty = True
+        if status != "emitted":
+            return None
+        self._metrics["rank_drops"] += 1
+        return (AlertType.RANK_DROP.value, keyword)
+
+    def _on_competitor(self, agent_id: str, state: _AgentState, keyword: str, position: int,
+                       domain: str, result: Dict, run_id: Any) -> Optional[Tuple[str, str]]:
+        if position > self.top_n or domain in state.known:
+            return None
+
+        if state.baseline_run is not None and run_id == state.baseline_run:
+            # primul run pentru un agent fără istoric: totul ar fi "nou"
+            state.known.add(domain)
+            state.dirty = True
+            return None
+
+        # domeniul devine "cunoscut" doar după ce alerta a plecat; altfel următorul rezultat reîncearcă
+        status = self._emit(
+            agent_id, AlertType.COMPETITOR_NEW.value, (domain,),
+            message=f"New competitor detected in top {self.top_n}: {domain} (position #{position})",
+            severity="high",
+            metadata={
+                "domain": domain,
+                "position": position,
+                "keyword": keyword,
+                "url": result.get("url")
+            },
+            auto_action="create_slave_agent"
+        )
+        if status in ("emitted", "deduplicated"):
+            state.known.add(domain)
+            state.dirty = True
+        if status != "emitted":
+            return None
+        self._metrics["new_competitors"] += 1
+        return (AlertType.COMPETITOR_NEW.value, domain)
+
+    def _emit(self, agent_id: str, alert_type: str, key: Tuple, **alert) -> Optional[str]:
+        """sink.emit; None dacă pipeline-ul a eșuat (starea nu se actualizează, rezultatul următor reîncearcă)"""
+        try:
+            return self.sink.emit(agent_id, alert_type, key, **alert)
+        except Exception as e:
+            self._metrics["emit_failures"] += 1
+            logger.error(f"❌ Alert {alert_type} for {agent_id} not submitted: {e}")
+            return None
+
+    def close(self):
+        self.snapshot()
+        self.sink.pipeline.close()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self._metrics,
+            "agents_tracked": len(self._agents),
+            "sink": self.sink.get_metrics(),
+            "pipeline": self.sink.pipeline.get_metrics()
+        }
+
+
+_default_engine: Optional[SERPAlertEngine] = None
+_default_lock = threading.Lock()
+
+
+def get_alert_engine() -> SERPAlertEngine:
+    """Engine-ul partajat în proces; starea e salvată și la ieșirea interpretorului"""
+    global _default_engine
+    with _default_lock:
+        if _default_engine is None:
+            _default_engine = SERPAlertEngine()
+            atexit.register(_default_engine.close)
+        return _default_engine
@@ -14,6 +14,8 @@ from enum import Enum
 
 from serp_ingest import SERPScorer, canonical_domain
 from serp_mongodb_schemas import SERPMongoDBSchemas
+from websocket_fanout import FanoutHub
+from mongo_bulk_writer import get_bulk_writer
 
 logger = logging.getLogger(__name__)
 
@@ -22,11 +24,14 @@ router = APIRouter(prefix="/api/serp", tags=["SERP Monitoring"])
 
 # Initialize components
 scorer = SERPScorer()
-schemas = SERPMongoDBSchemas()
+schemas = SERPMongoDBSchemas(bulk_writer=get_bulk_writer())
 
 # Active WebSocket connections (pentru live progress)
 active_connections: Dict[str, List[WebSocket]] = {}
 
+# Fan-out cu cozi limitate per conexiune; topic = run_id
+progress_hub = FanoutHub(max_queue=64)
+
 
 # ============================================================================
 # MODELS (Pydantic)
@@ -439,6 +444,8 @@ async def websocket_serp_progress(websocket: WebSocket, run_id: str):
     if run_id not in active_connections:
         active_connections[run_id] = []
     active_connections[run_id].append(websocket)
+    progress_hub.add(websocket, websocket)
+    progress_hub.subscribe(websocket, run_id)
     
     logger.info(f"🔌 WebSocket connected for run {run_id}")
     
@@ -446,7 +453,7 @@ async def websocket_serp_progress(websocket: WebSocket, run_id: str):
         # Trimite status initial
         run = schemas.db.serp_runs.find_one({"_id": run_id})
         if run:
-            await websocket.send_json({
+            progress_hub.send_to(websocket, {
                 "type": "status",
                 "data": {
                     "status": run.get("status", "unknown"),
@@ -467,7 +474,7 @@ async def websocket_serp_progress(websocket: WebSocket, run_id: str):
                         total_kw = len(run.get("keywords", []))
                         queries = run.get("stats", {}).get("queries", 0)
                         
-                        await websocket.send_json({
+                        progress_hub.send_to(websocket, {
                             "type": "progress",
                             "data": {
                                 "current": queries,
@@ -475,19 +482,21 @@ async def websocket_serp_progress(websocket: WebSocket, run_id: str):
                                 "percentage": round(queries / total_kw * 100, 1) if total_kw > 0 else 0,
                                 "status": run.get("status", "unknown")
                             }
-                        })
+                        }, coalesce_key="progress")
             
             except asyncio.TimeoutError:
                 # Timeout - verifică dacă run-ul e încă activ
                 run = schemas.db.serp_runs.find_one({"_id": run_id})
                 if run and run.get("status") in ["succeeded", "failed"]:
-                    await websocket.send_json({
+                    progress_hub.send_to(websocket, {
                         "type": "complete",
                         "data": {
                             "status": run.get("status"),
                             "message": f"SERP run {run_id} completed"
                         }
                     })
+                    # "complete" pleacă după progresul deja din coadă
+                    await progress_hub.drain(websocket)
                     break
     
     except WebSocketDisconnect:
@@ -495,7 +504,8 @@ async def websocket_serp_progress(websocket: WebSocket, run_id: str):
     
     finally:
         # Remove from active connections
-        if run_id in active_connections:
+        progress_hub.remove(websocket)
+        if run_id in active_connections and websocket in active_connections[run_id]:
             active_connections[run_id].remove(websocket)
             if not active_connections[run_id]:
                 del active_connections[run_id]
@@ -606,6 +616,7 @@ async def execute_serp_run(
                 errors += 1
         
         # Finalizare
+        schemas.flush()
         status = "succeeded" if errors == 0 else "partial" if queries_done > 0 else "failed"
         
         schemas.update_serp_run_status(
@@ -649,13 +660,13 @@ async def execute_serp_run(
 
 
 async def broadcast_to_websockets(run_id: str, message: dict):
-    """Broadcast message to all WebSocket connections pentru un run_id"""
-    if run_id in active_connections:
-        for websocket in active_connections[run_id]:
-            try:
-                await websocket.send_json(message)
-            except:
-                pass  # Connection might be closed
+    """
+    Broadcast message to all WebSocket connections pentru un run_id.
+    Serializare o singură dată, fără await pe socket-uri lente;
+    mesajele "progress" neexpediate sunt înlocuite de cele noi.
+    """
+    coalesce_key = "progress" if message.get("type") == "progress" else None
+    progress_hub.publish(message, topic=run_id, coalesce_key=coalesce_key)
 
 
 def generate_mock_serp_results(keyword: str, count: int) -> List[Dict]:
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+🔑 SERP Keyword Registry - Deduplicare SERP la nivel de keyword
+
+Masterii și slave-ii urmăresc keywords care se suprapun puternic.
+Registry-ul ține:
+1. serp_keyword_registry - keyword (normalizat) + piață → agenții care îl urmăresc
+2. serp_keyword_snapshots - snapshot global (keyword, market, date) → rezultate SERP
+
+Un singur fetch SERP per keyword per zi servește toți agenții care îl urmăresc;
+view-urile per agent sunt join-uri pe snapshot-ul comun.
+
+Usage:
+    from serp_keyword_registry import SERPKeywordRegistry
+
+    registry = SERPKeywordRegistry(db)
+    registry.register_keywords(agent_id, keywords, market="ro")
+    results = registry.get_or_fetch(keyword, "ro", fetcher=lambda kw: scraper.search_keyword(kw))
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# Fetcher: keyword → listă rezultate SERP (ordonate după poziție)
+SERPFetcher = Callable[[str], List[Dict]]
+
+
+def normalize_keyword(keyword: str) -> str:
+    """Lowercase + spații colapsate (cheia de deduplicare)"""
+    return " ".join((keyword or "").lower().split())
+
+
+class SERPKeywordRegistry:
+    """
+    Registry central de keywords + tabel global de snapshot-uri SERP
+
+    Snapshot _id: "{market}:{keyword_normalizat}:{YYYY-MM-DD}"
+    """
+
+    def __init__(self, db, default_market: str = "ro"):
+        """
+        Args:
+            db: Database MongoDB (ex: MongoClient(...).ai_agents_db)
+            default_market: Piața implicită
+        """
+        self.db = db
+        self.default_market = default_market
+        self.registry = db.serp_keyword_registry
+        self.snapshots = db.serp_keyword_snapshots
+        self.logger = logging.getLogger(f"{__name__}.SERPKeywordRegistry")
+
+        # Single-flight în proces: un singur fetch per snapshot_id simultan;
+        # intrarea [lock, utilizatori] dispare când ultimul thread a terminat
+        self._locks: Dict[str, list] = {}
+        self._locks_guard = threading.Lock()
+
+        self.stats = {"hits": 0, "fetches": 0, "empty": 0}
+
+        self._ensure_indexes()
+
+    def _ensure_indexes(self):
+        try:
+            self.registry.create_index([("agents", ASCENDING)], name="idx_agents")
+            self.snapshots.create_index([
+                ("keyword", ASCENDING),
+                ("market", ASCENDING),
+                ("date", DESCENDING)
+            ], name="idx_keyword_market_date")
+            self.snapshots.create_index([("date", DESCENDING)], name="idx_date")
+        except Exception as e:
+            self.logger.warning(f"⚠️ Could not create registry indexes: {e}")
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).date().isoformat()
+
+    def registry_id(self, keyword: str, market: Optional[str] = None) -> str:
+        return f"{market or self.default_market}:{normalize_keyword(keyword)}"
+
+    def snapshot_id(self, keyword: str, market: Optional[str] = None, date: Optional[str] = None) -> str:
+        return f"{self.registry_id(keyword, market)}:{date or self._today()}"
+
+    @contextmanager
+    def _single_flight(self, snapshot_id: str):
+        with self._locks_guard:
+            entry = self._locks.setdefault(snapshot_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[snapshot_id]
+
+    # ------------------------------------------------------------------
+    # Registry
+    # ------------------------------------------------------------------
+
+    def register_keywords(self, agent_id: str, keywords: Iterable[str], market: Optional[str] = None) -> int:
+        """
+        Înregistrează keywords urmărite de un agent (bulk upsert)
+
+        Returns:
+            Număr keywords unice înregistrate
+        """
+        market = market or self.default_market
+        now = datetime.now(timezone.utc)
+        ops = {}
+        for keyword in keywords:
+            normalized = normalize_keyword(keyword)
+            if not normalized:
+                continue
+            reg_id = f"{market}:{normalized}"
+            ops[reg_id] = UpdateOne(
+                {"_id": reg_id},
+                {
+                    "$setOnInsert": {"keyword": normalized, "market": market, "first_seen": now},
+                    "$addToSet": {"agents": str(agent_id)}
+                },
+                upsert=True
+            )
+        if ops:
+            self.registry.bulk_write(list(ops.values()), ordered=False)
+        return len(ops)
+
+    def unregister_agent(self, agent_id: str):
+        """Scoate agentul din toate keywords urmărite"""
+        self.registry.update_many({"agents": str(agent_id)}, {"$pull": {"agents": str(agent_id)}})
+
+    def get_agent_keywords(self, agent_id: str, market: Optional[str] = None) -> List[str]:
+        query = {"agents": str(agent_id)}
+        if market:
+            query["market"] = market
+        return [doc["keyword"] for doc in self.registry.find(query, {"keyword": 1})]
+
+    def get_tracked_keywords(self, market: Optional[str] = None) -> List[Dict]:
+        """Toate keywords unice + câți agenți le urmăresc"""
+        query = {"market": market} if market else {}
+        return [
+            {"keyword": doc["keyword"], "market": doc["market"], "agents_count": len(doc.get("agents", []))}
+            for doc in self.registry.find(query, {"keyword": 1, "market": 1, "agents": 1})
+        ]
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    def get_snapshot(self, keyword: str, market: Optional[str] = None, date: Optional[str] = None) -> Optional[Dict]:
+        return self.snapshots.find_one({"_id": self.snapshot_id(keyword, market, date)})
+
+    def save_snapshot(
+        self,
+        keyword: str,
+        results: List[Dict],
+        market: Optional[str] = None,
+        depth: int = 20,
+        provider: str = "brave",
+        date: Optional[str] = None
+    ) -> str:
+        """Salvează (sau înlocuiește) snapshot-ul zilei pentru keyword"""
+        market = market or self.default_market
+        date = date or self._today()
+        snapshot_id = self.snapshot_id(keyword, market, date)
+        self.snapshots.update_one(
+            {"_id": snapshot_id},
+            {"$set": {
+                "keyword": normalize_keyword(keyword),
+                "market": market,
+                "date": date,
+                "provider": provider,
+                "depth": depth,
+                "results": results,
+                "fetched_at": datetime.now(timezone.utc)
+            }},
+            upsert=True
+        )
+        self.registry.update_one(
+            {"_id": self.registry_id(keyword, market)},
+            {"$set": {"last_fetched": date}}
+        )
+        return snapshot_id
+
+    @staticmethod
+    def _usable(snapshot: Optional[Dict], depth: int) -> bool:
+        return bool(snapshot) and snapshot.get("depth", 0) >= depth and bool(snapshot.get("results"))
+
+    def get_or_fetch(
+        self,
+        keyword: str,
+        market: Optional[str] = None,
+        fetcher: Optional[SERPFetcher] = None,
+        depth: int = 20,
+        agent_id: Optional[str] = None,
+        provider: str = "brave"
+    ) -> List[Dict]:
+        """
+        Returnează rezultatele SERP de azi pentru keyword; face fetch doar
+        dacă nu există snapshot (sau are adâncime mai mică decât `depth`).
+
+        Args:
+            keyword: Keyword
+            market: Piață
+            fetcher: Funcție keyword → rezultate (apelată doar la miss)
+            depth: Câte rezultate sunt necesare
+            agent_id: Dacă e dat, keyword-ul e înregistrat pentru agent
+            provider: Numele provider-ului (informativ)
+
+        Returns:
+            Listă rezultate (max `depth`)
+        """
+        market = market or self.default_market
+        if agent_id:
+            self.register_keywords(agent_id, [keyword], market)
+
+        snapshot_id = self.snapshot_id(keyword, market)
+        snapshot = self.snapshots.find_one({"_id": snapshot_id})
+        if self._usable(snapshot, depth):
+            self.stats["hits"] += 1
+            return snapshot["results"][:depth]
+
+        if fetcher is None:
+            return []
+
+        with self._single_flight(snapshot_id):
+            # Re-check: alt thread poate fi terminat fetch-ul între timp
+            snapshot = self.snapshots.find_one({"_id": snapshot_id})
+            if self._usable(snapshot, depth):
+                self.stats["hits"] += 1
+                return snapshot["results"][:depth]
+
+            results = fetcher(keyword) or []
+            self.stats["fetches"] += 1
+            if not results:
+                # Nu salvăm snapshot gol - eroarea provider-ului nu trebuie cache-uită
+                self.stats["empty"] += 1
+                return []
+
+            self.save_snapshot(keyword, results, market, depth=depth, provider=provider)
+            return results[:depth]
+
+    def get_or_fetch_many(
+        self,
+        keywords: List[str],
+        market: Optional[str] = None,
+        fetcher: Optional[SERPFetcher] = None,
+        depth: int = 20,
+        agent_id: Optional[str] = None,
+        provider: str = "brave",
+        delay: float = 0.0
+    ) -> Dict[str, List[Dict]]:
+        """
+        Variantă batch: un singur query pentru snapshot-urile existente,
+        fetch doar pentru keywords lipsă (cu `delay` între apelurile reale).
+
+        Returns:
+            Dict keyword (original) → rezultate
+        """
+        market = market or self.default_market
+        if agent_id:
+            self.register_keywords(agent_id, keywords, market)
+
+        ids = {keyword: self.snapshot_id(keyword, market) for keyword in keywords}
+        existing = {
+            doc["_id"]: doc
+            for doc in self.snapshots.find({"_id": {"$in": list(set(ids.values()))}})
+        }
+
+        results_map: Dict[str, List[Dict]] = {}
+        fetched_for: Dict[str, List[Dict]] = {}
+        for keyword in keywords:
+            snapshot_id = ids[keyword]
+            snapshot = existing.get(snapshot_id)
+            if self._usable(snapshot, depth):
+                self.stats["hits"] += 1
+                results_map[keyword] = snapshot["results"][:depth]
+                continue
+            if snapshot_id in fetched_for:
+                # Duplicat în aceeași listă (ex: diferă doar majusculele)
+                results_map[keyword] = fetched_for[snapshot_id]
+                continue
+            if fetcher is None:
+                results_map[keyword] = []
+                continue
+
+            if fetched_for and delay > 0:
+                time.sleep(delay)
+            results = self.get_or_fetch(keyword, market, fetcher, depth=depth, provider=provider)
+            fetched_for[snapshot_id] = results
+            results_map[keyword] = results
+
+        return results_map
+
+    def prefetch(
+        self,
+        agents_keywords: Dict[str, List[str]],
+        fetcher: SERPFetcher,
+        market: Optional[str] = None,
+        depth: int = 20,
+        provider: str = "brave",
+        delay: float = 0.0
+    ) -> Dict[str, int]:
+        """
+        Înregistrează keywords pentru mai mulți agenți și face fetch o singură
+        dată pentru reuniunea lor (înainte de procesarea per agent).
+
+        Args:
+            agents_keywords: {agent_id: [keywords]}
+
+        Returns:
+            Statistici: tracked (total per agent), unique, overlap_factor
+        """
+        market = market or self.default_market
+        unique: Dict[str, str] = {}
+        tracked = 0
+        for agent_id, keywords in agents_keywords.items():
+            self.register_keywords(agent_id, keywords, market)
+            for keyword in keywords:
+                normalized = normalize_keyword(keyword)
+                if normalized:
+                    tracked += 1
+                    unique.setdefault(normalized, keyword)
+
+        self.get_or_fetch_many(list(unique.values()), market, fetcher, depth=depth, provider=provider, delay=delay)
+
+        overlap = round(tracked / len(unique), 2) if unique else 0
+        self.logger.info(f"🔑 Prefetch: {tracked} tracked keywords → {len(unique)} unique (overlap ×{overlap})")
+        return {"tracked": tracked, "unique": len(unique), "overlap_factor": overlap}
+
+    def get_agent_view(self, agent_id: str, market: Optional[str] = None, date: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """
+        View per agent: join între keywords înregistrate și snapshot-urile zilei
+
+        Returns:
+            Dict keyword → rezultate (doar keywords cu snapshot)
+        """
+        market = market or self.default_market
+        date = date or self._today()
+        keywords = self.get_agent_keywords(agent_id, market)
+        ids = [f"{market}:{keyword}:{date}" for keyword in keywords]
+        return {
+            doc["keyword"]: doc.get("results", [])
+            for doc in self.snapshots.find({"_id": {"$in": ids}}, {"keyword": 1, "results": 1})
+        }
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats)
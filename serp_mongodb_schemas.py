@@ -23,16 +23,28 @@ class SERPMongoDBSchemas:
     5. serp_alerts - Alerte automate (rank drops, new competitors, etc.)
     """
     
-    def __init__(self, mongo_uri: str = "mongodb://localhost:27018/", db_name: str = "ai_agents_db"):
+    def __init__(
+        self,
+        mongo_uri: str = "mongodb://localhost:27018/",
+        db_name: str = "ai_agents_db",
+        bulk_writer=None,
+        alert_engine=None
+    ):
         """
         Initialize MongoDB schemas manager
         
         Args:
             mongo_uri: MongoDB connection URI
             db_name: Database name
+            bulk_writer: MongoBulkWriter opțional - dacă e dat, rezultatele SERP
+                         sunt scrise în batch (apelează flush() înainte de citire)
+            alert_engine: SERPAlertEngine opțional - fiecare rezultat e evaluat pentru
+                          alerte (rank drop / competitor nou) imediat ce e scris
         """
         self.client = MongoClient(mongo_uri)
         self.db = self.client[db_name]
+        self.bulk_writer = bulk_writer
+        self.alert_engine = alert_engine
         self.logger = logging.getLogger(f"{__name__}.SERPMongoDBSchemas")
     
     def create_all_indexes(self):
@@ -287,11 +299,25 @@ class SERPMongoDBSchemas:
         }
         
         # Upsert (evită duplicate errors)
-        self.db.serp_results.update_one(
-            {"_id": result_id},
-            {"$set": doc},
-            upsert=True
-        )
+        if self.bulk_writer is not None:
+            self.bulk_writer.update_one(self.db.serp_results, {"_id": result_id}, {"$set": doc}, upsert=True)
+        else:
+            self.db.serp_results.update_one(
+                {"_id": result_id},
+                {"$set": doc},
+                upsert=True
+            )
+        
+        if self.alert_engine is not None:
+            try:
+                self.alert_engine.consume([doc])
+            except Exception as e:
+                self.logger.error(f"❌ Alert evaluation failed for {result_id}: {e}")
+    
+    def flush(self):
+        """Scrie rezultatele SERP rămase în bulk writer"""
+        if self.bulk_writer is not None:
+            self.bulk_writer.flush(self.db.serp_results)
     
     def upsert_competitor(
         self,
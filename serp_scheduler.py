@@ -23,6 +23,9 @@ from pymongo import MongoClient
 sys.path.insert(0, '/srv/hf/ai_agents')
 from serp_ingest import SERPScorer, canonical_domain
 from serp_mongodb_schemas import SERPMongoDBSchemas
+from serp_keyword_registry import SERPKeywordRegistry
+from mongo_bulk_writer import get_bulk_writer
+from serp_alert_engine import get_alert_engine
 
 logger = logging.getLogger(__name__)
 
@@ -42,10 +45,23 @@ class SERPMonitor:
         """Initialize SERP Monitor"""
         self.mongo = MongoClient('mongodb://localhost:27018/')
         self.db = self.mongo.ai_agents_db
-        self.schemas = SERPMongoDBSchemas()
+        self.schemas = SERPMongoDBSchemas(bulk_writer=get_bulk_writer(), alert_engine=get_alert_engine())
         self.scorer = SERPScorer()
+        self.registry = SERPKeywordRegistry(self.db)
+        self._serp_scraper = None
         self.logger = logging.getLogger(f"{__name__}.SERPMonitor")
     
+    def _get_serp_scraper(self):
+        """Scraper real (Brave), creat o singură dată"""
+        if self._serp_scraper is None:
+            from google_serp_scraper import GoogleSerpScraper
+            self._serp_scraper = GoogleSerpScraper(registry=self.registry)
+        return self._serp_scraper
+    
+    def _fetch_keyword(self, keyword: str) -> List[Dict]:
+        """Fetcher pentru registry: un apel real la provider"""
+        return self._get_serp_scraper().search_keyword(keyword, num_results=20, country="ro")
+    
     async def monitor_agent(self, agent_id: str) -> Dict:
         """
         🔍 Monitorizează un agent (SERP fetch + analiză schimbări)
@@ -131,16 +147,19 @@ class SERPMonitor:
         total_results = 0
         unique_domains = set()
         
-        # Import REAL SERP scraper
-        from google_serp_scraper import GoogleSerpScraper
-        serp_scraper = GoogleSerpScraper()
-        
         for keyword in keywords:
             self.logger.info(f"🔍 Searching REAL SERP for: {keyword}")
             
-            # REAL Brave API call (NO MORE MOCKS!)
+            # REAL Brave API call (NO MORE MOCKS!) - o dată pe zi per keyword,
+            # snapshot-ul e partajat cu toți agenții care urmăresc keyword-ul
             try:
-                real_results = serp_scraper.search(query=keyword, count=20)
+                real_results = self.registry.get_or_fetch(
+                    keyword,
+                    market="ro",
+                    fetcher=self._fetch_keyword,
+                    depth=20,
+                    agent_id=agent_id
+                )
                 
                 if not real_results:
                     self.logger.warning(f"⚠️ No SERP results for keyword: {keyword}")
@@ -163,7 +182,7 @@ class SERPMonitor:
                     url=result["url"],
                     domain=domain,
                     title=result.get("title", ""),
-                    snippet=result.get("snippet", ""),
+                    snippet=result.get("snippet") or result.get("description", ""),
                     result_type=result.get("type", "organic")
                 )
                 total_results += 1
@@ -179,6 +198,9 @@ class SERPMonitor:
                     run_id=run_id
                 )
         
+        # Rezultatele trebuie să fie în DB înainte de detecție/competitori
+        self.schemas.flush()
+        
         # Update run status
         self.schemas.update_serp_run_status(
             run_id=run_id,
@@ -421,6 +443,18 @@ class SERPMonitor:
         
         self.logger.info(f"📊 Found {len(masters)} agents to monitor")
         
+        # Fetch o singură dată reuniunea keywords (suprapunere mare între agenți)
+        try:
+            self.registry.prefetch(
+                {str(agent["_id"]): agent.get("keywords", []) for agent in masters},
+                fetcher=self._fetch_keyword,
+                market="ro",
+                depth=20,
+                delay=1.0
+            )
+        except Exception as e:
+            self.logger.error(f"❌ SERP prefetch failed, falling back to per-agent fetch: {e}")
+        
         results = []
         for agent in masters:
             agent_id = str(agent["_id"])
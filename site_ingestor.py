@@ -21,7 +21,9 @@ from pathlib import Path
 
 # Vector DB și embeddings
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client.models import Distance, PointStruct
+import qdrant_profiles
+from qdrant_tenancy import get_tenant_client
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
@@ -29,8 +31,15 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 from pymongo import MongoClient
 from bson import ObjectId
 
+# Cache-ul de rezultate al căutării vector (golit după scrieri)
+try:
+    from langchain_agents.tools.vector_search_tool import invalidate_search_cache
+except ImportError:
+    invalidate_search_cache = None
+
 logger = logging.getLogger(__name__)
 
+
 @dataclass
 class SitePage:
     """Reprezintă o pagină scraped din site"""
@@ -73,11 +82,11 @@ class SiteIngestor:
             separators=["\n\n", "\n", ". ", "! ", "? ", " ", ""]
         )
         
-        # Setup Qdrant
-        self.qdrant_client = QdrantClient(
+        # Setup Qdrant (rutat prin tenancy: agent_{id}_content poate sta în colecția partajată)
+        self.qdrant_client = get_tenant_client(QdrantClient(
             host=config.get('qdrant_host', 'localhost'),
             port=config.get('qdrant_port', 9306)
-        )
+        ))
         
         # Setup MongoDB
         self.mongo_client = MongoClient(config.get('mongodb_uri', 'mongodb://localhost:9308'))
@@ -367,14 +376,12 @@ class SiteIngestor:
         
         try:
             # Creează colecția dacă nu există
-            collections = self.qdrant_client.get_collections()
-            if collection_name not in [col.name for col in collections.collections]:
-                self.qdrant_client.create_collection(
-                    collection_name=collection_name,
-                    vectors_config=VectorParams(
-                        size=1024,  # Dimensiunea embedding-ului BGE
-                        distance=Distance.COSINE
-                    )
+            if not self.qdrant_client.collection_exists(collection_name):
+                qdrant_profiles.create_collection(
+                    self.qdrant_client,
+                    collection_name,
+                    1024,  # Dimensiunea embedding-ului BGE
+                    Distance.COSINE
                 )
             
             # Pregătește punctele pentru indexare
@@ -401,6 +408,8 @@ class SiteIngestor:
                     collection_name=collection_name,
                     points=batch_points
                 )
+            if invalidate_search_cache is not None:
+                invalidate_search_cache(collection_name)
             
             logger.info(f"Successfully indexed {len(points)} chunks in Qdrant")
             
@@ -33,6 +33,8 @@ except:
     def brave_search(query, count=10):
         return []
 
+from serp_keyword_registry import SERPKeywordRegistry
+
 
 class SERPTimelineTracker:
     """
@@ -43,12 +45,15 @@ class SERPTimelineTracker:
         self.mongo_client = MongoClient("mongodb://localhost:27017/")
         self.db = self.mongo_client["ai_agents_db"]
         
+        # Snapshot global (keyword, market, date) partajat între agenți
+        self.registry = SERPKeywordRegistry(self.db)
+        
         # Ensure indexes for time-series
         self._ensure_indexes()
         
         logger.info("✅ SERP Timeline Tracker initialized")
     
-    def track_keyword(self, keyword: str, agent_id: str = None, save: bool = True) -> Dict:
+    def track_keyword(self, keyword: str, agent_id: str = None, save: bool = True, market: str = "ro") -> Dict:
         """
         Urmărește un keyword și salvează snapshot SERP
         
@@ -56,6 +61,7 @@ class SERPTimelineTracker:
             keyword: Keyword de urmărit
             agent_id: Optional - ID agent pentru tracking
             save: Salvează în MongoDB (default True)
+            market: Piața (cheie în registry)
         
         Returns:
             Dict cu snapshot SERP
@@ -63,8 +69,14 @@ class SERPTimelineTracker:
         logger.info(f"📊 Tracking SERP for keyword: '{keyword}'")
         
         try:
-            # Get SERP results
-            serp_results = brave_search(keyword, count=20)
+            # Get SERP results (fetch doar dacă keyword-ul nu are snapshot azi)
+            serp_results = self.registry.get_or_fetch(
+                keyword,
+                market=market,
+                fetcher=lambda kw: brave_search(kw, count=20),
+                depth=20,
+                agent_id=agent_id
+            )
             
             # Extract rankings
             rankings = []
@@ -76,7 +88,7 @@ class SERPTimelineTracker:
                     "domain": domain,
                     "url": result.get("url", ""),
                     "title": result.get("title", ""),
-                    "snippet": result.get("snippet", "")[:500]  # Limit snippet
+                    "snippet": (result.get("snippet") or result.get("description", ""))[:500]  # Limit snippet
                 })
             
             # Create snapshot
@@ -138,11 +150,12 @@ class SERPTimelineTracker:
         for i, keyword in enumerate(keywords, 1):
             logger.info(f"  [{i}/{len(keywords)}] Tracking: {keyword}")
             
+            fetches_before = self.registry.stats["fetches"]
             snapshot = self.track_keyword(keyword, agent_id)
             snapshots.append(snapshot)
             
-            # Delay între requests (rate limiting)
-            if i < len(keywords):
+            # Delay între requests (rate limiting) - doar după un fetch real
+            if i < len(keywords) and self.registry.stats["fetches"] > fetches_before:
                 time.sleep(delay)
         
         logger.info(f"✅ Batch tracking complete: {len(snapshots)} snapshots")
@@ -10,7 +10,8 @@ load_dotenv()  # Încarcă variabilele de mediu din .env
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from llm_orchestrator import get_orchestrator
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
+from qdrant_tenancy import get_tenant_client
+from qdrant_client.models import Distance, PointStruct, Filter, FieldCondition, MatchValue
 from pymongo import MongoClient
 from bson import ObjectId
 import requests
@@ -20,7 +21,8 @@ import concurrent.futures
 from dataclasses import dataclass
 import hashlib
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from inference_backends import load_sentence_embedder
+import qdrant_profiles
 from datetime import datetime
 import asyncio
 
@@ -75,7 +77,7 @@ class ConstructionAgentCreator:
             print(f"✅ ScraperAPI activat (key length: {len(self.scraperapi_key)})")
         
         # Databases
-        self.qdrant = QdrantClient("localhost", port=9306,)
+        self.qdrant = get_tenant_client(QdrantClient("localhost", port=9306,))
         # Folosește configurația din config.database_config
         from config.database_config import MONGODB_URI, MONGODB_DATABASE
         self.mongo = MongoClient(MONGODB_URI)
@@ -162,10 +164,7 @@ class ConstructionAgentCreator:
                 try:
                     self.qdrant.get_collection(name)
                 except:
-                    self.qdrant.create_collection(
-                        collection_name=name,
-                        vectors_config=VectorParams(size=size, distance=Distance.COSINE)
-                    )
+                    qdrant_profiles.create_collection(self.qdrant, name, size, Distance.COSINE)
             
             print("✅ Baze de date pentru construcții inițializate")
         except Exception as e:
@@ -662,8 +661,8 @@ CONȚINUT: {content}
             print(f"🔧 Inițializând embedding model global pe CPU (stabil)")
             
             try:
-                # Inițializează pe CPU - cel mai stabil
-                model = SentenceTransformer('all-MiniLM-L6-v2', device='cpu')
+                # Inițializează pe CPU - cel mai stabil (INFERENCE_BACKEND=int8/onnx → model cuantizat)
+                model = load_sentence_embedder('all-MiniLM-L6-v2', device='cpu')
                 print(f"✅ Embedding model inițializat pe CPU")
                 
                 # Salvează global
@@ -694,11 +693,7 @@ CONȚINUT: {content}
             try:
                 self.qdrant.get_collection(collection_name)
             except:
-                from qdrant_client.models import Distance, VectorParams
-                self.qdrant.create_collection(
-                    collection_name=collection_name,
-                    vectors_config=VectorParams(size=384, distance=Distance.COSINE)
-                )
+                qdrant_profiles.create_collection(self.qdrant, collection_name, 384, Distance.COSINE)
                 print(f"📦 Colecție Qdrant creată: {collection_name}")
             
             # 2. Colectează TOATE chunks-urile mai întâi (pentru batch processing)
@@ -67,8 +67,8 @@ def check_qdrant():
 
 def check_mongo():
     try:
-        from pymongo import MongoClient
-        mc = MongoClient(os.getenv("MONGODB_URI","mongodb://127.0.0.1:27017"))
+        from resource_registry import get_registry
+        mc = get_registry().mongo(os.getenv("MONGODB_URI","mongodb://127.0.0.1:27017"))
         db = mc[os.getenv("MONGO_DB","ai_agents_db")]
         return {
             "ok": True,
@@ -16,6 +16,11 @@ from qdrant_client import QdrantClient
 from qdrant_client.models import Filter, FieldCondition, MatchValue
 import requests
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from retrieval.bm25 import build_from_qdrant, get_index_cache, reciprocal_rank_fusion
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +52,10 @@ class RouterConfig:
     enable_fallback: bool = True
     enable_escalation: bool = True
     escalation_threshold: float = 0.3
+    # Hybrid: BM25 pe textul paginilor, fuzionat RRF cu rezultatele vector (0 dezactivează)
+    bm25_weight: float = 1.0
+    vector_weight: float = 1.0
+    rrf_k: int = 60
 
 class MirrorAgentRouter:
     """Router inteligent pentru agentul Mirror"""
@@ -54,6 +63,7 @@ class MirrorAgentRouter:
     def __init__(self, qdrant_url: str = "http://localhost:6333"):
         self.client = QdrantClient(url=qdrant_url)
         self.config = RouterConfig()
+        self.bm25_cache = get_index_cache()
         self.routing_stats = {
             "total_requests": 0,
             "faq_responses": 0,
@@ -227,36 +237,58 @@ class MirrorAgentRouter:
                     "sources": []
                 }
             
-            # Generează embedding pentru întrebare
-            question_embedding = await self._generate_embedding(question)
+            # Vector search și BM25 în paralel
+            async def vector_search():
+                question_embedding = await self._generate_embedding(question)
+                return await asyncio.to_thread(
+                    self.client.search,
+                    collection_name=pages_collection,
+                    query_vector=question_embedding,
+                    limit=self.config.max_sources,
+                    score_threshold=self.config.pages_similarity_threshold
+                )
             
-            # Caută în pages
-            search_results = self.client.search(
-                collection_name=pages_collection,
-                query_vector=question_embedding,
-                limit=self.config.max_sources,
-                score_threshold=self.config.pages_similarity_threshold
+            search_results, lexical_hits = await asyncio.gather(
+                vector_search(),
+                asyncio.to_thread(self._lexical_search, question, pages_collection)
             )
             
-            if not search_results:
+            if not search_results and not lexical_hits:
                 return {
                     "similarity_score": 0.0,
                     "confidence": 0.0,
                     "sources": []
                 }
             
-            # Calculează confidence bazat pe cel mai bun rezultat
-            best_score = search_results[0].score
+            # Calculează confidence bazat pe cel mai bun rezultat vector
+            best_score = search_results[0].score if search_results else 0.0
             confidence = min(0.90, best_score * 1.1)  # Boost mai mic pentru pages
             
-            sources = []
+            sources_by_id = {}
+            for point_id, text, url in lexical_hits:
+                sources_by_id[point_id] = {
+                    "text": text,
+                    "url": url,
+                    "score": 0.0,
+                    "source_type": "pages_bm25"
+                }
             for result in search_results:
-                sources.append({
+                sources_by_id[str(result.id)] = {
                     "text": result.payload.get("text", ""),
                     "url": result.payload.get("url", ""),
                     "score": result.score,
                     "source_type": "pages"
-                })
+                }
+            
+            fused = reciprocal_rank_fusion(
+                {
+                    "vector": [str(result.id) for result in search_results],
+                    "bm25": [point_id for point_id, _, _ in lexical_hits]
+                },
+                {"vector": self.config.vector_weight, "bm25": self.config.bm25_weight},
+                k=self.config.rrf_k
+            )
+            sources = [sources_by_id[point_id] for point_id, _ in fused[:self.config.max_sources]]
             
             return {
                 "similarity_score": best_score,
@@ -272,6 +304,22 @@ class MirrorAgentRouter:
                 "sources": []
             }
     
+    def _lexical_search(self, question: str, collection_name: str) -> List[Tuple[str, str, str]]:
+        """BM25 peste payload-ul `text` al paginilor → [(point_id, text, url)]"""
+        if self.config.bm25_weight <= 0:
+            return []
+        try:
+            index = self.bm25_cache.get(
+                ("qdrant", collection_name),
+                loader=lambda: build_from_qdrant(self.client, collection_name, text_field="text", meta_fields=("url", "text")),
+                version=lambda: self.client.count(collection_name=collection_name).count
+            )
+            hits = index.search(question, top_k=self.config.max_sources)
+            return [(point_id, index.meta(point_id).get("text", ""), index.meta(point_id).get("url", "")) for point_id, _ in hits]
+        except Exception as e:
+            logger.warning(f"⚠️ BM25 search failed for {collection_name}: {e}")
+            return []
+    
     async def _generate_embedding(self, text: str) -> List[float]:
         """Generează embedding pentru text"""
         try:
@@ -5,6 +5,8 @@ Issue 7: Activează Curator pentru actualizarea automată a FAQ-ului
 """
 
 import asyncio
+import os
+import sys
 import time
 import json
 import logging
@@ -18,6 +20,9 @@ from qdrant_client import QdrantClient
 from qdrant_client.models import PointStruct, Distance, VectorParams
 from sentence_transformers import SentenceTransformer
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from qdrant_tenancy import get_tenant_client
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -65,7 +70,7 @@ class MirrorCurator:
     def __init__(self, api_base_url: str = "http://localhost:8083"):
         self.api_base_url = api_base_url
         self.db = MongoClient("mongodb://localhost:27017").mirror_curator
-        self.qdrant_client = QdrantClient("localhost", port=6333)
+        self.qdrant_client = get_tenant_client(QdrantClient("localhost", port=6333))
         self.openai_client = openai.OpenAI()
         
         # Model pentru embeddings
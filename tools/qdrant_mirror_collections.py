@@ -5,6 +5,8 @@ Issue 2: Creează colecțiile Qdrant pentru noul site
 """
 
 import asyncio
+import os
+import sys
 import logging
 import time
 from typing import Dict, List, Any, Optional
@@ -18,13 +20,16 @@ from qdrant_client.models import (
 from qdrant_client.http.exceptions import UnexpectedResponse
 import uuid
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from qdrant_tenancy import get_tenant_client
+
 logger = logging.getLogger(__name__)
 
 class QdrantMirrorCollections:
     """Manager pentru colecțiile Qdrant specifice per site"""
     
     def __init__(self, qdrant_url: str = "http://localhost:6333"):
-        self.client = QdrantClient(url=qdrant_url)
+        self.client = get_tenant_client(QdrantClient(url=qdrant_url))
         self.embedding_dim = 1536  # BAAI/bge-large-en-v1.5
         
     def generate_site_id(self, domain: str) -> str:
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Training Trigger - pornește fine-tuning-ul pe evenimente, nu prin polling
+
+- Fiecare interacțiune salvată (data_collector.save_interaction) incrementează
+  atomic ($inc) contorul global "*" și contorul agentului din `training_counters`.
+- Când un contor atinge pragul, un singur apelant câștigă claim-ul (update
+  condiționat pe document) și pune în coadă job-ul cu cheia idempotentă
+  `train:<scope>:<generation>` (index unic în `agent_jobs`).
+- Job-ul trece prin queued → building_dataset → training → completed | failed;
+  fiecare tranziție e salvată în job și publicată abonaților (subscribe / wait).
+
+Contorul `pending` numără interacțiunile noi de la ultimul job (se resetează la
+claim), deci un job se pornește o singură dată per prag, chiar dacă unele
+interacțiuni nu sunt marcate niciodată `processed`.
+
+Usage:
+    from training_trigger import get_training_trigger
+
+    trigger = get_training_trigger()
+    trigger.subscribe(lambda event: print(event["job_key"], event["status"]))
+    trigger.record_interaction(agent_id)      # după fiecare insert în interactions
+"""
+
+import logging
+import os
+import subprocess
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from pymongo import MongoClient, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+DB_NAME = os.getenv("MONGO_DB", "adbrain_ai")
+AUTO_TRAIN_THRESHOLD = int(os.getenv("AUTO_TRAIN_THRESHOLD", "50"))
+# 0 = contoarele per agent sunt doar informative (training-ul e global)
+AUTO_TRAIN_AGENT_THRESHOLD = int(os.getenv("AUTO_TRAIN_AGENT_THRESHOLD", "0"))
+# Un job fără tranziție finală după atâtea ore (proces mort) nu mai blochează contorul
+AUTO_TRAIN_STALE_HOURS = float(os.getenv("AUTO_TRAIN_STALE_HOURS", "12"))
+FINE_TUNING_DIR = os.getenv("FINE_TUNING_DIR", "/srv/hf/ai_agents/fine_tuning")
+
+GLOBAL_SCOPE = "*"
+ACTIVE_STATES = ("queued", "building_dataset", "training")
+FINAL_STATES = ("completed", "failed")
+
+# callback(event): event = {job_key, job_id, agent_id, status, previous, at, ...}
+Subscriber = Callable[[Dict[str, Any]], Any]
+
+
+class TrainingTriggerService:
+    """Contoare per agent + job-uri de training idempotente + evenimente de stare"""
+
+    def __init__(
+        self,
+        db=None,
+        threshold: int = AUTO_TRAIN_THRESHOLD,
+        agent_threshold: int = AUTO_TRAIN_AGENT_THRESHOLD,
+        stale_hours: float = AUTO_TRAIN_STALE_HOURS,
+        runner: Optional[Callable[[Dict[str, Any]], Any]] = None
+    ):
+        """
+        Args:
+            db: Baza Mongo (default: MONGO_URI / MONGO_DB)
+            threshold: Interacțiuni noi (toți agenții) care pornesc un training
+            agent_threshold: Prag per agent; 0 = fără job-uri per agent
+            stale_hours: După cât timp un job activ nemarcat final e ignorat
+            runner: callable(job) care execută job-ul (default: build_jsonl + train_qwen.sh)
+        """
+        if db is None:
+            db = MongoClient(MONGO_URI)[DB_NAME]
+        self.db = db
+        self.counters = db.training_counters
+        self.jobs = db.agent_jobs
+        self.threshold = threshold
+        self.agent_threshold = agent_threshold
+        self.stale = timedelta(hours=stale_hours)
+        self.runner = runner or self._run_job
+
+        self._subscribers: List[Subscriber] = []
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._changed = threading.Condition()
+        self._seeded = False
+
+        try:
+            # sparse: job-urile vechi nu au job_key
+            self.jobs.create_index("job_key", unique=True, sparse=True)
+        except Exception as e:
+            logger.warning(f"Could not create agent_jobs.job_key index: {e}")
+
+        logger.info(f"Training trigger initialized (threshold: {threshold}, per agent: {agent_threshold or 'off'})")
+
+    # ------------------------------------------------------------------
+    # Contoare
+    # ------------------------------------------------------------------
+
+    def _seed(self):
+        """Prima utilizare: contorul global pornește de la interacțiunile neprocesate existente"""
+        if self._seeded:
+            return
+        if self.counters.find_one({"_id": GLOBAL_SCOPE}, {"_id": 1}) is None:
+            backlog = self.db.interactions.count_documents({"processed": False, "type": "interaction"})
+            self.counters.update_one(
+                {"_id": GLOBAL_SCOPE},
+                {"$setOnInsert": {"pending": backlog, "generation": 0, "active_job": None}},
+                upsert=True
+            )
+        self._seeded = True
+
+    def _threshold_for(self, scope: str) -> int:
+        return self.threshold if scope == GLOBAL_SCOPE else self.agent_threshold
+
+    def _is_active(self, counter: Dict[str, Any]) -> bool:
+        active_at = counter.get("active_at")
+        if not counter.get("active_job") or active_at is None:
+            return False
+        if active_at.tzinfo is None:
+            active_at = active_at.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) - active_at < self.stale
+
+    def record_interaction(self, agent_id: Optional[str] = None) -> Optional[str]:
+        """
+        O(1) per interacțiune salvată: incrementează contoarele și pune în coadă
+        job-ul dacă un prag a fost atins.
+
+        Returns:
+            job_key-ul job-ului pus în coadă acum, sau None
+        """
+        self._seed()
+        now = datetime.now(timezone.utc)
+        job_key = None
+        for scope in [GLOBAL_SCOPE] + ([str(agent_id)] if agent_id else []):
+            counter = self.counters.find_one_and_update(
+                {"_id": scope},
+                {"$inc": {"pending": 1}, "$set": {"updated_at": now}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            threshold = self._threshold_for(scope)
+            if threshold and counter["pending"] >= threshold and not self._is_active(counter):
+                job_key = self._claim(scope, threshold) or job_key
+        return job_key
+
+    def maybe_trigger(self, agent_id: Optional[str] = None) -> Optional[str]:
+        """
+        Pune în coadă job-ul scope-ului dacă pragul e deja atins (un singur find_one).
+        Pentru un agent cu pragul per agent 0 (off) nu se pornește nimic.
+        """
+        self._seed()
+        scope = str(agent_id) if agent_id else GLOBAL_SCOPE
+        threshold = self._threshold_for(scope)
+        if not threshold:
+            return None
+        counter = self.counters.find_one({"_id": scope}) or {}
+        if counter.get("pending", 0) >= threshold and not self._is_active(counter):
+            return self._claim(scope, threshold)
+        return None
+
+    def counter_status(self, agent_id: Optional[str] = None) -> Dict[str, Any]:
+        scope = str(agent_id) if agent_id else GLOBAL_SCOPE
+        counter = self.counters.find_one({"_id": scope}) or {}
+        threshold = self._threshold_for(scope)
+        pending = counter.get("pending", 0)
+        return {
+            "scope": scope,
+            "pending": pending,
+            "threshold": threshold,  # 0 = fără job-uri pentru acest scope
+            "remaining": max(0, threshold - pending) if threshold else None,
+            "active_job": counter.get("active_job") if self._is_active(counter) else None,
+        }
+
+    # ------------------------------------------------------------------
+    # Job-uri
+    # ------------------------------------------------------------------
+
+    def _claim(self, scope: str, threshold: int) -> Optional[str]:
+        """Update condiționat: dintre apelanții concurenți, exact unul primește contorul"""
+        now = datetime.now(timezone.utc)
+        token = uuid.uuid4().hex
+        before = self.counters.find_one_and_update(
+            {
+                "_id": scope,
+                "pending": {"$gte": threshold},
+                "$or": [{"active_job": None}, {"active_at": None}, {"active_at": {"$lt": now - self.stale}}],
+            },
+            {"$set": {"pending": 0, "active_job": token, "active_at": now}, "$inc": {"generation": 1}},
+            return_document=ReturnDocument.BEFORE
+        )
+        if before is None:
+            return None
+
+        job_key = f"train:{scope}:{before.get('generation', 0) + 1}"
+        self.counters.update_one({"_id": scope, "active_job": token}, {"$set": {"active_job": job_key}})
+
+        job = {
+            "job_key": job_key,
+            "job_id": f"train_{now.strftime('%Y%m%d_%H%M%S')}_{before.get('generation', 0) + 1}",
+            "type": "auto_training",
+            "agent_id": None if scope == GLOBAL_SCOPE else scope,
+            "scope": scope,
+            "interactions_count": before["pending"],
+            "status": "queued",
+            "trigger": "auto",
+            "created_at": now,
+            "updated_at": now,
+            "transitions": [{"status": "queued", "at": now}],
+        }
+        try:
+            self.jobs.insert_one(job)
+        except DuplicateKeyError:
+            logger.info(f"Training job {job_key} already enqueued")
+            return job_key
+
+        logger.info(f"🚀 Threshold reached for {scope} ({before['pending']} interactions) → job {job_key}")
+        self._publish(job, "queued", None)
+        threading.Thread(target=self.runner, args=(job,), name=f"train-{job_key}", daemon=True).start()
+        return job_key
+
+    def _transition(self, job: Dict[str, Any], status: str, **fields) -> bool:
+        """Salvează tranziția (doar dintr-o stare activă) și o publică abonaților"""
+        now = datetime.now(timezone.utc)
+        previous = job.get("status")
+        result = self.jobs.update_one(
+            {"job_key": job["job_key"], "status": {"$in": list(ACTIVE_STATES)}},
+            {
+                "$set": {"status": status, "updated_at": now, **fields},
+                "$push": {"transitions": {"status": status, "at": now, **fields}},
+            }
+        )
+        if result.modified_count == 0:
+            return False
+        job["status"] = status
+        job.update(fields)
+
+        if status in FINAL_STATES:
+            job["finished_at"] = now
+            self.jobs.update_one({"job_key": job["job_key"]}, {"$set": {"finished_at": now}})
+            self.counters.update_one(
+                {"_id": job["scope"], "active_job": job["job_key"]},
+                {"$set": {"active_job": None, "active_at": None}}
+            )
+        self._publish(job, status, previous, **fields)
+        return True
+
+    def _run_job(self, job: Dict[str, Any]):
+        """build_jsonl.py, apoi train_qwen.sh; așteaptă procesul în loc să-i verifice pid-ul periodic"""
+        env = dict(os.environ)
+        if job.get("agent_id"):
+            env["AGENT_ID"] = job["agent_id"]
+        try:
+            self._transition(job, "building_dataset")
+            jsonl_result = subprocess.run(
+                ["python3", os.path.join(FINE_TUNING_DIR, "build_jsonl.py")],
+                capture_output=True,
+                text=True,
+                timeout=300,
+                env=env
+            )
+            if jsonl_result.returncode != 0:
+                raise RuntimeError(f"JSONL build failed: {jsonl_result.stderr[-2000:]}")
+
+            log_dir = os.path.join(FINE_TUNING_DIR, "logs")
+            os.makedirs(log_dir, exist_ok=True)
+            log_file = os.path.join(log_dir, f"{job['job_id']}.log")
+            with open(log_file, "ab") as log:
+                process = subprocess.Popen(
+                    ["bash", os.path.join(FINE_TUNING_DIR, "train_qwen.sh")],
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                    env=env
+                )
+            self._transition(job, "training", pid=process.pid, log_file=log_file)
+            logger.info(f"✅ Training started - Job: {job['job_key']}, PID: {process.pid}")
+
+            returncode = process.wait()
+            if returncode == 0:
+                self._transition(job, "completed", returncode=returncode)
+            else:
+                self._transition(job, "failed", returncode=returncode, error=f"train_qwen.sh exited with {returncode}")
+        except Exception as e:
+            logger.error(f"❌ Training job {job['job_key']} failed: {e}")
+            self._transition(job, "failed", error=str(e)[:2000])
+
+    # ------------------------------------------------------------------
+    # Evenimente
+    # ------------------------------------------------------------------
+
+    def subscribe(self, callback: Subscriber) -> Callable[[], None]:
+        """Abonare la tranzițiile job-urilor; returnează funcția de dezabonare"""
+        with self._changed:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._changed:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def _publish(self, job: Dict[str, Any], status: str, previous: Optional[str], **fields):
+        event = {
+            "job_key": job["job_key"],
+            "job_id": job["job_id"],
+            "agent_id": job.get("agent_id"),
+            "interactions_count": job.get("interactions_count", 0),
+            "status": status,
+            "previous": previous,
+            "at": datetime.now(timezone.utc),
+            **fields,
+        }
+        with self._changed:
+            self._latest[job["job_key"]] = event
+            if len(self._latest) > 1000:
+                for key in [k for k, e in self._latest.items() if e["status"] in FINAL_STATES][:500]:
+                    del self._latest[key]
+            subscribers = list(self._subscribers)
+            self._changed.notify_all()
+
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning(f"Training subscriber failed: {e}")
+
+    def wait(self, job_key: str, timeout: Optional[float] = None,
+             statuses: tuple = FINAL_STATES) -> Optional[Dict[str, Any]]:
+        """Blochează până când job-ul (rulat în acest proces) ajunge într-una din `statuses`"""
+        with self._changed:
+            self._changed.wait_for(
+                lambda: (self._latest.get(job_key) or {}).get("status") in statuses,
+                timeout=timeout
+            )
+            return self._latest.get(job_key)
+
+    def get_status(self, job: str) -> Dict[str, Any]:
+        """Starea unui job după job_key sau job_id"""
+        doc = self.jobs.find_one({"$or": [{"job_key": job}, {"job_id": job}]})
+        if not doc:
+            return {"found": False, "message": "Job not found"}
+        return {
+            "found": True,
+            "job_id": doc.get("job_id"),
+            "job_key": doc.get("job_key"),
+            "agent_id": doc.get("agent_id"),
+            "status": doc.get("status"),
+            "started_at": doc.get("created_at") or doc.get("started_at"),
+            "finished_at": doc.get("finished_at"),
+            "running": doc.get("status") in ACTIVE_STATES,
+            "pid": doc.get("pid"),
+            "interactions_count": doc.get("interactions_count"),
+            "transitions": doc.get("transitions", []),
+            "error": doc.get("error"),
+        }
+
+
+_default_trigger: Optional[TrainingTriggerService] = None
+_default_lock = threading.Lock()
+
+
+def get_training_trigger(threshold: Optional[int] = None) -> TrainingTriggerService:
+    """Serviciul partajat la nivel de proces (threshold contează doar la prima creare)"""
+    global _default_trigger
+    with _default_lock:
+        if _default_trigger is None:
+            _default_trigger = TrainingTriggerService(
+                threshold=threshold if threshold is not None else AUTO_TRAIN_THRESHOLD
+            )
+        return _default_trigger
@@ -0,0 +1,304 @@
+"""
+WebSocket Fan-out
+Bounded, backpressured broadcast layer shared by all WebSocket endpoints.
+
+Every connection gets its own bounded send queue drained by a dedicated
+writer task, so one slow client never delays the others. Messages are
+serialized once per broadcast and subscriptions are kept in a topic index.
+"""
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class SlowConsumerPolicy(str, Enum):
+    """What to do when a connection's send queue is full"""
+    DROP_OLDEST = "drop_oldest"    # evict the oldest pending frame
+    DROP_NEWEST = "drop_newest"    # discard the incoming frame
+    DISCONNECT = "disconnect"      # close the slow connection
+
+
+def serialize_message(message: Any) -> str:
+    """Serialize a message once for all recipients"""
+    if isinstance(message, str):
+        return message
+    return json.dumps(message, default=str, ensure_ascii=False)
+
+
+class ConnectionQueue:
+    """Bounded send queue + writer task for a single WebSocket"""
+
+    def __init__(
+        self,
+        connection_id: Hashable,
+        websocket: Any,
+        max_queue: int = 256,
+        policy: SlowConsumerPolicy = SlowConsumerPolicy.DROP_OLDEST,
+        send_timeout: float = 10.0,
+        on_close: Optional[Callable[[Hashable], None]] = None,
+    ):
+        self.connection_id = connection_id
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.on_close = on_close
+
+        # Pending frames: {coalesce_key or sequence: payload}
+        # Frames sharing a coalesce key replace each other in place.
+        self._pending: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+        # Set while nothing is queued or being written
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._writer())
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def enqueue(self, payload: str, coalesce_key: Optional[Hashable] = None) -> bool:
+        """Queue a serialized frame without blocking. Returns False if dropped."""
+        if self._closed:
+            return False
+
+        if coalesce_key is not None:
+            key = ("c", coalesce_key)
+            if key in self._pending:
+                # Newer state supersedes the pending one; keep queue position
+                self._pending[key] = payload
+                self.coalesced += 1
+                return True
+        else:
+            self._seq += 1
+            key = ("s", self._seq)
+
+        if len(self._pending) >= self.max_queue:
+            if self.policy == SlowConsumerPolicy.DROP_NEWEST:
+                self.dropped += 1
+                return False
+            if self.policy == SlowConsumerPolicy.DISCONNECT:
+                logger.warning(f"⚠️ Slow WebSocket consumer {self.connection_id}, disconnecting")
+                self.close()
+                return False
+            self._pending.popitem(last=False)
+            self.dropped += 1
+
+        self._pending[key] = payload
+        self._idle.clear()
+        self._wakeup.set()
+        return True
+
+    async def _writer(self):
+        try:
+            while not self._closed:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while self._pending and not self._closed:
+                    _, payload = self._pending.popitem(last=False)
+                    await asyncio.wait_for(
+                        self.websocket.send_text(payload), timeout=self.send_timeout
+                    )
+                    self.sent += 1
+                if not self._pending:
+                    self._idle.set()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Error sending to {self.connection_id}: {e}")
+        finally:
+            self._finish()
+
+    async def drain(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued frame has been written. Returns False on timeout/close."""
+        if self._closed:
+            return False
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return not self._closed
+
+    def close(self):
+        """Stop the writer task and drop pending frames"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._finish()
+
+    def _finish(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._pending.clear()
+        self._idle.set()
+        if self.on_close:
+            try:
+                self.on_close(self.connection_id)
+            except Exception as e:
+                logger.error(f"Error in on_close for {self.connection_id}: {e}")
+
+
+class FanoutHub:
+    """Topic-indexed WebSocket fan-out with per-connection backpressure"""
+
+    def __init__(
+        self,
+        max_queue: int = 256,
+        policy: SlowConsumerPolicy = SlowConsumerPolicy.DROP_OLDEST,
+        send_timeout: float = 10.0,
+    ):
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+
+        # Connections: {connection_id: ConnectionQueue}
+        self.connections: Dict[Hashable, ConnectionQueue] = {}
+
+        # Topic index: {topic: Set[connection_id]}
+        self.topics: Dict[str, Set[Hashable]] = {}
+
+        # Reverse index: {connection_id: Set[topic]}
+        self.connection_topics: Dict[Hashable, Set[str]] = {}
+
+        self.published = 0
+        self._closed_dropped = 0
+        self._closed_coalesced = 0
+        self._closed_sent = 0
+
+    def add(self, connection_id: Hashable, websocket: Any, **queue_options) -> ConnectionQueue:
+        """Register an accepted WebSocket and start its writer"""
+        if connection_id in self.connections:
+            self.remove(connection_id)
+
+        options = {
+            "max_queue": self.max_queue,
+            "policy": self.policy,
+            "send_timeout": self.send_timeout,
+        }
+        options.update(queue_options)
+        queue = ConnectionQueue(connection_id, websocket, on_close=self._on_queue_closed, **options)
+        self.connections[connection_id] = queue
+        self.connection_topics[connection_id] = set()
+        queue.start()
+        return queue
+
+    def remove(self, connection_id: Hashable):
+        """Unregister a connection and stop its writer"""
+        queue = self.connections.get(connection_id)
+        if queue is not None:
+            queue.close()
+        self._forget(connection_id)
+
+    def _on_queue_closed(self, connection_id: Hashable):
+        self._forget(connection_id)
+
+    def _forget(self, connection_id: Hashable):
+        queue = self.connections.pop(connection_id, None)
+        if queue is not None:
+            self._closed_sent += queue.sent
+            self._closed_dropped += queue.dropped
+            self._closed_coalesced += queue.coalesced
+        for topic in self.connection_topics.pop(connection_id, set()):
+            members = self.topics.get(topic)
+            if members is not None:
+                members.discard(connection_id)
+                if not members:
+                    del self.topics[topic]
+
+    def subscribe(self, connection_id: Hashable, topic: str):
+        if connection_id not in self.connections:
+            return
+        self.topics.setdefault(topic, set()).add(connection_id)
+        self.connection_topics[connection_id].add(topic)
+
+    def unsubscribe(self, connection_id: Hashable, topic: str):
+        members = self.topics.get(topic)
+        if members is not None:
+            members.discard(connection_id)
+            if not members:
+                del self.topics[topic]
+        if connection_id in self.connection_topics:
+            self.connection_topics[connection_id].discard(topic)
+
+    def has_subscribers(self, topic: Optional[str] = None) -> bool:
+        if topic is None:
+            return bool(self.connections)
+        return bool(self.topics.get(topic))
+
+    def publish(
+        self,
+        message: Any,
+        topic: Optional[str] = None,
+        coalesce_key: Optional[Hashable] = None,
+    ) -> int:
+        """
+        Serialize once and enqueue to every subscriber of `topic`
+        (or every connection when topic is None). Never awaits a socket.
+
+        Returns:
+            Number of connections the frame was queued for
+        """
+        if topic is None:
+            targets = list(self.connections.keys())
+        else:
+            targets = list(self.topics.get(topic, ()))
+        if not targets:
+            return 0
+
+        payload = serialize_message(message)
+        delivered = 0
+        for connection_id in targets:
+            queue = self.connections.get(connection_id)
+            if queue is not None and queue.enqueue(payload, coalesce_key):
+                delivered += 1
+
+        self.published += 1
+        return delivered
+
+    def send_to(self, connection_id: Hashable, message: Any, coalesce_key: Optional[Hashable] = None) -> bool:
+        queue = self.connections.get(connection_id)
+        if queue is None:
+            return False
+        return queue.enqueue(serialize_message(message), coalesce_key)
+
+    async def drain(self, connection_id: Hashable, timeout: float = 5.0) -> bool:
+        """Wait for a connection's queued frames to go out (e.g. before closing it)"""
+        queue = self.connections.get(connection_id)
+        if queue is None:
+            return False
+        return await queue.drain(timeout)
+
+    def close_all(self):
+        for connection_id in list(self.connections.keys()):
+            self.remove(connection_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        queues = list(self.connections.values())
+        return {
+            "connections": len(queues),
+            "topics": len(self.topics),
+            "published": self.published,
+            "sent": self._closed_sent + sum(q.sent for q in queues),
+            "dropped": self._closed_dropped + sum(q.dropped for q in queues),
+            "coalesced": self._closed_coalesced + sum(q.coalesced for q in queues),
+            "max_queue_depth": max((q.depth for q in queues), default=0),
+        }
@@ -5,19 +5,33 @@ Manages WebSocket connections for live job logs and real-time updates
 import logging
 import json
 import asyncio
+from collections import OrderedDict, deque
 from typing import Dict, Set, Optional
 from datetime import datetime, timezone
 from fastapi import WebSocket, WebSocketDisconnect
 from pymongo import MongoClient
 from bson import ObjectId
 
+from websocket_fanout import FanoutHub, SlowConsumerPolicy
+
 logger = logging.getLogger(__name__)
 
+# Retention caps for in-memory job logs
+MAX_LOGS_PER_JOB = 1000
+MAX_TRACKED_JOBS = 500
+
 
 class WebSocketManager:
     """Manages WebSocket connections for real-time updates"""
     
-    def __init__(self, mongo_client: MongoClient = None):
+    def __init__(
+        self,
+        mongo_client: MongoClient = None,
+        max_queue: int = 256,
+        policy: SlowConsumerPolicy = SlowConsumerPolicy.DROP_OLDEST,
+        max_logs_per_job: int = MAX_LOGS_PER_JOB,
+        max_tracked_jobs: int = MAX_TRACKED_JOBS
+    ):
         if mongo_client is None:
             mongo_client = MongoClient("mongodb://localhost:27017/")
         self.mongo = mongo_client
@@ -26,79 +40,82 @@ class WebSocketManager:
         # Active connections: {connection_id: WebSocket}
         self.active_connections: Dict[str, WebSocket] = {}
         
-        # Subscriptions: {connection_id: Set[subscription_types]}
-        self.subscriptions: Dict[str, Set[str]] = {}
+        # Per-connection send queues + topic index
+        self.hub = FanoutHub(max_queue=max_queue, policy=policy)
         
-        # Job logs: {job_id: List[log_entries]}
-        self.job_logs: Dict[str, list] = {}
+        # Subscriptions: {connection_id: Set[subscription_types]} (view over hub index)
+        self.subscriptions: Dict[str, Set[str]] = self.hub.connection_topics
+        
+        # Job logs: {job_id: deque[log_entries]}, bounded per job and in job count
+        self.max_logs_per_job = max_logs_per_job
+        self.max_tracked_jobs = max_tracked_jobs
+        self.job_logs: "OrderedDict[str, deque]" = OrderedDict()
     
     async def connect(self, websocket: WebSocket, connection_id: str):
         """Accept WebSocket connection"""
         await websocket.accept()
         self.active_connections[connection_id] = websocket
-        self.subscriptions[connection_id] = set()
+        self.hub.add(connection_id, websocket)
         logger.info(f"✅ WebSocket connected: {connection_id}")
     
     def disconnect(self, connection_id: str):
         """Remove WebSocket connection"""
-        if connection_id in self.active_connections:
-            del self.active_connections[connection_id]
-        if connection_id in self.subscriptions:
-            del self.subscriptions[connection_id]
+        self.active_connections.pop(connection_id, None)
+        self.hub.remove(connection_id)
         logger.info(f"❌ WebSocket disconnected: {connection_id}")
     
+    def _prune_closed(self):
+        """Drop connections whose writer stopped (send error / slow consumer)"""
+        for connection_id in list(self.active_connections.keys()):
+            if connection_id not in self.hub.connections:
+                self.active_connections.pop(connection_id, None)
+    
     async def send_personal_message(self, message: dict, connection_id: str):
-        """Send message to specific connection"""
-        if connection_id in self.active_connections:
-            try:
-                websocket = self.active_connections[connection_id]
-                await websocket.send_json(message)
-                return True
-            except Exception as e:
-                logger.error(f"Error sending message to {connection_id}: {e}")
-                self.disconnect(connection_id)
-                return False
-        return False
-    
-    async def broadcast(self, message: dict, subscription_type: Optional[str] = None):
-        """Broadcast message to all subscribed connections"""
-        disconnected = []
-        
-        for connection_id, websocket in self.active_connections.items():
-            # If subscription_type specified, only send to subscribed connections
-            if subscription_type:
-                if subscription_type not in self.subscriptions.get(connection_id, set()):
-                    continue
-            
-            try:
-                await websocket.send_json(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting to {connection_id}: {e}")
-                disconnected.append(connection_id)
+        """Queue message for a specific connection"""
+        self._prune_closed()
+        return self.hub.send_to(connection_id, message)
+    
+    async def broadcast(
+        self,
+        message: dict,
+        subscription_type: Optional[str] = None,
+        coalesce_key: Optional[str] = None
+    ):
+        """
+        Broadcast message to all subscribed connections.
         
-        # Clean up disconnected connections
-        for conn_id in disconnected:
-            self.disconnect(conn_id)
+        Serializes once and enqueues to each subscriber's bounded queue;
+        never waits on a slow socket. Messages sharing `coalesce_key`
+        replace each other while still pending.
+        """
+        self._prune_closed()
+        return self.hub.publish(message, topic=subscription_type, coalesce_key=coalesce_key)
     
     def subscribe(self, connection_id: str, subscription_type: str):
         """Subscribe connection to a type of updates"""
-        if connection_id not in self.subscriptions:
-            self.subscriptions[connection_id] = set()
-        self.subscriptions[connection_id].add(subscription_type)
+        self.hub.subscribe(connection_id, subscription_type)
         logger.info(f"✅ {connection_id} subscribed to {subscription_type}")
     
     def unsubscribe(self, connection_id: str, subscription_type: str):
         """Unsubscribe connection from a type of updates"""
-        if connection_id in self.subscriptions:
-            self.subscriptions[connection_id].discard(subscription_type)
+        self.hub.unsubscribe(connection_id, subscription_type)
         logger.info(f"❌ {connection_id} unsubscribed from {subscription_type}")
     
+    def _store_job_log(self, job_id: str, log_entry: dict):
+        logs = self.job_logs.get(job_id)
+        if logs is None:
+            logs = deque(maxlen=self.max_logs_per_job)
+            self.job_logs[job_id] = logs
+            while len(self.job_logs) > self.max_tracked_jobs:
+                self.job_logs.popitem(last=False)
+        else:
+            self.job_logs.move_to_end(job_id)
+        logs.append(log_entry)
+    
     async def send_job_log(self, job_id: str, log_entry: dict):
         """Send job log entry to subscribed connections"""
-        # Store log entry
-        if job_id not in self.job_logs:
-            self.job_logs[job_id] = []
-        self.job_logs[job_id].append(log_entry)
+        # Store log entry (bounded)
+        self._store_job_log(job_id, log_entry)
         
         # Broadcast to subscribers
         message = {
@@ -141,10 +158,17 @@ class WebSocketManager:
     def get_job_logs(self, job_id: str, limit: int = 100) -> list:
         """Get stored job logs"""
         if job_id in self.job_logs:
-            return self.job_logs[job_id][-limit:]
+            return list(self.job_logs[job_id])[-limit:]
         return []
     
     def get_active_connections_count(self) -> int:
         """Get number of active connections"""
+        self._prune_closed()
         return len(self.active_connections)
+    
+    def get_stats(self) -> dict:
+        """Get fan-out statistics (queued, sent, dropped, coalesced)"""
+        stats = self.hub.get_stats()
+        stats["tracked_jobs"] = len(self.job_logs)
+        return stats
 
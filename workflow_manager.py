@@ -33,6 +33,8 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(__file__))
 
+from mongo_bulk_writer import get_bulk_writer
+
 logger = logging.getLogger(__name__)
 
 class WorkflowStatus(str, Enum):
@@ -85,6 +87,8 @@ class WorkflowManager:
         self.mongo_client = MongoClient(mongo_uri)
         self.db = self.mongo_client["ai_agents_db"]
         self.workflows_collection = self.db["workflows"]
+        # Log lines are appended in bulk ($push merged per workflow)
+        self.writer = get_bulk_writer()
         self.active_workflows: Dict[str, Dict] = {}  # workflow_id -> workflow_data
         
         logger.info("✅ WorkflowManager initialized")
@@ -149,6 +153,9 @@ class WorkflowManager:
         if error is not None:
             update_doc["error"] = error
         
+        # Logurile sunt write-behind: ordinea față de status trebuie păstrată
+        self.writer.flush(self.workflows_collection)
+        
         if status == WorkflowStatus.RUNNING and "started_at" not in update_doc:
             workflow = self.workflows_collection.find_one({"_id": ObjectId(workflow_id)})
             if workflow and not workflow.get("started_at"):
@@ -170,7 +177,8 @@ class WorkflowManager:
             "message": message
         }
         
-        self.workflows_collection.update_one(
+        self.writer.update_one(
+            self.workflows_collection,
             {"_id": ObjectId(workflow_id)},
             {"$push": {"logs": log_entry}}
         )
@@ -192,6 +200,7 @@ class WorkflowManager:
         if websocket is None:
             return
         
+        self.writer.flush(self.workflows_collection)
         workflow = self.workflows_collection.find_one({"_id": ObjectId(workflow_id)})
         if not workflow:
             return
@@ -214,6 +223,7 @@ class WorkflowManager:
     
     def get_workflow_status(self, workflow_id: str) -> Optional[Dict]:
         """Obține statusul complet al unui workflow"""
+        self.writer.flush(self.workflows_collection)
         workflow = self.workflows_collection.find_one({"_id": ObjectId(workflow_id)})
         if workflow:
             workflow["_id"] = str(workflow["_id"])
@@ -222,6 +232,7 @@ class WorkflowManager:
     
     def list_active_workflows(self) -> list:
         """Listează toate workflow-urile active"""
+        self.writer.flush(self.workflows_collection)
         workflows = list(self.workflows_collection.find({
             "status": {"$in": [WorkflowStatus.PENDING.value, WorkflowStatus.RUNNING.value]}
         }).sort("created_at", -1))
@@ -233,6 +244,7 @@ class WorkflowManager:
     
     def list_recent_workflows(self, limit: int = 50) -> list:
         """Listează workflow-urile recente"""
+        self.writer.flush(self.workflows_collection)
         workflows = list(self.workflows_collection.find().sort("created_at", -1).limit(limit))
         
         for w in workflows:
@@ -645,8 +657,10 @@ class WorkflowManager:
             from google_serp_scraper import GoogleSerpScraper
             from full_slave_agent_creator import FullSlaveAgentCreator  # FULL AGENTS, nu doar metadata!
             from google_ads_strategy_generator import GoogleAdsStrategyGenerator
+            from serp_keyword_registry import SERPKeywordRegistry
             
-            scraper = GoogleSerpScraper()
+            serp_registry = SERPKeywordRegistry(self.db)
+            scraper = GoogleSerpScraper(registry=serp_registry)
             slave_creator = FullSlaveAgentCreator()  # FULL AI Agents pentru fiecare competitor!
             strategy_generator = GoogleAdsStrategyGenerator()
             
@@ -698,7 +712,14 @@ class WorkflowManager:
                 
                 # a) Google Search
                 self.add_workflow_log(workflow_id, f"   Searching Google for '{keyword}'...")
-                serp_results = scraper.search_keyword(keyword, num_results=20)
+                # Snapshot-ul zilei e partajat cu master/slave-ii care urmăresc keyword-ul
+                serp_results = serp_registry.get_or_fetch(
+                    keyword,
+                    market="ro",
+                    fetcher=lambda kw: scraper.search_keyword(kw, num_results=20, country="ro"),
+                    depth=20,
+                    agent_id=agent_id
+                )
                 
                 if not serp_results:
                     self.add_workflow_log(workflow_id, f"   ⚠️  No SERP results for '{keyword}'", level="WARNING")